@@ -420,16 +420,17 @@ class CostBasisCalculator(CustomizableDateMixin):
                     taxable_bought_cost += acquisition_cost
 
                 remaining_amount_from_last_buy = acquisition_event.remaining_amount - remaining_sold_amount  # noqa: E501
-                log.debug(
-                    'Spend uses up part of historical acquisition',
-                    tax_status='TAX-FREE' if at_taxfree_period else 'TAXABLE',
-                    used_amount=remaining_sold_amount,
-                    from_amount=acquisition_event.amount,
-                    asset=spending_asset,
-                    acquisition_rate=acquisition_event.rate,
-                    profit_currency=self.profit_currency,
-                    time=self.timestamp_to_date(acquisition_event.timestamp),
-                )
+                if log.isEnabledFor(logging.DEBUG):  # skip formatting the date otherwise
+                    log.debug(
+                        'Spend uses up part of historical acquisition',
+                        tax_status='TAX-FREE' if at_taxfree_period else 'TAXABLE',
+                        used_amount=remaining_sold_amount,
+                        from_amount=acquisition_event.amount,
+                        asset=spending_asset,
+                        acquisition_rate=acquisition_event.rate,
+                        profit_currency=self.profit_currency,
+                        time=self.timestamp_to_date(acquisition_event.timestamp),
+                    )
                 matched_acquisitions.append(MatchedAcquisition(
                     amount=remaining_sold_amount,
                     event=acquisition_event,
@@ -449,15 +450,16 @@ class CostBasisCalculator(CustomizableDateMixin):
                 taxable_amount += acquisition_event.remaining_amount
                 taxable_bought_cost += acquisition_cost
 
-            log.debug(
-                'Spend uses up entire historical acquisition',
-                tax_status='TAX-FREE' if at_taxfree_period else 'TAXABLE',
-                bought_amount=acquisition_event.remaining_amount,
-                asset=spending_asset,
-                acquisition_rate=acquisition_event.rate,
-                profit_currency=self.profit_currency,
-                time=self.timestamp_to_date(acquisition_event.timestamp),
-            )
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(
+                    'Spend uses up entire historical acquisition',
+                    tax_status='TAX-FREE' if at_taxfree_period else 'TAXABLE',
+                    bought_amount=acquisition_event.remaining_amount,
+                    asset=spending_asset,
+                    acquisition_rate=acquisition_event.rate,
+                    profit_currency=self.profit_currency,
+                    time=self.timestamp_to_date(acquisition_event.timestamp),
+                )
             matched_acquisitions.append(MatchedAcquisition(
                 amount=acquisition_event.remaining_amount,
                 event=acquisition_event,
@@ -74,7 +74,8 @@ class AccountingPot(CustomizableDateMixin):
             log.error(str(e))
             return
 
-        log.debug(event.to_string(self.timestamp_to_date))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(event.to_string(self.timestamp_to_date))
 
     def get_rate_in_profit_currency(self, asset: Asset, timestamp: Timestamp) -> Price:
         """Get the profit_currency price of asset in the given timestamp
@@ -0,0 +1,243 @@
+import logging
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import Flask, Response, request
+
+from rotkehlchen.chain.ethereum.modules.executor import module_query_executor
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.utils.mixins.cacheable import results_caches_stats
+from rotkehlchen.utils.singleflight import single_flights
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.utils import LockWaitStats
+    from rotkehlchen.rotkehlchen import Rotkehlchen
+    from rotkehlchen.utils.profiling import StackSampler
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TASK_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels) -> str:
+    if len(labels) == 0:
+        return ''
+    values = ','.join(
+        '{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))  # noqa: E501
+        for name, value in labels
+    )
+    return '{' + values + '}'
+
+
+class Histogram():
+    """A Prometheus style histogram with cumulative buckets"""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: Labels) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip([*(str(x) for x in self.buckets), '+Inf'], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')  # noqa: E501
+        lines.append(f'{name}_sum{_format_labels(labels)} {self.sum}')
+        lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return lines
+
+
+class APIMetrics():
+    """Request latencies and async task durations of the REST API
+
+    Nothing is measured while the metrics are disabled, including the timings of
+    the ethereum module queries. Enabling them wraps the
+    dispatching of the flask app's requests and disabling them restores it.
+    """
+
+    def __init__(self, rotkehlchen: 'Rotkehlchen', sampler: 'StackSampler') -> None:
+        self.rotkehlchen = rotkehlchen
+        self.sampler = sampler
+        self.enabled = False
+        self.requests: Dict[Labels, Histogram] = {}
+        self.tasks: Dict[Labels, Histogram] = {}
+        self.flask_app: Optional[Flask] = None
+
+    def attach(self, flask_app: Flask) -> None:
+        """Sets the flask app whose requests are measured while the metrics are enabled"""
+        self.flask_app = flask_app
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+
+        self.requests = {}
+        self.tasks = {}
+        self.enabled = True
+        module_query_executor.set_measuring(True)
+        if self.flask_app is not None:
+            self.flask_app.full_dispatch_request = self._timed_dispatch(
+                self.flask_app.full_dispatch_request,
+            )
+        log.info('Enabled the REST API metrics')
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+
+        self.enabled = False
+        module_query_executor.set_measuring(False)
+        if self.flask_app is not None:
+            del self.flask_app.full_dispatch_request  # back to the method of the class
+        log.info('Disabled the REST API metrics')
+
+    def _timed_dispatch(self, dispatch: Callable[[], Response]) -> Callable[[], Response]:
+        def timed_dispatch() -> Response:
+            start = time.perf_counter()
+            status = '500'
+            try:
+                response = dispatch()
+                status = str(response.status_code)
+                return response
+            finally:
+                self.observe_request(
+                    method=request.method,
+                    endpoint=request.url_rule.rule if request.url_rule is not None else 'unmatched',  # noqa: E501
+                    status=status,
+                    seconds=time.perf_counter() - start,
+                )
+
+        return timed_dispatch
+
+    def observe_request(self, method: str, endpoint: str, status: str, seconds: float) -> None:
+        labels = (('method', method), ('endpoint', endpoint), ('status', status))
+        histogram = self.requests.get(labels)
+        if histogram is None:
+            histogram = self.requests[labels] = Histogram(REQUEST_BUCKETS)
+        histogram.observe(seconds)
+
+    def observe_task(self, command: Callable, seconds: float) -> None:
+        labels = (('task', getattr(command, '__name__', str(command)).lstrip('_')),)
+        histogram = self.tasks.get(labels)
+        if histogram is None:
+            histogram = self.tasks[labels] = Histogram(TASK_BUCKETS)
+        histogram.observe(seconds)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP rotki_metrics_enabled Whether request latencies and task durations are measured',  # noqa: E501
+            '# TYPE rotki_metrics_enabled gauge',
+            f'rotki_metrics_enabled {int(self.enabled)}',
+            '# HELP rotki_api_request_duration_seconds Time taken to handle REST API requests',
+            '# TYPE rotki_api_request_duration_seconds histogram',
+        ]
+        for labels, histogram in sorted(self.requests.items()):
+            lines.extend(histogram.render('rotki_api_request_duration_seconds', labels))
+        lines.extend([
+            '# HELP rotki_async_task_duration_seconds Time taken by asynchronous REST API tasks',
+            '# TYPE rotki_async_task_duration_seconds histogram',
+        ])
+        for labels, histogram in sorted(self.tasks.items()):
+            lines.extend(histogram.render('rotki_async_task_duration_seconds', labels))
+
+        lines.extend([
+            '# HELP rotki_greenlets Number of greenlets that are still running',
+            '# TYPE rotki_greenlets gauge',
+            f'rotki_greenlets{{kind="api_task"}} {sum(1 for x in self.rotkehlchen.api_task_greenlets if not x.dead)}',  # noqa: E501
+            f'rotki_greenlets{{kind="background"}} {sum(1 for x in self.rotkehlchen.greenlet_manager.greenlets if not x.dead)}',  # noqa: E501
+            '# HELP rotki_profiler_running Whether the stack sampler is running',
+            '# TYPE rotki_profiler_running gauge',
+            f'rotki_profiler_running {int(self.sampler.running)}',
+        ])
+        lines.extend(self._render_single_flights())
+        lines.extend(self._render_module_queries())
+        lines.extend(self._render_results_caches())
+        if self.rotkehlchen.user_is_logged_in:
+            lines.extend(self._render_lock_waits())
+            lines.extend(self._render_balances_queries())
+
+        return '\n'.join(lines) + '\n'
+
+    def _render_lock_waits(self) -> List[str]:
+        lock_waits: Dict[str, 'LockWaitStats'] = dict(self.rotkehlchen.data.db.lock_waits)
+        lines = [
+            '# HELP rotki_db_lock_wait_seconds Time spent waiting for the user DB read connections and write batches',  # noqa: E501
+            '# TYPE rotki_db_lock_wait_seconds summary',
+        ]
+        for caller, stats in sorted(lock_waits.items()):
+            labels = (('caller', caller),)
+            lines.append(f'rotki_db_lock_wait_seconds_sum{_format_labels(labels)} {stats.total}')  # noqa: E501
+            lines.append(f'rotki_db_lock_wait_seconds_count{_format_labels(labels)} {stats.count}')  # noqa: E501
+        return lines
+
+    def _render_balances_queries(self) -> List[str]:
+        durations = dict(self.rotkehlchen.chain_manager.balances_query_durations)
+        lines = [
+            '# HELP rotki_chain_balances_query_seconds Time taken by the last balances query of each blockchain',  # noqa: E501
+            '# TYPE rotki_chain_balances_query_seconds gauge',
+        ]
+        for chain, seconds in sorted(durations.items(), key=lambda x: x[0].value):
+            lines.append(f'rotki_chain_balances_query_seconds{_format_labels((("blockchain", chain.value),))} {seconds}')  # noqa: E501
+        return lines
+
+    @staticmethod
+    def _render_single_flights() -> List[str]:
+        lines = [
+            '# HELP rotki_single_flight_calls_total Calls made by each single flight group',
+            '# TYPE rotki_single_flight_calls_total counter',
+        ]
+        for name, single_flight in sorted(single_flights.items()):
+            lines.append(f'rotki_single_flight_calls_total{_format_labels((("name", name),))} {single_flight.calls}')  # noqa: E501
+        lines.extend([
+            '# HELP rotki_single_flight_collapsed_total Concurrent duplicate calls that waited for an in-flight call instead',  # noqa: E501
+            '# TYPE rotki_single_flight_collapsed_total counter',
+        ])
+        for name, single_flight in sorted(single_flights.items()):
+            lines.append(f'rotki_single_flight_collapsed_total{_format_labels((("name", name),))} {single_flight.collapsed}')  # noqa: E501
+        return lines
+
+    @staticmethod
+    def _render_module_queries() -> List[str]:
+        lines = [
+            '# HELP rotki_module_query_seconds Time taken by the queries of the ethereum modules',
+            '# TYPE rotki_module_query_seconds summary',
+        ]
+        for (module, query), stats in sorted(module_query_executor.stats.items()):
+            labels = (('module', module), ('query', query))
+            lines.append(f'rotki_module_query_seconds_sum{_format_labels(labels)} {stats.total}')  # noqa: E501
+            lines.append(f'rotki_module_query_seconds_count{_format_labels(labels)} {stats.count}')  # noqa: E501
+        return lines
+
+    @staticmethod
+    def _render_results_caches() -> List[str]:
+        stats = results_caches_stats()
+        lines = [
+            '# HELP rotki_query_cache_entries Results kept by the cache of each cached query',
+            '# TYPE rotki_query_cache_entries gauge',
+        ]
+        for name, counters in sorted(stats.items()):
+            lines.append(f'rotki_query_cache_entries{_format_labels((("query", name),))} {counters["size"]}')  # noqa: E501
+        for counter, description in (
+                ('hits', 'Calls of each cached query answered from its cache'),
+                ('misses', 'Calls of each cached query not found in its cache or expired'),
+                ('evictions', 'Results of each cached query removed to make room or expired'),
+        ):
+            lines.extend([
+                f'# HELP rotki_query_cache_{counter}_total {description}',
+                f'# TYPE rotki_query_cache_{counter}_total counter',
+            ])
+            for name, counters in sorted(stats.items()):
+                lines.append(f'rotki_query_cache_{counter}_total{_format_labels((("query", name),))} {counters[counter]}')  # noqa: E501
+        return lines
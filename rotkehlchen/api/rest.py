@@ -7,6 +7,7 @@ import time
 import traceback
 from collections import defaultdict
 from http import HTTPStatus
+from io import BytesIO
 from pathlib import Path
 from typing import (
     TYPE_CHECKING,
@@ -43,6 +44,7 @@ from rotkehlchen.accounting.structures.base import (
     HistoryEventType,
     StakingEvent,
 )
+from rotkehlchen.api.metrics import PROMETHEUS_CONTENT_TYPE, APIMetrics
 from rotkehlchen.api.v1.schemas import TradeSchema
 from rotkehlchen.assets.asset import Asset, EthereumToken
 from rotkehlchen.assets.resolver import AssetResolver
@@ -59,6 +61,7 @@ from rotkehlchen.chain.bitcoin.xpub import XpubManager
 from rotkehlchen.chain.ethereum.airdrops import check_airdrops
 from rotkehlchen.chain.ethereum.decoding.constants import ETHADDRESS_TO_KNOWN_NAME
 from rotkehlchen.chain.ethereum.modules.eth2.constants import FREE_VALIDATORS_LIMIT
+from rotkehlchen.chain.ethereum.modules.executor import module_query_executor
 from rotkehlchen.constants import ENS_UPDATE_INTERVAL
 from rotkehlchen.constants.assets import A_ETH
 from rotkehlchen.constants.limits import (
@@ -147,7 +150,8 @@ from rotkehlchen.types import (
     Timestamp,
     TradeType,
 )
-from rotkehlchen.utils.misc import combine_dicts
+from rotkehlchen.utils.misc import combine_dicts, ts_now
+from rotkehlchen.utils.profiling import StackSampler
 from rotkehlchen.utils.version_check import get_current_version
 
 if TYPE_CHECKING:
@@ -217,6 +221,8 @@ class RestAPI():
         self.task_results: Dict[int, Any] = {}
         self.trade_schema = TradeSchema()
         self.import_tmp_files: DefaultDict[FileStorage, Path] = defaultdict()
+        self.profiler = StackSampler()
+        self.metrics = APIMetrics(rotkehlchen=rotkehlchen, sampler=self.profiler)
 
     # - Private functions not exposed to the API
     def _new_task_id(self) -> int:
@@ -261,7 +267,12 @@ class RestAPI():
 
     def _do_query_async(self, command: Callable, task_id: int, **kwargs: Any) -> None:
         log.debug(f'Async task with task id {task_id} started')
-        result = command(**kwargs)
+        if self.metrics.enabled:
+            start = time.perf_counter()
+            result = command(**kwargs)
+            self.metrics.observe_task(command, time.perf_counter() - start)
+        else:
+            result = command(**kwargs)
         self._write_task_result(task_id, result)
 
     def _query_async(self, command: Callable, **kwargs: Any) -> Response:
@@ -284,6 +295,8 @@ class RestAPI():
         gevent.wait(self.waited_greenlets)
         log.debug('Waited for greenlets. Killing all other greenlets')
         gevent.killall(self.rotkehlchen.api_task_greenlets)
+        if self.profiler.running:
+            self.profiler.stop()
         log.debug('Shutdown completed')
         logging.shutdown()
         self.stop_event.set()
@@ -643,6 +656,10 @@ class RestAPI():
             status_code = HTTPStatus.BAD_GATEWAY
         else:
             result = balances.serialize()
+            if len(balances.errors) != 0:
+                msg = 'Could not query the balances of: ' + ', '.join(
+                    f'{chain.value} ({error})' for chain, error in balances.errors.items()
+                )
             # If only specific input blockchain was given ignore other results
             totals: Dict[str, Any] = {'assets': {}, 'liabilities': {}}
             if blockchain == SupportedBlockchain.ETHEREUM:
@@ -721,6 +738,7 @@ class RestAPI():
             'entries_found': filter_total_found,
             'entries_total': self.rotkehlchen.data.db.get_entries_count(table_name),  # type: ignore  # noqa: E501
             'entries_limit': FREE_TRADES_LIMIT if self.rotkehlchen.premium is None else -1,
+            'next_cursor': filter_query.next_cursor,
         }
 
         return {'result': result, 'message': '', 'status_code': HTTPStatus.OK}
@@ -858,6 +876,7 @@ class RestAPI():
             'entries_total': self.rotkehlchen.data.db.get_entries_count('asset_movements'),
             'entries_found': filter_total_found,
             'entries_limit': limit,
+            'next_cursor': filter_query.next_cursor,
         }
 
         return {'result': result, 'message': msg, 'status_code': status_code}
@@ -935,9 +954,9 @@ class RestAPI():
     def add_ledger_action(self, action: LedgerAction) -> Response:
         db = DBLedgerActions(self.rotkehlchen.data.db, self.rotkehlchen.msg_aggregator)
         try:
-            identifier = db.add_ledger_action(action)
+            with db.db.savepoint():
+                identifier = db.add_ledger_action(action)
         except sqlcipher.IntegrityError:  # pylint: disable=no-member
-            db.db.conn.rollback()
             error_msg = 'Failed to add Ledger action due to entry already existing in the DB'
             return api_response(wrap_in_fail_result(error_msg), status_code=HTTPStatus.CONFLICT)
 
@@ -975,9 +994,9 @@ class RestAPI():
     def add_history_event(self, event: HistoryBaseEntry) -> Response:
         db = DBHistoryEvents(self.rotkehlchen.data.db)
         try:
-            identifier = db.add_history_event(event, mapping_value=HISTORY_MAPPING_CUSTOMIZED)
+            with db.db.savepoint():
+                identifier = db.add_history_event(event, mapping_value=HISTORY_MAPPING_CUSTOMIZED)  # noqa: E501
         except sqlcipher.DatabaseError as e:  # pylint: disable=no-member
-            db.db.conn.rollback()
             error_msg = f'Failed to add event to the DB due to a DB error: {str(e)}'
             return api_response(wrap_in_fail_result(error_msg), status_code=HTTPStatus.CONFLICT)
 
@@ -1339,7 +1358,7 @@ class RestAPI():
             return api_response(wrap_in_fail_result(str(e)), status_code=HTTPStatus.CONFLICT)
 
         # Also clear the in-memory cache of the asset resolver to requery DB
-        AssetResolver().assets_cache.pop(data['identifier'], None)
+        AssetResolver().clean_memory_cache(data['identifier'])
         return api_response(OK_RESULT, status_code=HTTPStatus.OK)
 
     def delete_custom_asset(self, identifier: str) -> Response:
@@ -1352,7 +1371,7 @@ class RestAPI():
             return api_response(wrap_in_fail_result(str(e)), status_code=HTTPStatus.CONFLICT)
 
         # Also clear the in-memory cache of the asset resolver
-        AssetResolver().assets_cache.pop(identifier, None)
+        AssetResolver().clean_memory_cache(identifier)
         return api_response(OK_RESULT, status_code=HTTPStatus.OK)
 
     def replace_asset(self, source_identifier: str, target_asset: Asset) -> Response:
@@ -1362,7 +1381,7 @@ class RestAPI():
             return api_response(wrap_in_fail_result(str(e)), status_code=HTTPStatus.CONFLICT)
 
         # Also clear the in-memory cache of the asset resolver
-        AssetResolver().assets_cache.pop(source_identifier, None)
+        AssetResolver().clean_memory_cache(source_identifier)
         return api_response(OK_RESULT, status_code=HTTPStatus.OK)
 
     @staticmethod
@@ -1414,7 +1433,7 @@ class RestAPI():
             return api_response(wrap_in_fail_result(str(e)), status_code=HTTPStatus.CONFLICT)
 
         # Also clear the in-memory cache of the asset resolver to requery DB
-        AssetResolver().assets_cache.pop(identifier, None)
+        AssetResolver().clean_memory_cache(identifier)
 
         return api_response(
             result=_wrap_in_ok_result({'identifier': identifier}),
@@ -1432,7 +1451,7 @@ class RestAPI():
             return api_response(wrap_in_fail_result(str(e)), status_code=HTTPStatus.CONFLICT)
 
         # Also clear the in-memory cache of the asset resolver
-        AssetResolver().assets_cache.pop(identifier, None)
+        AssetResolver().clean_memory_cache(identifier)
 
         return api_response(
             result=_wrap_in_ok_result({'identifier': identifier}),
@@ -1457,7 +1476,7 @@ class RestAPI():
             return api_response(_wrap_in_ok_result(OK_RESULT), status_code=HTTPStatus.OK)
         return api_response(wrap_in_fail_result(msg), status_code=HTTPStatus.CONFLICT)
 
-    def query_netvalue_data(self, include_nfts: bool) -> Response:
+    def query_netvalue_data(self, include_nfts: bool, max_points: Optional[int]) -> Response:
         from_ts = Timestamp(0)
         premium = self.rotkehlchen.premium
 
@@ -1466,7 +1485,11 @@ class RestAPI():
             start_of_day_today = datetime.datetime(today.year, today.month, today.day)
             from_ts = Timestamp(int((start_of_day_today - datetime.timedelta(days=14)).timestamp()))  # noqa: E501
 
-        data = self.rotkehlchen.data.db.get_netvalue_data(from_ts, include_nfts)
+        data = self.rotkehlchen.data.db.get_netvalue_data(
+            from_ts=from_ts,
+            include_nfts=include_nfts,
+            max_points=max_points,
+        )
         result = process_result({'times': data[0], 'data': data[1]})
         return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
 
@@ -1475,6 +1498,7 @@ class RestAPI():
             asset: Asset,
             from_timestamp: Timestamp,
             to_timestamp: Timestamp,
+            max_points: Optional[int],
     ) -> Response:
         # TODO: Think about this, but for now this is only balances, not liabilities
         data = self.rotkehlchen.data.db.query_timed_balances(
@@ -1482,6 +1506,7 @@ class RestAPI():
             to_ts=to_timestamp,
             asset=asset,
             balance_type=BalanceType.ASSET,
+            max_points=max_points,
         )
 
         result = process_result_list(data)
@@ -1995,6 +2020,46 @@ class RestAPI():
     def ping() -> Response:
         return api_response(_wrap_in_ok_result(True), status_code=HTTPStatus.OK)
 
+    def get_metrics(self) -> Response:
+        return make_response(
+            (self.metrics.render(), HTTPStatus.OK, {'Content-Type': PROMETHEUS_CONTENT_TYPE}),
+        )
+
+    def set_metrics_enabled(self, enabled: bool) -> Response:
+        if enabled:
+            self.metrics.enable()
+        else:
+            self.metrics.disable()
+        return api_response(_wrap_in_ok_result(True), status_code=HTTPStatus.OK)
+
+    def start_profiler(self, interval: float) -> Response:
+        try:
+            self.profiler.start(interval=interval)
+        except RuntimeError as e:
+            return api_response(wrap_in_fail_result(str(e)), status_code=HTTPStatus.CONFLICT)
+        return api_response(_wrap_in_ok_result(True), status_code=HTTPStatus.OK)
+
+    def stop_profiler(self) -> Response:
+        try:
+            self.profiler.stop()
+        except RuntimeError as e:
+            return api_response(wrap_in_fail_result(str(e)), status_code=HTTPStatus.CONFLICT)
+        return api_response(_wrap_in_ok_result(True), status_code=HTTPStatus.OK)
+
+    def download_profile(self) -> Response:
+        stacks = self.profiler.collapsed_stacks()
+        if stacks == '':
+            return api_response(
+                wrap_in_fail_result('The profiler has not taken any samples'),
+                status_code=HTTPStatus.CONFLICT,
+            )
+        return send_file(
+            path_or_file=BytesIO(stacks.encode()),
+            mimetype='text/plain',
+            as_attachment=True,
+            download_name=f'rotki_profile_{ts_now()}.folded',
+        )
+
     def _do_import_data(
         self,
         source: str,
@@ -2404,7 +2469,8 @@ class RestAPI():
             }
 
         try:
-            result = getattr(module_obj, method)(**kwargs)
+            with module_query_executor.measure(module_name, method):
+                result = getattr(module_obj, method)(**kwargs)
         except RemoteError as e:
             msg = str(e)
             status_code = HTTPStatus.BAD_GATEWAY
@@ -2962,6 +3028,7 @@ class RestAPI():
                 entries_table='ethereum_transactions',
             ),
             'entries_limit': FREE_ETH_TX_LIMIT if self.rotkehlchen.premium is None else -1,
+            'next_cursor': filter_query.next_cursor,
         }
 
         return {'result': result, 'message': message, 'status_code': status_code}
@@ -3102,6 +3169,7 @@ class RestAPI():
             f'{", ".join([asset.identifier for asset in assets])}',
         )
         assets_price = {}
+        price_ages = {}
         for asset in assets:
             if asset != target_asset:
                 assets_price[asset] = Inquirer().find_price(
@@ -3109,11 +3177,14 @@ class RestAPI():
                     to_asset=target_asset,
                     ignore_cache=ignore_cache,
                 )
+                price_ages[asset] = Inquirer().get_current_price_age(asset, target_asset)
             else:
                 assets_price[asset] = Price(FVal('1'))
+                price_ages[asset] = 0
 
         result = {
             'assets': assets_price,
+            'price_ages': price_ages,
             'target_asset': target_asset,
         }
         return _wrap_in_ok_result(process_result(result))
@@ -3842,6 +3913,7 @@ class RestAPI():
             'entries_found': entries_found,
             'entries_limit': entries_limit,
             'entries_total': entries_total,
+            'next_cursor': query_filter.next_cursor,
             'total_usd_value': usd_value,
             'assets': history_events_db.get_entries_assets_history_events(
                 query_filter=table_filter,
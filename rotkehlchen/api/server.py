@@ -92,6 +92,7 @@ from rotkehlchen.api.v1.resources import (
     MakerdaoVaultsResource,
     ManuallyTrackedBalancesResource,
     MessagesResource,
+    MetricsResource,
     NamedEthereumModuleDataResource,
     NamedOracleCacheResource,
     NFTSBalanceResource,
@@ -101,6 +102,7 @@ from rotkehlchen.api.v1.resources import (
     PeriodicDataResource,
     PickleDillResource,
     PingResource,
+    ProfilerResource,
     QueriedAddressesResource,
     ReverseEnsResource,
     SettingsResource,
@@ -271,6 +273,8 @@ URLS_V1: URLS = [
     ('/actions/ignored', IgnoredActionsResource),
     ('/info', InfoResource),
     ('/ping', PingResource),
+    ('/metrics', MetricsResource),
+    ('/profiler', ProfilerResource),
     ('/import', DataImportResource),
     ('/nfts', NFTSResource),
     ('/nfts/balances', NFTSBalanceResource),
@@ -369,6 +373,7 @@ class APIServer():
 
         self.wsgiserver: Optional[WSGIServer] = None
         self.flask_app.register_blueprint(self.blueprint)
+        self.rest_api.metrics.attach(self.flask_app)
 
         self.flask_app.errorhandler(HTTPStatus.NOT_FOUND)(endpoint_not_found)
         self.flask_app.register_error_handler(Exception, self.unhandled_exception)
@@ -78,6 +78,7 @@ from rotkehlchen.api.v1.schemas import (
     ManualPriceDeleteSchema,
     ManualPriceRegisteredSchema,
     ManualPriceSchema,
+    MetricsSchema,
     ModifyEthereumTokenSchema,
     NameDeleteSchema,
     NamedEthereumModuleDataSchema,
@@ -86,6 +87,7 @@ from rotkehlchen.api.v1.schemas import (
     NamedOracleCacheSchema,
     NewUserSchema,
     OptionalEthereumAddressSchema,
+    ProfilerSchema,
     QueriedAddressesSchema,
     RequiredEthereumAddressSchema,
     ReverseEnsSchema,
@@ -247,6 +249,28 @@ def require_loggedin_user() -> Callable:
     return _require_loggedin_user
 
 
+def read_only_db() -> Callable:
+    """This is a decorator for the RestAPI class's methods that only read from the user DB.
+
+    Their reads go through one of the read only connections of the DB so that they don't
+    wait for the writes of the background tasks.
+    """
+    def _read_only_db(f: Callable) -> Callable:
+        @wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # grab the `rest_api` attribute from the view class.
+            view_class = args[0]
+            rotkehlchen = view_class.rest_api.rotkehlchen
+            if rotkehlchen.user_is_logged_in is False:
+                return f(*args, **kwargs)
+
+            with rotkehlchen.data.db.read_only(caller=f'{view_class.__class__.__name__}.{f.__name__}'):  # noqa: E501
+                return f(*args, **kwargs)
+
+        return wrapper
+    return _read_only_db
+
+
 def require_premium_user(active_check: bool) -> Callable:
     """
     Decorator only for premium
@@ -312,6 +336,7 @@ class SettingsResource(BaseMethodView):
         return self.rest_api.set_settings(settings)
 
     @require_loggedin_user()
+    @read_only_db()
     def get(self) -> Response:
         return self.rest_api.get_settings()
 
@@ -414,6 +439,7 @@ class ExchangesDataResource(BaseMethodView):
 
 class AssociatedLocations(BaseMethodView):
     @require_loggedin_user()
+    @read_only_db()
     def get(self) -> Response:
         return self.rest_api.get_associated_locations()
 
@@ -528,6 +554,7 @@ class ExchangeBalancesResource(BaseMethodView):
 class OwnedAssetsResource(BaseMethodView):
 
     @require_loggedin_user()
+    @read_only_db()
     def get(self) -> Response:
         return self.rest_api.query_owned_assets()
 
@@ -831,6 +858,7 @@ class TagsResource(BaseMethodView):
     delete_schema = NameDeleteSchema()
 
     @require_loggedin_user()
+    @read_only_db()
     def get(self) -> Response:
         return self.rest_api.get_tags()
 
@@ -1034,9 +1062,10 @@ class StatisticsNetvalueResource(BaseMethodView):
 
     get_schema = StatisticsNetValueSchema()
 
+    @read_only_db()
     @use_kwargs(get_schema, location='json_and_query')
-    def get(self, include_nfts: bool) -> Response:
-        return self.rest_api.query_netvalue_data(include_nfts)
+    def get(self, include_nfts: bool, max_points: Optional[int]) -> Response:
+        return self.rest_api.query_netvalue_data(include_nfts=include_nfts, max_points=max_points)  # noqa: E501
 
 
 class StatisticsAssetBalanceResource(BaseMethodView):
@@ -1044,17 +1073,20 @@ class StatisticsAssetBalanceResource(BaseMethodView):
     get_schema = StatisticsAssetBalanceSchema()
 
     @require_premium_user(active_check=False)
+    @read_only_db()
     @use_kwargs(get_schema, location='json_and_query_and_view_args')
     def get(
             self,
             asset: Asset,
             from_timestamp: Timestamp,
             to_timestamp: Timestamp,
+            max_points: Optional[int],
     ) -> Response:
         return self.rest_api.query_timed_balances_data(
             asset=asset,
             from_timestamp=from_timestamp,
             to_timestamp=to_timestamp,
+            max_points=max_points,
         )
 
 
@@ -1063,6 +1095,7 @@ class StatisticsValueDistributionResource(BaseMethodView):
     get_schema = StatisticsValueDistributionSchema()
 
     @require_premium_user(active_check=False)
+    @read_only_db()
     @use_kwargs(get_schema, location='json_and_query')
     def get(self, distribution_by: str) -> Response:
         return self.rest_api.query_value_distribution_data(
@@ -1337,6 +1370,7 @@ class IgnoredActionsResource(BaseMethodView):
     modify_schema = IgnoredActionsModifySchema()
 
     @require_loggedin_user()
+    @read_only_db()
     @use_kwargs(get_schema, location='json_and_query')
     def get(self, action_type: Optional[ActionType]) -> Response:
         return self.rest_api.get_ignored_action_ids(action_type=action_type)
@@ -1360,6 +1394,7 @@ class QueriedAddressesResource(BaseMethodView):
     modify_schema = QueriedAddressesSchema()
 
     @require_loggedin_user()
+    @read_only_db()
     def get(self) -> Response:
         return self.rest_api.get_queried_addresses_per_module()
 
@@ -1389,6 +1424,33 @@ class PingResource(BaseMethodView):
         return self.rest_api.ping()
 
 
+class MetricsResource(BaseMethodView):
+
+    put_schema = MetricsSchema()
+
+    def get(self) -> Response:
+        return self.rest_api.get_metrics()
+
+    @use_kwargs(put_schema, location='json')
+    def put(self, enabled: bool) -> Response:
+        return self.rest_api.set_metrics_enabled(enabled)
+
+
+class ProfilerResource(BaseMethodView):
+
+    put_schema = ProfilerSchema()
+
+    def get(self) -> Response:
+        return self.rest_api.download_profile()
+
+    @use_kwargs(put_schema, location='json')
+    def put(self, interval: float) -> Response:
+        return self.rest_api.start_profiler(interval=interval)
+
+    def delete(self) -> Response:
+        return self.rest_api.stop_profiler()
+
+
 class DataImportResource(BaseMethodView):
 
     upload_schema = DataImportSchema()
@@ -67,6 +67,7 @@ from rotkehlchen.types import (
 )
 from rotkehlchen.utils.hexbytes import hexstring_to_bytes
 from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.profiling import DEFAULT_SAMPLE_INTERVAL
 
 from .fields import (
     AmountField,
@@ -150,6 +151,31 @@ class DBPaginationSchema(Schema):
     offset = fields.Integer(load_default=None)
 
 
+class DBCursorPaginationSchema(DBPaginationSchema):
+    """Pagination that can also continue from the next_cursor returned by the previous page"""
+    cursor = fields.String(load_default=None)
+
+    @validates_schema
+    def validate_cursor_pagination_schema(  # pylint: disable=no-self-use
+            self,
+            data: Dict[str, Any],
+            **_kwargs: Any,
+    ) -> None:
+        if data['cursor'] is None:
+            return
+
+        if data['offset'] is not None:
+            raise ValidationError(
+                message='Only one of cursor and offset can be given',
+                field_name='cursor',
+            )
+        if data['limit'] is None:
+            raise ValidationError(
+                message='A limit should be given along with the cursor',
+                field_name='limit',
+            )
+
+
 class DBOrderBySchema(Schema):
     # TODO: DBFilters already allow ordering by multiple attributes. Make the API do that too
     order_by_attribute = fields.String(load_default=None)
@@ -159,7 +185,7 @@ class DBOrderBySchema(Schema):
 class EthereumTransactionQuerySchema(
         AsyncQueryArgumentSchema,
         OnlyCacheQuerySchema,
-        DBPaginationSchema,
+        DBCursorPaginationSchema,
         DBOrderBySchema,
 ):
     address = EthereumAddressField(load_default=None)
@@ -198,17 +224,21 @@ class EthereumTransactionQuerySchema(
         order_by_attribute = data['order_by_attribute'] if data['order_by_attribute'] is not None else 'timestamp'  # noqa: E501
         protocols, asset = data['protocols'], data['asset']
         exclude_ignored_assets = data['exclude_ignored_assets']
-        filter_query = ETHTransactionsFilterQuery.make(
-            order_by_rules=[(order_by_attribute, data['ascending'])],
-            limit=data['limit'],
-            offset=data['offset'],
-            addresses=[address] if address is not None else None,
-            from_ts=data['from_timestamp'],
-            to_ts=data['to_timestamp'],
-            protocols=protocols,
-            asset=asset,
-            exclude_ignored_assets=exclude_ignored_assets,
-        )
+        try:
+            filter_query = ETHTransactionsFilterQuery.make(
+                order_by_rules=[(order_by_attribute, data['ascending'])],
+                limit=data['limit'],
+                offset=data['offset'],
+                cursor=data['cursor'],
+                addresses=[address] if address is not None else None,
+                from_ts=data['from_timestamp'],
+                to_ts=data['to_timestamp'],
+                protocols=protocols,
+                asset=asset,
+                exclude_ignored_assets=exclude_ignored_assets,
+            )
+        except DeserializationError as e:
+            raise ValidationError(message=str(e), field_name='cursor') from e
         event_params = {
             'asset': asset,
             'protocols': protocols,
@@ -240,7 +270,7 @@ class EthereumTransactionDecodingSchema(AsyncIgnoreCacheQueryArgumentSchema):
 class TradesQuerySchema(
         AsyncQueryArgumentSchema,
         OnlyCacheQuerySchema,
-        DBPaginationSchema,
+        DBCursorPaginationSchema,
         DBOrderBySchema,
 ):
     base_asset = AssetField(load_default=None)
@@ -278,17 +308,21 @@ class TradesQuerySchema(
             **_kwargs: Any,
     ) -> Dict[str, Any]:
         order_by_attribute = data['order_by_attribute'] if data['order_by_attribute'] is not None else 'time'  # noqa: E501
-        filter_query = TradesFilterQuery.make(
-            order_by_rules=[(order_by_attribute, data['ascending'])],
-            limit=data['limit'],
-            offset=data['offset'],
-            from_ts=data['from_timestamp'],
-            to_ts=data['to_timestamp'],
-            base_asset=data['base_asset'],
-            quote_asset=data['quote_asset'],
-            trade_type=[data['trade_type']] if data['trade_type'] is not None else None,
-            location=data['location'],
-        )
+        try:
+            filter_query = TradesFilterQuery.make(
+                order_by_rules=[(order_by_attribute, data['ascending'])],
+                limit=data['limit'],
+                offset=data['offset'],
+                cursor=data['cursor'],
+                from_ts=data['from_timestamp'],
+                to_ts=data['to_timestamp'],
+                base_asset=data['base_asset'],
+                quote_asset=data['quote_asset'],
+                trade_type=[data['trade_type']] if data['trade_type'] is not None else None,
+                location=data['location'],
+            )
+        except DeserializationError as e:
+            raise ValidationError(message=str(e), field_name='cursor') from e
         return {
             'async_query': data['async_query'],
             'only_cache': data['only_cache'],
@@ -299,7 +333,7 @@ class TradesQuerySchema(
 class StakingQuerySchema(
     AsyncQueryArgumentSchema,
     OnlyCacheQuerySchema,
-    DBPaginationSchema,
+    DBCursorPaginationSchema,
     DBOrderBySchema,
 ):
     from_timestamp = TimestampField(load_default=Timestamp(0))
@@ -320,23 +354,27 @@ class StakingQuerySchema(
         if order_by_attribute == 'event_type':
             order_by_attribute = 'subtype'
 
-        query_filter = HistoryEventFilterQuery.make(
-            order_by_rules=[(order_by_attribute, data['ascending'])],
-            limit=data['limit'],
-            offset=data['offset'],
-            from_ts=data['from_timestamp'],
-            to_ts=data['to_timestamp'],
-            location=Location.KRAKEN,
-            event_types=[
-                HistoryEventType.STAKING,
-            ],
-            event_subtypes=data['event_subtypes'],
-            exclude_subtypes=[
-                HistoryEventSubType.RECEIVE_WRAPPED,
-                HistoryEventSubType.RETURN_WRAPPED,
-            ],
-            asset=data['asset'],
-        )
+        try:
+            query_filter = HistoryEventFilterQuery.make(
+                order_by_rules=[(order_by_attribute, data['ascending'])],
+                limit=data['limit'],
+                offset=data['offset'],
+                cursor=data['cursor'],
+                from_ts=data['from_timestamp'],
+                to_ts=data['to_timestamp'],
+                location=Location.KRAKEN,
+                event_types=[
+                    HistoryEventType.STAKING,
+                ],
+                event_subtypes=data['event_subtypes'],
+                exclude_subtypes=[
+                    HistoryEventSubType.RECEIVE_WRAPPED,
+                    HistoryEventSubType.RETURN_WRAPPED,
+                ],
+                asset=data['asset'],
+            )
+        except DeserializationError as e:
+            raise ValidationError(message=str(e), field_name='cursor') from e
 
         value_filter = HistoryEventFilterQuery.make(
             limit=data['limit'],
@@ -410,7 +448,7 @@ class HistoryBaseEntrySchema(Schema):
 class AssetMovementsQuerySchema(
         AsyncQueryArgumentSchema,
         OnlyCacheQuerySchema,
-        DBPaginationSchema,
+        DBCursorPaginationSchema,
         DBOrderBySchema,
 ):
     asset = AssetField(load_default=None)
@@ -446,16 +484,20 @@ class AssetMovementsQuerySchema(
             **_kwargs: Any,
     ) -> Dict[str, Any]:
         order_by_attribute = data['order_by_attribute'] if data['order_by_attribute'] is not None else 'time'  # noqa: E501
-        filter_query = AssetMovementsFilterQuery.make(
-            order_by_rules=[(order_by_attribute, data['ascending'])],
-            limit=data['limit'],
-            offset=data['offset'],
-            from_ts=data['from_timestamp'],
-            to_ts=data['to_timestamp'],
-            asset=data['asset'],
-            action=[data['action']] if data['action'] is not None else None,
-            location=data['location'],
-        )
+        try:
+            filter_query = AssetMovementsFilterQuery.make(
+                order_by_rules=[(order_by_attribute, data['ascending'])],
+                limit=data['limit'],
+                offset=data['offset'],
+                cursor=data['cursor'],
+                from_ts=data['from_timestamp'],
+                to_ts=data['to_timestamp'],
+                asset=data['asset'],
+                action=[data['action']] if data['action'] is not None else None,
+                location=data['location'],
+            )
+        except DeserializationError as e:
+            raise ValidationError(message=str(e), field_name='cursor') from e
         return {
             'async_query': data['async_query'],
             'only_cache': data['only_cache'],
@@ -799,6 +841,14 @@ class ModifiableSettingsSchema(Schema):
         # Check that all values are unique
         validate=lambda data: len(data) == len(set(data)),
     )
+    query_cache_ttl = fields.Integer(
+        strict=True,
+        validate=webargs.validate.Range(
+            min=0,
+            error='The number of seconds for which query results are cached should be >= 0',
+        ),
+        load_default=None,
+    )
 
     @validates_schema
     def validate_settings_schema(  # pylint: disable=no-self-use
@@ -846,6 +896,7 @@ class ModifiableSettingsSchema(Schema):
             pnl_csv_have_summary=data['pnl_csv_have_summary'],
             ssf_0graph_multiplier=data['ssf_0graph_multiplier'],
             non_syncing_exchanges=data['non_syncing_exchanges'],
+            query_cache_ttl=data['query_cache_ttl'],
         )
 
 
@@ -982,6 +1033,14 @@ class StatisticsAssetBalanceSchema(Schema):
     asset = AssetField(required=True)
     from_timestamp = TimestampField(load_default=Timestamp(0))
     to_timestamp = TimestampField(load_default=ts_now)
+    max_points = fields.Integer(
+        strict=True,
+        load_default=None,
+        validate=webargs.validate.Range(
+            min=2,
+            error='The maximum number of points must be at least 2',
+        ),
+    )
 
 
 class StatisticsValueDistributionSchema(Schema):
@@ -1975,6 +2034,14 @@ class Eth2DailyStatsSchema(
 
 class StatisticsNetValueSchema(Schema):
     include_nfts = fields.Boolean(load_default=True)
+    max_points = fields.Integer(
+        strict=True,
+        load_default=None,
+        validate=webargs.validate.Range(
+            min=2,
+            error='The maximum number of points must be at least 2',
+        ),
+    )
 
 
 class BinanceMarketsSchema(Schema):
@@ -2026,3 +2093,18 @@ class ReverseEnsSchema(AsyncIgnoreCacheQueryArgumentSchema):
 class SnapshotImportingSchema(Schema):
     balances_snapshot_file = FileField(allowed_extensions=['.csv'], required=True)
     location_data_snapshot_file = FileField(allowed_extensions=['.csv'], required=True)
+
+
+class MetricsSchema(Schema):
+    enabled = fields.Boolean(required=True)
+
+
+class ProfilerSchema(Schema):
+    interval = fields.Float(
+        load_default=DEFAULT_SAMPLE_INTERVAL,
+        validate=webargs.validate.Range(
+            min=0.001,
+            max=1,
+            error='The profiler sampling interval must be between 0.001 and 1 seconds',
+        ),
+    )
@@ -99,6 +99,15 @@ def app_args(prog: str, description: str) -> argparse.ArgumentParser:
         choices=['debug', 'info', 'warning', 'error', 'critical'],
         default='debug',
     )
+    p.add_argument(
+        '--logformat',
+        help=(
+            'Choose the format of the logging entries. With "json" each entry is '
+            'written as a JSON object in its own line'
+        ),
+        choices=['text', 'json'],
+        default='text',
+    )
     p.add_argument(
         '--logfromothermodules',
         help=(
@@ -119,6 +128,15 @@ def app_args(prog: str, description: str) -> argparse.ArgumentParser:
         default=DEFAULT_MAX_LOG_BACKUP_FILES,
         type=int,
     )
+    p.add_argument(
+        '--decoding-processes',
+        help=(
+            'The number of processes used to decode large batches of ethereum '
+            'transactions. With the default of 1 they are decoded in the backend process'
+        ),
+        default=1,
+        type=int,
+    )
     p.add_argument(
         'version',
         help='Shows the rotkehlchen version',
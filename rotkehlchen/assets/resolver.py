@@ -1,15 +1,25 @@
-from typing import Dict, Optional
+import logging
+from typing import Dict, Iterable, Optional, Set
 
 from rotkehlchen.errors.asset import UnknownAsset
 from rotkehlchen.globaldb import GlobalDBHandler
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.utils.lru import LRUCache
 
 from .types import AssetData
 
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Max number of assets kept in the memory cache. Comfortably more than the number of
+# assets in the global DB so that in the common case nothing is evicted.
+ASSETS_CACHE_SIZE = 8192
+
 
 class AssetResolver():
     __instance: Optional['AssetResolver'] = None
-    # A cache so that the DB is not hit every time
-    assets_cache: Dict[str, AssetData] = {}
+    # A cache so that the DB is not hit every time. Keys are always lowercase identifiers
+    assets_cache: LRUCache[str, AssetData] = LRUCache(maxsize=ASSETS_CACHE_SIZE)
 
     def __new__(cls) -> 'AssetResolver':
         """Lazily initializes AssetResolver
@@ -32,6 +42,32 @@ class AssetResolver():
         else:
             AssetResolver.__instance.assets_cache.pop(identifier.lower(), None)
 
+    @staticmethod
+    def cache_stats() -> Dict[str, int]:
+        """Returns size and hit/miss/eviction counters of the memory cache"""
+        return AssetResolver().assets_cache.stats()
+
+    @staticmethod
+    def preload(identifiers: Iterable[str]) -> Set[str]:
+        """Resolve the given identifiers in bulk and keep their data in the memory cache
+
+        Identifiers already in the cache are not queried again. Identifiers that
+        can't be resolved are skipped, as they would raise UnknownAsset when
+        requested via get_asset_data() anyway, and are returned so that callers
+        can avoid asking for them again.
+        """
+        instance = AssetResolver()
+        missing = {x for x in identifiers if x.lower() not in instance.assets_cache}
+        if len(missing) == 0:
+            return set()
+
+        assets_data = GlobalDBHandler().get_assets_data(list(missing))
+        for asset_data in assets_data:
+            instance.assets_cache.put(asset_data.identifier.lower(), asset_data)
+        log.debug(f'Preloaded {len(assets_data)} out of {len(missing)} requested assets')
+        resolved = {x.identifier.lower() for x in assets_data}
+        return {x for x in missing if x.lower() not in resolved}
+
     @staticmethod
     def get_asset_data(
             asset_identifier: str,
@@ -54,5 +90,5 @@ class AssetResolver():
             raise UnknownAsset(asset_identifier)
 
         # save in the memory cache -- always lower
-        instance.assets_cache[asset_identifier.lower()] = asset_data
+        instance.assets_cache.put(asset_identifier.lower(), asset_data)
         return asset_data
@@ -95,13 +95,16 @@ def get_or_create_ethereum_token(
 def get_asset_by_symbol(symbol: str, asset_type: Optional[AssetType] = None) -> Optional[Asset]:
     """Gets an asset by symbol from the DB.
 
+    Uses the global DB's in-memory symbol index so repeated lookups, such as
+    during exchange queries and CSV imports, don't hit the DB each time.
+
     If no asset with that symbol or multiple assets with the same
     symbol are found returns None
     """
     if symbol == 'ETH':
         return A_ETH  # ETH can be ETH and ETH2 in the DB
 
-    assets_data = GlobalDBHandler().get_assets_with_symbol(symbol, asset_type)
+    assets_data = GlobalDBHandler().get_assets_with_symbol_cached(symbol, asset_type)
     if len(assets_data) != 1:
         return None
 
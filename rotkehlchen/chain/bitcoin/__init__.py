@@ -1,6 +1,10 @@
-from typing import Dict, List, Tuple
+import time
+from typing import Dict, List, Optional, Tuple
 
+import gevent
 import requests
+from gevent.lock import Semaphore
+from gevent.pool import Pool
 
 from rotkehlchen.errors.misc import RemoteError, UnableToDecryptRemoteData
 from rotkehlchen.fval import FVal
@@ -8,121 +12,189 @@ from rotkehlchen.types import BTCAddress
 from rotkehlchen.utils.misc import satoshis_to_btc
 from rotkehlchen.utils.network import request_get_dict
 
+# blockchain.info's multiaddr endpoint fails for too many addresses per query
+# https://github.com/rotki/rotki/issues/3037
+BLOCKCHAININFO_BATCH_SIZE = 80
+# blockstream can only be queried per address. Those queries run concurrently
+# but are all spaced out by the same throttle so that we don't get rate limited.
+BLOCKSTREAM_CONCURRENCY = 4
+BLOCKSTREAM_REQUESTS_INTERVAL = 0.25
+# For how long the queried transactions/balance of an address is reused
+ADDRESSES_CACHE_TTL_SECS = 60
 
-def _have_bc1_accounts(accounts: List[BTCAddress]) -> bool:
-    return any(account.lower()[0:3] == 'bc1' for account in accounts)
 
+class RequestsThrottle():
+    """Spaces out the requests made to a remote by all the greenlets that share it"""
 
-def get_bitcoin_addresses_balances(accounts: List[BTCAddress]) -> Dict[BTCAddress, FVal]:
-    """Queries blockchain.info or blockstream for the balances of accounts
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.lock = Semaphore()
+        self.next_request_ts = 0.0
 
-    May raise:
-    - RemotError if there is a problem querying blockchain.info or blockstream
-    """
-    source = 'blockchain.info'
-    balances: Dict[BTCAddress, FVal] = {}
-    try:
-        if _have_bc1_accounts(accounts):
-            # if 1 account is bech32 we have to query blockstream. blockchaininfo won't work
-            source = 'blockstream'
-            balances = {}
-            for account in accounts:
-                url = f'https://blockstream.info/api/address/{account}'
-                response_data = request_get_dict(url=url, handle_429=True, backoff_in_seconds=4)
-                stats = response_data['chain_stats']
-                balance = int(stats['funded_txo_sum']) - int(stats['spent_txo_sum'])
-                balances[account] = satoshis_to_btc(balance)
-        else:
-            # split the list of accounts into sublists of 80 addresses per list to overcome:
-            # https://github.com/rotki/rotki/issues/3037
-            accounts_chunks = [accounts[x:x + 80] for x in range(0, len(accounts), 80)]
-            for accounts_chunk in accounts_chunks:
-                params = '|'.join(accounts_chunk)
-                btc_resp = request_get_dict(
-                    url=f'https://blockchain.info/multiaddr?active={params}',
-                    handle_429=True,
-                    # If we get a 429 then their docs suggest 10 seconds
-                    # https://blockchain.info/q
-                    backoff_in_seconds=10,
-                )
-                for entry in btc_resp['addresses']:
-                    balances[entry['address']] = satoshis_to_btc(FVal(entry['final_balance']))
-    except (
-            requests.exceptions.RequestException,
-            UnableToDecryptRemoteData,
-            requests.exceptions.Timeout,
-    ) as e:
-        raise RemoteError(f'bitcoin external API request for balances failed due to {str(e)}') from e  # noqa: E501
-    except KeyError as e:
-        raise RemoteError(
-            f'Malformed response when querying bitcoin blockchain via {source}.'
-            f'Did not find key {e}',
-        ) from e
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_request_ts:
+                gevent.sleep(self.next_request_ts - now)
+                now = self.next_request_ts
+            self.next_request_ts = now + self.interval
 
-    return balances
 
+blockstream_throttle = RequestsThrottle(BLOCKSTREAM_REQUESTS_INTERVAL)
 
-def _check_blockstream_for_transactions(
-        accounts: List[BTCAddress],
-) -> Dict[BTCAddress, Tuple[bool, FVal]]:
-    """May raise connection errors or KeyError"""
-    have_transactions = {}
-    for account in accounts:
-        url = f'https://blockstream.info/api/address/{account}'
-        response_data = request_get_dict(url=url, handle_429=True, backoff_in_seconds=4)
-        stats = response_data['chain_stats']
-        balance = satoshis_to_btc(int(stats['funded_txo_sum']) - int(stats['spent_txo_sum']))
-        have_txs = stats['tx_count'] != 0
-        have_transactions[account] = (have_txs, balance)
 
-    return have_transactions
+class BitcoinAddressesCache():
+    """Remembers for a short time whether addresses have had transactions and
+    their balance, so that the xpub derivation and the balances query don't
+    query the same addresses one after the other"""
+
+    def __init__(self, ttl: int = ADDRESSES_CACHE_TTL_SECS) -> None:
+        self.ttl = ttl
+        self.entries: Dict[BTCAddress, Tuple[float, Tuple[bool, FVal]]] = {}
+
+    def get(self, address: BTCAddress) -> Optional[Tuple[bool, FVal]]:
+        entry = self.entries.get(address)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self.entries[address]
+            return None
+        return entry[1]
+
+    def add(self, data: Dict[BTCAddress, Tuple[bool, FVal]]) -> None:
+        now = time.monotonic()
+        for address, value in data.items():
+            self.entries[address] = (now, value)
+
+    def clear(self) -> None:
+        self.entries = {}
+
+
+def _is_bech32_account(account: BTCAddress) -> bool:
+    return account.lower()[0:3] == 'bc1'
+
+
+def _check_blockstream_for_transactions(account: BTCAddress) -> Tuple[bool, FVal]:
+    """May raise connection errors or KeyError"""
+    blockstream_throttle.wait()
+    url = f'https://blockstream.info/api/address/{account}'
+    response_data = request_get_dict(url=url, handle_429=True, backoff_in_seconds=4)
+    stats = response_data['chain_stats']
+    balance = satoshis_to_btc(int(stats['funded_txo_sum']) - int(stats['spent_txo_sum']))
+    return stats['tx_count'] != 0, balance
 
 
 def _check_blockchaininfo_for_transactions(
         accounts: List[BTCAddress],
 ) -> Dict[BTCAddress, Tuple[bool, FVal]]:
-    """May raise RemotError or KeyError"""
+    """May raise connection errors or KeyError"""
     have_transactions = {}
-    params = '|'.join(accounts)
-    btc_resp = request_get_dict(
-        url=f'https://blockchain.info/multiaddr?active={params}',
-        handle_429=True,
-        # If we get a 429 then their docs suggest 10 seconds
-        # https://blockchain.infoq/
-        backoff_in_seconds=15,
-    )
-    for entry in btc_resp['addresses']:
-        balance = satoshis_to_btc(entry['final_balance'])
-        have_transactions[entry['address']] = (entry['n_tx'] != 0, balance)
+    for idx in range(0, len(accounts), BLOCKCHAININFO_BATCH_SIZE):
+        params = '|'.join(accounts[idx:idx + BLOCKCHAININFO_BATCH_SIZE])
+        btc_resp = request_get_dict(
+            url=f'https://blockchain.info/multiaddr?active={params}',
+            handle_429=True,
+            # If we get a 429 then their docs suggest 10 seconds
+            # https://blockchain.info/q
+            backoff_in_seconds=10,
+        )
+        for entry in btc_resp['addresses']:
+            balance = satoshis_to_btc(FVal(entry['final_balance']))
+            have_transactions[entry['address']] = (entry['n_tx'] != 0, balance)
 
     return have_transactions
 
 
-def have_bitcoin_transactions(accounts: List[BTCAddress]) -> Dict[BTCAddress, Tuple[bool, FVal]]:
-    """
-    Takes a list of addresses and returns a mapping of which addresses have had transactions
-    and also their current balance
+def _query_bitcoin_transactions(
+        accounts: List[BTCAddress],
+) -> Dict[BTCAddress, Tuple[bool, FVal]]:
+    """Queries whether the given accounts have had transactions and their balance
+
+    Legacy and P2SH addresses are queried in batches from blockchain.info. Bech32
+    addresses are not supported by it so they are queried concurrently from blockstream.
 
     May raise:
     - RemoteError if any of the queried websites fail to be queried
     """
+    batched_accounts = [x for x in accounts if not _is_bech32_account(x)]
+    blockstream_accounts = [x for x in accounts if _is_bech32_account(x)]
+    pool = Pool(BLOCKSTREAM_CONCURRENCY)
+    greenlets = [
+        pool.spawn(_check_blockstream_for_transactions, account)
+        for account in blockstream_accounts
+    ]
+    have_transactions = {}
+    source = 'blockchain.info'
     try:
-        if _have_bc1_accounts(accounts):
-            source = 'blockstream'
-            have_transactions = _check_blockstream_for_transactions(accounts)
-        else:
-            source = 'blockchain.info'
-            have_transactions = _check_blockchaininfo_for_transactions(accounts)
+        if len(batched_accounts) != 0:
+            have_transactions = _check_blockchaininfo_for_transactions(batched_accounts)
+        source = 'blockstream'
+        pool.join()
+        for account, greenlet in zip(blockstream_accounts, greenlets):
+            have_transactions[account] = greenlet.get()
     except (
             requests.exceptions.RequestException,
             UnableToDecryptRemoteData,
             requests.exceptions.Timeout,
     ) as e:
-        raise RemoteError(f'bitcoin external API request for transactions failed due to {str(e)}') from e  # noqa: E501
+        raise RemoteError(f'bitcoin external API request failed due to {str(e)}') from e
     except KeyError as e:
         raise RemoteError(
             f'Malformed response when querying bitcoin blockchain via {source}.'
             f'Did not find key {str(e)}',
         ) from e
+    finally:
+        pool.kill()
+
+    return have_transactions
+
+
+def have_bitcoin_transactions(
+        accounts: List[BTCAddress],
+        cache: Optional[BitcoinAddressesCache] = None,
+        ignore_cache: bool = False,
+) -> Dict[BTCAddress, Tuple[bool, FVal]]:
+    """
+    Takes a list of addresses and returns a mapping of which addresses have had transactions
+    and also their current balance
+
+    If a cache is given then the addresses queried within its TTL are not queried again,
+    unless ignore_cache is True. All queried addresses are added to it.
+
+    May raise:
+    - RemoteError if any of the queried websites fail to be queried
+    """
+    have_transactions = {}
+    accounts_to_query = []
+    for account in accounts:
+        cached = None if cache is None or ignore_cache else cache.get(account)
+        if cached is None:
+            accounts_to_query.append(account)
+        else:
+            have_transactions[account] = cached
+
+    if len(accounts_to_query) != 0:
+        queried = _query_bitcoin_transactions(accounts_to_query)
+        if cache is not None:
+            cache.add(queried)
+        have_transactions.update(queried)
 
     return have_transactions
+
+
+def get_bitcoin_addresses_balances(
+        accounts: List[BTCAddress],
+        cache: Optional[BitcoinAddressesCache] = None,
+        ignore_cache: bool = False,
+) -> Dict[BTCAddress, FVal]:
+    """Queries blockchain.info or blockstream for the balances of accounts
+
+    May raise:
+    - RemotError if there is a problem querying blockchain.info or blockstream
+    """
+    have_transactions = have_bitcoin_transactions(
+        accounts=accounts,
+        cache=cache,
+        ignore_cache=ignore_cache,
+    )
+    return {account: balance for account, (_, balance) in have_transactions.items()}
@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
 
 from gevent.lock import Semaphore
 
-from rotkehlchen.chain.bitcoin import have_bitcoin_transactions
+from rotkehlchen.chain.bitcoin import BitcoinAddressesCache, have_bitcoin_transactions
 from rotkehlchen.chain.bitcoin.hdkey import HDKey
 from rotkehlchen.db.utils import insert_tag_mappings
 from rotkehlchen.errors.misc import RemoteError
@@ -69,6 +69,7 @@ def _derive_addresses_loop(
         start_index: int,
         root: HDKey,
         gap_limit: int,
+        cache: Optional[BitcoinAddressesCache],
 ) -> List[XpubDerivedAddressData]:
     """May raise:
     - RemoteError: if blockstream/blockchain.info can't be reached
@@ -82,7 +83,10 @@ def _derive_addresses_loop(
             child = root.derive_child(idx)
             batch_addresses.append((idx, child.address()))
 
-        have_tx_mapping = have_bitcoin_transactions([x[1] for x in batch_addresses])
+        have_tx_mapping = have_bitcoin_transactions(
+            accounts=[x[1] for x in batch_addresses],
+            cache=cache,
+        )
         should_continue = False
         for idx, address in batch_addresses:
             have_tx, balance = have_tx_mapping[address]
@@ -119,6 +123,7 @@ def _derive_addresses_from_xpub_data(
         start_receiving_index: int,
         start_change_index: int,
         gap_limit: int,
+        cache: Optional[BitcoinAddressesCache] = None,
 ) -> List[XpubDerivedAddressData]:
     """Derive all addresses from the xpub that have had transactions. Also includes
     any addresses until the biggest index derived addresses that have had no transactions.
@@ -140,6 +145,7 @@ def _derive_addresses_from_xpub_data(
             start_index=start_receiving_index,
             root=receiving_xpub,
             gap_limit=gap_limit,
+            cache=cache,
         ),
     )
     change_xpub = account_xpub.derive_child(1)
@@ -149,6 +155,7 @@ def _derive_addresses_from_xpub_data(
             start_index=start_change_index,
             root=change_xpub,
             gap_limit=gap_limit,
+            cache=cache,
         ),
     )
     return addresses
@@ -176,6 +183,7 @@ class XpubManager():
             start_receiving_index=last_receiving_idx,
             start_change_index=last_change_idx,
             gap_limit=self.chain_manager.btc_derivation_gap_limit,
+            cache=self.chain_manager.btc_addresses_cache,
         )
         known_btc_addresses = self.db.get_blockchain_accounts().btc
 
@@ -1,6 +1,8 @@
 import importlib
+import itertools
 import logging
 import pkgutil
+from collections import defaultdict
 from types import ModuleType
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
@@ -13,6 +15,7 @@ from rotkehlchen.accounting.structures.base import (
     HistoryEventType,
 )
 from rotkehlchen.assets.asset import EthereumToken
+from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.assets.utils import get_or_create_ethereum_token
 from rotkehlchen.chain.ethereum.abi import decode_event_data_abi_str
 from rotkehlchen.chain.ethereum.constants import MODULES_PACKAGE, MODULES_PREFIX_LENGTH
@@ -20,6 +23,7 @@ from rotkehlchen.chain.ethereum.structures import EthereumTxReceipt, EthereumTxR
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import A_1INCH, A_ETH, A_GTC
+from rotkehlchen.constants.resolver import ethaddress_to_identifier
 from rotkehlchen.db.constants import HISTORY_MAPPING_DECODED
 from rotkehlchen.db.ethtx import DBEthTx
 from rotkehlchen.db.filtering import ETHTransactionsFilterQuery, HistoryEventFilterQuery
@@ -32,6 +36,7 @@ from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import (
     ChecksumEthAddress,
+    EthereumInternalTransaction,
     EthereumTransaction,
     EVMTxHash,
     Location,
@@ -58,6 +63,7 @@ from .constants import (
     GTC_CLAIM,
     ONEINCH_CLAIM,
 )
+from .parallel import PARALLEL_DECODING_MIN_TXS, DecoderSnapshot, decode_in_processes
 from .structures import ActionItem
 from .utils import maybe_reshuffle_events
 
@@ -88,12 +94,20 @@ class EVMTransactionDecoder():
         self.dbethtx = DBEthTx(self.database)
         self.dbevents = DBHistoryEvents(self.database)
         self.base = BaseDecoderTools(database=database)
-        self.event_rules = [  # rules to try for all tx receipt logs decoding
-            self._maybe_decode_erc20_approve,
-            self._maybe_decode_erc20_721_transfer,
-            self._maybe_enrich_transfers,
-            self._maybe_decode_governance,
-        ]
+        self.event_rules: List[Callable] = []  # rules to try for all tx receipt logs decoding
+        # rules to try only for the tx receipt logs whose first topic is the key
+        self.topic_rules: Dict[bytes, List[Callable]] = {
+            ERC20_APPROVE: [self._maybe_decode_erc20_approve],
+            ERC20_OR_ERC721_TRANSFER: [self._maybe_decode_erc20_721_transfer],
+            GTC_CLAIM: [self._maybe_enrich_transfers],
+            ONEINCH_CLAIM: [self._maybe_enrich_transfers],
+            GNOSIS_CHAIN_BRIDGE_RECEIVE: [self._maybe_enrich_transfers],
+            GOVERNORALPHA_PROPOSE: [self._maybe_decode_governance],
+        }
+        # tokens (or None if not a known token) by log address. Cleared in reload_from_db()
+        self.tokens_cache: Dict[ChecksumEthAddress, Optional[EthereumToken]] = {}
+        # identifiers of log addresses that are not assets. Cleared in reload_from_db()
+        self.preload_misses: Set[str] = set()
         self.token_enricher_rules: List[Callable] = []  # enrichers to run for token transfers
         self.initialize_all_decoders()
         self.undecoded_tx_query_lock = Semaphore()
@@ -103,12 +117,14 @@ class EVMTransactionDecoder():
     ) -> Tuple[
             Dict[ChecksumEthAddress, Tuple[Any, ...]],
             List[Callable],
+            Dict[bytes, List[Callable]],
             List[Callable],
     ]:
         if isinstance(package, str):
             package = importlib.import_module(package)
         address_results = {}
         rules_results = []
+        topic_rules_results: Dict[bytes, List[Callable]] = defaultdict(list)
         enricher_results = []
         for _, name, is_pkg in pkgutil.walk_packages(package.__path__):
             full_name = package.__name__ + '.' + name
@@ -133,23 +149,29 @@ class EVMTransactionDecoder():
                     )
                     address_results.update(self.decoders[class_name].addresses_to_decoders())
                     rules_results.extend(self.decoders[class_name].decoding_rules())
+                    for topic, rules in self.decoders[class_name].decoding_rules_by_topic().items():  # noqa: E501
+                        topic_rules_results[topic].extend(rules)
                     enricher_results.extend(self.decoders[class_name].enricher_rules())
                     self.all_counterparties.update(self.decoders[class_name].counterparties())
 
-                recursive_addrs, recursive_rules, recurisve_enricher_results = self._recursively_initialize_decoders(full_name)  # noqa: E501
+                recursive_addrs, recursive_rules, recursive_topic_rules, recurisve_enricher_results = self._recursively_initialize_decoders(full_name)  # noqa: E501
                 address_results.update(recursive_addrs)
                 rules_results.extend(recursive_rules)
+                for topic, rules in recursive_topic_rules.items():
+                    topic_rules_results[topic].extend(rules)
                 enricher_results.extend(recurisve_enricher_results)
 
-        return address_results, rules_results, enricher_results
+        return address_results, rules_results, topic_rules_results, enricher_results
 
     def initialize_all_decoders(self) -> None:
         """Recursively check all submodules to get all decoder address mappings and rules
         """
         self.decoders: Dict[str, 'DecoderInterface'] = {}
-        address_result, rules_result, enrichers_result = self._recursively_initialize_decoders(MODULES_PACKAGE)  # noqa: E501
+        address_result, rules_result, topic_rules_result, enrichers_result = self._recursively_initialize_decoders(MODULES_PACKAGE)  # noqa: E501
         self.address_mappings = address_result
         self.event_rules.extend(rules_result)
+        for topic, rules in topic_rules_result.items():
+            self.topic_rules.setdefault(topic, []).extend(rules)
         self.token_enricher_rules.extend(enrichers_result)
         # update with counterparties not in any module
         self.all_counterparties.update([CPT_GAS, CPT_GNOSIS_CHAIN])
@@ -157,19 +179,35 @@ class EVMTransactionDecoder():
     def reload_from_db(self) -> None:
         """Reload all related settings from DB so that decoding happens with latest"""
         self.base.refresh_tracked_accounts()
+        self.tokens_cache.clear()
+        self.preload_misses.clear()
         for _, decoder in self.decoders.items():
             if isinstance(decoder, CustomizableDateMixin):
                 decoder.reload_settings()
 
+    def get_token(self, address: ChecksumEthAddress) -> Optional[EthereumToken]:
+        """Gets the token of the given address, keeping it in memory for the next logs"""
+        try:
+            return self.tokens_cache[address]
+        except KeyError:
+            token = GlobalDBHandler.get_ethereum_token(address)
+            self.tokens_cache[address] = token
+            return token
+
     def try_all_rules(
             self,
-            token: Optional[EthereumToken],
             tx_log: EthereumTxReceiptLog,
             transaction: EthereumTransaction,
             decoded_events: List[HistoryBaseEntry],
             action_items: List[ActionItem],
     ) -> Optional[HistoryBaseEntry]:
-        for rule in self.event_rules:
+        """Tries the rules of the log's first topic and then all the generic rules"""
+        topic_rules = self.topic_rules.get(tx_log.topics[0], []) if len(tx_log.topics) != 0 else []  # noqa: E501
+        if len(topic_rules) == 0 and len(self.event_rules) == 0:
+            return None
+
+        token = self.get_token(tx_log.address)
+        for rule in itertools.chain(topic_rules, self.event_rules):
             event = rule(token=token, tx_log=tx_log, transaction=transaction, decoded_events=decoded_events, action_items=action_items)  # noqa: E501
             if event:
                 return event
@@ -216,11 +254,29 @@ class EVMTransactionDecoder():
             tx_receipt: EthereumTxReceipt,
     ) -> List[HistoryBaseEntry]:
         """Decodes an ethereum transaction and its receipt and saves result in the DB"""
-        cursor = self.database.conn.cursor()
+        internal_txs = self._get_internal_transactions(transaction, tx_receipt)
+        events = self.decode_transaction_events(transaction, tx_receipt, internal_txs)
+        self._write_decoded_events(transaction, events)
+        return sorted(events, key=lambda x: x.sequence_index, reverse=False)
+
+    def decode_transaction_events(
+            self,
+            transaction: EthereumTransaction,
+            tx_receipt: EthereumTxReceipt,
+            internal_txs: List[EthereumInternalTransaction],
+    ) -> List[HistoryBaseEntry]:
+        """Decodes an ethereum transaction, its receipt and internal transactions.
+
+        Nothing is written in the DB. The events are returned in the order they were created.
+        """
         self.base.reset_sequence_counter()
         # check if any eth transfer happened in the transaction, including in internal transactions
-        events = self._maybe_decode_simple_transactions(transaction, tx_receipt)
+        events = self._maybe_decode_simple_transactions(transaction, tx_receipt, internal_txs)
         action_items: List[ActionItem] = []
+        # Most log addresses are tokens that the rules will resolve. Do it in bulk and
+        # remember the ones that are not so that they are not queried for every receipt
+        identifiers = {ethaddress_to_identifier(x.address) for x in tx_receipt.logs}
+        self.preload_misses.update(AssetResolver().preload(identifiers - self.preload_misses))
 
         # decode transaction logs from the receipt
         for tx_log in tx_receipt.logs:
@@ -231,32 +287,101 @@ class EVMTransactionDecoder():
                 events.append(event)
                 continue
 
-            token = GlobalDBHandler.get_ethereum_token(tx_log.address)
-            event = self.try_all_rules(token=token, tx_log=tx_log, transaction=transaction, decoded_events=events, action_items=action_items)  # noqa: E501
+            event = self.try_all_rules(tx_log=tx_log, transaction=transaction, decoded_events=events, action_items=action_items)  # noqa: E501
             if event:
                 events.append(event)
 
+        return events
+
+    def _get_internal_transactions(
+            self,
+            transaction: EthereumTransaction,
+            tx_receipt: EthereumTxReceipt,
+    ) -> List[EthereumInternalTransaction]:
+        """Internal transactions are not decoded for failed transactions so don't query them"""
+        if tx_receipt.status is False:
+            return []
+
+        return self.dbethtx.get_ethereum_internal_transactions(parent_tx_hash=transaction.tx_hash)
+
+    def _write_decoded_events(
+            self,
+            transaction: EthereumTransaction,
+            events: List[HistoryBaseEntry],
+    ) -> None:
+        """Saves the decoded events of a transaction and marks it as decoded"""
+        cursor = self.database.conn.cursor()
         self.dbevents.add_history_events(events)
         cursor.execute(
             'INSERT OR IGNORE INTO evm_tx_mappings(tx_hash, blockchain, value) VALUES(?, ?, ?)',
             (transaction.tx_hash, 'ETH', HISTORY_MAPPING_DECODED),
         )
         self.database.update_last_write()
-        return sorted(events, key=lambda x: x.sequence_index, reverse=False)
 
-    def get_and_decode_undecoded_transactions(self, limit: Optional[int] = None) -> None:
+    def _decode_in_processes(
+            self,
+            transactions: List[Tuple[EthereumTransaction, EthereumTxReceipt]],
+            processes: int,
+    ) -> List[List[HistoryBaseEntry]]:
+        """Decodes the given transactions in a pool of processes and saves the results
+
+        Results are written by this process one transaction at a time and in the given
+        order, so the outcome is the same as decoding each transaction with
+        decode_transaction(). Transactions the workers can't decode on their own are
+        decoded here.
+        """
+        snapshot = DecoderSnapshot(
+            globaldb_directory=GlobalDBHandler()._data_directory,  # type: ignore  # is set
+            tracked_accounts=self.base.tracked_accounts,
+            settings=self.database.get_settings(),
+        )
+        work = [
+            (transaction, tx_receipt, self._get_internal_transactions(transaction, tx_receipt))
+            for transaction, tx_receipt in transactions
+        ]
+        results = []
+        serially_decoded = 0
+        for (transaction, tx_receipt, _), serialized_events in zip(work, decode_in_processes(snapshot=snapshot, work=work, processes=processes)):  # noqa: E501
+            if serialized_events is None:
+                serially_decoded += 1
+                results.append(self.decode_transaction(transaction, tx_receipt))
+                continue
+
+            events = [HistoryBaseEntry.deserialize_from_db((None,) + x) for x in serialized_events]  # type: ignore  # noqa: E501
+            self._write_decoded_events(transaction, events)
+            results.append(sorted(events, key=lambda x: x.sequence_index, reverse=False))
+
+        log.debug(
+            f'Decoded {len(work)} transactions with {processes} processes. '
+            f'{serially_decoded} of them had to be decoded serially',
+        )
+        return results
+
+    def get_and_decode_undecoded_transactions(
+            self,
+            limit: Optional[int] = None,
+            processes: int = 1,
+    ) -> None:
         """Checks the DB for up to `limit` undecoded transactions and decodes them.
 
         This is protected by concurrent access from a lock"""
         with self.undecoded_tx_query_lock:
             hashes = self.dbethtx.get_transaction_hashes_not_decoded(limit=limit)
-            self.decode_transaction_hashes(ignore_cache=False, tx_hashes=hashes)
+            self.decode_transaction_hashes(ignore_cache=False, tx_hashes=hashes, processes=processes)  # noqa: E501
 
-    def decode_transaction_hashes(self, ignore_cache: bool, tx_hashes: Optional[List[EVMTxHash]]) -> List[HistoryBaseEntry]:  # noqa: E501
+    def decode_transaction_hashes(
+            self,
+            ignore_cache: bool,
+            tx_hashes: Optional[List[EVMTxHash]],
+            processes: int = 1,
+    ) -> List[HistoryBaseEntry]:
         """Make sure that receipts are pulled + events decoded for the given transaction hashes.
 
         The transaction hashes must exist in the DB at the time of the call
 
+        If processes is more than 1 and there are at least PARALLEL_DECODING_MIN_TXS
+        transactions to decode, decoding happens in a pool of that many processes.
+
         May raise:
         - DeserializationError if there is a problem with conacting a remote to get receipts
         - RemoteError if there is a problem with contacting a remote to get receipts
@@ -272,25 +397,72 @@ class EVMTransactionDecoder():
             for entry in cursor.execute('SELECT tx_hash FROM ethereum_transactions'):
                 tx_hashes.append(EVMTxHash(entry[0]))
 
-        for tx_hash in tx_hashes:
-            try:
-                receipt = self.eth_transactions.get_or_query_transaction_receipt(tx_hash)
-            except RemoteError as e:
-                raise InputError(f'Hash {tx_hash.hex()} does not correspond to a transaction') from e  # noqa: E501
-
-            # TODO: Change this if transaction filter query can accept multiple hashes
-            txs = self.dbethtx.get_ethereum_transactions(
-                filter_=ETHTransactionsFilterQuery.make(tx_hash=tx_hash),
-                has_premium=True,  # ignore limiting here
-            )
-            events.extend(self.get_or_decode_transaction_events(
-                transaction=txs[0],
-                tx_receipt=receipt,
-                ignore_cache=ignore_cache,
-            ))
+        # receipts and decoded events of all the transactions are written in few commits
+        with self.database.write_batch(caller='EVMTransactionDecoder.decode_transaction_hashes'):
+            if processes > 1 and len(tx_hashes) >= PARALLEL_DECODING_MIN_TXS:
+                return self._decode_transaction_hashes_in_processes(
+                    ignore_cache=ignore_cache,
+                    tx_hashes=tx_hashes,
+                    processes=processes,
+                )
+
+            for tx_hash in tx_hashes:
+                transaction, receipt = self._get_transaction_and_receipt(tx_hash)
+                events.extend(self.get_or_decode_transaction_events(
+                    transaction=transaction,
+                    tx_receipt=receipt,
+                    ignore_cache=ignore_cache,
+                ))
 
         return events
 
+    def _get_transaction_and_receipt(
+            self,
+            tx_hash: EVMTxHash,
+    ) -> Tuple[EthereumTransaction, EthereumTxReceipt]:
+        """May raise:
+        - DeserializationError/RemoteError if there is a problem with querying the receipt
+        - InputError if the transaction hash is not found in the DB
+        """
+        try:
+            receipt = self.eth_transactions.get_or_query_transaction_receipt(tx_hash)
+        except RemoteError as e:
+            raise InputError(f'Hash {tx_hash.hex()} does not correspond to a transaction') from e  # noqa: E501
+
+        # TODO: Change this if transaction filter query can accept multiple hashes
+        txs = self.dbethtx.get_ethereum_transactions(
+            filter_=ETHTransactionsFilterQuery.make(tx_hash=tx_hash),
+            has_premium=True,  # ignore limiting here
+        )
+        return txs[0], receipt
+
+    def _decode_transaction_hashes_in_processes(
+            self,
+            ignore_cache: bool,
+            tx_hashes: List[EVMTxHash],
+            processes: int,
+    ) -> List[HistoryBaseEntry]:
+        """Same as decode_transaction_hashes() but decodes in a pool of processes"""
+        events_per_tx: Dict[EVMTxHash, List[HistoryBaseEntry]] = {}
+        to_decode: List[Tuple[EthereumTransaction, EthereumTxReceipt]] = []
+        seen_hashes = set()
+        for tx_hash in tx_hashes:
+            if tx_hash in seen_hashes:
+                continue
+            seen_hashes.add(tx_hash)
+            transaction, receipt = self._get_transaction_and_receipt(tx_hash)
+            existing_events = self._get_decoded_events_or_clean(transaction, ignore_cache)
+            if existing_events is None:
+                to_decode.append((transaction, receipt))
+            else:
+                events_per_tx[tx_hash] = existing_events
+
+        decoded_events = self._decode_in_processes(to_decode, processes)
+        for (transaction, _), tx_events in zip(to_decode, decoded_events):
+            events_per_tx[transaction.tx_hash] = tx_events
+
+        return [event for tx_hash in tx_hashes for event in events_per_tx[tx_hash]]
+
     def get_or_decode_transaction_events(
             self,
             transaction: EthereumTransaction,
@@ -298,6 +470,22 @@ class EVMTransactionDecoder():
             ignore_cache: bool,
     ) -> List[HistoryBaseEntry]:
         """Get a transaction's events if existing in the DB or decode them"""
+        events = self._get_decoded_events_or_clean(transaction, ignore_cache)
+        if events is not None:
+            return events
+
+        # else we should decode now
+        return self.decode_transaction(transaction, tx_receipt)
+
+    def _get_decoded_events_or_clean(
+            self,
+            transaction: EthereumTransaction,
+            ignore_cache: bool,
+    ) -> Optional[List[HistoryBaseEntry]]:
+        """Returns the transaction's events if already decoded and ignore_cache is False.
+
+        If ignore_cache is True the already decoded events are deleted and None is returned
+        """
         cursor = self.database.conn.cursor()
         if ignore_cache is True:  # delete all decoded events
             self.dbevents.delete_events_by_tx_hash([transaction.tx_hash])
@@ -319,14 +507,12 @@ class EVMTransactionDecoder():
                 )
                 return events
 
-        # else we should decode now
-        events = self.decode_transaction(transaction, tx_receipt)
-        return events
+        return None
 
     def _maybe_decode_internal_transactions(
         self,
-        tx: EthereumTransaction,
         tx_receipt: EthereumTxReceipt,
+        internal_txs: List[EthereumInternalTransaction],
         events: List[HistoryBaseEntry],
         tx_hash_hex: str,
         ts_ms: TimestampMS,
@@ -338,9 +524,6 @@ class EVMTransactionDecoder():
         if tx_receipt.status is False:
             return
 
-        internal_txs = self.dbethtx.get_ethereum_internal_transactions(
-            parent_tx_hash=tx.tx_hash,
-        )
         for internal_tx in internal_txs:
             if internal_tx.to_address is None:
                 continue  # can that happen? Internal transaction deploying a contract?
@@ -371,6 +554,7 @@ class EVMTransactionDecoder():
             self,
             tx: EthereumTransaction,
             tx_receipt: EthereumTxReceipt,
+            internal_txs: List[EthereumInternalTransaction],
     ) -> List[HistoryBaseEntry]:
         """Decodes normal ETH transfers, internal transactions and gas cost payments"""
         events: List[HistoryBaseEntry] = []
@@ -399,8 +583,8 @@ class EVMTransactionDecoder():
 
         # Decode internal transactions after gas so gas is always 0 indexed
         self._maybe_decode_internal_transactions(
-            tx=tx,
             tx_receipt=tx_receipt,
+            internal_txs=internal_txs,
             events=events,
             tx_hash_hex=tx_hash_hex,
             ts_ms=ts_ms,
@@ -505,6 +689,7 @@ class EVMTransactionDecoder():
                 )
             except NotERC20Conformant:
                 return None  # ignore non-ERC20 transfers for now
+            self.tokens_cache[tx_log.address] = found_token
         else:
             found_token = token
 
@@ -42,6 +42,14 @@ class DecoderInterface(metaclass=ABCMeta):
         """
         return []
 
+    def decoding_rules_by_topic(self) -> Dict[bytes, List[Callable]]:  # pylint: disable=no-self-use  # noqa: E501
+        """
+        Subclasses may implement this to add decoding rules that only need to be attempted
+        for logs whose first topic is the given one. Preferred over decoding_rules() since
+        the rules are then only called for the logs they can decode.
+        """
+        return {}
+
     def enricher_rules(self) -> List[Callable]:  # pylint: disable=no-self-use
         """
         Subclasses may implement this to add new generic decoding rules to be attempted
@@ -0,0 +1,142 @@
+"""Decoding of independent transactions in a pool of worker processes
+
+Workers get a read-only snapshot of the decoder state and no access to the user DB
+or to the ethereum nodes. Any transaction whose decoding needs either of them (for
+example to create a token that is not in the global DB) is reported back as not
+decoded so that the parent decodes it normally. The parent is the single writer.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from gevent import get_hub
+
+from rotkehlchen.accounting.structures.base import HISTORY_EVENT_DB_TUPLE_WRITE
+from rotkehlchen.chain.ethereum.structures import EthereumTxReceipt
+from rotkehlchen.db.settings import DBSettings
+from rotkehlchen.db.utils import BlockchainAccounts
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.types import EthereumInternalTransaction, EthereumTransaction
+from rotkehlchen.user_messages import MessagesAggregator
+
+if TYPE_CHECKING:
+    from rotkehlchen.chain.ethereum.decoding.decoder import EVMTransactionDecoder
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Below this number of transactions the cost of starting the workers is not worth it
+PARALLEL_DECODING_MIN_TXS = 500
+# Number of transactions sent to a worker at a time
+PARALLEL_DECODING_CHUNKSIZE = 50
+
+DecodingWork = Tuple[EthereumTransaction, EthereumTxReceipt, List[EthereumInternalTransaction]]
+# The DB tuples of the decoded events or None if the transaction has to be decoded serially
+DecodingResult = Optional[List[HISTORY_EVENT_DB_TUPLE_WRITE]]
+
+
+class DecoderSnapshot(NamedTuple):
+    """The read-only part of the decoder state that the workers need"""
+    globaldb_directory: Path
+    tracked_accounts: BlockchainAccounts
+    settings: DBSettings
+
+
+class SerialDecodingRequired(Exception):
+    """Raised in a worker when decoding needs the user DB or the ethereum nodes"""
+
+
+class _SnapshotDBHandler():
+    """Stands in for the DBHandler in the workers serving only the snapshotted data"""
+
+    def __init__(self, snapshot: DecoderSnapshot) -> None:
+        self.snapshot = snapshot
+
+    def get_blockchain_accounts(self) -> BlockchainAccounts:
+        return self.snapshot.tracked_accounts
+
+    def get_settings(self) -> DBSettings:
+        return self.snapshot.settings
+
+    def __getattr__(self, name: str) -> Any:
+        raise SerialDecodingRequired(f'Decoding tried to access the user DB via {name}')
+
+
+class _UnavailableEthereumManager():
+    """Stands in for the EthereumManager in the workers"""
+
+    def __getattr__(self, name: str) -> Any:
+        raise SerialDecodingRequired(f'Decoding tried to access the ethereum nodes via {name}')
+
+
+_worker_decoder: Optional['EVMTransactionDecoder'] = None
+
+
+def _initialize_worker(snapshot: DecoderSnapshot) -> None:
+    from rotkehlchen.chain.ethereum.decoding.decoder import EVMTransactionDecoder  # isort:skip  # noqa: E501  # pylint: disable=import-outside-toplevel
+    global _worker_decoder  # pylint: disable=global-statement
+    # the parent owns the global DB, so the workers only read it
+    GlobalDBHandler(snapshot.globaldb_directory, read_only=True)
+    _worker_decoder = EVMTransactionDecoder(
+        database=_SnapshotDBHandler(snapshot),  # type: ignore  # only the snapshot is needed
+        ethereum_manager=_UnavailableEthereumManager(),  # type: ignore
+        eth_transactions=None,  # type: ignore  # only needed for querying receipts
+        msg_aggregator=MessagesAggregator(),
+    )
+
+
+def _decode_in_worker(work: DecodingWork) -> DecodingResult:
+    assert _worker_decoder is not None, 'worker should have been initialized'
+    transaction, tx_receipt, internal_txs = work
+    try:
+        events = _worker_decoder.decode_transaction_events(transaction, tx_receipt, internal_txs)
+    except Exception as e:  # pylint: disable=broad-except
+        # anything unexpected is retried by the parent so that it is handled as usual
+        log.debug(f'Parallel decoding of {transaction.tx_hash.hex()} deferred due to {str(e)}')
+        return None
+
+    return [x.serialize_for_db() for x in events]
+
+
+def _decode_in_pool(
+        snapshot: DecoderSnapshot,
+        work: Sequence[DecodingWork],
+        processes: int,
+) -> List[DecodingResult]:
+    results: List[DecodingResult] = []
+    try:
+        # spawn so that workers don't inherit the gevent hub and the open DB connections
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_initialize_worker,
+            initargs=(snapshot,),
+        ) as executor:
+            for result in executor.map(_decode_in_worker, work, chunksize=PARALLEL_DECODING_CHUNKSIZE):  # noqa: E501
+                results.append(result)
+    except BrokenProcessPool as e:
+        log.error(
+            f'The transaction decoding processes stopped unexpectedly due to {str(e)}. '
+            f'The remaining {len(work) - len(results)} transactions will be decoded serially',
+        )
+
+    return results + [None] * (len(work) - len(results))
+
+
+def decode_in_processes(
+        snapshot: DecoderSnapshot,
+        work: Sequence[DecodingWork],
+        processes: int,
+) -> List[DecodingResult]:
+    """Decodes the given transactions in a pool of processes
+
+    Results are returned in the order of the given work. If the pool breaks, for
+    example due to a worker getting killed, the transactions left are returned as
+    not decoded. Waiting for the workers happens in a native thread so that the
+    gevent hub is not blocked meanwhile.
+    """
+    return get_hub().threadpool.apply(_decode_in_pool, (snapshot, work, processes))
@@ -1,4 +1,3 @@
-from collections import defaultdict
 from typing import TYPE_CHECKING, Dict, List
 
 from rotkehlchen.chain.ethereum.defi.structures import DefiProtocolBalances
@@ -25,9 +24,11 @@ class DefiChad():
             self,
             addresses: List[ChecksumEthAddress],
     ) -> Dict[ChecksumEthAddress, List[DefiProtocolBalances]]:
-        defi_balances = defaultdict(list)
-        for account in addresses:
-            balances = self.zerion_sdk.all_balances_for_account(account)
-            if len(balances) != 0:
-                defi_balances[account] = balances
-        return defi_balances
+        """Queries the DeFi balances of the given addresses from the Zerion SDK
+
+        Addresses without any DeFi balances are not in the returned mapping.
+
+        May raise:
+        - RemoteError if any of the contract calls fails
+        """
+        return self.zerion_sdk.all_balances_for_accounts(addresses)
@@ -1,5 +1,8 @@
 import logging
-from typing import TYPE_CHECKING, List, Optional, Tuple
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from gevent.pool import Pool
 
 from rotkehlchen.accounting.structures.balance import Balance
 from rotkehlchen.assets.asset import EthereumToken
@@ -16,6 +19,7 @@ from rotkehlchen.chain.ethereum.utils import token_normalized_value_decimals
 from rotkehlchen.constants.assets import A_DAI, A_USDC
 from rotkehlchen.constants.ethereum import ETH_SPECIAL_ADDRESS, ZERION_ABI
 from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.constants.timing import DAY_IN_SECONDS
 from rotkehlchen.errors.asset import UnknownAsset, UnsupportedAsset
 from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.errors.serialization import DeserializationError
@@ -23,9 +27,9 @@ from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import Inquirer, get_underlying_asset_price
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.serialization.deserialize import deserialize_ethereum_address
-from rotkehlchen.types import ChecksumEthAddress, Price
+from rotkehlchen.types import ChecksumEthAddress, Price, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
-from rotkehlchen.utils.misc import get_chunks
+from rotkehlchen.utils.misc import get_chunks, ts_now
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.ethereum.manager import EthereumManager
@@ -35,6 +39,13 @@ log = RotkehlchenLogsAdapter(logger)
 
 
 PROTOCOLS_QUERY_NUM = 40  # number of protocols to query in a single call
+# The calls of all accounts run concurrently. Each call picks its own random order
+# of the open nodes, so the calls are spread across them.
+ZERION_QUERY_CONCURRENCY = 8
+# Protocols in which an account had no balances are not queried again for it
+# until its ETH balance changes, which happens with any transaction it sends,
+# or until this much time has passed. Contracts always get all protocols queried.
+EMPTY_PROTOCOLS_MAX_AGE = DAY_IN_SECONDS
 KNOWN_ZERION_PROTOCOL_NAMES = (
     'Curve • Vesting',
     'Curve • Liquidity Gauges',
@@ -188,6 +199,13 @@ def _handle_pooltogether(normalized_balance: FVal, token_name: str) -> Optional[
     return None
 
 
+class EmptyProtocols(NamedTuple):
+    """The protocols in which an account had no balances"""
+    eth_balance: FVal  # the ETH balance of the account when they were queried
+    timestamp: Timestamp
+    names: FrozenSet[str]
+
+
 # supported zerion adapter address
 ZERION_ADAPTER_ADDRESS = string_to_ethereum_address('0x06FE76B2f432fdfEcAEf1a7d4f6C3d41B5861672')
 
@@ -208,6 +226,7 @@ class ZerionSDK():
             deployed_block=1586199170,
         )
         self.protocol_names: Optional[List[str]] = None
+        self.empty_protocols: Dict[ChecksumEthAddress, EmptyProtocols] = {}
 
     def _get_protocol_names(self) -> List[str]:
         if self.protocol_names is not None:
@@ -229,41 +248,169 @@ class ZerionSDK():
         self.protocol_names = protocol_names
         return protocol_names
 
-    def _query_chain_for_all_balances(self, account: ChecksumEthAddress) -> List:
-        if NodeName.OWN in self.ethereum.web3_mapping:
-            try:
-                # In this case we don't care about the gas limit
-                return self.contract.call(
-                    ethereum=self.ethereum,
-                    method_name='getBalances',
-                    arguments=[account],
-                    call_order=[NodeName.OWN, NodeName.ONEINCH],
-                )
-            except RemoteError:
-                log.warning(
-                    'Failed to query zerionsdk balances with own node. Falling '
-                    'back to multiple calls to getProtocolBalances',
-                )
-
-        # but if we are not connected to our own node the zerion sdk get balances call
-        # has unfortunately crossed the default limits of almost all open nodes apart from 1inch
-        # https://github.com/rotki/rotki/issues/1969
-        # So now we get all supported protocols and query in batches
-        protocol_names = self._get_protocol_names()
-        result = []
-        protocol_chunks: List[List[str]] = list(get_chunks(
-            list(protocol_names),
-            n=PROTOCOLS_QUERY_NUM,
-        ))
-        for protocol_names in protocol_chunks:
-            contract_result = self.contract.call(
+    def _query_own_node_balances(self, account: ChecksumEthAddress) -> Optional[List]:
+        try:
+            # In this case we don't care about the gas limit
+            return self.contract.call(
                 ethereum=self.ethereum,
-                method_name='getProtocolBalances',
-                arguments=[account, protocol_names],
+                method_name='getBalances',
+                arguments=[account],
+                call_order=[NodeName.OWN, NodeName.ONEINCH],
+            )
+        except RemoteError:
+            log.warning(
+                f'Failed to query zerionsdk balances of {account} with own node. '
+                f'Falling back to multiple calls to getProtocolBalances',
             )
-            if len(contract_result) == 0:
+            return None
+
+    def _query_protocol_balances(
+            self,
+            account: ChecksumEthAddress,
+            protocol_names: List[str],
+    ) -> List:
+        return self.contract.call(
+            ethereum=self.ethereum,
+            method_name='getProtocolBalances',
+            arguments=[account, protocol_names],
+        )
+
+    def _get_eth_balances(
+            self,
+            accounts: List[ChecksumEthAddress],
+    ) -> Dict[ChecksumEthAddress, FVal]:
+        try:
+            return self.ethereum.get_multieth_balance(accounts)
+        except RemoteError as e:
+            log.warning(
+                f'Failed to query the ETH balances of the accounts whose DeFi balances are '
+                f'queried due to {str(e)}. Querying all protocols for them.',
+            )
+            return {}
+
+    def _is_contract(self, account: ChecksumEthAddress) -> bool:
+        """Returns whether the account has code. If that can't be queried it's
+        treated as a contract, so that its protocols are always queried."""
+        try:
+            code = self.ethereum.get_code(account)
+        except RemoteError as e:
+            log.warning(f'Failed to query the code of {account} due to {str(e)}')
+            return True
+
+        return code.removeprefix('0x') != ''
+
+    def _get_empty_protocols(
+            self,
+            account: ChecksumEthAddress,
+            eth_balance: Optional[FVal],
+            now: Timestamp,
+    ) -> Optional[EmptyProtocols]:
+        """Returns the protocols the account had no balances in, if they are still valid"""
+        empty_protocols = self.empty_protocols.get(account)
+        if empty_protocols is None:
+            return None
+        if (
+            eth_balance is None or
+            eth_balance != empty_protocols.eth_balance or
+            now - empty_protocols.timestamp > EMPTY_PROTOCOLS_MAX_AGE
+        ):
+            del self.empty_protocols[account]
+            return None
+
+        return empty_protocols
+
+    def _query_chain_for_all_balances(
+            self,
+            accounts: Sequence[ChecksumEthAddress],
+    ) -> Dict[ChecksumEthAddress, List]:
+        """Queries the protocol balances of all accounts concurrently
+
+        May raise:
+        - RemoteError if any of the contract calls fails
+        """
+        result: Dict[ChecksumEthAddress, List] = defaultdict(list)
+        accounts_to_query = list(accounts)
+        pool = Pool(ZERION_QUERY_CONCURRENCY)
+        try:
+            if NodeName.OWN in self.ethereum.web3_mapping:
+                own_node_greenlets = [
+                    pool.spawn(self._query_own_node_balances, account)
+                    for account in accounts_to_query
+                ]
+                pool.join()
+                queried_accounts = accounts_to_query
+                accounts_to_query = []
+                for account, greenlet in zip(queried_accounts, own_node_greenlets):
+                    balances = greenlet.get()
+                    if balances is None:
+                        accounts_to_query.append(account)
+                    else:
+                        result[account] = balances
+
+            if len(accounts_to_query) == 0:
+                return result
+
+            # but if we are not connected to our own node the zerion sdk get balances
+            # call has unfortunately crossed the default limits of almost all open nodes
+            # apart from 1inch https://github.com/rotki/rotki/issues/1969
+            # So now we get all supported protocols and query in batches
+            protocol_names = self._get_protocol_names()
+            eth_balances = self._get_eth_balances(accounts_to_query)
+            now = ts_now()
+            greenlets = []
+            for account in accounts_to_query:
+                empty_protocols = self._get_empty_protocols(
+                    account=account,
+                    eth_balance=eth_balances.get(account),
+                    now=now,
+                )
+                names = protocol_names
+                if empty_protocols is not None:
+                    names = [x for x in protocol_names if x not in empty_protocols.names]
+                for protocol_names_chunk in get_chunks(names, n=PROTOCOLS_QUERY_NUM):
+                    greenlets.append((
+                        account,
+                        protocol_names_chunk,
+                        pool.spawn(self._query_protocol_balances, account, protocol_names_chunk),
+                    ))
+            pool.join()
+
+            newly_empty: Dict[ChecksumEthAddress, List[str]] = defaultdict(list)
+            for account, protocol_names_chunk, greenlet in greenlets:
+                contract_result = greenlet.get()
+                result[account].extend(contract_result)
+                returned_names = {entry[0][0] for entry in contract_result}
+                # Only trust the returned names if they are all among the queried ones
+                if returned_names.issubset(protocol_names_chunk):
+                    newly_empty[account].extend(
+                        x for x in protocol_names_chunk if x not in returned_names
+                    )
+
+            # The ETH balance of a contract wallet, such as a Safe, does not change
+            # when it opens a position. So the empty protocols of contracts are not
+            # kept. This is checked when the empty protocols of an account are new.
+            contract_greenlets = [
+                (account, pool.spawn(self._is_contract, account))
+                for account in accounts_to_query
+                if account in eth_balances and account not in self.empty_protocols
+            ]
+            pool.join()
+            contracts = {account for account, greenlet in contract_greenlets if greenlet.get()}
+        finally:
+            pool.kill()
+
+        for account in accounts_to_query:
+            eth_balance = eth_balances.get(account)
+            if eth_balance is None or account in contracts:
                 continue
-            result.extend(contract_result)
+            empty_protocols = self.empty_protocols.get(account)
+            self.empty_protocols[account] = EmptyProtocols(
+                eth_balance=eth_balance,
+                timestamp=now if empty_protocols is None else empty_protocols.timestamp,
+                names=frozenset(newly_empty[account]).union(
+                    empty_protocols.names if empty_protocols is not None else (),
+                ),
+            )
 
         return result
 
@@ -272,7 +419,29 @@ class ZerionSDK():
 
         https://docs.zerion.io/smart-contracts/adapterregistry-v3#getbalances
         """
-        result = self._query_chain_for_all_balances(account=account)
+        return self.all_balances_for_accounts([account]).get(account, [])
+
+    def all_balances_for_accounts(
+            self,
+            accounts: Sequence[ChecksumEthAddress],
+    ) -> Dict[ChecksumEthAddress, List[DefiProtocolBalances]]:
+        """Queries the protocol balances of many accounts at once
+
+        Accounts without any protocol balances are not in the returned mapping.
+
+        May raise:
+        - RemoteError if any of the contract calls fails
+        """
+        result = self._query_chain_for_all_balances(accounts=accounts)
+        balances = {}
+        for account, entries in result.items():
+            protocol_balances = self._deserialize_protocol_balances(entries)
+            if len(protocol_balances) != 0:
+                balances[account] = protocol_balances
+
+        return balances
+
+    def _deserialize_protocol_balances(self, result: List) -> List[DefiProtocolBalances]:
         protocol_balances = []
         for entry in result:
             protocol = DefiProtocol(
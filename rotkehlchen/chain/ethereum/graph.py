@@ -1,7 +1,7 @@
 import json
 import logging
 import re
-from typing import Any, Dict, Literal, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence, Tuple
 
 import gevent
 import requests
@@ -12,6 +12,8 @@ from rotkehlchen.constants.timing import QUERY_RETRY_TIMES
 from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import ChecksumEthAddress, Timestamp
+from rotkehlchen.utils.concurrency import GRAPH_QUERIES_LIMIT
+from rotkehlchen.utils.misc import get_chunks
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -19,6 +21,8 @@ log = RotkehlchenLogsAdapter(logger)
 
 GRAPH_QUERY_LIMIT = 1000
 GRAPH_QUERY_SKIP_LIMIT = 5000
+# How many addresses are given to the `_in` filters of a single query
+GRAPH_QUERY_ADDRESSES_LIMIT = 100
 RE_MULTIPLE_WHITESPACE = re.compile(r'\s+')
 RETRY_BACKOFF_FACTOR = 0.2
 SUBGRAPH_REMOTE_ERROR_MSG = (
@@ -91,7 +95,8 @@ class Graph():
         retries_left = QUERY_RETRY_TIMES
         while retries_left > 0:
             try:
-                result = self.client.execute(gql(querystr), variable_values=param_values)
+                with GRAPH_QUERIES_LIMIT:
+                    result = self.client.execute(gql(querystr), variable_values=param_values)
             # need to catch Exception here due to stupidity of gql library
             except (requests.exceptions.RequestException, Exception) as e:  # pylint: disable=broad-except  # noqa: E501
                 # NB: the lack of a good API error handling by The Graph combined
@@ -117,3 +122,80 @@ class Graph():
 
         log.debug('Got result from The Graph query')
         return result
+
+    def query_paginated(
+            self,
+            querystr: str,
+            entity: str,
+            param_types: Dict[str, Any],
+            param_values: Dict[str, Any],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Queries all the entities matching a query, yielding them a page at a time
+
+        The pages are requested by the id of the last entity of the previous page
+        instead of skipping entities, which The Graph limits. So the query needs
+        `first: $limit`, `orderBy: id` and an `id_gt: $id` filter on the entity.
+
+        May raise:
+        - RemoteError: If there is a problem querying the subgraph and there
+        are no retries left.
+        """
+        param_types = {**param_types, '$limit': 'Int!', '$id': 'ID!'}
+        param_values = {**param_values, 'limit': GRAPH_QUERY_LIMIT, 'id': '0'}
+        while True:
+            result = self.query(
+                querystr=querystr,
+                param_types=param_types,
+                param_values=param_values,
+            )
+            page = result[entity]
+            yield page
+            if len(page) < GRAPH_QUERY_LIMIT:
+                break
+
+            param_values['id'] = page[-1]['id']
+
+    def query_addresses(
+            self,
+            querystr: str,
+            entity: str,
+            address_field: str,
+            addresses: Sequence[ChecksumEthAddress],
+            param_types: Dict[str, Any],
+            param_values: Dict[str, Any],
+            address_type: Literal['Bytes!', 'String!', 'ID!'] = 'Bytes!',
+    ) -> Iterator[Tuple[ChecksumEthAddress, Dict[str, Any]]]:
+        """Queries the entities of many addresses, yielding each with its address
+
+        The addresses are given to the query in chunks as `$addresses`, to be used
+        in an `_in` filter, and each chunk is queried with `query_paginated`.
+        `address_field` is the field of the entity, dot separated if nested, whose
+        value is the address the entity belongs to.
+
+        May raise:
+        - RemoteError: If there is a problem querying the subgraph and there
+        are no retries left.
+        """
+        param_types = {**param_types, '$addresses': f'[{address_type}]'}
+        for chunk in get_chunks(list(addresses), n=GRAPH_QUERY_ADDRESSES_LIMIT):
+            chunk_addresses = {address.lower(): address for address in chunk}
+            pages = self.query_paginated(
+                querystr=querystr,
+                entity=entity,
+                param_types=param_types,
+                param_values={**param_values, 'addresses': list(chunk_addresses)},
+            )
+            for page in pages:
+                for entry in page:
+                    value = entry
+                    for field in address_field.split('.'):
+                        value = value[field]
+                    address = chunk_addresses.get(value)
+                    if address is None:
+                        log.error(
+                            f'The Graph returned {entity} entry {entry["id"]} of '
+                            f'address {value} which was not queried. Skipping it',
+                        )
+                        continue
+
+                    yield address, entry
@@ -25,11 +25,13 @@ from rotkehlchen.chain.ethereum.graph import (
     format_query_indentation,
 )
 from rotkehlchen.chain.ethereum.interfaces.ammswap.types import (
+    AddressEvents,
     AddressEventsBalances,
     AddressToLPBalances,
     AddressTrades,
     AggregatedAmount,
     AssetToPrice,
+    DDAddressEvents,
     DDAddressToLPBalances,
     EventType,
     LiquidityPool,
@@ -134,11 +136,13 @@ class AMMSwapPlatform(metaclass=abc.ABCMeta):
             self.mint_event = EventType.MINT_UNISWAP
             self.burn_event = EventType.BURN_UNISWAP
             self.swaps_query = SWAPS_QUERY
+            self.swaps_address_field = 'from'
             self.trades_prefix = UNISWAP_TRADES_PREFIX
         elif self.location == Location.SUSHISWAP:
             self.mint_event = EventType.MINT_SUSHISWAP
             self.burn_event = EventType.BURN_SUSHISWAP
             self.swaps_query = SUSHISWAP_SWAPS_QUERY
+            self.swaps_address_field = 'to'
             self.trades_prefix = SUSHISWAP_TRADES_PREFIX
         else:
             raise NotImplementedError(f'AMM platform with location {self.location} not valid.')
@@ -351,67 +355,73 @@ class AMMSwapPlatform(metaclass=abc.ABCMeta):
                 # Update <LiquidityPool> total balance in USD
                 lp.user_balance.usd_value = total_user_balance
 
+    def _get_addresses_by_query_start(
+            self,
+            prefix: str,
+            addresses: List[ChecksumEthAddress],
+            to_timestamp: Timestamp,
+    ) -> Dict[Timestamp, List[ChecksumEthAddress]]:
+        """Groups the addresses by the timestamp their subgraph query starts from
+
+        That is the end of the range already queried for the address, which is
+        saved in the used query ranges with the given prefix, or 0 if the address
+        was never queried. Addresses already queried up to `to_timestamp` are
+        left out, so that each group can be queried at once.
+        """
+        addresses_by_start: Dict[Timestamp, List[ChecksumEthAddress]] = defaultdict(list)
+        for address in addresses:
+            queried_range = self.database.get_used_query_range(name=f'{prefix}_{address}')
+            if queried_range is None:
+                addresses_by_start[Timestamp(0)].append(address)
+            elif to_timestamp > queried_range[1]:
+                addresses_by_start[queried_range[1]].append(address)
+
+        return addresses_by_start
+
     def _get_events_graph(
             self,
-            address: ChecksumEthAddress,
+            addresses: List[ChecksumEthAddress],
             start_ts: Timestamp,
             end_ts: Timestamp,
             event_type: EventType,
-    ) -> List[LiquidityPoolEvent]:
-        """Get the address' events (mints & burns) querying the AMM's subgraph
+    ) -> AddressEvents:
+        """Get the addresses' events (mints & burns) querying the AMM's subgraph
         Each event data is stored in a <LiquidityPoolEvent>.
         """
-        address_events: List[LiquidityPoolEvent] = []
+        address_events: DDAddressEvents = defaultdict(list)
         if event_type == self.mint_event:
             query = MINTS_QUERY
             query_schema = 'mints'
+            address_field = 'to'
         elif event_type == self.burn_event:
             query = BURNS_QUERY
             query_schema = 'burns'
+            address_field = 'sender'
         else:
             log.error(
                 f'Unexpected {self.location} event_type: {event_type}. Skipping events query.',
             )
             return address_events
 
-        query_id = '0'
-        query_offset = 0
         param_types = {
-            '$limit': 'Int!',
-            '$offset': 'Int!',
-            '$address': 'Bytes!',
             '$start_ts': 'BigInt!',
             '$end_ts': 'BigInt!',
-            '$id': 'ID!',
         }
         param_values = {
-            'limit': GRAPH_QUERY_LIMIT,
-            'offset': query_offset,
-            'address': address.lower(),
             'start_ts': str(start_ts),
             'end_ts': str(end_ts),
-            'id': query_id,
         }
         querystr = format_query_indentation(query.format())
-
-        while True:
-            try:
-                result = self.graph.query(
-                    querystr=querystr,
-                    param_types=param_types,
-                    param_values=param_values,
-                )
-            except RemoteError as e:
-                self.msg_aggregator.add_error(
-                    SUBGRAPH_REMOTE_ERROR_MSG.format(error_msg=str(e), location=self.location),
-                )
-                raise
-            except AttributeError as e:
-                raise ModuleInitializationFailure(f'{self.location} subgraph remote error') from e
-
-            result_data = result[query_schema]
-
-            for event in result_data:
+        result = self.graph.query_addresses(
+            querystr=querystr,
+            entity=query_schema,
+            address_field=address_field,
+            addresses=addresses,
+            param_types=param_types,
+            param_values=param_values,
+        )
+        try:
+            for address, event in result:
                 token0_ = event['pair']['token0']
                 token1_ = event['pair']['token1']
 
@@ -456,35 +466,24 @@ class AMMSwapPlatform(metaclass=abc.ABCMeta):
                     usd_price=Price(FVal(event['amountUSD'])),
                     lp_amount=AssetAmount(FVal(event['liquidity'])),
                 )
-                address_events.append(lp_event)
-                query_id = event['id']
-
-            # Check whether an extra request is needed
-            if len(result_data) < GRAPH_QUERY_LIMIT:
-                break
-
-            # Update pagination step
-            if query_offset == GRAPH_QUERY_SKIP_LIMIT:
-                query_offset = 0
-                new_query_id = query_id
-            else:
-                query_offset += GRAPH_QUERY_LIMIT
-                new_query_id = '0'
-            param_values = {
-                **param_values,
-                'id': new_query_id,
-                'offset': query_offset,
-            }
+                address_events[address].append(lp_event)
+        except RemoteError as e:
+            self.msg_aggregator.add_error(
+                SUBGRAPH_REMOTE_ERROR_MSG.format(error_msg=str(e), location=self.location),
+            )
+            raise
+        except AttributeError as e:
+            raise ModuleInitializationFailure(f'{self.location} subgraph remote error') from e
 
         return address_events
 
     def _read_subgraph_trades(
             self,
-            address: ChecksumEthAddress,
+            addresses: List[ChecksumEthAddress],
             start_ts: Timestamp,
             end_ts: Timestamp,
-    ) -> List[AMMTrade]:
-        """Get the address' trades data querying the AMM subgraph
+    ) -> AddressTrades:
+        """Get the addresses' trades data querying the AMM subgraph
 
         Each trade (swap) instantiates an <AMMTrade>.
 
@@ -502,41 +501,26 @@ class AMMSwapPlatform(metaclass=abc.ABCMeta):
         May raise
         - RemoteError
         """
-        trades: List[AMMTrade] = []
-        query_id = '0'
-        query_offset = 0
+        address_trades: AddressTrades = defaultdict(list)
         param_types = {
-            '$limit': 'Int!',
-            '$offset': 'Int!',
-            '$address': 'Bytes!',
             '$start_ts': 'BigInt!',
             '$end_ts': 'BigInt!',
-            '$id': 'ID!',
         }
         param_values = {
-            'limit': GRAPH_QUERY_LIMIT,
-            'offset': 0,
-            'address': address.lower(),
             'start_ts': str(start_ts),
             'end_ts': str(end_ts),
-            'id': query_id,
         }
         querystr = format_query_indentation(self.swaps_query.format())
-
-        while True:
-            try:
-                result = self.graph.query(
-                    querystr=querystr,
-                    param_types=param_types,
-                    param_values=param_values,
-                )
-            except RemoteError as e:
-                self.msg_aggregator.add_error(
-                    SUBGRAPH_REMOTE_ERROR_MSG.format(error_msg=str(e), location=self.location),
-                )
-                raise
-
-            for entry in result['swaps']:
+        result = self.graph.query_addresses(
+            querystr=querystr,
+            entity='swaps',
+            address_field=self.swaps_address_field,
+            addresses=addresses,
+            param_types=param_types,
+            param_values=param_values,
+        )
+        try:
+            for address, entry in result:
                 swaps = []
                 try:
                     for swap in entry['transaction']['swaps']:
@@ -600,7 +584,6 @@ class AMMSwapPlatform(metaclass=abc.ABCMeta):
                             amount0_out=AssetAmount(amount0_out),
                             amount1_out=AssetAmount(amount1_out),
                         ))
-                    query_id = entry['id']
                 except KeyError as e:
                     log.error(
                         f'Failed to read trade in {self.location} swap {str(entry)}. '
@@ -614,40 +597,14 @@ class AMMSwapPlatform(metaclass=abc.ABCMeta):
                     continue
 
                 # Now that we got all swaps for a transaction, create the trade object
-                trades.extend(self._tx_swaps_to_trades(swaps))
-
-            # Check whether an extra request is needed
-            if len(result['swaps']) < GRAPH_QUERY_LIMIT:
-                break
-
-            # Update pagination step
-            if query_offset == GRAPH_QUERY_SKIP_LIMIT:
-                query_offset = 0
-                new_query_id = query_id
-            else:
-                query_offset += GRAPH_QUERY_LIMIT
-                new_query_id = '0'
-            param_values = {
-                **param_values,
-                'id': new_query_id,
-                'offset': query_offset,
-            }
-
-        return trades
-
-    def _get_trades_graph(
-            self,
-            addresses: List[ChecksumEthAddress],
-            start_ts: Timestamp,
-            end_ts: Timestamp,
-    ) -> AddressTrades:
-        address_trades = {}
-        for address in addresses:
-            trades = self._get_trades_graph_for_address(address, start_ts, end_ts)
-            if len(trades) != 0:
-                address_trades[address] = trades
+                address_trades[address].extend(self._tx_swaps_to_trades(swaps))
+        except RemoteError as e:
+            self.msg_aggregator.add_error(
+                SUBGRAPH_REMOTE_ERROR_MSG.format(error_msg=str(e), location=self.location),
+            )
+            raise
 
-        return address_trades
+        return dict(address_trades)
 
     def _get_trades(
             self,
@@ -661,60 +618,31 @@ class AMMSwapPlatform(metaclass=abc.ABCMeta):
         DB and finally all DB trades are read and returned.
         """
         address_amm_trades: AddressTrades = {}
-        new_addresses: List[ChecksumEthAddress] = []
-        existing_addresses: List[ChecksumEthAddress] = []
-        min_end_ts: Timestamp = to_timestamp
-
         if only_cache:
             return self._fetch_trades_from_db(addresses, from_timestamp, to_timestamp)
 
         dbranges = DBQueryRanges(self.database)
-        # Get addresses' last used query range for this AMM's trades
-        for address in addresses:
-            entry_name = f'{self.trades_prefix}_{address}'
-            trades_range = self.database.get_used_query_range(name=entry_name)
-
-            if not trades_range:
-                new_addresses.append(address)
-            else:
-                existing_addresses.append(address)
-                min_end_ts = min(min_end_ts, trades_range[1])
-
-        # Request new addresses' trades
-        if new_addresses:
-            start_ts = Timestamp(0)
-            new_address_trades = self._get_trades_graph(
-                addresses=new_addresses,
+        addresses_by_start = self._get_addresses_by_query_start(
+            prefix=self.trades_prefix,
+            addresses=addresses,
+            to_timestamp=to_timestamp,
+        )
+        # Request the trades of each group of addresses queried up to the same time
+        for start_ts, start_addresses in addresses_by_start.items():
+            address_amm_trades.update(self._get_trades_graph_for_addresses(
+                addresses=start_addresses,
                 start_ts=start_ts,
                 end_ts=to_timestamp,
-            )
-            address_amm_trades.update(new_address_trades)
+            ))
 
-            # Insert last used query range for new addresses
-            for address in new_addresses:
+            # Update last used query range for the addresses
+            for address in start_addresses:
                 entry_name = f'{self.trades_prefix}_{address}'
                 dbranges.update_used_query_range(
                     location_string=entry_name,
                     queried_ranges=[(start_ts, to_timestamp)],
                 )
 
-        # Request existing DB addresses' trades
-        if existing_addresses and to_timestamp > min_end_ts:
-            address_new_trades = self._get_trades_graph(
-                addresses=existing_addresses,
-                start_ts=min_end_ts,
-                end_ts=to_timestamp,
-            )
-            address_amm_trades.update(address_new_trades)
-
-            # Update last used query range for existing addresses
-            for address in existing_addresses:
-                entry_name = f'{self.trades_prefix}_{address}'
-                dbranges.update_used_query_range(
-                    location_string=entry_name,
-                    queried_ranges=[(min_end_ts, to_timestamp)],
-                )
-
         # Insert all unique swaps to the DB
         all_swaps = set()
         for address in filter(lambda x: x in address_amm_trades, addresses):
@@ -997,12 +925,12 @@ class AMMSwapPlatform(metaclass=abc.ABCMeta):
         return protocol_balance
 
     @abc.abstractmethod
-    def _get_trades_graph_for_address(
+    def _get_trades_graph_for_addresses(
             self,
-            address: ChecksumEthAddress,
+            addresses: List[ChecksumEthAddress],
             start_ts: Timestamp,
             end_ts: Timestamp,
-    ) -> List[AMMTrade]:
+    ) -> AddressTrades:
         raise NotImplementedError('should only be implemented by subclasses')
 
     @abc.abstractmethod
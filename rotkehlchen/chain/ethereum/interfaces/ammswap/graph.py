@@ -3,9 +3,10 @@ MINTS_QUERY = (
     mints
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
-            to: $address,
+            to_in: $addresses,
             timestamp_gte: $start_ts,
             timestamp_lte: $end_ts,
             id_gt: $id,
@@ -46,9 +47,10 @@ BURNS_QUERY = (
     burns
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
-            sender: $address,
+            sender_in: $addresses,
             timestamp_gte: $start_ts,
             timestamp_lte: $end_ts,
             id_gt: $id,
@@ -89,15 +91,17 @@ SWAPS_QUERY = (
     swaps
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
-            from: $address,
+            from_in: $addresses,
             timestamp_gte: $start_ts,
             timestamp_lte: $end_ts,
             id_gt: $id,
         }}
     ) {{
         id
+        from
         transaction {{
             swaps {{
                 id
@@ -134,15 +138,17 @@ SUSHISWAP_SWAPS_QUERY = (
     swaps
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
-            to: $address,
+            to_in: $addresses,
             timestamp_gte: $start_ts,
             timestamp_lte: $end_ts,
             id_gt: $id,
         }}
     ) {{
         id
+        to
         transaction {{
             swaps {{
                 id
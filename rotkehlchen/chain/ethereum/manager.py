@@ -62,6 +62,7 @@ from rotkehlchen.types import (
     Timestamp,
 )
 from rotkehlchen.user_messages import MessagesAggregator
+from rotkehlchen.utils.concurrency import OWN_NODE_QUERIES_LIMIT
 from rotkehlchen.utils.misc import from_wei, hex_or_bytes_to_str
 from rotkehlchen.utils.network import request_get_dict
 
@@ -445,7 +446,11 @@ class EthereumManager():
                 continue
 
             try:
-                result = method(web3, **kwargs)
+                if node == NodeName.OWN:
+                    with OWN_NODE_QUERIES_LIMIT:
+                        result = method(web3, **kwargs)
+                else:
+                    result = method(web3, **kwargs)
             except (
                     RemoteError,
                     requests.exceptions.RequestException,
@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Set, Tu
 
 from rotkehlchen.accounting.structures.balance import Balance
 from rotkehlchen.assets.asset import Asset
-from rotkehlchen.chain.ethereum.graph import Graph
+from rotkehlchen.chain.ethereum.graph import Graph, format_query_indentation
 from rotkehlchen.chain.ethereum.modules.makerdao.constants import RAY
 from rotkehlchen.chain.ethereum.utils import ethaddress_to_asset, token_normalized_value_decimals
 from rotkehlchen.constants.ethereum import ATOKEN_ABI, ATOKEN_V2_ABI
@@ -47,22 +47,31 @@ log = RotkehlchenLogsAdapter(logger)
 AAVE_GRAPH_RECENT_SECS = 600  # 10 mins
 
 USER_RESERVES_QUERY = """
-{{
-  userReserves(where: {{ user: "{address}"}}) {{
+  userReserves (
+    first: $limit,
+    orderBy: id,
+    orderDirection: asc,
+    where: {user_in: $addresses, id_gt: $id}
+  ) {
     id
-    reserve{{
+    reserve{
       id
       symbol
-    }}
-    user {{
+    }
+    user {
       id
-    }}
-  }}
-}}"""
+    }
+  }
+}"""
 
 
 USER_EVENTS_QUERY = """
-  users (where: {id: $address}) {
+  users (
+    first: $limit,
+    orderBy: id,
+    orderDirection: asc,
+    where: {id_in: $addresses, id_gt: $id}
+  ) {
     id
     depositHistory {
         id
@@ -128,7 +137,12 @@ USER_EVENTS_QUERY = """
 """
 
 USER_EVENTS_QUERY_V2 = """
-  users (where: {id: $address}) {
+  users (
+    first: $limit,
+    orderBy: id,
+    orderDirection: asc,
+    where: {id_in: $addresses, id_gt: $id}
+  ) {
     id
     depositHistory {
         id
@@ -404,45 +418,93 @@ class AaveGraphInquirer(AaveInquirer):
         """
         Queries aave history for a list of addresses.
 
+        The reserves and events of all the addresses are queried at once. Only
+        the events of the addresses that have not been queried recently are
+        queried again.
+
         This function should be entered while holding the history_lock
         semaphore
         """
+        users_reserves = self._get_users_reserves(addresses)
+        users_addresses = [x for x in addresses if len(users_reserves.get(x, [])) != 0]
+        now = ts_now()
+        outdated_addresses = []
+        for address in users_addresses:
+            last_query = self.database.get_used_query_range(f'aave_events_{address}')
+            if last_query is None or now - last_query[1] > AAVE_GRAPH_RECENT_SECS:
+                outdated_addresses.append(address)
+
+        users_results = self._get_users_results(outdated_addresses)
         result = {}
-        for address in addresses:
-            history_results = self.get_history_for_address(
-                user_address=address,
-                from_timestamp=from_timestamp,
-                to_timestamp=to_timestamp,
+        for address in users_addresses:
+            result[address] = self._get_user_data(
+                from_ts=from_timestamp,
+                to_ts=to_timestamp,
+                address=address,
                 balances=aave_balances.get(address, AaveBalances({}, {})),
+                user_results=users_results[address] if address in outdated_addresses else None,
             )
-            if history_results is None:
-                continue
-            result[address] = history_results
 
         return result
 
-    def _get_user_reserves(self, address: ChecksumEthAddress) -> List[AaveUserReserve]:
-        query = self.graph.query(
-            querystr=USER_RESERVES_QUERY.format(address=address.lower()),
-        )
-        query_v2 = self.graph_v2.query(
-            querystr=USER_RESERVES_QUERY.format(address=address.lower()),
-        )
-        result = []
-        for entry in query['userReserves'] + query_v2['userReserves']:
-            reserve = entry['reserve']
-            try:
-                result.append(AaveUserReserve(
-                    # The ID of reserve is the address of the asset and the address of the market's LendingPoolAddressProvider, in lower case  # noqa: E501
-                    address=deserialize_ethereum_address(reserve['id'][:42]),
-                    symbol=reserve['symbol'],
-                ))
-            except DeserializationError:
-                log.error(
-                    f'Failed to deserialize reserve address {reserve["id"]} '
-                    f'Skipping reserve address {reserve["id"]} for user address {address}',
-                )
-                continue
+    def _get_users_reserves(
+            self,
+            addresses: List[ChecksumEthAddress],
+    ) -> Dict[ChecksumEthAddress, List[AaveUserReserve]]:
+        """Queries the reserves of the addresses in both the v1 and v2 subgraphs"""
+        result: Dict[ChecksumEthAddress, List[AaveUserReserve]] = defaultdict(list)
+        querystr = format_query_indentation(USER_RESERVES_QUERY)
+        for graph in (self.graph, self.graph_v2):
+            entries = graph.query_addresses(
+                querystr=querystr,
+                entity='userReserves',
+                address_field='user.id',
+                addresses=addresses,
+                param_types={},
+                param_values={},
+                address_type='String!',
+            )
+            for address, entry in entries:
+                reserve = entry['reserve']
+                try:
+                    result[address].append(AaveUserReserve(
+                        # The ID of reserve is the address of the asset and the address of the market's LendingPoolAddressProvider, in lower case  # noqa: E501
+                        address=deserialize_ethereum_address(reserve['id'][:42]),
+                        symbol=reserve['symbol'],
+                    ))
+                except DeserializationError:
+                    log.error(
+                        f'Failed to deserialize reserve address {reserve["id"]} '
+                        f'Skipping reserve address {reserve["id"]} for user address {address}',
+                    )
+                    continue
+
+        return result
+
+    def _get_users_results(
+            self,
+            addresses: List[ChecksumEthAddress],
+    ) -> Dict[ChecksumEthAddress, List[Dict[str, Any]]]:
+        """Queries the events of the addresses in both the v1 and v2 subgraphs
+
+        Returns the users found in each subgraph for each address
+        """
+        result: Dict[ChecksumEthAddress, List[Dict[str, Any]]] = defaultdict(list)
+        if len(addresses) == 0:
+            return result
+
+        for graph, query in ((self.graph, USER_EVENTS_QUERY), (self.graph_v2, USER_EVENTS_QUERY_V2)):  # noqa: E501
+            entries = graph.query_addresses(
+                querystr=format_query_indentation(query),
+                entity='users',
+                address_field='id',
+                addresses=addresses,
+                param_types={},
+                param_values={},
+                address_type='ID!',
+            )
+            for address, user_result in entries:
+                result[address].append(user_result)
 
         return result
 
@@ -668,7 +730,7 @@ class AaveGraphInquirer(AaveInquirer):
 
     def _process_graph_query_result(
         self,
-        query: Dict[str, Any],
+        user_result: Dict[str, Any],
         deposits: List[AaveDepositWithdrawalEvent],
         withdrawals: List[AaveDepositWithdrawalEvent],
         borrows: List[AaveBorrowEvent],
@@ -679,7 +741,7 @@ class AaveGraphInquirer(AaveInquirer):
         to_ts: Timestamp,
     ) -> None:
         """
-        Given a query result from the graph this function extracts information for:
+        Given a user of a query result from the graph this function extracts information for:
         - deposits
         - withdrawals
         - borrows
@@ -687,11 +749,6 @@ class AaveGraphInquirer(AaveInquirer):
         - liquidation_calls
         and extends the corresponding arguments with the obtained information.
         """
-        if 'users' not in query or len(query['users']) == 0:
-            # If there is no information on the query finish the execution
-            log.debug(f'Aave subgraph query has no information for user. {str(query)}')
-            return
-        user_result = query['users'][0]
         msg = 'Failed to obtain a valid result from Aave graph.'
         try:
             deposits += self._parse_deposits(user_result['depositHistory'], from_ts, to_ts)
@@ -720,51 +777,29 @@ class AaveGraphInquirer(AaveInquirer):
             to_ts: Timestamp,
             address: ChecksumEthAddress,
             balances: AaveBalances,
+            user_results: Optional[List[Dict[str, Any]]],
     ) -> AaveHistory:
+        """Processes the users queried from the v1 and v2 subgraphs for the address
+
+        `user_results` is None if the address was queried recently and so was
+        not queried again.
+        """
         last_query = self.database.get_used_query_range(f'aave_events_{address}')
         db_events = self.database.get_aave_events(address=address)
 
         now = ts_now()
-        last_query_ts = 0
         if last_query is not None:
-            last_query_ts = last_query[1]
-            from_ts = Timestamp(last_query_ts + 1)
+            from_ts = Timestamp(last_query[1] + 1)
 
         deposits: List[AaveDepositWithdrawalEvent] = []
         withdrawals: List[AaveDepositWithdrawalEvent] = []
         borrows: List[AaveBorrowEvent] = []
         repays: List[AaveRepayEvent] = []
         liquidation_calls: List[AaveLiquidationEvent] = []
-        query = self.graph.query(
-            querystr=USER_EVENTS_QUERY,
-            param_types={'$address': 'ID!'},
-            param_values={'address': address.lower()},
-        )
-        query_v2 = self.graph_v2.query(
-            querystr=USER_EVENTS_QUERY_V2,
-            param_types={'$address': 'ID!'},
-            param_values={'address': address.lower()},
-        )
-
         user_merged_data: Dict[str, Any] = defaultdict(list)
-        if now - last_query_ts > AAVE_GRAPH_RECENT_SECS:
-            # In theory if these were individual queries we should do them only if
-            # we have not queried recently. In practise since we only do 1 query above
-            # this is useless for now, but keeping the mechanism in case we change
-            # the way we query the subgraph
-            self._process_graph_query_result(
-                query=query,
-                deposits=deposits,
-                withdrawals=withdrawals,
-                borrows=borrows,
-                repays=repays,
-                liquidation_calls=liquidation_calls,
-                user_merged_data=user_merged_data,
-                from_ts=from_ts,
-                to_ts=to_ts,
-            )
+        for user_result in user_results or []:
             self._process_graph_query_result(
-                query=query_v2,
+                user_result=user_result,
                 deposits=deposits,
                 withdrawals=withdrawals,
                 borrows=borrows,
@@ -794,11 +829,12 @@ class AaveGraphInquirer(AaveInquirer):
         self.database.add_aave_events(address, new_events)
         # After all events have been queried then also update the query range.
         # Even if no events are found for an address we need to remember the range
-        self.database.update_used_query_range(
-            name=f'aave_events_{address}',
-            start_ts=Timestamp(0),
-            end_ts=now,
-        )
+        if user_results is not None:
+            self.database.update_used_query_range(
+                name=f'aave_events_{address}',
+                start_ts=Timestamp(0),
+                end_ts=now,
+            )
 
         # Sort actions so that actions with same time are sorted deposit -> interest -> withdrawal
         all_events: List[AaveEvent] = new_events + db_events
@@ -1051,30 +1087,6 @@ class AaveGraphInquirer(AaveInquirer):
 
         return events
 
-    def get_history_for_address(
-            self,
-            user_address: ChecksumEthAddress,
-            from_timestamp: Timestamp,
-            to_timestamp: Timestamp,
-            balances: AaveBalances,
-    ) -> Optional[AaveHistory]:
-        """
-        Queries aave history for a single address.
-
-        This function should be entered while holding the history_lock
-        semaphore
-        """
-        reserves = self._get_user_reserves(address=user_address)
-        if len(reserves) != 0:
-            return self._get_user_data(
-                from_ts=from_timestamp,
-                to_ts=to_timestamp,
-                address=user_address,
-                balances=balances,
-            )
-
-        return None
-
     def _get_asset_and_balance(
             self,
             entry: Dict[str, Any],
@@ -0,0 +1,126 @@
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Sequence, Tuple, TypeVar, Union
+
+from gevent.pool import Pool
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# How many jobs of a single run are queried at the same time. The remote services
+# they query are further bounded by the limits of rotkehlchen.utils.concurrency
+MODULE_QUERIES_CONCURRENCY = 8
+
+
+@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=False)
+class ModuleQueryStats:
+    """How long the queries of a module took, in seconds"""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def serialize(self) -> Dict[str, Union[int, float]]:
+        return {'count': self.count, 'total': self.total, 'max': self.max}
+
+
+class ModuleQueryJob(NamedTuple):
+    module: str
+    query: str  # what is queried, to tell apart the timings of the module's queries
+    function: Callable[[], Any]
+
+
+class ModuleQueryExecutor():
+    """Runs the queries of the ethereum modules concurrently
+
+    Each job is a query of a module, usually for a single address. The jobs of a
+    run are spread over a pool of greenlets of its own, so that a job can start a
+    run of its own without waiting for a free greenlet of its parent's run.
+    While measuring, which the REST API metrics turn on and off, how long the
+    queries of each module took is kept so that slow integrations can be spotted.
+    """
+
+    def __init__(self, concurrency: int = MODULE_QUERIES_CONCURRENCY) -> None:
+        self.concurrency = concurrency
+        self.measuring = False
+        self.stats: Dict[Tuple[str, str], ModuleQueryStats] = defaultdict(ModuleQueryStats)
+
+    def set_measuring(self, measuring: bool) -> None:
+        """Turns the timing of the queries on or off. Turning it on resets the stats."""
+        if measuring and not self.measuring:
+            self.stats.clear()
+        self.measuring = measuring
+
+    @contextmanager
+    def measure(self, module: str, query: str) -> Iterator[None]:
+        """Adds the time spent within the context to the stats of the module's query,
+        if measuring"""
+        if not self.measuring:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.stats[(module, query)].add(seconds)
+            log.debug(f'Queried {query} of {module} module', seconds=round(seconds, 3))
+
+    def _run_job(self, job: ModuleQueryJob) -> Any:
+        if not self.measuring:
+            return job.function()
+
+        with self.measure(job.module, job.query):
+            return job.function()
+
+    def run(self, jobs: Sequence[ModuleQueryJob]) -> List[Any]:
+        """Runs the jobs concurrently and returns their results in the order of the jobs
+
+        If any of the jobs raises, the jobs still running are killed and the exception
+        is raised
+        """
+        if len(jobs) == 1:
+            return [self._run_job(jobs[0])]
+
+        pool = Pool(self.concurrency)
+        try:
+            greenlets = []
+            for job in jobs:
+                greenlet = pool.spawn(self._run_job, job)
+                greenlet.name = f'Query {job.query} of {job.module} module'
+                greenlets.append(greenlet)
+            pool.join(raise_error=True)
+            return [greenlet.get() for greenlet in greenlets]
+        finally:
+            pool.kill()
+
+    def map(
+            self,
+            module: str,
+            query: str,
+            function: Callable[[T], R],
+            arguments: Sequence[T],
+    ) -> List[R]:
+        """Calls the module's function once per argument concurrently and returns
+        the results in the order of the arguments"""
+        return self.run([
+            ModuleQueryJob(module=module, query=query, function=partial(function, argument))
+            for argument in arguments
+        ])
+
+
+module_query_executor = ModuleQueryExecutor()
@@ -9,6 +9,7 @@ from rotkehlchen.accounting.structures.balance import AssetBalance, Balance, Bal
 from rotkehlchen.accounting.structures.defi import DefiEvent, DefiEventType
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.chain.ethereum.defi.defisaver_proxy import HasDSProxy
+from rotkehlchen.chain.ethereum.modules.executor import module_query_executor
 from rotkehlchen.chain.ethereum.utils import asset_normalized_value, token_normalized_value
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import (
@@ -694,10 +695,14 @@ class MakerdaoVaults(HasDSProxy):
             self.vault_mappings = defaultdict(list)
             proxy_mappings = self._get_accounts_having_proxy()
             vaults = []
-            for user_address, proxy in proxy_mappings.items():
-                vaults.extend(
-                    self._get_vaults_of_address(user_address=user_address, proxy_address=proxy),
-                )
+            vaults_per_address = module_query_executor.map(
+                module='makerdao_vaults',
+                query='vaults_of_address',
+                function=lambda x: self._get_vaults_of_address(user_address=x[0], proxy_address=x[1]),  # noqa: E501
+                arguments=list(proxy_mappings.items()),
+            )
+            for address_vaults in vaults_per_address:
+                vaults.extend(address_vaults)
 
             self.last_vault_mapping_query_ts = ts_now()
             # Returns vaults sorted. Oldest identifier first
@@ -726,9 +731,13 @@ class MakerdaoVaults(HasDSProxy):
         proxy_mappings = self._get_accounts_having_proxy()
         # Make sure that before querying vault details there has been a recent vaults call
         vaults = self.get_vaults()
-        for vault in vaults:
-            proxy = proxy_mappings[vault.owner]
-            vault_detail = self._query_vault_details(vault, proxy, vault.urn)
+        vault_details = module_query_executor.map(
+            module='makerdao_vaults',
+            query='vault_details',
+            function=lambda x: self._query_vault_details(x, proxy_mappings[x.owner], x.urn),
+            arguments=vaults,
+        )
+        for vault_detail in vault_details:
             if vault_detail:
                 self.vault_details.append(vault_detail)
 
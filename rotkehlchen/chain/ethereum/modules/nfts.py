@@ -61,7 +61,7 @@ class Nfts(EthereumModule, CacheableMixIn, LockableQueryMixIn):  # lgtm [py/miss
         self.opensea = Opensea(database=database, msg_aggregator=msg_aggregator)
 
     @protect_with_lock()
-    @cache_response_timewise()
+    @cache_response_timewise(maxsize=8)
     def _get_all_nft_data(
             self,  # pylint: disable=unused-argument
             addresses: List[ChecksumEthAddress],
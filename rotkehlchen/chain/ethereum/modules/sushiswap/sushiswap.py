@@ -14,7 +14,6 @@ from rotkehlchen.chain.ethereum.interfaces.ammswap.types import (
     EventType,
 )
 from rotkehlchen.chain.ethereum.interfaces.ammswap.utils import SUBGRAPH_REMOTE_ERROR_MSG
-from rotkehlchen.chain.ethereum.trades import AMMTrade
 from rotkehlchen.errors.misc import ModuleInitializationFailure, RemoteError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.premium.premium import Premium
@@ -82,59 +81,28 @@ class Sushiswap(AMMSwapPlatform, EthereumModule):
         address_events_balances: AddressEventsBalances = {}
         address_events: DDAddressEvents = defaultdict(list)
         db_address_events: AddressEvents = {}
-        new_addresses: List[ChecksumEthAddress] = []
-        existing_addresses: List[ChecksumEthAddress] = []
-        min_end_ts: Timestamp = to_timestamp
-
-        # Get addresses' last used query range for Sushiswap events
-        for address in addresses:
-            entry_name = f'{SUSHISWAP_EVENTS_PREFIX}_{address}'
-            events_range = self.database.get_used_query_range(name=entry_name)
-
-            if not events_range:
-                new_addresses.append(address)
-            else:
-                existing_addresses.append(address)
-                min_end_ts = min(min_end_ts, events_range[1])
-
-        # Request new addresses' events
-        if new_addresses:
-            start_ts = Timestamp(0)
-            for address in new_addresses:
-                for event_type in EventType:
-                    new_address_events = self._get_events_graph(
-                        address=address,
-                        start_ts=start_ts,
-                        end_ts=to_timestamp,
-                        event_type=event_type,
-                    )
-                    if new_address_events:
-                        address_events[address].extend(new_address_events)
-
-                # Insert new address' last used query range
-                self.database.update_used_query_range(
-                    name=f'{SUSHISWAP_EVENTS_PREFIX}_{address}',
+        addresses_by_start = self._get_addresses_by_query_start(
+            prefix=SUSHISWAP_EVENTS_PREFIX,
+            addresses=addresses,
+            to_timestamp=to_timestamp,
+        )
+        # Request the events of each group of addresses queried up to the same time
+        for start_ts, start_addresses in addresses_by_start.items():
+            for event_type in (self.mint_event, self.burn_event):
+                events = self._get_events_graph(
+                    addresses=start_addresses,
                     start_ts=start_ts,
                     end_ts=to_timestamp,
+                    event_type=event_type,
                 )
+                for address, address_new_events in events.items():
+                    address_events[address].extend(address_new_events)
 
-        # Request existing DB addresses' events
-        if existing_addresses and to_timestamp > min_end_ts:
-            for address in existing_addresses:
-                for event_type in EventType:
-                    address_new_events = self._get_events_graph(
-                        address=address,
-                        start_ts=min_end_ts,
-                        end_ts=to_timestamp,
-                        event_type=event_type,
-                    )
-                    if address_new_events:
-                        address_events[address].extend(address_new_events)
-
-                # Update existing address' last used query range
+            # Update the addresses' last used query range
+            for address in start_addresses:
                 self.database.update_used_query_range(
                     name=f'{SUSHISWAP_EVENTS_PREFIX}_{address}',
-                    start_ts=min_end_ts,
+                    start_ts=start_ts,
                     end_ts=to_timestamp,
                 )
 
@@ -229,22 +197,21 @@ class Sushiswap(AMMSwapPlatform, EthereumModule):
             )
         return trades
 
-    def _get_trades_graph_for_address(
+    def _get_trades_graph_for_addresses(
             self,
-            address: ChecksumEthAddress,
+            addresses: List[ChecksumEthAddress],
             start_ts: Timestamp,
             end_ts: Timestamp,
-    ) -> List[AMMTrade]:
-        trades = []
+    ) -> AddressTrades:
         try:
-            trades.extend(self._read_subgraph_trades(address, start_ts, end_ts))
+            return self._read_subgraph_trades(addresses, start_ts, end_ts)
         except RemoteError as e:
             log.error(
-                f'Error querying sushiswap trades using graph for address {address} '
+                f'Error querying sushiswap trades using graph for addresses {addresses} '
                 f'between {start_ts} and {end_ts}. {str(e)}',
             )
 
-        return trades
+        return {}
 
     def delete_events_data(self) -> None:
         self.database.delete_sushiswap_events_data()
@@ -6,13 +6,17 @@ V3_SWAPS_QUERY = (
     swaps
     (
         first: $limit,
-        skip: $offset,
+        orderBy: id,
+        orderDirection: asc,
         where: {{
-            origin: $address,
+            origin_in: $addresses,
             timestamp_gte: $start_ts,
             timestamp_lte: $end_ts,
+            id_gt: $id,
         }}
     ) {{
+        id
+        origin
         transaction {{
             swaps {{
                 id
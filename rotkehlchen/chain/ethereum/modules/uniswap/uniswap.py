@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING, List, Optional, Set
 
 from rotkehlchen.assets.asset import EthereumToken
 from rotkehlchen.assets.utils import get_or_create_ethereum_token
-from rotkehlchen.chain.ethereum.graph import GRAPH_QUERY_LIMIT, Graph, format_query_indentation
+from rotkehlchen.chain.ethereum.graph import Graph, format_query_indentation
 from rotkehlchen.chain.ethereum.interfaces.ammswap import UNISWAP_TRADES_PREFIX
 from rotkehlchen.chain.ethereum.interfaces.ammswap.ammswap import AMMSwapPlatform
 from rotkehlchen.chain.ethereum.interfaces.ammswap.types import (
@@ -18,7 +18,7 @@ from rotkehlchen.chain.ethereum.interfaces.ammswap.types import (
     ProtocolBalance,
 )
 from rotkehlchen.chain.ethereum.interfaces.ammswap.utils import SUBGRAPH_REMOTE_ERROR_MSG
-from rotkehlchen.chain.ethereum.trades import AMMSwap, AMMTrade
+from rotkehlchen.chain.ethereum.trades import AMMSwap
 from rotkehlchen.constants import ZERO
 from rotkehlchen.errors.misc import ModuleInitializationFailure, RemoteError
 from rotkehlchen.errors.serialization import DeserializationError
@@ -126,59 +126,28 @@ class Uniswap(AMMSwapPlatform, EthereumModule):
         address_events_balances: AddressEventsBalances = {}
         address_events: DDAddressEvents = defaultdict(list)
         db_address_events: AddressEvents = {}
-        new_addresses: List[ChecksumEthAddress] = []
-        existing_addresses: List[ChecksumEthAddress] = []
-        min_end_ts: Timestamp = to_timestamp
-
-        # Get addresses' last used query range for Uniswap events
-        for address in addresses:
-            entry_name = f'{UNISWAP_EVENTS_PREFIX}_{address}'
-            events_range = self.database.get_used_query_range(name=entry_name)
-
-            if not events_range:
-                new_addresses.append(address)
-            else:
-                existing_addresses.append(address)
-                min_end_ts = min(min_end_ts, events_range[1])
-
-        # Request new addresses' events
-        if new_addresses:
-            start_ts = Timestamp(0)
-            for address in new_addresses:
-                for event_type in EventType:
-                    new_address_events = self._get_events_graph(
-                        address=address,
-                        start_ts=start_ts,
-                        end_ts=to_timestamp,
-                        event_type=event_type,
-                    )
-                    if new_address_events:
-                        address_events[address].extend(new_address_events)
-
-                # Insert new address' last used query range
-                self.database.update_used_query_range(
-                    name=f'{UNISWAP_EVENTS_PREFIX}_{address}',
+        addresses_by_start = self._get_addresses_by_query_start(
+            prefix=UNISWAP_EVENTS_PREFIX,
+            addresses=addresses,
+            to_timestamp=to_timestamp,
+        )
+        # Request the events of each group of addresses queried up to the same time
+        for start_ts, start_addresses in addresses_by_start.items():
+            for event_type in (self.mint_event, self.burn_event):
+                events = self._get_events_graph(
+                    addresses=start_addresses,
                     start_ts=start_ts,
                     end_ts=to_timestamp,
+                    event_type=event_type,
                 )
+                for address, address_new_events in events.items():
+                    address_events[address].extend(address_new_events)
 
-        # Request existing DB addresses' events
-        if existing_addresses and to_timestamp > min_end_ts:
-            for address in existing_addresses:
-                for event_type in EventType:
-                    address_new_events = self._get_events_graph(
-                        address=address,
-                        start_ts=min_end_ts,
-                        end_ts=to_timestamp,
-                        event_type=event_type,
-                    )
-                    if address_new_events:
-                        address_events[address].extend(address_new_events)
-
-                # Update existing address' last used query range
+            # Update the addresses' last used query range
+            for address in start_addresses:
                 self.database.update_used_query_range(
                     name=f'{UNISWAP_EVENTS_PREFIX}_{address}',
-                    start_ts=min_end_ts,
+                    start_ts=start_ts,
                     end_ts=to_timestamp,
                 )
 
@@ -237,36 +206,24 @@ class Uniswap(AMMSwapPlatform, EthereumModule):
         DB and finally all DB trades are read and returned.
         """
         address_amm_trades: AddressTrades = {}
-        new_addresses: List[ChecksumEthAddress] = []
-        existing_addresses: List[ChecksumEthAddress] = []
-        min_end_ts: Timestamp = to_timestamp
-
         if only_cache:
             return self._fetch_trades_from_db(addresses, from_timestamp, to_timestamp)
 
-        # Get addresses' last used query range for Uniswap trades
-        for address in addresses:
-            entry_name = f'{UNISWAP_TRADES_PREFIX}_{address}'
-            trades_range = self.database.get_used_query_range(name=entry_name)
-
-            if not trades_range:
-                new_addresses.append(address)
-            else:
-                existing_addresses.append(address)
-                min_end_ts = min(min_end_ts, trades_range[1])
-
-        # Request new addresses' trades
-        if new_addresses:
-            start_ts = Timestamp(0)
-            new_address_trades = self._get_trades_graph(
-                addresses=new_addresses,
+        addresses_by_start = self._get_addresses_by_query_start(
+            prefix=UNISWAP_TRADES_PREFIX,
+            addresses=addresses,
+            to_timestamp=to_timestamp,
+        )
+        # Request the trades of each group of addresses queried up to the same time
+        for start_ts, start_addresses in addresses_by_start.items():
+            address_amm_trades.update(self._get_trades_graph_for_addresses(
+                addresses=start_addresses,
                 start_ts=start_ts,
                 end_ts=to_timestamp,
-            )
-            address_amm_trades.update(new_address_trades)
+            ))
 
-            # Insert last used query range for new addresses
-            for address in new_addresses:
+            # Update last used query range for the addresses
+            for address in start_addresses:
                 entry_name = f'{UNISWAP_TRADES_PREFIX}_{address}'
                 self.database.update_used_query_range(
                     name=entry_name,
@@ -274,24 +231,6 @@ class Uniswap(AMMSwapPlatform, EthereumModule):
                     end_ts=to_timestamp,
                 )
 
-        # Request existing DB addresses' trades
-        if existing_addresses and to_timestamp > min_end_ts:
-            address_new_trades = self._get_trades_graph(
-                addresses=existing_addresses,
-                start_ts=min_end_ts,
-                end_ts=to_timestamp,
-            )
-            address_amm_trades.update(address_new_trades)
-
-            # Update last used query range for existing addresses
-            for address in existing_addresses:
-                entry_name = f'{UNISWAP_TRADES_PREFIX}_{address}'
-                self.database.update_used_query_range(
-                    name=entry_name,
-                    start_ts=min_end_ts,
-                    end_ts=to_timestamp,
-                )
-
         # Insert all unique swaps to the DB
         all_swaps = set()
         for address in filter(lambda x: x in address_amm_trades, addresses):
@@ -302,36 +241,40 @@ class Uniswap(AMMSwapPlatform, EthereumModule):
         self.database.add_amm_swaps(list(all_swaps))
         return self._fetch_trades_from_db(addresses, from_timestamp, to_timestamp)
 
-    def _get_trades_graph_for_address(
+    def _get_trades_graph_for_addresses(
             self,
-            address: ChecksumEthAddress,
+            addresses: List[ChecksumEthAddress],
             start_ts: Timestamp,
             end_ts: Timestamp,
-    ) -> List[AMMTrade]:
-        trades = []
+    ) -> AddressTrades:
+        address_trades: AddressTrades = defaultdict(list)
         try:
-            trades.extend(self._read_subgraph_trades(address, start_ts, end_ts))
+            v2_trades = self._read_subgraph_trades(addresses, start_ts, end_ts)
+            for address, trades in v2_trades.items():
+                address_trades[address].extend(trades)
         except RemoteError as e:
             log.error(
-                f'Error querying uniswap v2 trades using graph for address {address} '
+                f'Error querying uniswap v2 trades using graph for addresses {addresses} '
                 f'between {start_ts} and {end_ts}. {str(e)}',
             )
         try:
-            trades.extend(self._get_trades_graph_v3_for_address(address, start_ts, end_ts))
+            v3_trades = self._get_trades_graph_v3_for_addresses(addresses, start_ts, end_ts)
+            for address, trades in v3_trades.items():
+                address_trades[address].extend(trades)
         except RemoteError as e:
             log.error(
-                f'Error querying uniswap v3 trades using graph for address {address} '
+                f'Error querying uniswap v3 trades using graph for addresses {addresses} '
                 f'between {start_ts} and {end_ts}. {str(e)}',
             )
-        return trades
+        return dict(address_trades)
 
-    def _get_trades_graph_v3_for_address(
+    def _get_trades_graph_v3_for_addresses(
             self,
-            address: ChecksumEthAddress,
+            addresses: List[ChecksumEthAddress],
             start_ts: Timestamp,
             end_ts: Timestamp,
-    ) -> List[AMMTrade]:
-        """Get the address' trades data querying the Uniswap subgraph
+    ) -> AddressTrades:
+        """Get the addresses' trades data querying the Uniswap subgraph
 
         Each trade (swap) instantiates an <AMMTrade>.
 
@@ -349,41 +292,26 @@ class Uniswap(AMMSwapPlatform, EthereumModule):
         May raise:
         - RemoteError
         """
-        trades: List[AMMTrade] = []
+        address_trades: AddressTrades = defaultdict(list)
         param_types = {
-            '$limit': 'Int!',
-            '$offset': 'Int!',
-            '$address': 'Bytes!',
             '$start_ts': 'BigInt!',
             '$end_ts': 'BigInt!',
         }
         param_values = {
-            'limit': GRAPH_QUERY_LIMIT,
-            'offset': 0,
-            'address': address.lower(),
             'start_ts': str(start_ts),
             'end_ts': str(end_ts),
         }
         querystr = format_query_indentation(V3_SWAPS_QUERY.format())
-
-        while True:
-            try:
-                result = self.graph_v3.query(
-                    querystr=querystr,
-                    param_types=param_types,
-                    param_values=param_values,
-                )
-            except RemoteError as e:
-                self.msg_aggregator.add_error(
-                    SUBGRAPH_REMOTE_ERROR_MSG.format(
-                        error_msg=str(e),
-                        location=self.location,
-                    ),
-                )
-                raise
-
-            result_data = result['swaps']
-            for entry in result_data:
+        result = self.graph_v3.query_addresses(
+            querystr=querystr,
+            entity='swaps',
+            address_field='origin',
+            addresses=addresses,
+            param_types=param_types,
+            param_values=param_values,
+        )
+        try:
+            for address, entry in result:
                 swaps = []
                 for swap in entry['transaction']['swaps']:
                     timestamp = swap['timestamp']
@@ -459,17 +387,17 @@ class Uniswap(AMMSwapPlatform, EthereumModule):
                     continue
 
                 # Now that we got all swaps for a transaction, create the trade object
-                trades.extend(self._tx_swaps_to_trades(swaps))
-            # Check whether an extra request is needed
-            if len(result_data) < GRAPH_QUERY_LIMIT:
-                break
-
-            # Update pagination step
-            param_values = {
-                **param_values,
-                'offset': param_values['offset'] + GRAPH_QUERY_LIMIT,  # type: ignore
-            }
-        return trades
+                address_trades[address].extend(self._tx_swaps_to_trades(swaps))
+        except RemoteError as e:
+            self.msg_aggregator.add_error(
+                SUBGRAPH_REMOTE_ERROR_MSG.format(
+                    error_msg=str(e),
+                    location=self.location,
+                ),
+            )
+            raise
+
+        return dict(address_trades)
 
     def get_balances(
         self,
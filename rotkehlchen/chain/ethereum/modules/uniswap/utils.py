@@ -1,7 +1,7 @@
 import json
 import logging
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Callable, List, Optional, Set
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Set, Tuple, Union
 
 import requests
 from web3.types import BlockIdentifier
@@ -141,61 +141,39 @@ def get_latest_lp_addresses(data_directory: Path) -> List[ChecksumEthAddress]:
         return json.loads(f.read())
 
 
-def find_uniswap_v2_lp_price(
-        ethereum: 'EthereumManager',
+UNISWAP_V2_LP_METHODS = ('token0', 'token1', 'totalSupply', 'getReserves', 'decimals')
+
+
+def uniswap_v2_lp_price_calls(token: EthereumToken) -> List[Tuple[ChecksumEthAddress, str]]:
+    """The contract calls whose output is needed to calculate the price of a uniswap v2 LP token"""  # noqa: E501
+    contract = EthereumContract(address=token.ethereum_address, abi=UNISWAP_V2_LP_ABI, deployed_block=0)  # noqa: E501
+    return [
+        (token.ethereum_address, contract.encode(method_name=method))
+        for method in UNISWAP_V2_LP_METHODS
+    ]
+
+
+def uniswap_v2_lp_price_from_output(
         token: EthereumToken,
+        output: Sequence[Union[Tuple[bool, bytes], bytes]],
         token_price_func: Callable,
         token_price_func_args: List[Any],
-        block_identifier: BlockIdentifier,
 ) -> Optional[Price]:
-    """
-    Calculate the price for a uniswap v2 LP token. That is
+    """Calculate the price for a uniswap v2 LP token from the output of the calls
+    given by uniswap_v2_lp_price_calls. The output can be that of multicall or multicall_2.
+
     value = (Total value of liquidity pool) / (Current suply of LP tokens)
-    We need:
-    - Price of token 0
-    - Price of token 1
-    - Pooled amount of token 0
-    - Pooled amount of token 1
-    - Total supply of of pool token
     """
     address = token.ethereum_address
     contract = EthereumContract(address=address, abi=UNISWAP_V2_LP_ABI, deployed_block=0)
-    methods = ['token0', 'token1', 'totalSupply', 'getReserves', 'decimals']
-    multicall_method = multicall_2  # choose which multicall to use
-    if isinstance(block_identifier, int):
-        if block_identifier <= 7929876:
-            log.error(
-                f'No multicall contract at the block {block_identifier}. Uniswap v2 LP '
-                f'query failed. Should implement direct queries',
-            )
-            return None
-
-        if block_identifier <= 12336033:
-            multicall_method = multicall
-
-    try:
-        output = multicall_method(
-            ethereum=ethereum,
-            require_success=True,
-            calls=[(address, contract.encode(method_name=method)) for method in methods],
-            block_identifier=block_identifier,
-        )
-    except RemoteError as e:
-        log.error(
-            f'Remote error calling multicall contract for uniswap v2 lp '
-            f'token {token.ethereum_address} properties: {str(e)}',
-        )
-        return None
-
-    # decode output
     decoded = []
-    for (method_output, method_name) in zip(output, methods):
+    for (method_output, method_name) in zip(output, UNISWAP_V2_LP_METHODS):
         call_success = True
-        if multicall_method == multicall_2:
+        if isinstance(method_output, bytes):  # multicall output
+            call_result = method_output
+        else:  # multicall_2 output
             call_success = method_output[0]
             call_result = method_output[1]
-        else:
-            call_result = method_output  # type: ignore
         if call_success and len(call_result) != 0:
             decoded_method = contract.decode(call_result, method_name)
             if len(decoded_method) == 1:
@@ -239,6 +217,57 @@ def find_uniswap_v2_lp_price(
     return Price(share_value)
 
 
+def find_uniswap_v2_lp_price(
+        ethereum: 'EthereumManager',
+        token: EthereumToken,
+        token_price_func: Callable,
+        token_price_func_args: List[Any],
+        block_identifier: BlockIdentifier,
+) -> Optional[Price]:
+    """
+    Calculate the price for a uniswap v2 LP token. That is
+    value = (Total value of liquidity pool) / (Current suply of LP tokens)
+    We need:
+    - Price of token 0
+    - Price of token 1
+    - Pooled amount of token 0
+    - Pooled amount of token 1
+    - Total supply of of pool token
+    """
+    multicall_method = multicall_2  # choose which multicall to use
+    if isinstance(block_identifier, int):
+        if block_identifier <= 7929876:
+            log.error(
+                f'No multicall contract at the block {block_identifier}. Uniswap v2 LP '
+                f'query failed. Should implement direct queries',
+            )
+            return None
+
+        if block_identifier <= 12336033:
+            multicall_method = multicall
+
+    try:
+        output = multicall_method(
+            ethereum=ethereum,
+            require_success=True,
+            calls=uniswap_v2_lp_price_calls(token),
+            block_identifier=block_identifier,
+        )
+    except RemoteError as e:
+        log.error(
+            f'Remote error calling multicall contract for uniswap v2 lp '
+            f'token {token.ethereum_address} properties: {str(e)}',
+        )
+        return None
+
+    return uniswap_v2_lp_price_from_output(
+        token=token,
+        output=output,
+        token_price_func=token_price_func,
+        token_price_func_args=token_price_func_args,
+    )
+
+
 def historical_uniswap_v2_lp_price(
         ethereum: 'EthereumManager',
         token: EthereumToken,
@@ -1,4 +1,4 @@
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from rotkehlchen.accounting.structures.base import (
     HistoryBaseEntry,
@@ -63,10 +63,11 @@ class Uniswapv1Decoder(DecoderInterface):  # lgtm[py/missing-call-to-init]
 
     # -- DecoderInterface methods
 
-    def decoding_rules(self) -> List[Callable]:
-        return [
-            self._maybe_decode_swap,
-        ]
+    def decoding_rules_by_topic(self) -> Dict[bytes, List[Callable]]:
+        return {
+            TOKEN_PURCHASE: [self._maybe_decode_swap],
+            ETH_PURCHASE: [self._maybe_decode_swap],
+        }
 
     def counterparties(self) -> List[str]:
         return [CPT_UNISWAP_V1]
@@ -6,6 +6,7 @@ from rotkehlchen.accounting.structures.balance import AssetBalance, Balance
 from rotkehlchen.accounting.structures.defi import DefiEvent, DefiEventType
 from rotkehlchen.assets.asset import Asset, EthereumToken
 from rotkehlchen.chain.ethereum.constants import ZERO_ADDRESS
+from rotkehlchen.chain.ethereum.modules.executor import module_query_executor
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
 from rotkehlchen.constants.assets import (
     A_ALINK_V1,
@@ -761,8 +762,10 @@ class YearnVaults(EthereumModule):
             to_block = self.ethereum.get_blocknumber_by_time(to_timestamp)
             history: Dict[ChecksumEthAddress, Dict[str, YearnVaultHistory]] = {}
 
-            for address in addresses:
-                history[address] = {}
+            def get_address_history(
+                    address: ChecksumEthAddress,
+            ) -> Dict[str, YearnVaultHistory]:
+                address_history = {}
                 for _, vault in YEARN_VAULTS.items():
                     vault_history = self.get_vault_history(
                         defi_balances=defi_balances.get(address, []),
@@ -772,10 +775,18 @@ class YearnVaults(EthereumModule):
                         to_block=to_block,
                     )
                     if vault_history:
-                        history[address][vault.name] = vault_history
-
-                if len(history[address]) == 0:
-                    del history[address]
+                        address_history[vault.name] = vault_history
+                return address_history
+
+            addresses_history = module_query_executor.map(
+                module='yearn_vaults',
+                query='history_of_address',
+                function=get_address_history,
+                arguments=addresses,
+            )
+            for address, address_history in zip(addresses, addresses_history):
+                if len(address_history) != 0:
+                    history[address] = address_history
 
         return history
 
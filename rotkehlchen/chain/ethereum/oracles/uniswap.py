@@ -284,7 +284,7 @@ class UniswapV3Oracle(UniswapOracle):
     def __init__(self, eth_manager: 'EthereumManager'):
         super().__init__(eth_manager=eth_manager, version=3)
 
-    @cache_response_timewise()
+    @cache_response_timewise(maxsize=1024)
     def get_pool(
         self,
         token_0: EthereumToken,
@@ -376,7 +376,7 @@ class UniswapV2Oracle(UniswapOracle):
     def __init__(self, eth_manager: 'EthereumManager'):
         super().__init__(eth_manager=eth_manager, version=3)
 
-    @cache_response_timewise()
+    @cache_response_timewise(maxsize=1024)
     def get_pool(
         self,
         token_0: EthereumToken,
@@ -4,6 +4,7 @@ from collections import defaultdict
 from typing import Dict, List, Optional, Sequence, Tuple
 
 from rotkehlchen.assets.asset import EthereumToken
+from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.chain.ethereum.manager import EthereumManager, NodeName
 from rotkehlchen.chain.ethereum.types import string_to_ethereum_address
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
@@ -146,6 +147,9 @@ class EthTokens():
             exceptions=exceptions,
             except_protocols=['balancer'],
         )
+        # All detected and saved tokens are turned into EthereumToken objects by
+        # identifier. Resolve them in bulk instead of one global DB query per token.
+        AssetResolver().preload(x.identifier for x in all_tokens)
         # With etherscan with chunks > 120, we get request uri too large
         # so the limitation is not in the gas, but in the request uri length
         etherscan_chunks = list(get_chunks(all_tokens, n=ETHERSCAN_MAX_TOKEN_CHUNK_LENGTH))
@@ -193,6 +197,12 @@ class EthTokens():
             account=address,
             call_order=call_order,
         )
+        tokens_by_identifier = {x.identifier: x for x in tokens}
+        # Query the on-chain state of the LP and vault tokens in batches before their prices
+        Inquirer().prefetch_derived_prices(
+            tokens_by_identifier[x] for x in ret
+            if x in tokens_by_identifier and tokens_by_identifier[x] not in token_usd_price
+        )
         for token_identifier, value in ret.items():
             token = EthereumToken.from_identifier(token_identifier)
             if token is None:  # should not happen
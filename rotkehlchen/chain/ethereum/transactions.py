@@ -385,6 +385,7 @@ class EthTransactions:
             has_premium=True,  # we don't need any limiting here
         )
         if len(result) == 0:
+            self.database.commit_write_batch()
             transaction = self.ethereum.get_transaction_by_hash(tx_hash)
             dbethtx.add_ethereum_transactions([transaction], relevant_address=None)
             self._get_internal_transactions_for_ranges(
@@ -403,6 +404,7 @@ class EthTransactions:
             return tx_receipt
 
         # not in the DB, so we need to query the chain for it
+        self.database.commit_write_batch()
         tx_receipt_data = self.ethereum.get_transaction_receipt(tx_hash=tx_hash)
         dbethtx.add_receipt_data(tx_receipt_data)
         tx_receipt = dbethtx.get_receipt(tx_hash)
@@ -1,8 +1,10 @@
 import logging
 import operator
+import time
 from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import partial
 from importlib import import_module
 from pathlib import Path
 from typing import (
@@ -21,12 +23,14 @@ from typing import (
     overload,
 )
 
+from gevent import Timeout
 from gevent.lock import Semaphore
+from gevent.pool import Pool
 from web3.exceptions import BadFunctionCallOutput
 
 from rotkehlchen.accounting.structures.balance import Balance, BalanceSheet
 from rotkehlchen.assets.asset import Asset, EthereumToken
-from rotkehlchen.chain.bitcoin import get_bitcoin_addresses_balances
+from rotkehlchen.chain.bitcoin import BitcoinAddressesCache, get_bitcoin_addresses_balances
 from rotkehlchen.chain.ethereum.defi.chad import DefiChad
 from rotkehlchen.chain.ethereum.defi.structures import DefiProtocolBalances
 from rotkehlchen.chain.ethereum.modules import (
@@ -46,6 +50,7 @@ from rotkehlchen.chain.ethereum.modules import (
     YearnVaultsV2,
 )
 from rotkehlchen.chain.ethereum.modules.eth2.structures import Eth2Validator
+from rotkehlchen.chain.ethereum.modules.executor import ModuleQueryJob, module_query_executor
 from rotkehlchen.chain.ethereum.tokens import EthTokens
 from rotkehlchen.chain.ethereum.types import string_to_ethereum_address
 from rotkehlchen.chain.substrate.manager import wait_until_a_node_is_available
@@ -76,6 +81,7 @@ from rotkehlchen.errors.misc import (
     InputError,
     ModuleInactive,
     ModuleInitializationFailure,
+    RemoteError,
 )
 from rotkehlchen.fval import FVal
 from rotkehlchen.greenlets import GreenletManager
@@ -128,6 +134,12 @@ def _module_name_to_class(module_name: ModuleName) -> EthereumModule:
 
 
 DEFI_BALANCES_REQUERY_SECONDS = 600
+# How many chains query_balances queries at the same time
+BALANCE_QUERIES_CONCURRENCY = 4
+# Seconds after which the balances query of a chain is abandoned. Ethereum takes longer
+# since it also detects the tokens and queries the DeFi protocols of all accounts.
+CHAIN_BALANCES_QUERY_TIMEOUTS = {SupportedBlockchain.ETHEREUM: 900}
+DEFAULT_CHAIN_BALANCES_QUERY_TIMEOUT = 300
 
 # Mapping to token symbols to ignore. True means all
 DEFI_PROTOCOLS_TO_SKIP_ASSETS = {
@@ -305,6 +317,8 @@ class BlockchainBalances:
 class BlockchainBalancesUpdate:
     per_account: BlockchainBalances
     totals: BalanceSheet
+    # The errors of the chains whose balances could not be queried
+    errors: Dict[SupportedBlockchain, str] = field(default_factory=dict)
 
     def serialize(self) -> Dict[str, Dict]:
         return {
@@ -343,10 +357,13 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
         self.data_directory = data_directory
         self.beaconchain = beaconchain
         self.btc_derivation_gap_limit = btc_derivation_gap_limit
+        self.btc_addresses_cache = BitcoinAddressesCache()
         self.defi_balances_last_query_ts = Timestamp(0)
         self.defi_balances: Dict[ChecksumEthAddress, List[DefiProtocolBalances]] = {}
 
         self.eth2_details: List['ValidatorDetails'] = []
+        # Seconds taken by the last balances query of each chain
+        self.balances_query_durations: Dict[SupportedBlockchain, float] = {}
 
         self.defi_lock = Semaphore()
         self.btc_lock = Semaphore()
@@ -554,7 +571,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
             )
 
     @protect_with_lock(arguments_matter=True)
-    @cache_response_timewise(forward_ignore_cache=True)
     def query_balances(
             self,
             blockchain: Optional[SupportedBlockchain] = None,
@@ -565,49 +581,94 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
 
         If force detection is true, then the ethereum token detection is forced.
 
+        The chains are queried concurrently, each with its own timeout. If all chains
+        are queried, the chains that fail are skipped and their errors are returned in
+        the update along with the balances of the other chains. Each chain's query is
+        cached on its own so the update is not.
+
         May raise:
-        - RemoteError if an external service such as Etherscan or blockchain.info
-        is queried and there is a problem with its query.
-        - EthSyncError if querying the token balances through a provided ethereum
-        client and the chain is not synced
+        - RemoteError if a specific blockchain is queried and an external service such
+        as Etherscan or blockchain.info is queried and there is a problem with its query.
+        - EthSyncError if ethereum is queried and querying the token balances through
+        a provided ethereum client and the chain is not synced
         """
-        should_query_eth = not blockchain or blockchain == SupportedBlockchain.ETHEREUM
-        should_query_eth2 = not blockchain or blockchain == SupportedBlockchain.ETHEREUM_BEACONCHAIN  # noqa: E501
-        should_query_btc = not blockchain or blockchain == SupportedBlockchain.BITCOIN
-        should_query_ksm = not blockchain or blockchain == SupportedBlockchain.KUSAMA
-        should_query_dot = not blockchain or blockchain == SupportedBlockchain.POLKADOT
-        should_query_avax = not blockchain or blockchain == SupportedBlockchain.AVALANCHE
-
-        if should_query_eth:
-            self.query_ethereum_balances(
-                force_token_detection=force_token_detection,
-                ignore_cache=ignore_cache,
-            )
-        if should_query_eth2:
-            self.query_ethereum_beaconchain_balances(
-                fetch_validators_for_eth1=force_token_detection,  # document this better
+        queries: List[Tuple[SupportedBlockchain, Callable[..., None], Dict[str, Any]]] = [
+            (SupportedBlockchain.ETHEREUM, self.query_ethereum_balances, {'force_token_detection': force_token_detection}),  # noqa: E501
+            (SupportedBlockchain.ETHEREUM_BEACONCHAIN, self.query_ethereum_beaconchain_balances, {'fetch_validators_for_eth1': force_token_detection}),  # document this better  # noqa: E501
+            (SupportedBlockchain.BITCOIN, self.query_btc_balances, {}),
+            (SupportedBlockchain.KUSAMA, self.query_kusama_balances, {}),
+            (SupportedBlockchain.POLKADOT, self.query_polkadot_balances, {}),
+            (SupportedBlockchain.AVALANCHE, self.query_avalanche_balances, {}),
+        ]
+        pool = Pool(BALANCE_QUERIES_CONCURRENCY)
+        greenlets = {}
+        for chain, query, kwargs in queries:
+            if blockchain is not None and chain != blockchain:
+                continue
+            greenlets[chain] = pool.spawn(
+                self._query_chain_balances,
+                chain=chain,
+                query=query,
                 ignore_cache=ignore_cache,
+                **kwargs,
             )
-        if should_query_btc:
-            self.query_btc_balances(ignore_cache=ignore_cache)
-        if should_query_ksm:
-            self.query_kusama_balances(ignore_cache=ignore_cache)
-        if should_query_dot:
-            self.query_polkadot_balances(ignore_cache=ignore_cache)
-        if should_query_avax:
-            self.query_avalanche_balances(ignore_cache=ignore_cache)
+            greenlets[chain].name = f'Query {chain.value} balances'
+        pool.join()
 
-        return self.get_balances_update()
+        errors = {}
+        for chain, greenlet in greenlets.items():
+            try:
+                greenlet.get()
+            except (RemoteError, EthSyncError) as e:
+                if blockchain is not None:
+                    raise
+                log.error(f'Querying {chain.value} balances failed due to: {str(e)}')
+                errors[chain] = str(e)
+
+        return BlockchainBalancesUpdate(
+            per_account=self.balances.copy(),
+            totals=self.totals.copy(),
+            errors=errors,
+        )
+
+    def _query_chain_balances(
+            self,
+            chain: SupportedBlockchain,
+            query: Callable[..., None],
+            **kwargs: Any,
+    ) -> None:
+        """Runs the balances query of a chain and keeps how long it took
+
+        May raise:
+        - RemoteError if the query times out or any of the errors of the query
+        """
+        timeout = CHAIN_BALANCES_QUERY_TIMEOUTS.get(chain, DEFAULT_CHAIN_BALANCES_QUERY_TIMEOUT)
+        start = time.perf_counter()
+        try:
+            with Timeout(timeout) as timer:
+                query(**kwargs)
+        except Timeout as e:
+            if e is not timer:
+                raise
+            raise RemoteError(f'Querying the balances timed out after {timeout} seconds') from e  # noqa: E501
+        finally:
+            duration = time.perf_counter() - start
+            self.balances_query_durations[chain] = duration
+            log.debug(f'Queried {chain.value} balances', seconds=round(duration, 3))
 
     @protect_with_lock()
-    @cache_response_timewise()
+    @cache_response_timewise(forward_ignore_cache=True)
     def query_btc_balances(
-            self,  # pylint: disable=unused-argument
-            # Kwargs here is so linters don't complain when the "magic" ignore_cache kwarg is given
-            **kwargs: Any,
+            self,
+            ignore_cache: bool = False,
+            # Kwargs here is so linters don't complain when other "magic" kwargs are given
+            **kwargs: Any,  # pylint: disable=unused-argument
     ) -> None:
         """Queries blockchain.info/blockstream for the balance of all BTC accounts
 
+        Addresses queried shortly before, for example by the xpub derivation, are not
+        queried again unless ignore_cache is True.
+
         May raise:
         - RemotError if there is a problem querying any remote
         """
@@ -617,7 +678,11 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
         self.balances.btc = {}
         btc_usd_price = Inquirer().find_usd_price(A_BTC)
         total = FVal(0)
-        balances = get_bitcoin_addresses_balances(self.accounts.btc)
+        balances = get_bitcoin_addresses_balances(
+            accounts=self.accounts.btc,
+            cache=self.btc_addresses_cache,
+            ignore_cache=ignore_cache,
+        )
         for account, balance in balances.items():
             total += balance
             self.balances.btc[account] = Balance(
@@ -741,7 +806,10 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
             if btc_account not in db_btc_accounts:
                 accounts_to_remove.append(btc_account)
 
-        balances_mapping = get_bitcoin_addresses_balances(accounts_to_remove)
+        balances_mapping = get_bitcoin_addresses_balances(
+            accounts=accounts_to_remove,
+            cache=self.btc_addresses_cache,
+        )
         balances = [balances_mapping.get(x, ZERO) for x in accounts_to_remove]
         self.modify_blockchain_accounts(
             blockchain=SupportedBlockchain.BITCOIN,
@@ -777,7 +845,10 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
         # and there is no other account in the balances
         if append_or_remove == 'append' or remove_with_populated_balance:
             if already_queried_balance is None:
-                balances = get_bitcoin_addresses_balances([account])
+                balances = get_bitcoin_addresses_balances(
+                    accounts=[account],
+                    cache=self.btc_addresses_cache,
+                )
                 balance = balances[account]
             else:
                 balance = already_queried_balance
@@ -1030,7 +1101,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
         # chain to populate the self.balances mapping.
         if not self.balances.is_queried(blockchain):
             self.query_balances(blockchain, ignore_cache=True)
-            self.flush_cache('query_balances', blockchain=blockchain, ignore_cache=True)  # noqa: E501
 
         result = self.modify_blockchain_accounts(
             blockchain=blockchain,
@@ -1119,8 +1189,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
 
                 # we are adding/removing accounts, make sure query cache is flushed
                 self.flush_cache('query_btc_balances')
-                self.flush_cache('query_balances')
-                self.flush_cache('query_balances', blockchain=SupportedBlockchain.BITCOIN)
                 for idx, account in enumerate(accounts):
                     a_balance = already_queried_balances[idx] if already_queried_balances else None
                     self.modify_btc_account(
@@ -1138,8 +1206,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
                 # we are adding/removing accounts, make sure query cache is flushed
                 self.flush_cache('query_ethereum_balances', force_token_detection=False)
                 self.flush_cache('query_ethereum_balances', force_token_detection=True)
-                self.flush_cache('query_balances')
-                self.flush_cache('query_balances', blockchain=SupportedBlockchain.ETHEREUM)
                 for account in accounts:
                     # when the API adds or removes an address, the deserialize function at
                     # EthereumAddressField is called, so we expect from the addresses retrieved by
@@ -1173,14 +1239,22 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
                     else:  # remove
                         self.defi_balances.pop(address, None)
                     # For each module run the corresponding callback for the address
-                    for _, module in self.iterate_modules():
-                        if append_or_remove == 'append':
-                            new_module_balances = module.on_account_addition(address)
+                    if append_or_remove == 'append':
+                        modules_balances = module_query_executor.run([
+                            ModuleQueryJob(
+                                module=name,
+                                query='on_account_addition',
+                                function=partial(module.on_account_addition, address),
+                            )
+                            for name, module in self.iterate_modules()
+                        ])
+                        for new_module_balances in modules_balances:
                             if new_module_balances:
                                 for entry in new_module_balances:
                                     self.balances.eth[address].assets[entry.asset] += entry.balance
                                     self.totals.assets[entry.asset] += entry.balance
-                        else:  # remove
+                    else:  # remove
+                        for _, module in self.iterate_modules():
                             module.on_account_removal(address)
 
         elif blockchain == SupportedBlockchain.KUSAMA:
@@ -1190,8 +1264,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
 
                 # we are adding/removing accounts, make sure query cache is flushed
                 self.flush_cache('query_kusama_balances')
-                self.flush_cache('query_balances')
-                self.flush_cache('query_balances', blockchain=SupportedBlockchain.KUSAMA)
                 for account in accounts:
                     self.modify_kusama_account(
                         account=KusamaAddress(account),
@@ -1205,8 +1277,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
 
                 # we are adding/removing accounts, make sure query cache is flushed
                 self.flush_cache('query_polkadot_balances')
-                self.flush_cache('query_balances')
-                self.flush_cache('query_balances', blockchain=SupportedBlockchain.POLKADOT)
                 for account in accounts:
                     self.modify_polkadot_account(
                         account=PolkadotAddress(account),
@@ -1220,8 +1290,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
 
                 # we are adding/removing accounts, make sure query cache is flushed
                 self.flush_cache('query_avalanche_balances')
-                self.flush_cache('query_balances')
-                self.flush_cache('query_balances', blockchain=SupportedBlockchain.AVALANCHE)  # noqa: E501
                 for account in accounts:
                     address = string_to_ethereum_address(account)
                     self.modify_avalanche_account(
@@ -1416,14 +1484,55 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
         self.query_ethereum_tokens(force_token_detection)
         self._add_protocol_balances()
 
+    def _query_protocol_balances(self) -> Dict[Tuple[str, str], Any]:
+        """Queries the balances of the activated modules concurrently
+
+        Returns the results keyed by the module name and the query
+        """
+        jobs = []
+        dsr_module = self.get_module('makerdao_dsr')
+        if dsr_module is not None:
+            jobs.append(ModuleQueryJob('makerdao_dsr', 'balances', dsr_module.get_current_dsr))
+        vaults_module = self.get_module('makerdao_vaults')
+        if vaults_module is not None:
+            jobs.append(ModuleQueryJob('makerdao_vaults', 'balances', vaults_module.get_balances))
+        adex_module = self.get_module('adex')
+        if adex_module is not None and self.premium is not None:
+            jobs.append(ModuleQueryJob('adex', 'balances', partial(
+                adex_module.get_balances,
+                addresses=self.queried_addresses_for_module('adex'),
+            )))
+        pickle_module = self.get_module('pickle_finance')
+        if pickle_module is not None:
+            jobs.append(ModuleQueryJob('pickle_finance', 'balances', partial(
+                pickle_module.balances_in_protocol,
+                addresses=self.queried_addresses_for_module('pickle_finance'),
+            )))
+        liquity_module = self.get_module('liquity')
+        if liquity_module is not None:
+            liquity_addresses = self.queried_addresses_for_module('liquity')
+            jobs.append(ModuleQueryJob('liquity', 'balances', partial(
+                liquity_module.get_positions,
+                addresses_list=liquity_addresses,
+            )))
+            jobs.append(ModuleQueryJob('liquity', 'staking_balances', partial(
+                liquity_module.liquity_staking_balances,
+                addresses=liquity_addresses,
+            )))
+
+        if len(jobs) == 0:
+            return {}
+        results = module_query_executor.run(jobs)
+        return {(job.module, job.query): result for job, result in zip(jobs, results)}
+
     def _add_protocol_balances(self) -> None:
         """Also count token balances that may come from various protocols"""
+        protocol_balances = self._query_protocol_balances()
         # If we have anything in DSR also count it towards total blockchain balances
         eth_balances = self.balances.eth
-        dsr_module = self.get_module('makerdao_dsr')
-        if dsr_module is not None:
+        current_dsr_report = protocol_balances.get(('makerdao_dsr', 'balances'))
+        if current_dsr_report is not None:
             additional_total = Balance()
-            current_dsr_report = dsr_module.get_current_dsr()
             for dsr_account, balance_entry in current_dsr_report.balances.items():
 
                 if balance_entry.amount == ZERO:
@@ -1437,8 +1546,8 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
 
         # Also count the vault balance and defi saver wallets and add it to the totals
         vaults_module = self.get_module('makerdao_vaults')
-        if vaults_module is not None:
-            balances = vaults_module.get_balances()
+        balances = protocol_balances.get(('makerdao_vaults', 'balances'))
+        if vaults_module is not None and balances is not None:
             for address, entry in balances.items():
                 if address not in eth_balances:
                     self.msg_aggregator.add_error(
@@ -1487,37 +1596,28 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
                     balances=defi_balances,
                 )
 
-        adex_module = self.get_module('adex')
-        if adex_module is not None and self.premium is not None:
-            adex_balances = adex_module.get_balances(addresses=self.queried_addresses_for_module('adex'))  # noqa: E501
+        adex_balances = protocol_balances.get(('adex', 'balances'))
+        if adex_balances is not None:
             for address, balance in adex_balances.items():
                 eth_balances[address].assets[A_ADX] += balance
                 self.totals.assets[A_ADX] += balance
 
-        pickle_module = self.get_module('pickle_finance')
-        if pickle_module is not None:
-            pickle_balances_per_address = pickle_module.balances_in_protocol(
-                addresses=self.queried_addresses_for_module('pickle_finance'),
-            )
+        pickle_balances_per_address = protocol_balances.get(('pickle_finance', 'balances'))
+        if pickle_balances_per_address is not None:
             for address, pickle_balances in pickle_balances_per_address.items():
                 for asset_balance in pickle_balances:
                     eth_balances[address].assets[asset_balance.asset] += asset_balance.balance
                     self.totals.assets[asset_balance.asset] += asset_balance.balance
 
-        liquity_module = self.get_module('liquity')
-        if liquity_module is not None:
-            # Get trove information
-            liquity_balances = liquity_module.get_positions(
-                addresses_list=self.queried_addresses_for_module('liquity'),
-            )
+        liquity_balances = protocol_balances.get(('liquity', 'balances'))
+        if liquity_balances is not None:
+            # Trove information
             for address, deposits in liquity_balances.items():
                 collateral = deposits.collateral.balance
                 eth_balances[address].assets[A_ETH] += collateral
                 self.totals.assets[A_ETH] += collateral
-            # Get staked amounts
-            liquity_staked = liquity_module.liquity_staking_balances(
-                addresses=self.queried_addresses_for_module('liquity'),
-            )
+            # Staked amounts
+            liquity_staked = protocol_balances[('liquity', 'staking_balances')]
             for address, staked_info in liquity_staked.items():
                 deposited_lqty = staked_info.staked.balance
                 eth_balances[address].assets[A_LQTY] += deposited_lqty
@@ -1638,7 +1738,7 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
         )
 
     @protect_with_lock()
-    @cache_response_timewise()
+    @cache_response_timewise(maxsize=8)
     def get_eth2_history_events(
             self,
             from_timestamp: Timestamp,
@@ -1703,8 +1803,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
         )
         self.flush_cache('get_eth2_daily_stats')
         self.flush_cache('query_ethereum_beaconchain_balances')
-        self.flush_cache('query_balances')
-        self.flush_cache('query_balances', blockchain=SupportedBlockchain.ETHEREUM_BEACONCHAIN)
 
     def add_eth2_validator(
             self,
@@ -1730,8 +1828,6 @@ class ChainManager(CacheableMixIn, LockableQueryMixIn):
         self.flush_cache('get_eth2_history_events')
         self.flush_cache('get_eth2_daily_stats')
         self.flush_cache('query_ethereum_beaconchain_balances')
-        self.flush_cache('query_balances')
-        self.flush_cache('query_balances', blockchain=SupportedBlockchain.ETHEREUM_BEACONCHAIN)
 
     def delete_eth2_validator(
             self,
@@ -1,10 +1,12 @@
 import logging
+from collections import defaultdict
 from functools import wraps
 from http import HTTPStatus
 from json.decoder import JSONDecodeError
 from typing import (
     Any,
     Callable,
+    DefaultDict,
     Dict,
     Iterable,
     List,
@@ -19,9 +21,11 @@ from urllib.parse import urlparse
 
 import gevent
 import requests
+from gevent.lock import Semaphore
 from requests.adapters import Response
 from substrateinterface import SubstrateInterface
 from substrateinterface.exceptions import BlockNotFound, SubstrateRequestException
+from substrateinterface.utils.ss58 import ss58_decode
 from websocket import WebSocketException
 
 from rotkehlchen.assets.asset import Asset
@@ -52,6 +56,11 @@ from .utils import KUSAMA_NODE_CONNECTION_TIMEOUT
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Number of accounts whose balances are requested with a single storage query
+ACCOUNTS_BALANCE_BATCH_SIZE = 100
+# Size of the SCALE encoded AccountData: free, reserved and two more u128
+ACCOUNT_DATA_SIZE = 64
+
 
 class SubstrateChainProperties(NamedTuple):
     """These properties are populated straight from the blockchain.
@@ -165,6 +174,8 @@ class SubstrateManager():
         self.own_rpc_endpoint = own_rpc_endpoint
         self.available_node_attributes_map: DictNodeNameNodeAttributes = {}
         self.available_nodes_call_order: NodesCallOrder = []
+        # node interface url -> lock serializing the batch requests to the node
+        self.node_interface_locks: DefaultDict[str, Semaphore] = defaultdict(Semaphore)
         self.chain_properties: SubstrateChainProperties
         if connect_on_startup and len(connect_at_start) != 0:
             self.attempt_connections()
@@ -331,16 +342,120 @@ class SubstrateManager():
             account=account,
             result=result,
         )
+        return self._deserialize_account_balance(result)
 
-        balance = ZERO
-        if result is not None:
-            account_data = result.value['data']
-            balance = (
-                FVal(account_data['free'] + account_data['reserved']) /
-                FVal('10') ** self.chain_properties.token_decimals
+    def _get_accounts_balance(
+            self,
+            accounts: List[SubstrateAddress],
+            node_interface: SubstrateInterface,
+    ) -> Dict[SubstrateAddress, FVal]:
+        """Given accounts get their amount of chain native token with a single
+        `state_queryStorageAt` request for the `System.Account` storage of all of them.
+
+        The storage keys are built and the AccountInfo values are decoded here so
+        that the request does not need the chain metadata. The requests to a node
+        are sent one at a time, as a websocket node interface can't be shared by
+        concurrent requests.
+        """
+        log.debug(
+            f'{self.chain} querying {self.chain_properties.token.identifier} balances',
+            url=node_interface.url,
+            accounts=accounts,
+        )
+        try:
+            accounts_by_key = {
+                node_interface.generate_storage_hash(
+                    storage_module='System',
+                    storage_function='Account',
+                    params=[ss58_decode(account, valid_ss58_format=self.chain_properties.ss58_format)],  # noqa: E501
+                    hashers=['Blake2_128Concat'],
+                ): account for account in accounts
+            }
+            with self.node_interface_locks[node_interface.url]:
+                with gevent.Timeout(KUSAMA_NODE_CONNECTION_TIMEOUT):
+                    result = node_interface.rpc_request(
+                        method='state_queryStorageAt',
+                        params=[list(accounts_by_key)],
+                    )
+            changes = result['result'][0]['changes']
+        except (
+                requests.exceptions.RequestException,
+                SubstrateRequestException,
+                ValueError,
+                WebSocketException,
+                gevent.Timeout,
+                BlockNotFound,
+                KeyError,
+                IndexError,
+                TypeError,
+        ) as e:
+            msg = str(e)
+            if isinstance(e, gevent.Timeout):
+                msg = f'a timeout of {msg}'
+            elif isinstance(e, (KeyError, IndexError, TypeError)):
+                msg = f'unexpected response format {str(e)}'
+            message = (
+                f'{self.chain} failed to request {self.chain_properties.token.identifier} '
+                f'accounts balance at endpoint {node_interface.url} due to: {msg}'
             )
+            log.error(message, accounts=accounts)
+            raise RemoteError(message) from e
 
-        return balance
+        log.debug(f'{self.chain} accounts balance', accounts=accounts, result=result)
+        # the storage values are not returned in the order of the keys and the
+        # accounts that don't exist have no value
+        balances = {account: ZERO for account in accounts}
+        for storage_key, account_info in changes:
+            account = accounts_by_key.get(storage_key)
+            if account is None:
+                raise RemoteError(
+                    f'{self.chain} node at endpoint {node_interface.url} returned the '
+                    f'unexpected storage key {storage_key}',
+                )
+            if account_info is not None:
+                balances[account] = self._deserialize_account_data(account_info)
+
+        return balances
+
+    def _deserialize_account_data(self, account_info: str) -> FVal:
+        """Returns the free and reserved amount of a SCALE encoded AccountInfo
+
+        AccountData is the last field of AccountInfo in all the runtimes and it
+        starts with the free and reserved amounts as little endian u128, followed
+        by two more u128.
+
+        May raise:
+        - RemoteError: the AccountInfo is not hex or too short to contain an AccountData
+        """
+        try:
+            data = bytes.fromhex(account_info[2:])
+        except (TypeError, ValueError) as e:
+            raise RemoteError(f'{self.chain} got an invalid AccountInfo {account_info}') from e
+
+        if len(data) < ACCOUNT_DATA_SIZE:
+            raise RemoteError(
+                f'{self.chain} got an AccountInfo of {len(data)} bytes, which is too '
+                f'short to contain an AccountData',
+            )
+        account_data = data[-ACCOUNT_DATA_SIZE:]
+        free = int.from_bytes(account_data[:16], byteorder='little')
+        reserved = int.from_bytes(account_data[16:32], byteorder='little')
+        return FVal(free + reserved) / FVal('10') ** self.chain_properties.token_decimals
+
+    def _deserialize_account_balance(self, account_info: Optional[Any]) -> FVal:
+        """Returns the free and reserved amount of an account's AccountData
+
+        More information about an account balance in the Substrate AccountData
+        documentation.
+        """
+        if account_info is None or account_info.value is None:
+            return ZERO
+
+        account_data = account_info.value['data']
+        return (
+            FVal(account_data['free'] + account_data['reserved']) /
+            FVal('10') ** self.chain_properties.token_decimals
+        )
 
     def _get_chain_id(self, node_interface: SubstrateInterface) -> SubstrateChainId:
         """Return the chain identifier.
@@ -581,19 +696,78 @@ class SubstrateManager():
     ) -> Dict[SubstrateAddress, FVal]:
         """Given a list of accounts get their amount of chain native token.
 
+        The balances of up to ACCOUNTS_BALANCE_BATCH_SIZE accounts are requested at
+        once and the batches are requested concurrently. Unless there is an own node,
+        each batch is first requested to a different available node and then to the
+        rest in the call order, so that the batches are spread across the nodes.
+
         This method is not decorated with `request_available_nodes` on purpose,
-        so each request can use all available nodes.
+        so each batch can use all available nodes.
 
         May raise:
-        - RemoteError: `request_available_nodes()` fails to request after
-        trying with all the available nodes.
+        - RemoteError: a batch fails to be requested after trying with all the
+        available nodes.
         """
+        if len(accounts) == 0:
+            return {}
+        if len(self.available_nodes_call_order) == 0:
+            raise RemoteError(f'{self.chain} has no nodes available')
+
+        greenlets = [
+            gevent.spawn(
+                self._request_accounts_balance,
+                accounts=accounts[idx:idx + ACCOUNTS_BALANCE_BATCH_SIZE],
+                nodes_call_order=self._get_batch_nodes_call_order(batch_idx),
+            ) for batch_idx, idx in enumerate(range(0, len(accounts), ACCOUNTS_BALANCE_BATCH_SIZE))  # noqa: E501
+        ]
+        gevent.joinall(greenlets)
         balances: Dict[SubstrateAddress, FVal] = {}
-        for account in accounts:
-            balances[account] = self.get_account_balance(account)
+        for greenlet in greenlets:
+            balances.update(greenlet.get())
 
         return balances
 
+    def _get_batch_nodes_call_order(self, batch_idx: int) -> NodesCallOrder:
+        """Returns the nodes call order of a batch of accounts. The own node, if any,
+        is always called first. Otherwise the batches start with a different node."""
+        call_order = self.available_nodes_call_order
+        if call_order[0][0] == self.chain.node_name_type().OWN:
+            return call_order
+
+        first_idx = batch_idx % len(call_order)
+        return [call_order[first_idx], *call_order[:first_idx], *call_order[first_idx + 1:]]
+
+    def _request_accounts_balance(
+            self,
+            accounts: List[SubstrateAddress],
+            nodes_call_order: NodesCallOrder,
+    ) -> Dict[SubstrateAddress, FVal]:
+        """Requests the balances of the accounts to each node of the call order until
+        a request succeeds, like `request_available_nodes()` does.
+
+        May raise:
+        - RemoteError: the request fails with all the nodes.
+        """
+        requested_nodes = []
+        for node, node_attributes in nodes_call_order:
+            try:
+                return self._get_accounts_balance(
+                    accounts=accounts,
+                    node_interface=node_attributes.node_interface,
+                )
+            except RemoteError as e:
+                requested_nodes.append(str(node))
+                log.warning(
+                    f'{self.chain} accounts balance failed to request via {node} node at '
+                    f'endpoint {node_attributes.node_interface.url} due to: {str(e)}.',
+                    accounts=accounts,
+                )
+
+        raise RemoteError(
+            f'{self.chain} request failed after trying the following nodes: '
+            f'{", ".join(requested_nodes)}',
+        )
+
     @request_available_nodes
     def get_chain_id(
             self,
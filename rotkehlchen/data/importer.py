@@ -216,7 +216,9 @@ class DataImporter():
         filepath: Path,
         **kwargs: Any,
     ) -> Tuple[bool, str]:
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_cointracking_csv',
+        ):
             data = csv.reader(csvfile, delimiter=',', quotechar='"')
             header = remap_header(next(data))
             for idx, row in enumerate(data):
@@ -718,42 +720,44 @@ class DataImporter():
                         self.db_ledger.add_ledger_action(action)
 
     def import_cryptocom_csv(self, filepath: Path, **kwargs: Any) -> Tuple[bool, str]:
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_cryptocom_csv',
+        ):
             data = csv.DictReader(csvfile)
             try:
-                #  Notice: Crypto.com csv export gathers all swapping entries (`lockup_swap_*`,
-                # `crypto_wallet_swap_*`, ...) into one entry named `dynamic_coin_swap_*`.
-                self._import_cryptocom_associated_entries(
-                    data=data,
-                    tx_kind='dynamic_coin_swap',
-                    **kwargs,
-                )
-                # reset the iterator
-                csvfile.seek(0)
-                # pass the header since seek(0) make the first row to be the header
-                next(data)
-
-                self._import_cryptocom_associated_entries(
-                    data=data,
-                    tx_kind='dust_conversion',
-                    **kwargs,
-                )
-                csvfile.seek(0)
-                next(data)
+                with self.db.savepoint():
+                    #  Notice: Crypto.com csv export gathers all swapping entries (`lockup_swap_*`,
+                    # `crypto_wallet_swap_*`, ...) into one entry named `dynamic_coin_swap_*`.
+                    self._import_cryptocom_associated_entries(
+                        data=data,
+                        tx_kind='dynamic_coin_swap',
+                        **kwargs,
+                    )
+                    # reset the iterator
+                    csvfile.seek(0)
+                    # pass the header since seek(0) make the first row to be the header
+                    next(data)
+
+                    self._import_cryptocom_associated_entries(
+                        data=data,
+                        tx_kind='dust_conversion',
+                        **kwargs,
+                    )
+                    csvfile.seek(0)
+                    next(data)
 
-                self._import_cryptocom_associated_entries(data, 'interest_swap', **kwargs)
-                csvfile.seek(0)
-                next(data)
+                    self._import_cryptocom_associated_entries(data, 'interest_swap', **kwargs)
+                    csvfile.seek(0)
+                    next(data)
 
-                self._import_cryptocom_associated_entries(data, 'invest', **kwargs)
-                csvfile.seek(0)
-                next(data)
+                    self._import_cryptocom_associated_entries(data, 'invest', **kwargs)
+                    csvfile.seek(0)
+                    next(data)
             except KeyError as e:
                 return False, f'Crypto.com csv missing entry for {str(e)}'
             except UnknownAsset as e:
                 return False, f'Encountered unknown asset {str(e)} at crypto.com csv import'
             except sqlcipher.IntegrityError:  # pylint: disable=no-member
-                self.db.conn.rollback()
                 self.db.msg_aggregator.add_warning(
                     'Error during cryptocom CSV import consumption. '
                     ' Entry already existed in DB. Ignoring.',
@@ -764,7 +768,8 @@ class DataImporter():
                 if idx % ROWS_PER_CONTEXT_SWITCH == 0:
                     gevent.sleep(0.1)
                 try:
-                    self._consume_cryptocom_entry(row, **kwargs)
+                    with self.db.savepoint():
+                        self._consume_cryptocom_entry(row, **kwargs)
                 except UnknownAsset as e:
                     self.db.msg_aggregator.add_warning(
                         f'During cryptocom CSV import found action with unknown '
@@ -778,7 +783,6 @@ class DataImporter():
                     )
                     continue
                 except sqlcipher.IntegrityError:  # pylint: disable=no-member
-                    self.db.conn.rollback()
                     self.db.msg_aggregator.add_warning(
                         'Error during cryptocom CSV import consumption. '
                         ' Entry already existed in DB. Ignoring.',
@@ -905,13 +909,16 @@ class DataImporter():
         Information for the values that the columns can have has been obtained from
         https://github.com/BittyTax/BittyTax/blob/06794f51223398759852d6853bc7112ffb96129a/bittytax/conv/parsers/blockfi.py#L67
         """
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_blockfi_transactions_csv',
+        ):
             data = csv.DictReader(csvfile)
             for idx, row in enumerate(data):
                 if idx % ROWS_PER_CONTEXT_SWITCH == 0:
                     gevent.sleep(0.1)
                 try:
-                    self._consume_blockfi_entry(row, **kwargs)
+                    with self.db.savepoint():
+                        self._consume_blockfi_entry(row, **kwargs)
                 except UnknownAsset as e:
                     self.db.msg_aggregator.add_warning(
                         f'During BlockFi CSV import found action with unknown '
@@ -925,7 +932,6 @@ class DataImporter():
                     )
                     continue
                 except sqlcipher.IntegrityError:  # pylint: disable=no-member
-                    self.db.conn.rollback()
                     self.db.msg_aggregator.add_warning(
                         'Error during blockfi CSV import consumption. '
                         ' Entry already existed in DB. Ignoring.',
@@ -981,7 +987,9 @@ class DataImporter():
         Information for the values that the columns can have has been obtained from
         the issue in github #1674
         """
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_blockfi_trades_csv',
+        ):
             data = csv.DictReader(csvfile)
             for idx, row in enumerate(data):
                 if idx % ROWS_PER_CONTEXT_SWITCH == 0:
@@ -1118,13 +1126,16 @@ class DataImporter():
         Information for the values that the columns can have has been obtained from
         https://github.com/BittyTax/BittyTax/blob/06794f51223398759852d6853bc7112ffb96129a/bittytax/conv/parsers/nexo.py
         """
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_nexo_csv',
+        ):
             data = csv.DictReader(csvfile)
             for idx, row in enumerate(data):
                 if idx % ROWS_PER_CONTEXT_SWITCH == 0:
                     gevent.sleep(0.1)
                 try:
-                    self._consume_nexo(row, **kwargs)
+                    with self.db.savepoint():
+                        self._consume_nexo(row, **kwargs)
                 except UnknownAsset as e:
                     self.db.msg_aggregator.add_warning(
                         f'During Nexo CSV import found action with unknown '
@@ -1138,7 +1149,6 @@ class DataImporter():
                     )
                     continue
                 except sqlcipher.IntegrityError:  # pylint: disable=no-member
-                    self.db.conn.rollback()
                     self.db.msg_aggregator.add_warning(
                         'Error during nexro CSV import consumption. '
                         ' Entry already existed in DB. Ignoring.',
@@ -1216,7 +1226,9 @@ Trade from ShapeShift with ShapeShift Deposit Address:
         """
         Information for the values that the columns can have has been obtained from sample CSVs
         """
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_shapeshift_trades_csv',
+        ):
             data = csv.DictReader(csvfile)
             for idx, row in enumerate(data):
                 if idx % ROWS_PER_CONTEXT_SWITCH == 0:
@@ -1388,7 +1400,9 @@ Activity from uphold with uphold transaction id:
         """
         Information for the values that the columns can have has been obtained from sample CSVs
         """
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_uphold_transactions_csv',
+        ):
             data = csv.DictReader(csvfile)
             for idx, row in enumerate(data):
                 if idx % ROWS_PER_CONTEXT_SWITCH == 0:
@@ -1484,7 +1498,9 @@ Activity from uphold with uphold transaction id:
         Import trades from bisq. The information and comments about this importer were addressed
         at the issue https://github.com/rotki/rotki/issues/824
         """
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_bisq_trades_csv',
+        ):
             data = csv.DictReader(csvfile)
             for idx, row in enumerate(data):
                 if idx % ROWS_PER_CONTEXT_SWITCH == 0:
@@ -1630,7 +1646,9 @@ Activity from uphold with uphold transaction id:
             )
 
     def import_binance_csv(self, filepath: Path, **kwargs: Any) -> Tuple[bool, str]:
-        with open(filepath, 'r', encoding='utf-8-sig') as csvfile:
+        with open(filepath, 'r', encoding='utf-8-sig') as csvfile, self.db.write_batch(
+            caller='DataImporter.import_binance_csv',
+        ):
             input_rows = list(csv.DictReader(csvfile))
             skipped_count, multirows = self._group_binance_rows(rows=input_rows, **kwargs)
             if skipped_count > 0:
@@ -1,18 +1,38 @@
+import itertools
 import json
 import logging
 import os
 import re
 import shutil
 import tempfile
+import time
 from collections import defaultdict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Sequence, Set, Tuple, Type, Union, cast
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
+import gevent
+from gevent.lock import BoundedSemaphore, Semaphore
 from pysqlcipher3 import dbapi2 as sqlcipher
 
 from rotkehlchen.accounting.structures.balance import BalanceType
 from rotkehlchen.accounting.structures.base import ActionType
 from rotkehlchen.assets.asset import Asset, EthereumToken
+from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.balances.manual import ManuallyTrackedBalance
 from rotkehlchen.chain.bitcoin.hdkey import HDKey
 from rotkehlchen.chain.bitcoin.xpub import (
@@ -48,8 +68,8 @@ from rotkehlchen.chain.ethereum.trades import AMMSwap
 from rotkehlchen.constants.assets import A_USD
 from rotkehlchen.constants.ethereum import YEARN_VAULTS_PREFIX, YEARN_VAULTS_V2_PREFIX
 from rotkehlchen.constants.limits import FREE_ASSET_MOVEMENTS_LIMIT, FREE_TRADES_LIMIT
-from rotkehlchen.constants.misc import NFT_DIRECTIVE
-from rotkehlchen.constants.timing import HOUR_IN_SECONDS
+from rotkehlchen.constants.misc import NFT_DIRECTIVE, ZERO
+from rotkehlchen.constants.timing import DAY_IN_SECONDS, HOUR_IN_SECONDS, WEEK_IN_SECONDS
 from rotkehlchen.db.constants import (
     BINANCE_MARKETS_KEY,
     KRAKEN_ACCOUNT_TYPE_KEY,
@@ -74,9 +94,12 @@ from rotkehlchen.db.utils import (
     BlockchainAccounts,
     DBAssetBalance,
     LocationData,
+    LockWaitStats,
     SingleDBAssetBalance,
     Tag,
+    WriteBatch,
     deserialize_tags_from_db,
+    downsample_time_series,
     form_query_to_filter_timestamps,
     insert_tag_mappings,
     is_valid_db_blockchain_account,
@@ -125,6 +148,21 @@ KDF_ITER = 64000
 DBINFO_FILENAME = 'dbinfo.json'
 MAIN_DB_NAME = 'rotkehlchen.db'
 TRANSIENT_DB_NAME = 'rotkehlchen_transient.db'
+# Limits of the writes held in a write batch after which they are committed
+WRITE_BATCH_MAX_ROWS = 5000
+WRITE_BATCH_MAX_SECONDS = 2
+# Number of read only connections to the user DB that can be open at the same time
+DB_READ_CONNECTIONS = 2
+# Waits for a DB lock longer than this many seconds are logged
+DB_LOCK_WAIT_LOG_SECONDS = 0.1
+# The periods of the balance snapshot rollups from the longest to the shortest
+BALANCE_ROLLUP_PERIODS = (('W', WEEK_IN_SECONDS), ('D', DAY_IN_SECONDS))
+BALANCE_ROLLUP_LENGTHS = dict(BALANCE_ROLLUP_PERIODS)
+# The offsets of the rollup periods from the epoch. Weeks start on Mondays.
+BALANCE_ROLLUP_OFFSETS = {'W': 4 * DAY_IN_SECONDS, 'D': 0}
+# A snapshot stores all of its balances if this many snapshots were stored since the last
+# one that did. Snapshots are saved every balance_save_frequency hours.
+BALANCES_KEYFRAME_SNAPSHOTS = 30
 
 DBTupleType = Literal[
     'trade',
@@ -157,6 +195,33 @@ TABLES_WITH_ASSETS = (
 DB_BACKUP_RE = re.compile(r'(\d+)_rotkehlchen_db_v(\d+).backup')
 
 
+def _balance_usd_price(amount: str, usd_value: str) -> str:
+    """The USD price of an asset as given by the amount and usd_value of its balance"""
+    amount_value = FVal(amount)
+    if amount_value == ZERO:
+        return '0'
+    return str(FVal(usd_value) / amount_value)
+
+
+def _derived_usd_value(amount: str, usd_price: str) -> str:
+    return str(FVal(amount) * FVal(usd_price))
+
+
+def _balance_rollup_start(period: str, timestamp: Timestamp) -> Timestamp:
+    """The start of the daily or weekly rollup period that timestamp is in"""
+    return Timestamp(timestamp - (timestamp - BALANCE_ROLLUP_OFFSETS[period]) % BALANCE_ROLLUP_LENGTHS[period])  # noqa: E501
+
+
+def _rollup_periods_of(timestamps: Iterable[Tuple[Timestamp, Any]]) -> Dict[Tuple[str, Timestamp], Set[Any]]:  # noqa: E501
+    """Groups the keys of the given (time, key) pairs by the (period, start) of each
+    rollup period that their time is in"""
+    keys_by_period: Dict[Tuple[str, Timestamp], Set[Any]] = defaultdict(set)
+    for timestamp, key in timestamps:
+        for period, _ in BALANCE_ROLLUP_PERIODS:
+            keys_by_period[(period, _balance_rollup_start(period, timestamp))].add(key)
+    return keys_by_period
+
+
 def _protect_password_sqlcipher(password: str) -> str:
     """A double quote in the password would close the string. To escape it double it
 
@@ -246,7 +311,21 @@ class DBHandler:
         self.user_data_dir = user_data_dir
         self.sqlcipher_version = detect_sqlcipher_version()
         self.last_write_ts: Optional[Timestamp] = None
-        self.conn: sqlcipher.Connection = None  # pylint: disable=no-member
+        self._write_batch: Optional[WriteBatch] = None
+        # password is kept to open the read only connections when they are needed
+        self._password = password
+        self._read_conns: List[sqlcipher.Connection] = []  # pylint: disable=no-member
+        self._greenlet_read_conns: Dict[Any, sqlcipher.Connection] = {}  # pylint: disable=no-member  # noqa: E501
+        # connections that were in use when the pool was closed. Closed when returned.
+        self._read_conns_to_close: List[sqlcipher.Connection] = []  # pylint: disable=no-member  # noqa: E501
+        self._read_semaphore = BoundedSemaphore(DB_READ_CONNECTIONS)
+        self._write_batch_lock = Semaphore()
+        self._savepoint_ids = itertools.count()
+        # the number of open savepoints of each greenlet and the rows written in them
+        self._savepoints: Dict[Any, int] = {}
+        self._savepoint_rows: Dict[Any, int] = {}
+        self.lock_waits: Dict[str, LockWaitStats] = defaultdict(LockWaitStats)
+        self._conn: sqlcipher.Connection = None  # pylint: disable=no-member
         self.conn_transient: sqlcipher.Connection = None  # pylint: disable=no-member
         self._connect(password)
         self._run_actions_after_first_connection(password)
@@ -255,11 +334,29 @@ class DBHandler:
         self.update_owned_assets_in_globaldb()
         self.add_globaldb_assetids()
 
+    @property
+    def conn(self) -> sqlcipher.Connection:  # pylint: disable=no-member
+        """The connection to the user DB. Inside read_only() it is the read only
+        connection held by the current greenlet, otherwise the single writer connection
+        """
+        if len(self._greenlet_read_conns) != 0:
+            read_conn = self._greenlet_read_conns.get(gevent.getcurrent())
+            if read_conn is not None:
+                return read_conn
+        return self._conn
+
+    @conn.setter
+    def conn(self, value: sqlcipher.Connection) -> None:  # pylint: disable=no-member
+        self._conn = value
+
     def __del__(self) -> None:
         self.logout()
 
     def logout(self) -> None:
         if self.conn is not None:
+            if self._write_batch is not None:
+                self._write_batch = None
+                self._commit_last_write()
             self.disconnect(conn_attribute='conn')
         if self.conn_transient is not None:
             self.disconnect(conn_attribute='conn_transient')
@@ -284,6 +381,8 @@ class DBHandler:
         - AuthenticationError if a wrong password is given or if the DB is corrupt
         - DBUpgradeError if there is a problem with DB upgrading
         """
+        # The upgrades back up the DB by copying its file so all of its data must be in it
+        self.conn.execute('PRAGMA journal_mode=DELETE')
         # Run upgrades if needed
         fresh_db = DBUpgradeManager(self).run_upgrades()
         # create tables if needed (first run - or some new tables)
@@ -294,6 +393,12 @@ class DBHandler:
                 'INSERT OR REPLACE INTO settings(name, value) VALUES(?, ?)',
                 ('version', str(ROTKEHLCHEN_DB_VERSION)),
             )
+        # After the upgrades switch to the write-ahead log so that the read only
+        # connections are not blocked by the writes. With it the synchronous mode
+        # can be lowered without risking corruption of the DB.
+        self.conn.commit()
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
         # set up transient connection
         self._connect(password, conn_attribute='conn_transient')
         # creating tables if necessary
@@ -365,6 +470,14 @@ class DBHandler:
             fullpath = self.user_data_dir / MAIN_DB_NAME
         else:
             fullpath = self.user_data_dir / TRANSIENT_DB_NAME
+        setattr(self, conn_attribute, self._open_connection(fullpath, password))
+
+    def _open_connection(self, fullpath: Path, password: str) -> sqlcipher.Connection:  # pylint: disable=no-member  # noqa: E501
+        """May raise:
+        - SystemPermissionError if we are unable to open the DB file,
+        probably due to permission errors
+        - AuthenticationError if the given password is not the right one for the DB
+        """
         try:
             conn: sqlcipher.Connection = sqlcipher.connect(str(fullpath))  # pylint: disable=no-member  # noqa: E501
         except sqlcipher.OperationalError as e:  # pylint: disable=no-member
@@ -390,7 +503,7 @@ class DBHandler:
                 'Wrong password or invalid/corrupt database for user',
             ) from e
 
-        setattr(self, conn_attribute, conn)
+        return conn
 
     def _change_password(
             self,
@@ -425,14 +538,67 @@ class DBHandler:
             self._change_password(new_password, 'conn') and
             self._change_password(new_password, 'conn_transient')
         )
+        if result:  # new read only connections need the new password
+            self._password = new_password
+            self._close_read_connections()
         return result
 
     def disconnect(self, conn_attribute: Literal['conn', 'conn_transient'] = 'conn') -> None:
+        if conn_attribute == 'conn':
+            self._close_read_connections()
         conn = getattr(self, conn_attribute, None)
         if conn:
             conn.close()
             setattr(self, conn_attribute, None)
 
+    def _close_read_connections(self) -> None:
+        """Closes the idle read only connections. Those currently in use are closed when
+        the greenlets using them are done with them instead of returning to the pool."""
+        for conn in self._read_conns:
+            conn.close()
+        self._read_conns = []
+        self._read_conns_to_close.extend(self._greenlet_read_conns.values())
+
+    @contextmanager
+    def read_only(self, caller: str) -> Iterator[None]:
+        """Makes `conn` a read only connection to the user DB for the current greenlet
+        until the block ends. Each greenlet gets its own connection from a pool of at
+        most DB_READ_CONNECTIONS. With the write-ahead log its reads are not blocked
+        by the writer connection, and they only see committed data.
+
+        Any write attempted through `conn` inside the block raises an OperationalError.
+
+        The time spent waiting for a free connection is recorded in `lock_waits` under
+        `caller`.
+        """
+        greenlet = gevent.getcurrent()
+        if greenlet in self._greenlet_read_conns:  # already reading in this greenlet
+            yield
+            return
+
+        start = time.monotonic()
+        with self._read_semaphore:
+            waited = time.monotonic() - start
+            self.lock_waits[caller].add(waited)
+            if waited >= DB_LOCK_WAIT_LOG_SECONDS:
+                log.debug(f'{caller} waited {waited:.3f} seconds for a DB read connection')
+
+            if len(self._read_conns) != 0:
+                conn = self._read_conns.pop()
+            else:
+                conn = self._open_connection(self.user_data_dir / MAIN_DB_NAME, self._password)  # noqa: E501
+                conn.execute('PRAGMA query_only=ON')
+            self._greenlet_read_conns[greenlet] = conn
+            try:
+                yield
+            finally:
+                del self._greenlet_read_conns[greenlet]
+                if conn in self._read_conns_to_close:  # the pool was closed meanwhile
+                    self._read_conns_to_close.remove(conn)
+                    conn.close()
+                else:
+                    self._read_conns.append(conn)
+
     def export_unencrypted(self, temppath: Path) -> None:
         self.conn.executescript(
             'ATTACH DATABASE "{}" AS plaintext KEY "";'
@@ -449,6 +615,7 @@ class DBHandler:
         - AuthenticationError if the wrong password is given
         """
         self.disconnect()
+        self._password = password
         rdbpath = self.user_data_dir / MAIN_DB_NAME
         # Make copy of existing encrypted DB before removing it
         shutil.copy2(
@@ -483,15 +650,146 @@ class DBHandler:
         # all went okay, remove the original temp backup
         (self.user_data_dir / 'rotkehlchen_temp_backup.db').unlink()
 
-    def update_last_write(self) -> None:
+    def checkpoint(self) -> None:
+        """Moves all the committed writes from the write-ahead log to the DB file. Needed
+        before copying the DB file while it's open."""
+        self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def update_last_write(self, rows: int = 1) -> None:
+        """Saves the time of the last write to the DB and commits
+
+        Within a write batch of the current greenlet both are deferred until the batch
+        commits. `rows` is the number of rows just written, counted towards its row limit.
+        """
         # Also keep it in memory for faster querying
         self.last_write_ts = ts_now()
-        cursor = self.conn.cursor()
+        greenlet = gevent.getcurrent()
+        if greenlet in self._savepoints:  # a commit would make the savepoint unusable
+            self._savepoint_rows[greenlet] = self._savepoint_rows.get(greenlet, 0) + rows
+            return
+
+        batch = self._write_batch
+        if batch is not None and batch.greenlet is greenlet:
+            batch.rows += rows
+            batch.last_write_pending = True
+            if not batch.should_commit():
+                return
+
+        self._commit_last_write()
+
+    def _commit_last_write(self) -> None:
+        if self._write_batch is not None:  # the commit also commits the batched writes
+            self._write_batch.committed()
+        cursor = self._conn.cursor()
         cursor.execute(
             'INSERT OR REPLACE INTO settings(name, value) VALUES(?, ?)',
             ('last_write_ts', str(self.last_write_ts)),
         )
-        self.conn.commit()
+        self._conn.commit()
+
+    def commit_write_batch(self) -> None:
+        """Commits the writes of the current greenlet's write batch that are not committed
+        yet. To be called before waiting on the network so that the transaction of the
+        batch is not kept open meanwhile."""
+        batch = self._write_batch
+        if (
+            batch is not None and batch.last_write_pending and
+            batch.greenlet is gevent.getcurrent()
+        ):
+            self._commit_last_write()
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """Undoes the writes of the block to the writer connection if it raises
+
+        Unlike a rollback of the connection this keeps the other uncommitted writes, such
+        as those of an open write batch. A transaction is begun first if none is open so
+        that releasing the savepoint does not commit. The commits of update_last_write()
+        in the block are made when the outermost savepoint of the greenlet ends, and are
+        dropped if it fails.
+        """
+        greenlet = gevent.getcurrent()
+        name = f'savepoint_{next(self._savepoint_ids)}'
+        cursor = self._conn.cursor()
+        if not self._conn.in_transaction:
+            cursor.execute('BEGIN')
+        cursor.execute(f'SAVEPOINT {name}')
+        self._savepoints[greenlet] = self._savepoints.get(greenlet, 0) + 1
+        try:
+            yield
+        except BaseException:
+            self._end_savepoint(cursor, f'ROLLBACK TO {name}')
+            self._end_savepoint(cursor, f'RELEASE {name}')
+            self._leave_savepoint(greenlet)  # the undone writes need no commit
+            raise
+        self._end_savepoint(cursor, f'RELEASE {name}')
+        rows = self._leave_savepoint(greenlet)
+        if rows is not None:
+            self.update_last_write(rows=rows)
+
+    def _leave_savepoint(self, greenlet: Any) -> Optional[int]:
+        """Counts the end of a savepoint of the greenlet. If it was the outermost one,
+        returns the rows written in it, or None if there are none or it was not."""
+        depth = self._savepoints.pop(greenlet) - 1
+        if depth != 0:
+            self._savepoints[greenlet] = depth
+            return None
+        return self._savepoint_rows.pop(greenlet, None)
+
+    @staticmethod
+    def _end_savepoint(cursor: sqlcipher.Cursor, query: str) -> None:  # pylint: disable=no-member  # noqa: E501
+        try:
+            cursor.execute(query)
+        except sqlcipher.OperationalError as e:  # pylint: disable=no-member
+            # The block waited on the network and a write of another greenlet committed
+            log.error(f'Could not end a savepoint of the user DB since it was committed. {str(e)}')  # noqa: E501
+
+    @contextmanager
+    def write_batch(
+            self,
+            caller: str,
+            max_rows: int = WRITE_BATCH_MAX_ROWS,
+            max_seconds: float = WRITE_BATCH_MAX_SECONDS,
+    ) -> Iterator[None]:
+        """Holds the writes of the current greenlet in a single transaction instead of
+        committing after each of them. The transaction is committed along with a single
+        update of the last write time when `max_rows` rows have been written or when
+        `max_seconds` have passed since the last commit, and when the batch ends.
+
+        Writes are committed when the batch ends even if it ends with an exception, the
+        same as they would have been without a batch. A batch opened in the greenlet of an
+        open batch just joins it. Batches of other greenlets wait for it to end, and the
+        time they wait is recorded in `lock_waits` under `caller`. Writes of other
+        greenlets outside of a batch are not batched.
+
+        The writer connection is shared, so the batched writes may also be committed by
+        the writes of other greenlets. Operations whose writes must be undone on failure
+        use savepoint() instead of rolling back the connection, so that only their own
+        writes are dropped.
+        """
+        greenlet = gevent.getcurrent()
+        if self._write_batch is not None and self._write_batch.greenlet is greenlet:
+            yield
+            return
+
+        start = time.monotonic()
+        with self._write_batch_lock:
+            waited = time.monotonic() - start
+            self.lock_waits[caller].add(waited)
+            if waited >= DB_LOCK_WAIT_LOG_SECONDS:
+                log.debug(f'{caller} waited {waited:.3f} seconds for the DB write batch')
+
+            self._write_batch = WriteBatch(
+                greenlet=greenlet,
+                max_rows=max_rows,
+                max_seconds=max_seconds,
+            )
+            try:
+                yield
+            finally:
+                batch, self._write_batch = self._write_batch, None
+                if batch.last_write_pending and self._conn is not None:
+                    self._commit_last_write()
 
     def get_last_write_ts(self) -> Timestamp:
         cursor = self.conn.cursor()
@@ -706,17 +1004,17 @@ class DBHandler:
         """
         cursor = self.conn.cursor()
         tuples = [(action_type.serialize_for_db(), x) for x in identifiers]
-        cursor.executemany(
-            'DELETE FROM ignored_actions WHERE type=? AND identifier=?;',
-            tuples,
-        )
-        affected_rows = cursor.rowcount
-        if affected_rows != len(identifiers):
-            self.conn.rollback()
-            raise InputError(
-                f'Tried to remove {len(identifiers) - affected_rows} '
-                f'ignored actions that do not exist',
+        with self.savepoint():
+            cursor.executemany(
+                'DELETE FROM ignored_actions WHERE type=? AND identifier=?;',
+                tuples,
             )
+            affected_rows = cursor.rowcount
+            if affected_rows != len(identifiers):
+                raise InputError(
+                    f'Tried to remove {len(identifiers) - affected_rows} '
+                    f'ignored actions that do not exist',
+                )
         self.update_last_write()
 
     def get_ignored_action_ids(
@@ -742,26 +1040,389 @@ class DBHandler:
         return mapping
 
     def add_multiple_balances(self, balances: List[DBAssetBalance]) -> None:
-        """Execute addition of multiple balances in the DB"""
+        """Execute addition of multiple balances in the DB
+
+        The balances of each timestamp are stored whole as a keyframe, along with the USD
+        price of each of their assets. An existing snapshot at the timestamp and the
+        snapshot following it are turned into keyframes first so that they no longer
+        depend on the snapshots before them.
+        """
+        cursor = self.conn.cursor()
+        timestamps = {entry.time for entry in balances}
+        with self.savepoint():
+            for timestamp in timestamps:
+                self._make_balances_keyframe(cursor, timestamp)
+                next_ts = self._next_balances_snapshot(cursor, timestamp)
+                if next_ts is not None:
+                    self._make_balances_keyframe(cursor, next_ts)
+
+            for entry in balances:
+                try:
+                    cursor.execute(
+                        'INSERT INTO timed_balances('
+                        '    time, currency, amount, usd_value, category) '
+                        ' VALUES(?, ?, ?, ?, ?)',
+                        (entry.time, entry.asset.identifier, entry.amount, entry.usd_value, entry.category.serialize_for_db()),  # noqa: E501
+                    )
+                except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
+                    raise InputError(
+                        f'Adding timed_balance failed. Either asset with identifier '
+                        f'{entry.asset.identifier} is not known or an entry for timestamp '
+                        f'{entry.time} already exists.',
+                    ) from e
+        # the price of an asset is given by its first balance
+        cursor.executemany(
+            'INSERT OR IGNORE INTO timed_balances_prices(time, currency, usd_price) '
+            'VALUES(?, ?, ?)',
+            [(x.time, x.asset.identifier, _balance_usd_price(x.amount, x.usd_value)) for x in balances],  # noqa: E501
+        )
+        cursor.executemany(
+            'INSERT OR IGNORE INTO timed_balances_snapshots(time, keyframe) VALUES(?, 1)',
+            [(x,) for x in timestamps],
+        )
+        self._update_balance_rollups(
+            cursor=cursor,
+            entries=[(x.time, (x.asset.identifier, x.category.serialize_for_db())) for x in balances],  # noqa: E501
+        )
+        self.update_last_write()
+
+    def _add_balances_changes(self, balances: List[DBAssetBalance], timestamp: Timestamp) -> None:  # noqa: E501
+        """Adds the snapshot of the given balances at timestamp by storing only what changed
+        since the previous snapshot
+
+        The USD price of an asset is stored if it changed. A balance is stored if its
+        amount changed or if its USD value is not its amount times the USD price of its
+        asset, which is what the USD value of the balances that are not stored is
+        derived from.
+
+        The snapshot is stored whole as a keyframe if it's the first one, if
+        BALANCES_KEYFRAME_SNAPSHOTS snapshots were stored since the last keyframe or
+        if it's not the latest one.
+
+        May raise:
+        - InputError if an asset is not known or there is already a snapshot at timestamp
+        """
         cursor = self.conn.cursor()
+        previous_ts, exists = cursor.execute(
+            'SELECT MAX(time), SUM(time=?) FROM timed_balances_snapshots WHERE time <= ?',
+            (timestamp, timestamp),
+        ).fetchone()
+        if (
+            previous_ts is None or
+            exists != 0 or
+            self._balances_snapshots_since_keyframe(cursor, timestamp) >= BALANCES_KEYFRAME_SNAPSHOTS or  # noqa: E501
+            self._next_balances_snapshot(cursor, timestamp) is not None
+        ):
+            self.add_multiple_balances(balances)
+            return
 
+        previous, previous_prices = self._query_balances_snapshot(cursor, previous_ts)
+        prices: Dict[str, str] = {}
+        for entry in balances:  # the price of an asset is given by its first balance
+            prices.setdefault(entry.asset.identifier, _balance_usd_price(entry.amount, entry.usd_value))  # noqa: E501
+        changes = []
         for entry in balances:
-            try:
-                cursor.execute(
-                    'INSERT INTO timed_balances('
-                    '    time, currency, amount, usd_value, category) '
-                    ' VALUES(?, ?, ?, ?, ?)',
-                    (entry.time, entry.asset.identifier, entry.amount, entry.usd_value, entry.category.serialize_for_db()),  # noqa: E501
+            key = (entry.asset.identifier, entry.category.serialize_for_db())
+            previous_balance = previous.pop(key, None)
+            if (
+                previous_balance is None or
+                previous_balance[0] != entry.amount or
+                _derived_usd_value(entry.amount, prices[key[0]]) != entry.usd_value
+            ):
+                changes.append((key[1], timestamp, key[0], entry.amount, entry.usd_value))
+        # the balances of the previous snapshot that are no longer there
+        changes.extend((category, timestamp, currency, None, None) for currency, category in previous)  # noqa: E501
+        try:
+            with self.savepoint():
+                cursor.executemany(
+                    'INSERT INTO timed_balances(category, time, currency, amount, usd_value) '
+                    'VALUES(?, ?, ?, ?, ?)',
+                    changes,
                 )
-            except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
-                self.conn.rollback()
-                raise InputError(
-                    f'Adding timed_balance failed. Either asset with identifier '
-                    f'{entry.asset.identifier} is not known or an entry for timestamp '
-                    f'{entry.time} already exists.',
-                ) from e
+                cursor.executemany(
+                    'INSERT INTO timed_balances_prices(time, currency, usd_price) VALUES(?, ?, ?)',  # noqa: E501
+                    [(timestamp, currency, price) for currency, price in prices.items() if previous_prices.get(currency) != price],  # noqa: E501
+                )
+        except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
+            raise InputError(
+                f'Adding timed_balance failed. Either an asset is not known or an entry '
+                f'for timestamp {timestamp} already exists.',
+            ) from e
+        cursor.execute(
+            'INSERT INTO timed_balances_snapshots(time, keyframe) VALUES(?, 0)', (timestamp,),
+        )
+        self._update_balance_rollups(
+            cursor=cursor,
+            entries=[(timestamp, (x.asset.identifier, x.category.serialize_for_db())) for x in balances],  # noqa: E501
+        )
         self.update_last_write()
 
+    def delete_balances_snapshot(self, timestamp: Timestamp) -> None:
+        """Deletes the timed balances of the snapshot at timestamp
+
+        The following snapshot is turned into a keyframe first since its changes may be
+        relative to the deleted snapshot.
+        """
+        cursor = self.conn.cursor()
+        next_ts = self._next_balances_snapshot(cursor, timestamp)
+        if next_ts is not None:
+            self._make_balances_keyframe(cursor, next_ts)
+        rows = self._query_balances_snapshot_rows(cursor, timestamp)
+        cursor.execute('DELETE FROM timed_balances WHERE time=?', (timestamp,))
+        cursor.execute('DELETE FROM timed_balances_prices WHERE time=?', (timestamp,))
+        cursor.execute('DELETE FROM timed_balances_snapshots WHERE time=?', (timestamp,))
+        self._update_balance_rollups(
+            cursor=cursor,
+            entries=[(timestamp, (currency, category)) for category, currency, _, _ in rows],
+        )
+
+    def get_balances_snapshot(self, timestamp: Timestamp) -> List[DBAssetBalance]:
+        """Returns all balances of the snapshot at timestamp, or an empty list if there is
+        no snapshot at timestamp"""
+        cursor = self.conn.cursor()
+        exists = cursor.execute(
+            'SELECT COUNT(*) FROM timed_balances_snapshots WHERE time=?', (timestamp,),
+        ).fetchone()[0]
+        if exists == 0:
+            return []
+
+        return [
+            DBAssetBalance(
+                category=BalanceType.deserialize_from_db(category),
+                time=timestamp,
+                asset=Asset(currency),
+                amount=amount,
+                usd_value=usd_value,
+            ) for category, currency, amount, usd_value in self._query_balances_snapshot_rows(cursor, timestamp)  # noqa: E501
+        ]
+
+    def iterate_balances_snapshots(
+            self,
+            from_ts: Timestamp,
+            to_ts: Timestamp,
+            condition: str = '',
+            bindings: Sequence[Any] = (),
+            category: Optional[BalanceType] = None,
+    ) -> Iterator[Tuple[Timestamp, Dict[Tuple[str, str], Tuple[str, str]]]]:
+        """Reconstructs the balances of each snapshot between from_ts and to_ts from the
+        last keyframe before them and the changes stored after it
+
+        Yields the time of each snapshot and a mapping of (currency, category) to
+        (amount, usd_value). The condition can limit the balances to some assets and may
+        only use the currency column. The balances can also be limited to a category.
+        The mapping is updated in place for the next snapshot so it should not be kept.
+        """
+        for snapshot_time, balances, _ in self._iterate_balances_and_prices(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                condition=condition,
+                bindings=bindings,
+                category=category,
+        ):
+            yield snapshot_time, balances
+
+    def _iterate_balances_and_prices(
+            self,
+            from_ts: Timestamp,
+            to_ts: Timestamp,
+            condition: str = '',
+            bindings: Sequence[Any] = (),
+            category: Optional[BalanceType] = None,
+    ) -> Iterator[Tuple[Timestamp, Dict[Tuple[str, str], Tuple[str, str]], Dict[str, str]]]:  # noqa: E501
+        """Same as iterate_balances_snapshots but also yields the USD price of each asset
+        that had a balance since the last keyframe"""
+        cursor = self.conn.cursor()
+        start_ts = self._last_balances_keyframe(cursor, from_ts)
+        snapshots = cursor.execute(
+            'SELECT time, keyframe FROM timed_balances_snapshots WHERE time BETWEEN ? AND ? '
+            'ORDER BY time ASC',
+            (start_ts, to_ts),
+        ).fetchall()
+        category_condition, category_bindings = '', ()
+        if category is not None:
+            category_condition, category_bindings = ' AND category=?', (category.serialize_for_db(),)  # noqa: E501
+        changes = cursor.execute(
+            f'SELECT time, currency, category, amount, usd_value FROM timed_balances '
+            f'WHERE time BETWEEN ? AND ? {condition}{category_condition} ORDER BY time ASC',
+            (start_ts, to_ts, *bindings, *category_bindings),
+        )
+        price_changes = self.conn.cursor().execute(
+            f'SELECT time, currency, usd_price FROM timed_balances_prices '
+            f'WHERE time BETWEEN ? AND ? {condition} ORDER BY time ASC',
+            (start_ts, to_ts, *bindings),
+        )
+        amounts: Dict[Tuple[str, str], str] = {}
+        prices: Dict[str, str] = {}
+        balances: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        change = next(changes, None)
+        price_change = next(price_changes, None)
+        for snapshot_time, keyframe in snapshots:
+            if keyframe == 1:
+                amounts.clear()
+                prices.clear()
+            stored = {}
+            while change is not None and change[0] == snapshot_time:
+                if change[3] is None:
+                    amounts.pop((change[1], change[2]), None)
+                else:
+                    amounts[(change[1], change[2])] = change[3]
+                    stored[(change[1], change[2])] = (change[3], change[4])
+                change = next(changes, None)
+            while price_change is not None and price_change[0] == snapshot_time:
+                prices[price_change[1]] = price_change[2]
+                price_change = next(price_changes, None)
+
+            if snapshot_time >= from_ts:
+                balances.clear()
+                for key, amount in amounts.items():
+                    balance = stored.get(key)
+                    if balance is None:  # the amount did not change, only the price
+                        balance = (amount, _derived_usd_value(amount, prices.get(key[0], '0')))  # noqa: E501
+                    balances[key] = balance
+                yield snapshot_time, balances, prices
+
+    def _last_balances_keyframe(self, cursor: sqlcipher.Cursor, timestamp: Timestamp) -> Timestamp:
+        result = cursor.execute(
+            'SELECT MAX(time) FROM timed_balances_snapshots WHERE keyframe=1 AND time <= ?',
+            (timestamp,),
+        ).fetchone()[0]
+        return Timestamp(0) if result is None else result
+
+    def _balances_snapshots_since_keyframe(self, cursor: sqlcipher.Cursor, timestamp: Timestamp) -> int:  # noqa: E501
+        return cursor.execute(
+            'SELECT COUNT(*) FROM timed_balances_snapshots WHERE time > ? AND time <= ?',
+            (self._last_balances_keyframe(cursor, timestamp), timestamp),
+        ).fetchone()[0]
+
+    def _next_balances_snapshot(self, cursor: sqlcipher.Cursor, timestamp: Timestamp) -> Optional[Timestamp]:  # noqa: E501
+        return cursor.execute(
+            'SELECT MIN(time) FROM timed_balances_snapshots WHERE time > ?', (timestamp,),
+        ).fetchone()[0]
+
+    def _query_balances_snapshot(
+            self,
+            cursor: sqlcipher.Cursor,
+            timestamp: Timestamp,
+    ) -> Tuple[Dict[Tuple[str, str], Tuple[str, str]], Dict[str, str]]:
+        """Returns the mapping of (currency, category) to (amount, usd_value) of all
+        balances of the snapshot at timestamp, or of the latest snapshot before it, along
+        with the USD prices of the assets known at it"""
+        snapshot_ts = cursor.execute(
+            'SELECT MAX(time) FROM timed_balances_snapshots WHERE time <= ?', (timestamp,),
+        ).fetchone()[0]
+        if snapshot_ts is not None:
+            for _, balances, prices in self._iterate_balances_and_prices(
+                    from_ts=snapshot_ts,
+                    to_ts=snapshot_ts,
+            ):
+                return dict(balances), dict(prices)
+        return {}, {}
+
+    def _query_balances_snapshot_rows(
+            self,
+            cursor: sqlcipher.Cursor,
+            timestamp: Timestamp,
+    ) -> List[Tuple[str, str, str, str]]:
+        """Returns (category, currency, amount, usd_value) of all balances of the
+        snapshot at timestamp, or of the latest snapshot before it"""
+        balances, _ = self._query_balances_snapshot(cursor, timestamp)
+        return [
+            (category, currency, amount, usd_value)
+            for (currency, category), (amount, usd_value) in balances.items()
+        ]
+
+    def _make_balances_keyframe(self, cursor: sqlcipher.Cursor, timestamp: Timestamp) -> None:
+        """Stores all balances of the snapshot at timestamp and the prices known at it, if
+        there is a snapshot, so that it no longer depends on the snapshots before it"""
+        result = cursor.execute(
+            'SELECT keyframe FROM timed_balances_snapshots WHERE time=?', (timestamp,),
+        ).fetchone()
+        if result is None or result[0] == 1:
+            return
+
+        balances, prices = self._query_balances_snapshot(cursor, timestamp)
+        cursor.execute('DELETE FROM timed_balances WHERE time=?', (timestamp,))
+        cursor.execute('DELETE FROM timed_balances_prices WHERE time=?', (timestamp,))
+        cursor.executemany(
+            'INSERT INTO timed_balances(category, time, currency, amount, usd_value) '
+            'VALUES(?, ?, ?, ?, ?)',
+            [(category, timestamp, currency, amount, usd_value) for (currency, category), (amount, usd_value) in balances.items()],  # noqa: E501
+        )
+        # the later snapshots may rely on the prices of assets that have no balance here
+        cursor.executemany(
+            'INSERT INTO timed_balances_prices(time, currency, usd_price) VALUES(?, ?, ?)',
+            [(timestamp, currency, price) for currency, price in prices.items()],
+        )
+        cursor.execute('UPDATE timed_balances_snapshots SET keyframe=1 WHERE time=?', (timestamp,))  # noqa: E501
+
+    def _update_balance_rollups(
+            self,
+            cursor: sqlcipher.Cursor,
+            entries: List[Tuple[Timestamp, Tuple[str, str]]],
+    ) -> None:
+        """Recomputes the daily and weekly rollups of the given (time, (currency,
+        category)) balances from the snapshots of their periods
+
+        The snapshots of each period are read once however many of its balances changed
+        and summed as FVal, so that a rollup is exactly the sum of the snapshots of its
+        period whatever order they were added and deleted in.
+        """
+        for (period, start_ts), keys in _rollup_periods_of(entries).items():
+            sums: Dict[Tuple[str, str], Tuple[FVal, FVal, int]] = {}
+            for _, balances in self.iterate_balances_snapshots(
+                    from_ts=start_ts,
+                    to_ts=Timestamp(start_ts + BALANCE_ROLLUP_LENGTHS[period] - 1),
+            ):
+                for key in keys.intersection(balances):
+                    amount, usd_value = balances[key]
+                    amount_sum, usd_value_sum, entries_sum = sums.get(key, (ZERO, ZERO, 0))
+                    sums[key] = (amount_sum + FVal(amount), usd_value_sum + FVal(usd_value), entries_sum + 1)  # noqa: E501
+
+            cursor.executemany(
+                'DELETE FROM timed_balances_rollups WHERE period=? AND time=? AND '
+                'currency=? AND category=?',
+                [(period, start_ts, *key) for key in keys],
+            )
+            cursor.executemany(
+                'INSERT INTO timed_balances_rollups(period, time, currency, category, '
+                'amount, usd_value, entries) VALUES(?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (period, start_ts, *key, str(amount_sum), str(usd_value_sum), entries_sum)
+                    for key, (amount_sum, usd_value_sum, entries_sum) in sums.items()
+                ],
+            )
+
+    @staticmethod
+    def _update_location_data_rollups(
+            cursor: sqlcipher.Cursor,
+            entries: List[Tuple[Timestamp, str]],
+    ) -> None:
+        """Recomputes the daily and weekly rollups of the given (time, location) entries
+        of timed_location_data from the entries of their periods as FVal sums"""
+        for (period, start_ts), locations in _rollup_periods_of(entries).items():
+            sums: Dict[str, Tuple[FVal, int]] = {}
+            for location, usd_value in cursor.execute(
+                'SELECT location, usd_value FROM timed_location_data WHERE time BETWEEN ? AND ?',  # noqa: E501
+                (start_ts, start_ts + BALANCE_ROLLUP_LENGTHS[period] - 1),
+            ).fetchall():
+                if location not in locations:
+                    continue
+                usd_value_sum, entries_sum = sums.get(location, (ZERO, 0))
+                sums[location] = (usd_value_sum + FVal(usd_value), entries_sum + 1)
+
+            cursor.executemany(
+                'DELETE FROM timed_location_data_rollups WHERE period=? AND time=? AND location=?',  # noqa: E501
+                [(period, start_ts, location) for location in locations],
+            )
+            cursor.executemany(
+                'INSERT INTO timed_location_data_rollups(period, time, location, usd_value, '
+                'entries) VALUES(?, ?, ?, ?, ?)',
+                [
+                    (period, start_ts, location, str(usd_value_sum), entries_sum)
+                    for location, (usd_value_sum, entries_sum) in sums.items()
+                ],
+            )
+
     def add_aave_events(self, address: ChecksumEthAddress, events: Sequence[AaveEvent]) -> None:
         cursor = self.conn.cursor()
         for e in events:
@@ -1379,6 +2040,10 @@ class DBHandler:
             'DELETE FROM history_events WHERE location = ?;',
             (location.serialize_for_db(),),
         )
+        cursor.execute(
+            'DELETE FROM history_events_daily_stats WHERE location = ?;',
+            (location.serialize_for_db(),),
+        )
         self.update_last_write()
 
     def update_used_query_range(self, name: str, start_ts: Timestamp, end_ts: Timestamp) -> None:
@@ -1406,23 +2071,43 @@ class DBHandler:
     def add_multiple_location_data(self, location_data: List[LocationData]) -> None:
         """Execute addition of multiple location data in the DB"""
         cursor = self.conn.cursor()
-        for entry in location_data:
-            try:
-                cursor.execute(
-                    'INSERT INTO timed_location_data('
-                    '    time, location, usd_value) '
-                    ' VALUES(?, ?, ?)',
-                    (entry.time, entry.location, entry.usd_value),
-                )
-            except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
-                self.conn.rollback()
-                raise InputError(
-                    f'Tried to add a timed_location_data for '
-                    f'{str(Location.deserialize_from_db(entry.location))} at'
-                    f' already existing timestamp {entry.time}.',
-                ) from e
+        with self.savepoint():
+            for entry in location_data:
+                try:
+                    cursor.execute(
+                        'INSERT INTO timed_location_data('
+                        '    time, location, usd_value) '
+                        ' VALUES(?, ?, ?)',
+                        (entry.time, entry.location, entry.usd_value),
+                    )
+                except sqlcipher.IntegrityError as e:  # pylint: disable=no-member
+                    raise InputError(
+                        f'Tried to add a timed_location_data for '
+                        f'{str(Location.deserialize_from_db(entry.location))} at'
+                        f' already existing timestamp {entry.time}.',
+                    ) from e
+            self._update_location_data_rollups(
+                cursor=cursor,
+                entries=[(entry.time, entry.location) for entry in location_data],
+            )
         self.update_last_write()
 
+    def delete_location_data(self, timestamp: Timestamp) -> bool:
+        """Deletes the timed location data of the snapshot at timestamp
+
+        Returns False if the snapshot had no location data.
+        """
+        cursor = self.conn.cursor()
+        locations = [x[0] for x in cursor.execute(
+            'SELECT location FROM timed_location_data WHERE time=?', (timestamp,),
+        )]
+        cursor.execute('DELETE FROM timed_location_data WHERE time=?', (timestamp,))
+        self._update_location_data_rollups(
+            cursor=cursor,
+            entries=[(timestamp, location) for location in locations],
+        )
+        return len(locations) != 0
+
     def add_blockchain_accounts(
             self,
             blockchain: SupportedBlockchain,
@@ -1509,21 +2194,21 @@ class DBHandler:
         account_tuples = [(x,) for x in accounts]
 
         cursor = self.conn.cursor()
-        cursor.executemany(
-            'DELETE FROM tag_mappings WHERE '
-            'object_reference = ?;', account_tuples,
-        )
-        cursor.executemany(
-            'DELETE FROM blockchain_accounts WHERE '
-            'blockchain = ? and account = ?;', tuples,
-        )
-        affected_rows = cursor.rowcount
-        if affected_rows != len(accounts):
-            self.conn.rollback()
-            raise InputError(
-                f'Tried to remove {len(accounts) - affected_rows} '
-                f'{blockchain.value} accounts that do not exist',
+        with self.savepoint():
+            cursor.executemany(
+                'DELETE FROM tag_mappings WHERE '
+                'object_reference = ?;', account_tuples,
+            )
+            cursor.executemany(
+                'DELETE FROM blockchain_accounts WHERE '
+                'blockchain = ? and account = ?;', tuples,
             )
+            affected_rows = cursor.rowcount
+            if affected_rows != len(accounts):
+                raise InputError(
+                    f'Tried to remove {len(accounts) - affected_rows} '
+                    f'{blockchain.value} accounts that do not exist',
+                )
 
         self.update_last_write()
 
@@ -1826,27 +2511,31 @@ class DBHandler:
         """
         cursor = self.conn.cursor()
         tuples = [(x,) for x in ids]
-        cursor.executemany(
-            'DELETE FROM tag_mappings WHERE '
-            'object_reference = ?;', tuples,
-        )
-        cursor.executemany(
-            'DELETE FROM manually_tracked_balances WHERE id = ?;', tuples,
-        )
-        affected_rows = cursor.rowcount
-        if affected_rows != len(ids):
-            self.conn.rollback()
-            raise InputError(
-                f'Tried to remove {len(ids) - affected_rows} '
-                f'manually tracked balance ids that do not exist',
+        with self.savepoint():
+            cursor.executemany(
+                'DELETE FROM tag_mappings WHERE '
+                'object_reference = ?;', tuples,
+            )
+            cursor.executemany(
+                'DELETE FROM manually_tracked_balances WHERE id = ?;', tuples,
             )
+            affected_rows = cursor.rowcount
+            if affected_rows != len(ids):
+                raise InputError(
+                    f'Tried to remove {len(ids) - affected_rows} '
+                    f'manually tracked balance ids that do not exist',
+                )
 
         self.update_last_write()
 
     def remove(self) -> None:
         cursor = self.conn.cursor()
         cursor.execute('DROP TABLE IF EXISTS timed_balances')
+        cursor.execute('DROP TABLE IF EXISTS timed_balances_snapshots')
+        cursor.execute('DROP TABLE IF EXISTS timed_balances_prices')
         cursor.execute('DROP TABLE IF EXISTS timed_location_data')
+        cursor.execute('DROP TABLE IF EXISTS timed_balances_rollups')
+        cursor.execute('DROP TABLE IF EXISTS timed_location_data_rollups')
         cursor.execute('DROP TABLE IF EXISTS timed_unique_data')
         self.update_last_write()
 
@@ -1895,7 +2584,7 @@ class DBHandler:
             usd_value=str(data['net_usd']),
         ))
         try:
-            self.add_multiple_balances(balances)
+            self._add_balances_changes(balances, timestamp)
             self.add_multiple_location_data(locations)
         except InputError as err:
             self.msg_aggregator.add_warning(str(err))
@@ -1950,7 +2639,11 @@ class DBHandler:
             ftx_subaccount: Optional[str],
             should_commit: bool = False,
     ) -> None:
-        """May raise InputError if something is wrong with editing the DB"""
+        """May raise InputError if something is wrong with editing the DB
+
+        Without should_commit the edit is not committed and the caller undoes the writes
+        made before an error with a savepoint around the call.
+        """
         if location not in SUPPORTED_EXCHANGES:
             raise InputError(f'Unsupported exchange {str(location)}')
 
@@ -1996,7 +2689,6 @@ class DBHandler:
                     ),
                 )
             except sqlcipher.DatabaseError as e:  # pylint: disable=no-member
-                self.conn.rollback()
                 raise InputError(f'Could not update DB user_credentials_mappings due to {str(e)}') from e  # noqa: E501
 
         location_is_binance = location in (Location.BINANCE, Location.BINANCEUS)
@@ -2011,14 +2703,12 @@ class DBHandler:
                     (f'{str(location)}\\_trades_%', '\\'),
                 )
             except sqlcipher.DatabaseError as e:  # pylint: disable=no-member
-                self.conn.rollback()
                 raise InputError(f'Could not update DB user_credentials_mappings due to {str(e)}') from e  # noqa: E501
         if location == Location.FTX and ftx_subaccount is not None:
             try:
                 exchange_name = new_name if new_name is not None else name
                 self.set_ftx_subaccount(exchange_name, ftx_subaccount)
             except sqlcipher.DatabaseError as e:  # pylint: disable=no-member
-                self.conn.rollback()
                 raise InputError(f'Could not update DB user_credentials_mappings due to {str(e)}') from e  # noqa: E501
 
         if new_name is not None:
@@ -2250,7 +2940,7 @@ class DBHandler:
                 f' DB. Tuples: {tuples} with query: {query}',
             )
 
-        self.update_last_write()
+        self.update_last_write(rows=len(tuples))
 
     def add_margin_positions(self, margin_positions: List[MarginPosition]) -> None:
         margin_tuples: List[Tuple[Any, ...]] = []
@@ -2391,6 +3081,8 @@ class DBHandler:
             query = 'SELECT * FROM (SELECT * from asset_movements ORDER BY time DESC LIMIT ?) ' + query  # noqa: E501
             results = cursor.execute(query, [FREE_ASSET_MOVEMENTS_LIMIT] + bindings)
 
+        results = results.fetchall()
+        filter_query.update_next_cursor(cursor.description, results)
         asset_movements = []
         for result in results:
             try:
@@ -2597,6 +3289,8 @@ class DBHandler:
             query = 'SELECT * FROM (SELECT * from trades ORDER BY time DESC LIMIT ?) ' + query  # noqa: E501
             results = cursor.execute(query, [FREE_TRADES_LIMIT] + bindings)
 
+        results = results.fetchall()
+        filter_query.update_next_cursor(cursor.description, results)
         trades = []
         for result in results:
             try:
@@ -2747,12 +3441,92 @@ class DBHandler:
         # else
         return None
 
+    def _downsampling_source(
+            self,
+            table: str,
+            condition: str,
+            bindings: Sequence[Any],
+            from_ts: Timestamp,
+            to_ts: Timestamp,
+            max_points: Optional[int],
+    ) -> Optional[Tuple[Timestamp, int, Optional[str]]]:
+        """Decides how the entries of the given snapshot table should be downsampled
+        to at most max_points points
+
+        Returns None if there are few enough entries to return them all. Otherwise
+        returns the time of the first entry, the width of the buckets to average and
+        the rollup period that has fewer entries than the buckets, or None if the
+        buckets are smaller than a day and the snapshots themselves have to be read.
+        """
+        if max_points is None:
+            return None
+
+        cursor = self.conn.cursor()
+        first_ts, last_ts, count = cursor.execute(
+            f'SELECT MIN(time), MAX(time), COUNT(*) FROM {table} '
+            f'WHERE {condition} AND time BETWEEN ? AND ?;',
+            (*bindings, from_ts, to_ts),
+        ).fetchone()
+        if count <= max_points:
+            return None
+
+        bucket_width = -(-(last_ts - first_ts + 1) // max_points)  # ceil division
+        period = None
+        for rollup_period, period_length in BALANCE_ROLLUP_PERIODS:
+            if bucket_width >= period_length:
+                period = rollup_period
+                break
+        return Timestamp(first_ts), bucket_width, period
+
+    def _downsampling_snapshots(
+            self,
+            source: Tuple[Timestamp, int, Optional[str]],
+            to_ts: Timestamp,
+    ) -> List[Tuple[int, int]]:
+        """Returns the time of each snapshot of the downsampling source with 1 entry, or
+        the time of each of its rollup periods with the number of snapshots in it"""
+        first_ts, _, period = source
+        cursor = self.conn.cursor()
+        if period is None:
+            return cursor.execute(
+                'SELECT time, 1 FROM timed_location_data '
+                'WHERE location="H" AND time BETWEEN ? AND ?',
+                (first_ts, to_ts),
+            ).fetchall()
+        return cursor.execute(
+            'SELECT time, entries FROM timed_location_data_rollups '
+            'WHERE period=? AND location="H" AND time BETWEEN ? AND ?',
+            (period, first_ts - BALANCE_ROLLUP_LENGTHS[period] + 1, to_ts),
+        ).fetchall()
+
     def get_netvalue_data(
         self,
         from_ts: Timestamp,
         include_nfts: bool = True,
+        max_points: Optional[int] = None,
     ) -> Tuple[List[str], List[str]]:
-        """Get all entries of net value data from the DB"""
+        """Get all entries of net value data from the DB
+
+        If max_points is given and there are more entries, the entries are averaged in
+        at most max_points buckets of equal length. The daily or weekly rollups of the
+        snapshots are read for buckets that span more than a day or a week.
+        """
+        to_ts = ts_now()
+        source = self._downsampling_source(
+            table='timed_location_data',
+            condition='location="H"',
+            bindings=(),
+            from_ts=from_ts,
+            to_ts=to_ts,
+            max_points=max_points,
+        )
+        if source is not None:
+            return self._get_downsampled_netvalue_data(
+                source=source,
+                to_ts=to_ts,
+                include_nfts=include_nfts,
+            )
+
         cursor = self.conn.cursor()
         # Get the total location ("H") entries in ascending time
         query = cursor.execute(
@@ -2761,13 +3535,15 @@ class DBHandler:
             (from_ts,),
         )
         if not include_nfts:
-            nft_cursor = self.conn.cursor()
-            nft_balances = nft_cursor.execute(
-                'SELECT time, SUM(usd_value) FROM timed_balances WHERE time >= ? '
-                'AND currency LIKE ? GROUP BY time',
-                (from_ts, f'{NFT_DIRECTIVE}%'),
-            )
-            nft_values = {time: value for time, value in nft_balances}
+            nft_values = {
+                snapshot_time: sum((FVal(x[1]) for x in balances.values()), FVal(0))
+                for snapshot_time, balances in self.iterate_balances_snapshots(
+                    from_ts=from_ts,
+                    to_ts=to_ts,
+                    condition='AND currency LIKE ?',
+                    bindings=(f'{NFT_DIRECTIVE}%',),
+                )
+            }
 
         data = []
         times_int = []
@@ -2780,16 +3556,69 @@ class DBHandler:
             data.append(total)
         return times_int, data
 
+    def _get_downsampled_netvalue_data(
+            self,
+            source: Tuple[Timestamp, int, Optional[str]],
+            to_ts: Timestamp,
+            include_nfts: bool,
+    ) -> Tuple[List[str], List[str]]:
+        first_ts, bucket_width, period = source
+        cursor = self.conn.cursor()
+        nft_values: Dict[int, float] = {}
+        if period is None:
+            querystr = (
+                'SELECT time, CAST(usd_value AS REAL), 1 FROM timed_location_data '
+                'WHERE location="H" AND time BETWEEN ? AND ?'
+            )
+            bindings: Tuple[Any, ...] = (first_ts, to_ts)
+            if not include_nfts:
+                nft_values = {
+                    snapshot_time: sum(float(x[1]) for x in balances.values())
+                    for snapshot_time, balances in self.iterate_balances_snapshots(
+                        from_ts=first_ts,
+                        to_ts=to_ts,
+                        condition='AND currency LIKE ?',
+                        bindings=(f'{NFT_DIRECTIVE}%',),
+                    )
+                }
+        else:
+            querystr = (
+                'SELECT time, usd_value, entries FROM timed_location_data_rollups '
+                'WHERE period=? AND location="H" AND time BETWEEN ? AND ?'
+            )
+            bindings = (period, first_ts - BALANCE_ROLLUP_LENGTHS[period] + 1, to_ts)
+            if not include_nfts:
+                nft_values = dict(cursor.execute(
+                    'SELECT time, SUM(usd_value) FROM timed_balances_rollups '
+                    'WHERE period=? AND currency LIKE ? AND time BETWEEN ? AND ? GROUP BY time',
+                    (period, f'{NFT_DIRECTIVE}%', *bindings[1:]),
+                ))
+
+        entries = cursor.execute(querystr, bindings).fetchall()
+        points = downsample_time_series(
+            rows=(
+                (entry_time, '', (usd_value - nft_values.get(entry_time, 0),))
+                for entry_time, usd_value, _ in entries
+            ),
+            snapshots=((entry_time, snapshots) for entry_time, _, snapshots in entries),
+            start_ts=first_ts,
+            bucket_width=bucket_width,
+        )
+        return [x[0] for x in points], [str(x[2][0]) for x in points]
+
     def query_timed_balances(
             self,
             asset: Asset,
             from_ts: Optional[Timestamp] = None,
             to_ts: Optional[Timestamp] = None,
             balance_type: Optional[BalanceType] = None,
+            max_points: Optional[int] = None,
     ) -> List[SingleDBAssetBalance]:
         """Query all balance entries for an asset within a range of timestamps
 
-        Can optionally filter by balance type
+        Can optionally filter by balance type. If max_points is given and there are
+        more entries, they are averaged in at most max_points buckets of equal length
+        as in get_netvalue_data.
         """
         if from_ts is None:
             from_ts = Timestamp(0)
@@ -2797,55 +3626,95 @@ class DBHandler:
             to_ts = ts_now()
         settings = self.get_settings()
 
-        querystr = (
-            'SELECT time, amount, usd_value, category FROM timed_balances '
-            'WHERE time BETWEEN ? AND ? AND currency=?'
-        )
-        bindings = [from_ts, to_ts, asset.identifier]
+        condition = 'currency=?'
+        bindings: List[Any] = [asset.identifier]
         if balance_type is not None:
-            querystr += ' AND category=?'
+            condition += ' AND category=?'
             bindings.append(balance_type.serialize_for_db())
-        querystr += ' ORDER BY time ASC;'
 
-        cursor = self.conn.cursor()
-        results = cursor.execute(querystr, bindings)
-        results = results.fetchall()
+        # the asset's balances are only stored when they change so the number of
+        # snapshots decides if they are downsampled
+        source = self._downsampling_source(
+            table='timed_location_data',
+            condition='location="H"',
+            bindings=(),
+            from_ts=from_ts,
+            to_ts=to_ts,
+            max_points=max_points,
+        )
+        if source is None:
+            results = [
+                (snapshot_time, category, amount, usd_value)
+                for snapshot_time, balances in self.iterate_balances_snapshots(
+                    from_ts=from_ts,
+                    to_ts=to_ts,
+                    condition='AND currency=?',
+                    bindings=(asset.identifier,),
+                    category=balance_type,
+                )
+                for (_, category), (amount, usd_value) in sorted(balances.items())
+            ]
+            step = settings.balance_save_frequency * HOUR_IN_SECONDS
+        else:
+            first_ts, bucket_width, period = source
+            if period is None:
+                rows: Iterable[Tuple[int, str, Tuple[float, ...]]] = (
+                    (snapshot_time, category, (float(amount), float(usd_value)))
+                    for snapshot_time, balances in self.iterate_balances_snapshots(
+                        from_ts=first_ts,
+                        to_ts=to_ts,
+                        condition='AND currency=?',
+                        bindings=(asset.identifier,),
+                        category=balance_type,
+                    )
+                    for (_, category), (amount, usd_value) in balances.items()
+                )
+            else:
+                rows = (
+                    (entry_time, category, (amount, usd_value))
+                    for entry_time, category, amount, usd_value in self.conn.cursor().execute(
+                        f'SELECT time, category, amount, usd_value '
+                        f'FROM timed_balances_rollups WHERE period=? AND time BETWEEN ? AND ? '
+                        f'AND {condition};',
+                        (period, first_ts - BALANCE_ROLLUP_LENGTHS[period] + 1, to_ts, *bindings),  # noqa: E501
+                    )
+                )
+            points = downsample_time_series(
+                rows=rows,
+                snapshots=self._downsampling_snapshots(source=source, to_ts=to_ts),
+                start_ts=first_ts,
+                bucket_width=bucket_width,
+            )
+            results = [(x[0], x[1], str(x[2][0]), str(x[2][1])) for x in points]
+            step = max(settings.balance_save_frequency * HOUR_IN_SECONDS, bucket_width)
+
         balances = []
-        results_length = len(results)
+        max_diff = step * settings.ssf_0graph_multiplier
         for idx, result in enumerate(results):
             entry_time = result[0]
-            category = BalanceType.deserialize_from_db(result[3])
+            category = BalanceType.deserialize_from_db(result[1])
             balances.append(
                 SingleDBAssetBalance(
                     time=entry_time,
-                    amount=result[1],
-                    usd_value=result[2],
+                    amount=result[2],
+                    usd_value=result[3],
                     category=category,
                 ),
             )
-            if settings.ssf_0graph_multiplier == 0 or idx == results_length - 1:
+            if settings.ssf_0graph_multiplier == 0 or idx == len(results) - 1:
                 continue
 
+            # Add zero balances every step while the gap to the next entry is over max_diff
             next_result_time = results[idx + 1][0]
-            max_diff = settings.balance_save_frequency * HOUR_IN_SECONDS * settings.ssf_0graph_multiplier  # noqa: E501
-            while next_result_time - entry_time > max_diff:
-                entry_time = entry_time + settings.balance_save_frequency * HOUR_IN_SECONDS
-                if entry_time >= next_result_time:
-                    break
-
-                balances.append(
-                    SingleDBAssetBalance(
-                        time=entry_time,
-                        amount='0',
-                        usd_value='0',
-                        category=category,
-                    ),
-                )
+            balances.extend(
+                SingleDBAssetBalance(time=zero_time, amount='0', usd_value='0', category=category)  # noqa: E501
+                for zero_time in range(entry_time + step, next_result_time - max_diff + step, step)  # noqa: E501
+            )
 
         return balances
 
-    def query_owned_assets(self) -> List[Asset]:
-        """Query the DB for a list of all assets ever owned
+    def query_owned_asset_identifiers(self) -> Set[str]:
+        """Query the DB for the identifiers of all assets ever owned
 
         The assets are taken from:
         - Balance snapshots
@@ -2878,22 +3747,34 @@ class DBHandler:
                 continue
 
             for result in query:
-                for _, asset_id in enumerate(result):
-                    try:
-                        if asset_id is not None:
-                            results.add(Asset(asset_id))
-                    except UnknownAsset:
-                        self.msg_aggregator.add_warning(
-                            f'Unknown/unsupported asset {asset_id} found in the database. '
-                            f'If you believe this should be supported open an issue in github',
-                        )
-                        continue
-                    except DeserializationError:
-                        self.msg_aggregator.add_error(
-                            f'Asset with non-string type {type(asset_id)} found in the '
-                            f'database. Skipping it.',
-                        )
-                        continue
+                results.update(x for x in result if x is not None)
+
+        return results
+
+    def query_owned_assets(self) -> List[Asset]:
+        """Query the DB for a list of all assets ever owned
+
+        See query_owned_asset_identifiers() for where the assets are taken from
+        """
+        asset_ids = self.query_owned_asset_identifiers()
+        # resolve them all at once instead of one global DB query per asset
+        AssetResolver().preload(x for x in asset_ids if isinstance(x, str))
+        results = set()
+        for asset_id in asset_ids:
+            try:
+                results.add(Asset(asset_id))
+            except UnknownAsset:
+                self.msg_aggregator.add_warning(
+                    f'Unknown/unsupported asset {asset_id} found in the database. '
+                    f'If you believe this should be supported open an issue in github',
+                )
+                continue
+            except DeserializationError:
+                self.msg_aggregator.add_error(
+                    f'Asset with non-string type {type(asset_id)} found in the '
+                    f'database. Skipping it.',
+                )
+                continue
 
         return list(results)
 
@@ -3011,25 +3892,15 @@ class DBHandler:
         The list is sorted by usd value going from higher to lower
         """
         cursor = self.conn.cursor()
-        results = cursor.execute(
-            'SELECT time, currency, amount, usd_value, category FROM timed_balances WHERE '
-            'time=(SELECT MAX(time) from timed_balances) AND category = ? ORDER BY '
-            'CAST(usd_value AS REAL) DESC;',
-            (BalanceType.ASSET.serialize_for_db(),),  # pylint: disable=no-member
-        )
-        results = results.fetchall()
-        asset_balances = []
-        for result in results:
-            asset_balances.append(
-                DBAssetBalance(
-                    time=result[0],
-                    asset=Asset(result[1]),
-                    amount=result[2],
-                    usd_value=result[3],
-                    category=BalanceType.deserialize_from_db(result[4]),
-                ),
-            )
+        latest_ts = cursor.execute('SELECT MAX(time) FROM timed_balances_snapshots').fetchone()[0]  # noqa: E501
+        if latest_ts is None:
+            return []
 
+        asset_balances = [
+            x for x in self.get_balances_snapshot(latest_ts)
+            if x.category == BalanceType.ASSET
+        ]
+        asset_balances.sort(key=lambda x: float(x.usd_value), reverse=True)
         return asset_balances
 
     def get_tags(self) -> Dict[str, Tag]:
@@ -3479,6 +4350,7 @@ class DBHandler:
         version = self.get_version()
         new_db_filename = f'{ts_now()}_rotkehlchen_db_v{version}.backup'
         new_db_path = self.user_data_dir / new_db_filename
+        self.checkpoint()
         shutil.copyfile(
             self.user_data_dir / 'rotkehlchen.db',
             new_db_path,
@@ -168,6 +168,8 @@ class DBEthTx():
             query = 'SELECT DISTINCT ethereum_transactions.tx_hash, timestamp, block_number, from_address, to_address, value, gas, gas_price, gas_used, input_data, nonce FROM (SELECT * from ethereum_transactions ORDER BY timestamp DESC LIMIT ?) ethereum_transactions ' + query  # noqa: E501
             results = cursor.execute(query, [FREE_ETH_TX_LIMIT] + bindings)
 
+        results = results.fetchall()
+        filter_.update_next_cursor(cursor.description, results)
         ethereum_transactions = []
         for result in results:
             try:
@@ -328,8 +330,7 @@ class DBEthTx():
                     topic_tuples,
                 )
 
-        self.db.conn.commit()
-        self.db.update_last_write()
+        self.db.update_last_write(rows=1 + len(log_tuples) + len(topic_tuples))
 
     def get_receipt(self, tx_hash: EVMTxHash) -> Optional[EthereumTxReceipt]:
         cursor = self.db.conn.cursor()
@@ -1,11 +1,14 @@
+import base64
+import json
 import logging
 from dataclasses import dataclass
-from typing import Any, List, Literal, NamedTuple, Optional, Tuple, Union, cast
+from typing import Any, ClassVar, List, Literal, NamedTuple, Optional, Sequence, Tuple, Union, cast
 
 from rotkehlchen.accounting.ledger_actions import LedgerActionType
 from rotkehlchen.accounting.structures.base import HistoryEventSubType, HistoryEventType
 from rotkehlchen.accounting.types import SchemaEventType
 from rotkehlchen.assets.asset import Asset
+from rotkehlchen.constants.timing import DAY_IN_SECONDS
 from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -22,6 +25,16 @@ from rotkehlchen.utils.misc import ts_now
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Attributes stored as strings that are ordered by their numeric value
+NUMERIC_ORDER_ATTRIBUTES = ('amount', 'fee', 'rate')
+
+
+def _order_expression(attribute: str) -> str:
+    if attribute in NUMERIC_ORDER_ATTRIBUTES:
+        return f'CAST({attribute} AS REAL)'
+
+    return attribute
+
 
 class DBFilterOrder(NamedTuple):
     rules: List[Tuple[str, bool]]
@@ -31,12 +44,7 @@ class DBFilterOrder(NamedTuple):
         for idx, (attribute, ascending) in enumerate(self.rules):
             if idx != 0:
                 querystr += ','
-            if attribute in ('amount', 'fee', 'rate'):
-                order_by = f'CAST({attribute} AS REAL)'
-            else:
-                order_by = attribute
-
-            querystr += f'{order_by} {"ASC" if ascending else "DESC"}'
+            querystr += f'{_order_expression(attribute)} {"ASC" if ascending else "DESC"}'
 
         return querystr
 
@@ -49,6 +57,113 @@ class DBFilterPagination(NamedTuple):
         return f'LIMIT {self.limit} OFFSET {self.offset}'
 
 
+class DBFilterKeysetPagination(NamedTuple):
+    """Pagination that seeks past the last row of the previous page instead of skipping
+    rows with an OFFSET, so that all pages are equally fast to query.
+
+    after holds the values of the order by attributes of the last row of the previous
+    page. The order by rules end with a unique attribute so they identify that row.
+    None means this is the first page.
+    """
+    limit: int
+    after: Optional[List[Any]]
+
+    def prepare(self) -> str:
+        return f'LIMIT {self.limit}'
+
+    def prepare_seek(
+            self,
+            order_by: DBFilterOrder,
+            not_null_attributes: Tuple[str, ...],
+    ) -> Tuple[str, List[Any]]:
+        """Returns the condition of the rows that come after self.after in the given order"""
+        assert self.after is not None, 'seek should only be prepared with a previous row'
+        directions = {ascending for _, ascending in order_by.rules}
+        if len(directions) == 1 and None not in self.after and (
+            # in descending order NULLs come last, which a row value comparison would skip
+            True in directions or
+            all(attribute in not_null_attributes for attribute, _ in order_by.rules)
+        ):
+            # a single row value comparison is what sqlite can best use an index for
+            columns = ', '.join(_order_expression(attribute) for attribute, _ in order_by.rules)
+            questionmarks = ', '.join('?' * len(self.after))
+            operator = '>' if True in directions else '<'
+            return f'({columns}) {operator} ({questionmarks})', list(self.after)
+
+        # Otherwise expand to: a after x OR (a = x AND b after y) OR ...
+        # In sqlite NULL comes before any other value in ascending order
+        terms, bindings = [], []
+        equal_conditions: List[str] = []
+        equal_bindings: List[Any] = []
+        for (attribute, ascending), value in zip(order_by.rules, self.after):
+            expression = _order_expression(attribute)
+            after_condition: Optional[str]
+            if value is None:
+                after_condition = f'{expression} IS NOT NULL' if ascending else None
+                after_bindings = []
+            elif ascending:
+                after_condition = f'{expression} > ?'
+                after_bindings = [value]
+            else:
+                after_condition = f'({expression} < ? OR {expression} IS NULL)'
+                after_bindings = [value]
+
+            if after_condition is not None:
+                terms.append(f'({" AND ".join(equal_conditions + [after_condition])})')
+                bindings.extend(equal_bindings + after_bindings)
+            if value is None:
+                equal_conditions.append(f'{expression} IS NULL')
+            else:
+                equal_conditions.append(f'{expression} = ?')
+                equal_bindings.append(value)
+
+        return f'({" OR ".join(terms)})', bindings
+
+
+def _serialize_cursor_value(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {'hex': value.hex()}
+
+    return value
+
+
+def _deserialize_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return bytes.fromhex(value['hex'])
+
+    return value
+
+
+def serialize_keyset_cursor(order_rules: List[Tuple[str, bool]], values: Sequence[Any]) -> str:
+    """Creates the opaque cursor given to the API for the row with the given order values"""
+    data = {
+        'order': order_rules,
+        'after': [_serialize_cursor_value(x) for x in values],
+    }
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode()
+
+
+def deserialize_keyset_cursor(cursor: str, order_rules: List[Tuple[str, bool]]) -> List[Any]:
+    """Returns the order values of the row the cursor points to
+
+    May raise:
+    - DeserializationError if the cursor is malformed or was made for another ordering
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        cursor_rules = [(attribute, ascending) for attribute, ascending in data['order']]
+        values = [_deserialize_cursor_value(x) for x in data['after']]
+    except (ValueError, TypeError, KeyError) as e:
+        raise DeserializationError(f'Malformed pagination cursor {cursor}') from e
+
+    if cursor_rules != order_rules or len(values) != len(order_rules):
+        raise DeserializationError(
+            'The pagination cursor was created for a different ordering of the entries',
+        )
+
+    return values
+
+
 @dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=False)
 class DBFilter():
     and_op: bool
@@ -185,7 +300,15 @@ class DBFilterQuery():
     filters: List[DBFilter]
     join_clause: Optional[DBFilter] = None
     order_by: Optional[DBFilterOrder] = None
-    pagination: Optional[DBFilterPagination] = None
+    pagination: Optional[Union[DBFilterPagination, DBFilterKeysetPagination]] = None
+    # Set after querying a page with a cursor to the cursor of the next page, if any
+    next_cursor: Optional[str] = None
+
+    # Attributes that together identify a row. They break ties in the ordering so that
+    # rows can be paginated with a cursor. Empty if the query does not support cursors.
+    keyset_attributes: ClassVar[Tuple[str, ...]] = ()
+    # Attributes that can be ordered by and are never NULL
+    not_null_attributes: ClassVar[Tuple[str, ...]] = ()
 
     def prepare(
             self,
@@ -210,9 +333,22 @@ class DBFilterQuery():
             filterstrings.append(f'({operator.join(filters)})')
             bindings.extend(single_bindings)
 
-        if len(filterstrings) != 0:
-            operator = ' AND ' if self.and_op else ' OR '
-            filter_query = f'{"WHERE " if self.join_clause is None else "AND ("}{operator.join(filterstrings)}{"" if self.join_clause is None else ")"}'  # noqa: E501
+        operator = ' AND ' if self.and_op else ' OR '
+        conditions = operator.join(filterstrings)
+        if (
+            with_pagination and self.order_by is not None and
+            isinstance(self.pagination, DBFilterKeysetPagination) and
+            self.pagination.after is not None
+        ):
+            seek_querystr, seek_bindings = self.pagination.prepare_seek(
+                order_by=self.order_by,
+                not_null_attributes=self.not_null_attributes,
+            )
+            conditions = seek_querystr if conditions == '' else f'({conditions}) AND {seek_querystr}'  # noqa: E501
+            bindings.extend(seek_bindings)
+
+        if conditions != '':
+            filter_query = f'{"WHERE " if self.join_clause is None else "AND ("}{conditions}{"" if self.join_clause is None else ")"}'  # noqa: E501
             query_parts.append(filter_query)
 
         if with_order and self.order_by is not None:
@@ -225,6 +361,31 @@ class DBFilterQuery():
 
         return ' '.join(query_parts), bindings
 
+    def update_next_cursor(self, description: Sequence[Tuple], rows: Sequence[Tuple]) -> None:
+        """Sets next_cursor from the rows of the page queried with this filter
+
+        description is the DB cursor description of the query, which should contain
+        all of the order by attributes as columns.
+        """
+        self.next_cursor = None
+        if (
+            self.order_by is None or
+            not isinstance(self.pagination, DBFilterKeysetPagination) or
+            len(rows) < self.pagination.limit
+        ):
+            return
+
+        column_names = [x[0] for x in description]
+        last_row = rows[-1]
+        values = []
+        for attribute, _ in self.order_by.rules:
+            value = last_row[column_names.index(attribute.split('.')[-1])]
+            if attribute in NUMERIC_ORDER_ATTRIBUTES and value is not None:
+                value = float(value)  # compared against the CAST to REAL of the attribute
+            values.append(value)
+
+        self.next_cursor = serialize_keyset_cursor(self.order_by.rules, values)
+
     @classmethod
     def create(
             cls,
@@ -232,11 +393,42 @@ class DBFilterQuery():
             limit: Optional[int],
             offset: Optional[int],
             order_by_rules: Optional[List[Tuple[str, bool]]] = None,
+            cursor: Optional[str] = None,
     ) -> 'DBFilterQuery':
-        if limit is None or offset is None:
-            pagination = None
-        else:
-            pagination = DBFilterPagination(limit=limit, offset=offset)
+        """Creates the filter query with the given pagination
+
+        Entries are only paginated if a limit is given along with an offset or a cursor.
+        If the query supports cursors the ordering ends with the identifying attributes
+        so that pages are consistent, and the first page (offset of 0) and the pages
+        after a cursor are paginated with a keyset. Those pages get a next_cursor.
+
+        May raise:
+        - DeserializationError if the given cursor is invalid
+        """
+        pagination: Optional[Union[DBFilterPagination, DBFilterKeysetPagination]] = None
+        if cursor is not None:
+            if len(cls.keyset_attributes) == 0:
+                raise DeserializationError('These entries can not be paginated with a cursor')
+            if limit is None or offset is not None:
+                raise DeserializationError('A cursor should be given with a limit and no offset')  # noqa: E501
+
+        if limit is not None and (offset is not None or cursor is not None):
+            if len(cls.keyset_attributes) != 0:
+                if order_by_rules is None:
+                    order_by_rules = []
+                ordered_attributes = {attribute for attribute, _ in order_by_rules}
+                ascending = order_by_rules[-1][1] if len(order_by_rules) != 0 else True
+                order_by_rules = order_by_rules + [
+                    (x, ascending) for x in cls.keyset_attributes if x not in ordered_attributes  # noqa: E501
+                ]
+
+            if offset is not None and (offset != 0 or len(cls.keyset_attributes) == 0):
+                pagination = DBFilterPagination(limit=limit, offset=offset)
+            else:
+                pagination = DBFilterKeysetPagination(
+                    limit=limit,
+                    after=None if cursor is None else deserialize_keyset_cursor(cursor, order_by_rules),  # type: ignore  # noqa: E501
+                )
 
         if order_by_rules is None:
             order_by = None
@@ -293,6 +485,9 @@ class FilterWithLocation():
 @dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=False)
 class ETHTransactionsFilterQuery(DBFilterQuery, FilterWithTimestamp):
 
+    keyset_attributes = ('ethereum_transactions.tx_hash',)
+    not_null_attributes = ('timestamp', 'ethereum_transactions.tx_hash')
+
     @property
     def addresses(self) -> Optional[List[ChecksumEthAddress]]:
         if self.join_clause is None:
@@ -308,6 +503,7 @@ class ETHTransactionsFilterQuery(DBFilterQuery, FilterWithTimestamp):
             order_by_rules: Optional[List[Tuple[str, bool]]] = None,
             limit: Optional[int] = None,
             offset: Optional[int] = None,
+            cursor: Optional[str] = None,
             # temporary unused argument here and below. Remove warning later.
             addresses: Optional[List[ChecksumEthAddress]] = None,  # pylint: disable=unused-argument  # noqa: E501
             from_ts: Optional[Timestamp] = None,
@@ -325,6 +521,7 @@ class ETHTransactionsFilterQuery(DBFilterQuery, FilterWithTimestamp):
             limit=limit,
             offset=offset,
             order_by_rules=order_by_rules,
+            cursor=cursor,
         )
         filter_query = cast('ETHTransactionsFilterQuery', filter_query)
         filters: List[DBFilter] = []
@@ -436,6 +633,10 @@ class DBMultiStringFilter(DBFilter):
 
 class TradesFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLocation):
 
+    # The ids of the AMM swaps in combined_trades_view are not unique so also use the pair
+    keyset_attributes = ('id', 'base_asset', 'quote_asset')
+    not_null_attributes = ('time', 'location', 'type', 'amount', 'rate', 'id', 'base_asset', 'quote_asset')  # noqa: E501
+
     @classmethod
     def make(
             cls,
@@ -443,6 +644,7 @@ class TradesFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLocation):
             order_by_rules: Optional[List[Tuple[str, bool]]] = None,
             limit: Optional[int] = None,
             offset: Optional[int] = None,
+            cursor: Optional[str] = None,
             from_ts: Optional[Timestamp] = None,
             to_ts: Optional[Timestamp] = None,
             base_asset: Optional[Asset] = None,
@@ -458,6 +660,7 @@ class TradesFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLocation):
             limit=limit,
             offset=offset,
             order_by_rules=order_by_rules,
+            cursor=cursor,
         )
         filter_query = cast('TradesFilterQuery', filter_query)
         filters: List[DBFilter] = []
@@ -484,6 +687,9 @@ class TradesFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLocation):
 
 class AssetMovementsFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLocation):
 
+    keyset_attributes = ('id',)
+    not_null_attributes = ('location', 'category', 'id')
+
     @classmethod
     def make(
             cls,
@@ -491,6 +697,7 @@ class AssetMovementsFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLo
             order_by_rules: Optional[List[Tuple[str, bool]]] = None,
             limit: Optional[int] = None,
             offset: Optional[int] = None,
+            cursor: Optional[str] = None,
             from_ts: Optional[Timestamp] = None,
             to_ts: Optional[Timestamp] = None,
             asset: Optional[Asset] = None,
@@ -505,6 +712,7 @@ class AssetMovementsFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLo
             limit=limit,
             offset=offset,
             order_by_rules=order_by_rules,
+            cursor=cursor,
         )
         filter_query = cast('AssetMovementsFilterQuery', filter_query)
         filters: List[DBFilter] = []
@@ -689,6 +897,9 @@ class DBNullFilter(DBFilter):
 
 class HistoryEventFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLocation):
 
+    keyset_attributes = ('identifier',)
+    not_null_attributes = ('timestamp', 'sequence_index', 'identifier', 'location', 'type', 'asset')  # noqa: E501
+
     @classmethod
     def make(
             cls,
@@ -696,6 +907,7 @@ class HistoryEventFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLoca
             order_by_rules: Optional[List[Tuple[str, bool]]] = None,
             limit: Optional[int] = None,
             offset: Optional[int] = None,
+            cursor: Optional[str] = None,
             from_ts: Optional[Timestamp] = None,
             to_ts: Optional[Timestamp] = None,
             asset: Optional[Asset] = None,
@@ -718,6 +930,7 @@ class HistoryEventFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLoca
             limit=limit,
             offset=offset,
             order_by_rules=order_by_rules,
+            cursor=cursor,
         )
         filter_query = cast('HistoryEventFilterQuery', filter_query)
         filters: List[DBFilter] = []
@@ -787,6 +1000,61 @@ class HistoryEventFilterQuery(DBFilterQuery, FilterWithTimestamp, FilterWithLoca
         filter_query.filters = filters
         return filter_query
 
+    def prepare_value_stats(self) -> Optional[Tuple[Tuple[str, List[Any]], Optional[Tuple[str, List[Any]]]]]:  # noqa: E501
+        """Splits the filter into a part answered by the history_events_daily_stats table
+        and a part answered by the history_events table.
+
+        The first is the WHERE clause for the daily stats of the days entirely within the
+        timestamp range. The second is the WHERE clause for the events of the days partly
+        within the range, or None if there are no such days.
+
+        Returns None if the filter can't be answered by the daily stats.
+        """
+        if self.and_op is False:
+            return None
+
+        stats_filters, stats_bindings = [], []
+        for fil in self.filters:
+            if fil is self.timestamp_filter:
+                continue
+            if not (
+                isinstance(fil, DBLocationFilter) or
+                (isinstance(fil, DBAssetFilter) and fil.asset_key == 'asset') or
+                (isinstance(fil, DBMultiStringFilter) and fil.column in ('type', 'subtype'))
+            ):
+                return None  # not a column of the daily stats
+            # the daily stats columns have the same names as the history_events columns
+            filters, single_bindings = fil.prepare()
+            stats_filters.append(f'({" AND ".join(filters)})')
+            stats_bindings.extend(single_bindings)
+
+        day_in_ms = DAY_IN_SECONDS * 1000
+        first_day, last_day = None, None
+        edge_filters, edge_bindings = [], []
+        if self.timestamp_filter.from_ts is not None:
+            first_day = -(-self.timestamp_filter.from_ts * 1000 // day_in_ms)  # ceil division
+            stats_filters.append('day >= ?')
+            stats_bindings.append(first_day)
+            edge_filters.append('timestamp < ?')
+            edge_bindings.append(first_day * day_in_ms)
+        if self.timestamp_filter.to_ts is not None:
+            last_day = (self.timestamp_filter.to_ts * 1000 + 1) // day_in_ms - 1
+            stats_filters.append('day <= ?')
+            stats_bindings.append(last_day)
+            edge_filters.append('timestamp >= ?')
+            edge_bindings.append((last_day + 1) * day_in_ms)
+        if first_day is not None and last_day is not None and first_day > last_day:
+            return None  # no whole day in the range
+
+        stats_where = f'WHERE {" AND ".join(stats_filters)}' if len(stats_filters) != 0 else ''
+        if len(edge_filters) == 0:
+            return (stats_where, stats_bindings), None
+
+        # the timestamp filter is in the prepared filters so this only leaves the edge days
+        query_filters, bindings = self.prepare(with_pagination=False, with_order=False)
+        edges_where = f'{query_filters} AND ({" OR ".join(edge_filters)})'
+        return (stats_where, stats_bindings), (edges_where, bindings + edge_bindings)
+
 
 @dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=False)
 class DBProtocolsFilter(DBFilter):
@@ -1,15 +1,19 @@
 import logging
-from typing import TYPE_CHECKING, List, Optional
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Set
 
 from pysqlcipher3 import dbapi2 as sqlcipher
 
 from rotkehlchen.accounting.structures.base import HistoryBaseEntry
 from rotkehlchen.assets.asset import Asset
+from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.limits import FREE_HISTORY_EVENTS_LIMIT
+from rotkehlchen.constants.timing import DAY_IN_SECONDS
 from rotkehlchen.db.constants import HISTORY_MAPPING_CUSTOMIZED
 from rotkehlchen.db.filtering import HistoryEventFilterQuery
 from rotkehlchen.errors.asset import UnknownAsset
+from rotkehlchen.errors.misc import InputError
 from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -26,6 +30,78 @@ log = RotkehlchenLogsAdapter(logger)
 HISTORY_INSERT = """INSERT INTO history_events(event_identifier, sequence_index,
 timestamp, location, location_label, asset, amount, usd_value, notes,
 type, subtype, counterparty, extra_data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"""
+HISTORY_EVENTS_SUMS_QUERY = 'SELECT asset, SUM(CAST(amount AS REAL)), SUM(CAST(usd_value AS REAL)) FROM history_events {} GROUP BY asset;'  # noqa: E501
+DAILY_STATS_SUMS_QUERY = 'SELECT asset, SUM(amount), SUM(usd_value) FROM history_events_daily_stats {} GROUP BY asset;'  # noqa: E501
+DAY_IN_MS = DAY_IN_SECONDS * 1000
+# The (location, type, subtype, asset, day) of a row of history_events_daily_stats
+DailyStatsGroup = Tuple[str, str, Optional[str], str, int]
+
+
+def daily_stats_group(event_tuple: Sequence[Any]) -> DailyStatsGroup:
+    """Returns the daily stats group of a history event serialized for the DB"""
+    return event_tuple[3], event_tuple[9], event_tuple[10], event_tuple[5], event_tuple[2] // DAY_IN_MS  # noqa: E501
+
+
+def query_daily_stats_groups(
+        cursor: sqlcipher.Cursor,  # pylint: disable=no-member
+        where: str,
+        bindings: Sequence[Sequence[Any]],
+) -> Set[DailyStatsGroup]:
+    """Returns the daily stats groups of the history events matching the given WHERE
+    clause with any of the given bindings. Used to find the groups that a change of
+    these events will affect before making it."""
+    groups: Set[DailyStatsGroup] = set()
+    for entry in bindings:
+        groups.update(cursor.execute(
+            f'SELECT location, type, subtype, asset, timestamp / {DAY_IN_MS} '
+            f'FROM history_events WHERE {where}',
+            entry,
+        ))
+    return groups
+
+
+def update_daily_stats(
+        cursor: sqlcipher.Cursor,  # pylint: disable=no-member
+        groups: Iterable[DailyStatsGroup],
+) -> None:
+    """Recomputes the history_events_daily_stats rows of the given groups from their
+    history events.
+
+    Writes to history_events call this once with all the groups they touched so that
+    each group is summed once however many of its events changed. The events of each
+    day are read once with the timestamp index and summed as FVal so that the stats
+    are exactly the sums of the TEXT values of the events.
+    """
+    groups_by_day: Dict[int, Set[DailyStatsGroup]] = defaultdict(set)
+    for group in groups:
+        groups_by_day[group[4]].add(group)
+
+    for day, day_groups in groups_by_day.items():
+        sums: Dict[DailyStatsGroup, Tuple[FVal, FVal, int]] = {}
+        for location, event_type, subtype, asset, amount, usd_value in cursor.execute(
+            'SELECT location, type, subtype, asset, amount, usd_value FROM history_events '
+            'WHERE timestamp >= ? AND timestamp < ?',
+            (day * DAY_IN_MS, (day + 1) * DAY_IN_MS),
+        ).fetchall():
+            group = (location, event_type, subtype, asset, day)
+            if group not in day_groups:
+                continue
+            amount_sum, usd_value_sum, events = sums.get(group, (ZERO, ZERO, 0))
+            sums[group] = (amount_sum + FVal(amount), usd_value_sum + FVal(usd_value), events + 1)  # noqa: E501
+
+        cursor.executemany(
+            'DELETE FROM history_events_daily_stats WHERE location=? AND type=? AND '
+            'subtype IS ? AND asset=? AND day=?',
+            list(day_groups),
+        )
+        cursor.executemany(
+            'INSERT INTO history_events_daily_stats(location, type, subtype, asset, day, '
+            'amount, usd_value, events) VALUES(?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (*group, str(amount_sum), str(usd_value_sum), events)
+                for group, (amount_sum, usd_value_sum, events) in sums.items()
+            ],
+        )
 
 
 class DBHistoryEvents():
@@ -48,8 +124,10 @@ class DBHistoryEvents():
         - sqlcipher.DatabaseError: If anything went wrong at insertion
         """
         cursor = self.db.conn.cursor()
-        cursor.execute(HISTORY_INSERT, event.serialize_for_db())
+        event_tuple = event.serialize_for_db()
+        cursor.execute(HISTORY_INSERT, event_tuple)
         identifier = cursor.lastrowid
+        update_daily_stats(cursor, [daily_stats_group(event_tuple)])
 
         if mapping_value is not None:
             cursor.execute(
@@ -75,17 +153,19 @@ class DBHistoryEvents():
             query=HISTORY_INSERT,
             tuples=events,
         )
-        self.db.update_last_write()
+        update_daily_stats(self.db.conn.cursor(), {daily_stats_group(x) for x in events})
 
     def edit_history_event(self, event: HistoryBaseEntry) -> Tuple[bool, str]:
         """Edit a history entry to the DB. Returns the edited entry"""
         cursor = self.db.conn.cursor()
+        event_tuple = event.serialize_for_db()
+        groups = query_daily_stats_groups(cursor, 'identifier=?', [(event.identifier,)])
         try:
             cursor.execute(
                 'UPDATE history_events SET event_identifier=?, sequence_index=?, timestamp=?, '
                 'location=?, location_label=?, asset=?, amount=?, usd_value=?, notes=?, '
                 'type=?, subtype=?, counterparty=?, extra_data=? WHERE identifier=?',
-                (*event.serialize_for_db(), event.identifier),
+                (*event_tuple, event.identifier),
             )
         except sqlcipher.IntegrityError:  # pylint: disable=no-member
             msg = (
@@ -102,6 +182,7 @@ class DBHistoryEvents():
             'VALUES(?, ?)',
             (event.identifier, HISTORY_MAPPING_CUSTOMIZED),
         )
+        update_daily_stats(cursor, groups | {daily_stats_group(event_tuple)})
 
         self.db.update_last_write()
         return True, ''
@@ -115,29 +196,33 @@ class DBHistoryEvents():
         is returned. Otherwise None is returned.
         """
         cursor = self.db.conn.cursor()
-        for identifier in identifiers:
-            result = cursor.execute(
-                'SELECT COUNT(*) FROM history_events WHERE event_identifier=('
-                'SELECT event_identifier FROM history_events WHERE identifier=?)',
-                (identifier,),
-            )
-            if result.fetchone()[0] == 1:
-                self.db.conn.rollback()
-                return (
-                    f'Tried to remove history event with id {identifier} '
-                    f'which was the last event of a transaction'
-                )
-
-            cursor.execute(
-                'DELETE FROM history_events WHERE identifier=?', (identifier,),
-            )
-            affected_rows = cursor.rowcount
-            if affected_rows != 1:
-                self.db.conn.rollback()
-                return (
-                    f'Tried to remove history event with id {identifier} which does not exist'
-                )
-
+        groups = query_daily_stats_groups(cursor, 'identifier=?', [(x,) for x in identifiers])
+        try:
+            with self.db.savepoint():
+                for identifier in identifiers:
+                    result = cursor.execute(
+                        'SELECT COUNT(*) FROM history_events WHERE event_identifier=('
+                        'SELECT event_identifier FROM history_events WHERE identifier=?)',
+                        (identifier,),
+                    )
+                    if result.fetchone()[0] == 1:
+                        raise InputError(
+                            f'Tried to remove history event with id {identifier} '
+                            f'which was the last event of a transaction',
+                        )
+
+                    cursor.execute(
+                        'DELETE FROM history_events WHERE identifier=?', (identifier,),
+                    )
+                    affected_rows = cursor.rowcount
+                    if affected_rows != 1:
+                        raise InputError(
+                            f'Tried to remove history event with id {identifier} which does not exist',  # noqa: E501
+                        )
+        except InputError as e:
+            return str(e)
+
+        update_daily_stats(cursor, groups)
         self.db.update_last_write()
         return None
 
@@ -147,14 +232,24 @@ class DBHistoryEvents():
         cursor = self.db.conn.cursor()
         customized_event_ids = self.get_customized_event_identifiers()
         length = len(customized_event_ids)
-        querystr = 'DELETE FROM history_events WHERE event_identifier=?'
+        where = 'event_identifier=?'
         if length != 0:
-            querystr += f' AND identifier NOT IN ({", ".join(["?"] * length)})'
+            where += f' AND identifier NOT IN ({", ".join(["?"] * length)})'
             bindings = [(x.hex(), *customized_event_ids) for x in tx_hashes]
         else:
             bindings = [(x.hex(),) for x in tx_hashes]
 
-        cursor.executemany(querystr, bindings)
+        groups = query_daily_stats_groups(cursor, where, bindings)
+        cursor.executemany(f'DELETE FROM history_events WHERE {where}', bindings)
+        update_daily_stats(cursor, groups)
+
+    def update_usd_values(self, updates: List[Tuple[str, int]]) -> None:
+        """Sets the usd values of history events from (usd_value, identifier) tuples"""
+        cursor = self.db.conn.cursor()
+        groups = query_daily_stats_groups(cursor, 'identifier=?', [(x[1],) for x in updates])
+        cursor.executemany('UPDATE history_events SET usd_value=? WHERE identifier=?', updates)
+        update_daily_stats(cursor, groups)
+        self.db.update_last_write()
 
     def get_customized_event_identifiers(self) -> List[int]:
         """Returns the identifiers of all the events in the database that have been customized"""
@@ -183,6 +278,10 @@ class DBHistoryEvents():
             query = 'SELECT * FROM (SELECT * from history_events ORDER BY timestamp DESC, sequence_index ASC LIMIT ?) ' + query  # noqa: E501
             results = cursor.execute(query, [FREE_HISTORY_EVENTS_LIMIT] + bindings)
 
+        results = results.fetchall()
+        filter_query.update_next_cursor(cursor.description, results)
+        # resolve all assets of the events with one global DB query instead of one per event
+        AssetResolver().preload({x[6] for x in results if isinstance(x[6], str)})
         output = []
         for entry in results:
             try:
@@ -258,7 +357,8 @@ class DBHistoryEvents():
         cursor = self.db.conn.cursor()
         query, bindings = query_filter.prepare(with_pagination=False)
         query = 'SELECT DISTINCT asset from history_events ' + query
-        result = cursor.execute(query, bindings)
+        result = cursor.execute(query, bindings).fetchall()
+        AssetResolver().preload(x[0] for x in result if isinstance(x[0], str))
         assets = []
         for asset_id in result:
             try:
@@ -283,46 +383,56 @@ class DBHistoryEvents():
         query_filter: HistoryEventFilterQuery,
     ) -> Tuple[FVal, List[Tuple[Asset, FVal, FVal]]]:
         """Returns the sum of the USD value at the time of acquisition and the amount received
-        by asset"""
+        by asset
+
+        The sums of the days entirely within the filter's range are read from the daily
+        stats. Only the events of the days at the edges of the range are summed directly.
+        """
         cursor = self.db.conn.cursor()
-        usd_value = ZERO
-        query_filters, bindings = query_filter.prepare(with_pagination=False, with_order=False)
+        queries = []
+        value_stats_filters = query_filter.prepare_value_stats()
+        if value_stats_filters is None:
+            query_filters, bindings = query_filter.prepare(with_pagination=False, with_order=False)  # noqa: E501
+            queries.append((HISTORY_EVENTS_SUMS_QUERY.format(query_filters), bindings))
+        else:
+            (stats_filters, stats_bindings), edges = value_stats_filters
+            queries.append((DAILY_STATS_SUMS_QUERY.format(stats_filters), stats_bindings))
+            if edges is not None:
+                queries.append((HISTORY_EVENTS_SUMS_QUERY.format(edges[0]), edges[1]))
+
+        sums: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+        for query, bindings in queries:
+            for asset_identifier, amount, usd_value in cursor.execute(query, bindings):
+                sums[asset_identifier][0] += amount
+                sums[asset_identifier][1] += usd_value
+
+        total_usd_value = ZERO
         try:
-            query = 'SELECT SUM(CAST(usd_value AS REAL)) FROM history_events ' + query_filters
-            result = cursor.execute(query, bindings).fetchone()[0]
-            if result is not None:
-                usd_value = deserialize_fval(
-                    value=result,
-                    name='usd value in history events stats',
-                    location='get_value_stats',
-                )
+            total_usd_value = deserialize_fval(
+                value=sum(x[1] for x in sums.values()),
+                name='usd value in history events stats',
+                location='get_value_stats',
+            )
         except DeserializationError as e:
             log.error(f'Didnt get correct valid usd_value for history_events query. {str(e)}')
 
-        query = (
-            'SELECT asset, SUM(CAST(amount AS REAL)), SUM(CAST(usd_value AS REAL)) ' +
-            'FROM history_events ' +
-            query_filters +
-            ' GROUP BY asset;'
-        )
-        result = cursor.execute(query, bindings)
         assets_amounts = []
-        for row in result:
+        for asset_identifier, (amount_sum, usd_value_sum) in sorted(sums.items()):
             try:
-                asset = Asset(row[0])
+                asset = Asset(asset_identifier)
                 amount = deserialize_fval(
-                    value=row[1],
+                    value=amount_sum,
                     name='total amount in history events stats',
                     location='get_value_stats',
                 )
                 sum_of_usd_values = deserialize_fval(
-                    value=row[2],
+                    value=usd_value_sum,
                     name='total usd value in history events stats',
                     location='get_value_stats',
                 )
                 assets_amounts.append((asset, amount, sum_of_usd_values))
             except UnknownAsset as e:
-                log.debug(f'Found unknown asset {row[0]} in staking event. {str(e)}')
+                log.debug(f'Found unknown asset {asset_identifier} in staking event. {str(e)}')
             except DeserializationError as e:
-                log.debug(f'Failed to deserialize amount {row[1]}. {str(e)}')
-        return usd_value, assets_amounts
+                log.debug(f'Failed to deserialize amount {amount_sum}. {str(e)}')
+        return total_usd_value, assets_amounts
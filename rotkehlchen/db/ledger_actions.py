@@ -84,7 +84,7 @@ class DBLedgerActions():
 
         May raise:
         - sqlcipher.IntegrityError if there is a conflict at addition in  _add_gitcoin_extra_data.
-         If this error is raised connection needs to be rolled back by the caller.
+         If this error is raised the caller's savepoint undoes the addition.
         """
         cursor = self.db.conn.cursor()
         query = """
@@ -95,7 +95,7 @@ class DBLedgerActions():
         cursor.execute(query, action.serialize_for_db())
         identifier = cursor.lastrowid
         action.identifier = identifier
-        self.db.conn.commit()
+        self.db.update_last_write()
         return identifier
 
     def add_ledger_actions(self, actions: List[LedgerAction]) -> None:
@@ -106,11 +106,11 @@ class DBLedgerActions():
         """
         for action in actions:
             try:
-                self.add_ledger_action(action)
+                with self.db.savepoint():
+                    self.add_ledger_action(action)
             except sqlcipher.IntegrityError:  # pylint: disable=no-member
                 self.db.msg_aggregator.add_warning('Did not add ledger action to DB due to it already existing')  # noqa: E501
                 log.warning(f'Did not add ledger action {action} to the DB due to it already existing')  # noqa: E501
-                self.db.conn.rollback()  # undo the addition and rollack to last commit
 
     def remove_ledger_action(self, identifier: int) -> Optional[str]:
         """Removes a ledger action from the DB by identifier
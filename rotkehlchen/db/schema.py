@@ -184,6 +184,31 @@ CREATE TABLE IF NOT EXISTS timed_balances (
 );
 """
 
+# The times of the balance snapshots. The timed_balances entries of the keyframes hold
+# all of their balances. The entries of any other snapshot only hold the balances whose
+# amount changed since the previous snapshot or whose usd_value is not the amount times
+# the USD price of the asset, with a NULL amount and usd_value for the removed ones.
+DB_CREATE_TIMED_BALANCES_SNAPSHOTS = """
+CREATE TABLE IF NOT EXISTS timed_balances_snapshots (
+    time INTEGER NOT NULL PRIMARY KEY,
+    keyframe INTEGER NOT NULL CHECK (keyframe IN (0, 1))
+);
+"""
+
+# The USD prices of the assets of the balance snapshots, as given by their first balance.
+# The keyframes hold all of the prices known at them. Any other snapshot only holds the
+# prices that changed since the previous snapshot. The usd_value of a balance that has
+# no timed_balances entry at a snapshot is its amount times the price.
+DB_CREATE_TIMED_BALANCES_PRICES = """
+CREATE TABLE IF NOT EXISTS timed_balances_prices (
+    time INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    usd_price TEXT NOT NULL,
+    FOREIGN KEY(currency) REFERENCES assets(identifier) ON UPDATE CASCADE,
+    PRIMARY KEY (time, currency)
+);
+"""
+
 DB_CREATE_TIMED_LOCATION_DATA = """
 CREATE TABLE IF NOT EXISTS timed_location_data (
     time INTEGER,
@@ -193,6 +218,35 @@ CREATE TABLE IF NOT EXISTS timed_location_data (
 );
 """
 
+# Sums of the balance snapshots per day ('D') and per week ('W', starting on Monday) so
+# that the statistics graphs of long ranges can be downsampled without reading every
+# snapshot. The DBHandler recomputes the rollups of a period from its snapshots when
+# snapshots are added or deleted.
+DB_CREATE_TIMED_BALANCES_ROLLUPS = """
+CREATE TABLE IF NOT EXISTS timed_balances_rollups (
+    period CHAR(1) NOT NULL,
+    time INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    category CHAR(1) NOT NULL DEFAULT('A') REFERENCES balance_category(category),
+    amount REAL NOT NULL,
+    usd_value REAL NOT NULL,
+    entries INTEGER NOT NULL,
+    FOREIGN KEY(currency) REFERENCES assets(identifier) ON UPDATE CASCADE,
+    PRIMARY KEY (period, currency, time, category)
+);
+"""
+
+DB_CREATE_TIMED_LOCATION_DATA_ROLLUPS = """
+CREATE TABLE IF NOT EXISTS timed_location_data_rollups (
+    period CHAR(1) NOT NULL,
+    time INTEGER NOT NULL,
+    location CHAR(1) NOT NULL DEFAULT('A') REFERENCES location(location),
+    usd_value REAL NOT NULL,
+    entries INTEGER NOT NULL,
+    PRIMARY KEY (period, location, time)
+);
+"""
+
 DB_CREATE_USER_CREDENTIALS = """
 CREATE TABLE IF NOT EXISTS user_credentials (
     name TEXT NOT NULL,
@@ -633,6 +687,25 @@ CREATE TABLE IF NOT EXISTS history_events_mappings (
 );
 """  # noqa: E501
 
+# Sums of the amounts and usd values of the history events per asset, location, type,
+# subtype and day so that value stats don't have to parse the TEXT values of all
+# events. The writes to history_events recompute the stats of the groups they touch
+# with update_daily_stats() of db/history_events.py. The subtype is not part of a primary
+# key since it can be NULL, so it is matched with IS.
+DB_CREATE_HISTORY_EVENTS_DAILY_STATS = """
+CREATE TABLE IF NOT EXISTS history_events_daily_stats (
+    asset TEXT NOT NULL,
+    location TEXT NOT NULL,
+    type TEXT NOT NULL,
+    subtype TEXT,
+    day INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    usd_value REAL NOT NULL,
+    events INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_events_daily_stats ON history_events_daily_stats(location, type, day, asset, subtype);
+"""  # noqa: E501
+
 DB_CREATE_ADEX_EVENTS = """
 CREATE TABLE IF NOT EXISTS adex_events (
     tx_hash VARCHAR[42] NOT NULL,
@@ -801,6 +874,21 @@ CREATE TABLE IF NOT EXISTS ens_mappings (
 );
 """
 
+# Indexes for the columns the filters of db/filtering.py query by. Tables whose
+# primary key already starts with the filtered columns are not included.
+DB_CREATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_history_events_timestamp ON history_events(timestamp, sequence_index);
+CREATE INDEX IF NOT EXISTS idx_history_events_asset ON history_events(asset);
+CREATE INDEX IF NOT EXISTS idx_trades_time ON trades(time);
+CREATE INDEX IF NOT EXISTS idx_trades_location_time ON trades(location, time);
+CREATE INDEX IF NOT EXISTS idx_asset_movements_time ON asset_movements(time);
+CREATE INDEX IF NOT EXISTS idx_asset_movements_location_time ON asset_movements(location, time);
+CREATE INDEX IF NOT EXISTS idx_ledger_actions_timestamp ON ledger_actions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_ethereum_transactions_timestamp ON ethereum_transactions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_eth2_daily_staking_details_timestamp ON eth2_daily_staking_details(timestamp);
+CREATE INDEX IF NOT EXISTS idx_timed_balances_currency_time ON timed_balances(currency, time);
+"""  # noqa: E501
+
 DB_SCRIPT_CREATE_TABLES = f"""
 PRAGMA foreign_keys=off;
 BEGIN TRANSACTION;
@@ -810,7 +898,11 @@ BEGIN TRANSACTION;
 {DB_CREATE_BALANCE_CATEGORY}
 {DB_CREATE_ASSETS}
 {DB_CREATE_TIMED_BALANCES}
+{DB_CREATE_TIMED_BALANCES_SNAPSHOTS}
+{DB_CREATE_TIMED_BALANCES_PRICES}
 {DB_CREATE_TIMED_LOCATION_DATA}
+{DB_CREATE_TIMED_BALANCES_ROLLUPS}
+{DB_CREATE_TIMED_LOCATION_DATA_ROLLUPS}
 {DB_CREATE_USER_CREDENTIALS}
 {DB_CREATE_USER_CREDENTIALS_MAPPINGS}
 {DB_CREATE_EXTERNAL_SERVICE_CREDENTIALS}
@@ -843,6 +935,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_ETH2_DAILY_STAKING_DETAILS}
 {DB_CREATE_HISTORY_EVENTS}
 {DB_CREATE_HISTORY_EVENTS_MAPPINGS}
+{DB_CREATE_HISTORY_EVENTS_DAILY_STATS}
 {DB_CREATE_ADEX_EVENTS}
 {DB_CREATE_LEDGER_ACTION_TYPE}
 {DB_CREATE_LEDGER_ACTIONS}
@@ -852,6 +945,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_NFTS}
 {DB_CREATE_COMBINED_TRADES_VIEW}
 {DB_CREATE_ENS_MAPPINGS}
+{DB_CREATE_INDEXES}
 COMMIT;
 PRAGMA foreign_keys=on;
 """
@@ -45,6 +45,7 @@ CREATE TABLE IF NOT EXISTS pnl_events (
     data TEXT NOT NULL,
     FOREIGN KEY (report_id) REFERENCES pnl_reports(identifier) ON DELETE CASCADE ON UPDATE CASCADE
 );
+CREATE INDEX IF NOT EXISTS idx_pnl_events_report_id_timestamp ON pnl_events(report_id, timestamp);
 """
 
 DB_CREATE_SETTINGS = """
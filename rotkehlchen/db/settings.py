@@ -18,7 +18,7 @@ from rotkehlchen.types import (
 )
 from rotkehlchen.user_messages import MessagesAggregator
 
-ROTKEHLCHEN_DB_VERSION = 32
+ROTKEHLCHEN_DB_VERSION = 33
 ROTKEHLCHEN_TRANSIENT_DB_VERSION = 1
 DEFAULT_TAXFREE_AFTER_PERIOD = YEAR_IN_SECONDS
 DEFAULT_INCLUDE_CRYPTO2CRYPTO = True
@@ -48,6 +48,7 @@ DEFAULT_PNL_CSV_WITH_FORMULAS = True
 DEFAULT_PNL_CSV_HAVE_SUMMARY = False
 DEFAULT_SSF_0GRAPH_MULTIPLIER = 0
 DEFAULT_LAST_DATA_MIGRATION = 0
+DEFAULT_QUERY_CACHE_TTL = 600
 
 JSON_KEYS = (
     'current_price_oracles',
@@ -74,6 +75,7 @@ INTEGER_KEYS = (
     'btc_derivation_gap_limit',
     'ssf_0graph_multiplier',
     'last_data_migration',
+    'query_cache_ttl',
 )
 STRING_KEYS = (
     'eth_rpc_endpoint',
@@ -117,6 +119,7 @@ class DBSettings(NamedTuple):
     ssf_0graph_multiplier: int = DEFAULT_SSF_0GRAPH_MULTIPLIER
     last_data_migration: int = DEFAULT_LAST_DATA_MIGRATION
     non_syncing_exchanges: List[ExchangeLocationID] = []
+    query_cache_ttl: int = DEFAULT_QUERY_CACHE_TTL
 
 
 class ModifiableDBSettings(NamedTuple):
@@ -145,6 +148,7 @@ class ModifiableDBSettings(NamedTuple):
     pnl_csv_have_summary: Optional[bool] = None
     ssf_0graph_multiplier: Optional[int] = None
     non_syncing_exchanges: Optional[List[ExchangeLocationID]] = None
+    query_cache_ttl: Optional[int] = None
 
     def serialize(self) -> Dict[str, Any]:
         settings_dict = {}
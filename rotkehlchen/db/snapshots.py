@@ -42,25 +42,14 @@ class DBSnapshot:
         self,
         timestamp: Timestamp,
     ) -> List[DBAssetBalance]:
-        """Retrieves the timed_balances from the db for a given timestamp."""
-        balances_data = []
-        cursor = self.db.conn.cursor()
-        timed_balances_result = cursor.execute(
-            'SELECT category, time, amount, currency, usd_value FROM timed_balances '
-            'WHERE time=?', (timestamp,),
-        )
+        """Retrieves the timed_balances from the db for a given timestamp.
 
-        for data in timed_balances_result:
-            balances_data.append(
-                DBAssetBalance(
-                    category=BalanceType.deserialize_from_db(data[0]),
-                    time=data[1],
-                    amount=data[2],
-                    asset=Asset(data[3]),
-                    usd_value=str(FVal(data[4])),
-                ),
-            )
-        return balances_data
+        Only the balances that changed since the previous snapshot may be stored at the
+        timestamp so the whole snapshot is reconstructed by the DBHandler."""
+        return [
+            balance._replace(usd_value=str(FVal(balance.usd_value)))
+            for balance in self.db.get_balances_snapshot(timestamp)
+        ]
 
     def get_timed_location_data(
         self,
@@ -306,13 +295,8 @@ class DBSnapshot:
 
     def delete(self, timestamp: Timestamp) -> Tuple[bool, str]:
         """Deletes a snapshot of the database at a given timestamp"""
-        cursor = self.db.conn.cursor()
-        cursor.execute('DELETE FROM timed_balances WHERE time=?', (timestamp,))
-        if cursor.rowcount == 0:
-            return False, 'No snapshot found for the specified timestamp'
-        cursor.execute('DELETE FROM timed_location_data WHERE time=?', (timestamp,))
-        if cursor.rowcount == 0:
-            self.db.conn.rollback()
+        if self.db.delete_location_data(timestamp) is False:
             return False, 'No snapshot found for the specified timestamp'
+        self.db.delete_balances_snapshot(timestamp)
         self.db.update_last_write()
         return True, ''
@@ -35,6 +35,7 @@ from rotkehlchen.db.upgrades.v28_v29 import upgrade_v28_to_v29
 from rotkehlchen.db.upgrades.v29_v30 import upgrade_v29_to_v30
 from rotkehlchen.db.upgrades.v30_v31 import upgrade_v30_to_v31
 from rotkehlchen.db.upgrades.v31_v32 import upgrade_v31_to_v32
+from rotkehlchen.db.upgrades.v32_v33 import upgrade_v32_to_v33
 from rotkehlchen.errors.misc import DBUpgradeError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.utils.misc import ts_now
@@ -215,6 +216,10 @@ UPGRADES_LIST = [
         from_version=31,
         function=upgrade_v31_to_v32,
     ),
+    UpgradeRecord(
+        from_version=32,
+        function=upgrade_v32_to_v33,
+    ),
 ]
 
 
@@ -0,0 +1,191 @@
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from rotkehlchen.fval import FVal
+
+if TYPE_CHECKING:
+    from sqlite3 import Cursor
+
+    from rotkehlchen.db.dbhandler import DBHandler
+
+# The snapshots stored between keyframes, as BALANCES_KEYFRAME_SNAPSHOTS of the DBHandler
+KEYFRAME_SNAPSHOTS = 30
+# The (period, offset from the epoch, length) of the daily and weekly balance rollups
+ROLLUP_PERIODS = (('D', 0, 86400), ('W', 345600, 604800))
+
+
+def _add_indexes(cursor: 'Cursor') -> None:
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_timestamp ON history_events(timestamp, sequence_index);')  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_asset ON history_events(asset);')  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_time ON trades(time);')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_location_time ON trades(location, time);')  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_asset_movements_time ON asset_movements(time);')  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_asset_movements_location_time ON asset_movements(location, time);')  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ledger_actions_timestamp ON ledger_actions(timestamp);')  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_ethereum_transactions_timestamp ON ethereum_transactions(timestamp);')  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_eth2_daily_staking_details_timestamp ON eth2_daily_staking_details(timestamp);')  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_timed_balances_currency_time ON timed_balances(currency, time);')  # noqa: E501
+
+
+def _add_history_events_daily_stats(cursor: 'Cursor') -> None:
+    """Create the daily stats of the history events and fill them with the existing events.
+    The writes to history_events keep them up to date from then on."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS history_events_daily_stats (
+    asset TEXT NOT NULL,
+    location TEXT NOT NULL,
+    type TEXT NOT NULL,
+    subtype TEXT,
+    day INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    usd_value REAL NOT NULL,
+    events INTEGER NOT NULL
+);""")  # noqa: E501
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_events_daily_stats ON history_events_daily_stats(location, type, day, asset, subtype);')  # noqa: E501
+    cursor.execute("""
+    INSERT INTO history_events_daily_stats(asset, location, type, subtype, day, amount, usd_value, events)
+    SELECT asset, location, type, subtype, timestamp / 86400000, SUM(CAST(amount AS REAL)), SUM(CAST(usd_value AS REAL)), COUNT(*)
+    FROM history_events GROUP BY asset, location, type, subtype, timestamp / 86400000;
+    """)  # noqa: E501
+
+
+def _add_balance_rollups(cursor: 'Cursor') -> None:
+    """Create the daily and weekly sums of the balance snapshots and fill them with the
+    existing snapshots. The values are summed as FVal as the DBHandler does when it
+    recomputes a rollup."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS timed_balances_rollups (
+    period CHAR(1) NOT NULL,
+    time INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    category CHAR(1) NOT NULL DEFAULT('A') REFERENCES balance_category(category),
+    amount REAL NOT NULL,
+    usd_value REAL NOT NULL,
+    entries INTEGER NOT NULL,
+    FOREIGN KEY(currency) REFERENCES assets(identifier) ON UPDATE CASCADE,
+    PRIMARY KEY (period, currency, time, category)
+);""")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS timed_location_data_rollups (
+    period CHAR(1) NOT NULL,
+    time INTEGER NOT NULL,
+    location CHAR(1) NOT NULL DEFAULT('A') REFERENCES location(location),
+    usd_value REAL NOT NULL,
+    entries INTEGER NOT NULL,
+    PRIMARY KEY (period, location, time)
+);""")
+    balance_sums: Dict[Tuple[str, int, str, str], Tuple[FVal, FVal, int]] = {}
+    for timestamp, currency, category, amount, usd_value in cursor.execute(
+        'SELECT time, currency, category, amount, usd_value FROM timed_balances',
+    ).fetchall():
+        for period, offset, length in ROLLUP_PERIODS:
+            key = (period, timestamp - (timestamp - offset) % length, currency, category)
+            amount_sum, usd_value_sum, entries = balance_sums.get(key, (FVal(0), FVal(0), 0))
+            balance_sums[key] = (amount_sum + FVal(amount), usd_value_sum + FVal(usd_value), entries + 1)  # noqa: E501
+    cursor.executemany(
+        'INSERT INTO timed_balances_rollups(period, time, currency, category, amount, usd_value, entries) '  # noqa: E501
+        'VALUES(?, ?, ?, ?, ?, ?, ?)',
+        [(*key, str(amount_sum), str(usd_value_sum), entries) for key, (amount_sum, usd_value_sum, entries) in balance_sums.items()],  # noqa: E501
+    )
+    location_sums: Dict[Tuple[str, int, str], Tuple[FVal, int]] = {}
+    for timestamp, location, usd_value in cursor.execute(
+        'SELECT time, location, usd_value FROM timed_location_data',
+    ).fetchall():
+        for period, offset, length in ROLLUP_PERIODS:
+            key = (period, timestamp - (timestamp - offset) % length, location)
+            usd_value_sum, entries = location_sums.get(key, (FVal(0), 0))
+            location_sums[key] = (usd_value_sum + FVal(usd_value), entries + 1)
+    cursor.executemany(
+        'INSERT INTO timed_location_data_rollups(period, time, location, usd_value, entries) '
+        'VALUES(?, ?, ?, ?, ?)',
+        [(*key, str(usd_value_sum), entries) for key, (usd_value_sum, entries) in location_sums.items()],  # noqa: E501
+    )
+
+
+def _usd_price(amount: str, usd_value: str) -> str:
+    amount_value = FVal(amount)
+    if amount_value == FVal(0):
+        return '0'
+    return str(FVal(usd_value) / amount_value)
+
+
+def _compact_timed_balances(cursor: 'Cursor') -> None:
+    """Keep only the timed balances whose amount changed since the previous snapshot or
+    whose usd_value is not the amount times the USD price of the asset, with NULL entries
+    for the removed ones. The prices are kept in timed_balances_prices when they change.
+    Every KEYFRAME_SNAPSHOTS snapshots one keeps all of its balances and prices and is
+    recorded as a keyframe."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS timed_balances_snapshots (
+    time INTEGER NOT NULL PRIMARY KEY,
+    keyframe INTEGER NOT NULL CHECK (keyframe IN (0, 1))
+);""")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS timed_balances_prices (
+    time INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    usd_price TEXT NOT NULL,
+    FOREIGN KEY(currency) REFERENCES assets(identifier) ON UPDATE CASCADE,
+    PRIMARY KEY (time, currency)
+);""")
+    snapshot_times = [x[0] for x in cursor.execute(
+        'SELECT DISTINCT time FROM timed_balances ORDER BY time ASC;',
+    )]
+    previous: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    known_prices: Dict[str, str] = {}
+    since_keyframe = KEYFRAME_SNAPSHOTS  # the first snapshot is a keyframe
+    for snapshot_time in snapshot_times:
+        current: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        prices: Dict[str, str] = {}
+        for currency, category, amount, usd_value in cursor.execute(
+            'SELECT currency, category, amount, usd_value FROM timed_balances WHERE time=? '
+            'ORDER BY category ASC;',
+            (snapshot_time,),
+        ):
+            current[(currency, category)] = (amount, usd_value)
+            prices.setdefault(currency, _usd_price(amount, usd_value))
+        keyframe = since_keyframe >= KEYFRAME_SNAPSHOTS
+        cursor.execute(
+            'INSERT INTO timed_balances_snapshots(time, keyframe) VALUES(?, ?);',
+            (snapshot_time, int(keyframe)),
+        )
+        if keyframe:
+            since_keyframe = 0
+            known_prices = {}
+        else:
+            since_keyframe += 1
+            cursor.executemany(
+                'DELETE FROM timed_balances WHERE time=? AND currency=? AND category=?;',
+                [
+                    (snapshot_time, *key) for key, (amount, usd_value) in current.items()
+                    if key in previous and previous[key][0] == amount and
+                    str(FVal(amount) * FVal(prices[key[0]])) == usd_value
+                ],
+            )
+            cursor.executemany(
+                'INSERT INTO timed_balances(category, time, currency, amount, usd_value) '
+                'VALUES(?, ?, ?, NULL, NULL);',
+                [(category, snapshot_time, currency) for currency, category in previous.keys() - current.keys()],  # noqa: E501
+            )
+        cursor.executemany(
+            'INSERT INTO timed_balances_prices(time, currency, usd_price) VALUES(?, ?, ?);',
+            [(snapshot_time, currency, price) for currency, price in prices.items() if known_prices.get(currency) != price],  # noqa: E501
+        )
+        known_prices.update(prices)
+        previous = current
+
+
+def upgrade_v32_to_v33(db: 'DBHandler') -> None:
+    """Upgrades the DB from v32 to v33
+    - Add indexes for the columns that history, trades, asset movements, ledger actions,
+    transactions, eth2 daily stats and timed balances are filtered by
+    - Add the daily stats of the history events used for their value stats
+    - Add the daily and weekly rollups of the balance snapshots used by the statistics graphs
+    - Store only the changes of the timed balances between keyframes
+    """
+    primary_cursor = db.conn.cursor()
+    _add_indexes(primary_cursor)
+    _add_history_events_daily_stats(primary_cursor)
+    _add_balance_rollups(primary_cursor)
+    _compact_timed_balances(primary_cursor)
+    db.conn.commit()
+    db.conn.execute('VACUUM;')  # give the space of the removed timed balances back
@@ -1,5 +1,18 @@
+import time
+from dataclasses import dataclass, field
 from sqlite3 import Cursor
-from typing import TYPE_CHECKING, Dict, List, Literal, NamedTuple, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from eth_utils import is_checksum_address
 
@@ -48,6 +61,44 @@ class BlockchainAccounts(NamedTuple):
         raise AssertionError(f'Unsupported blockchain: {blockchain}')
 
 
+@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=False)
+class WriteBatch:
+    """The state of the writes held in a single transaction by DBHandler.write_batch()"""
+    greenlet: Any  # the greenlet whose writes are batched
+    max_rows: int
+    max_seconds: float
+    rows: int = 0
+    last_write_pending: bool = False
+    last_commit: float = field(default_factory=time.monotonic)
+
+    def should_commit(self) -> bool:
+        return (
+            self.rows >= self.max_rows or
+            time.monotonic() - self.last_commit >= self.max_seconds
+        )
+
+    def committed(self) -> None:
+        self.rows = 0
+        self.last_write_pending = False
+        self.last_commit = time.monotonic()
+
+
+@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=False)
+class LockWaitStats:
+    """How long the callers of a DB lock waited for it, in seconds"""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def serialize(self) -> Dict[str, Union[int, float]]:
+        return {'count': self.count, 'total': self.total, 'max': self.max}
+
+
 class DBAssetBalance(NamedTuple):
     category: BalanceType
     time: Timestamp
@@ -178,6 +229,49 @@ def insert_tag_mappings(
     )
 
 
+def downsample_time_series(
+        rows: Iterable[Tuple[int, str, Tuple[float, ...]]],
+        snapshots: Iterable[Tuple[int, int]],
+        start_ts: Timestamp,
+        bucket_width: int,
+) -> List[Tuple[Timestamp, str, Tuple[FVal, ...]]]:
+    """Averages (time, group, sums) rows in buckets of bucket_width seconds starting at
+    start_ts, separately for each group. The rows can be single snapshot values or the
+    sums of a rollup period.
+
+    The (time, entries) snapshots give the number of snapshots at each row time. The
+    sums of a bucket are divided by all of its snapshots so that a group missing from
+    some of them counts as zero there, as it does in the snapshots themselves.
+
+    Returns one (time, group, averages) point per group of each bucket ordered by time.
+    The time of a point is the average time of the snapshots in its bucket.
+    """
+    def bucket_of(entry_time: int) -> Tuple[int, int]:
+        entry_time = max(entry_time, start_ts)  # rollup periods can start before the range
+        return entry_time, (entry_time - start_ts) // bucket_width
+
+    bucket_snapshots: Dict[int, Tuple[int, int]] = {}
+    for entry_time, entries in snapshots:
+        entry_time, bucket = bucket_of(entry_time)
+        times_sum, entries_sum = bucket_snapshots.get(bucket, (0, 0))
+        bucket_snapshots[bucket] = (times_sum + entry_time * entries, entries_sum + entries)
+
+    buckets: Dict[Tuple[str, int], List[float]] = {}
+    for entry_time, group, sums in rows:
+        values_sum = buckets.setdefault((group, bucket_of(entry_time)[1]), [0.0] * len(sums))
+        for idx, value in enumerate(sums):
+            values_sum[idx] += value
+
+    points = []
+    for (group, bucket), values_sum in buckets.items():
+        times_sum, entries_sum = bucket_snapshots.get(bucket, (0, 0))
+        if entries_sum == 0:  # values without a snapshot can't be averaged
+            continue
+        points.append((Timestamp(times_sum // entries_sum), group, tuple(FVal(x) / entries_sum for x in values_sum)))  # noqa: E501
+    points.sort(key=lambda x: x[0])
+    return points
+
+
 def is_valid_db_blockchain_account(
         blockchain: str,
         account: str,
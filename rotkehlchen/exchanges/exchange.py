@@ -290,15 +290,16 @@ class ExchangeInterface(CacheableMixIn, LockableQueryMixIn):
                 end_ts=query_end_ts,
             )
 
-            # make sure to add them to the DB
-            if new_trades != []:
-                self.db.add_trades(new_trades)
-
-            # and also set the used queried timestamp range for the exchange
-            ranges.update_used_query_range(
-                location_string=location_string,
-                queried_ranges=[queried_range],
-            )
+            # make sure to add them to the DB and also set the used queried timestamp
+            # range for the exchange, both in a single commit
+            with self.db.write_batch(caller='ExchangeInterface.query_trade_history'):
+                if new_trades != []:
+                    self.db.add_trades(new_trades)
+
+                ranges.update_used_query_range(
+                    location_string=location_string,
+                    queried_ranges=[queried_range],
+                )
             # finally append them to the already returned DB trades
             trades.extend(new_trades)
 
@@ -334,15 +335,16 @@ class ExchangeInterface(CacheableMixIn, LockableQueryMixIn):
                 end_ts=query_end_ts,
             )
 
-            # make sure to add them to the DB
-            if len(new_positions) != 0:
-                self.db.add_margin_positions(new_positions)
+            # make sure to add them to the DB and also set the last queried timestamp
+            # for the exchange, both in a single commit
+            with self.db.write_batch(caller='ExchangeInterface.query_margin_history'):
+                if len(new_positions) != 0:
+                    self.db.add_margin_positions(new_positions)
 
-            # and also set the last queried timestamp for the exchange
-            ranges.update_used_query_range(
-                location_string=location_string,
-                queried_ranges=[(query_start_ts, query_end_ts)],
-            )
+                ranges.update_used_query_range(
+                    location_string=location_string,
+                    queried_ranges=[(query_start_ts, query_end_ts)],
+                )
             # finally append them to the already returned DB margin positions
             margin_positions.extend(new_positions)
 
@@ -390,13 +392,14 @@ class ExchangeInterface(CacheableMixIn, LockableQueryMixIn):
                 end_ts=query_end_ts,
             )
 
-            if len(new_movements) != 0:
-                self.db.add_asset_movements(new_movements)
+            with self.db.write_batch(caller='ExchangeInterface.query_deposits_withdrawals'):
+                if len(new_movements) != 0:
+                    self.db.add_asset_movements(new_movements)
 
-            ranges.update_used_query_range(
-                location_string=location_string,
-                queried_ranges=[(query_start_ts, query_end_ts)],
-            )
+                ranges.update_used_query_range(
+                    location_string=location_string,
+                    queried_ranges=[(query_start_ts, query_end_ts)],
+                )
             asset_movements.extend(new_movements)
 
         return asset_movements
@@ -436,13 +439,14 @@ class ExchangeInterface(CacheableMixIn, LockableQueryMixIn):
                 start_ts=query_start_ts,
                 end_ts=query_end_ts,
             )
-            if len(new_ledger_actions) != 0:
-                db.add_ledger_actions(new_ledger_actions)
+            with self.db.write_batch(caller='ExchangeInterface.query_income_loss_expense'):
+                if len(new_ledger_actions) != 0:
+                    db.add_ledger_actions(new_ledger_actions)
 
-            ranges.update_used_query_range(
-                location_string=location_string,
-                queried_ranges=[(query_start_ts, query_end_ts)],
-            )
+                ranges.update_used_query_range(
+                    location_string=location_string,
+                    queried_ranges=[(query_start_ts, query_end_ts)],
+                )
             ledger_actions.extend(new_ledger_actions)
 
         return ledger_actions
@@ -1156,19 +1156,20 @@ class Kraken(ExchangeInterface):  # lgtm[py/missing-call-to-init]
                 new_events.extend(group_events)
 
             if len(new_events) != 0:
-                try:
-                    self.history_events_db.add_history_events(new_events)
-                except InputError as e:
-                    self.msg_aggregator.add_error(
-                        f'Failed to save kraken events from {query_start_ts} to {query_end_ts} '
-                        f'in database. {str(e)}',
+                with self.db.write_batch(caller='Kraken.query_kraken_ledgers'):
+                    try:
+                        self.history_events_db.add_history_events(new_events)
+                    except InputError as e:
+                        self.msg_aggregator.add_error(
+                            f'Failed to save kraken events from {query_start_ts} to '
+                            f'{query_end_ts} in database. {str(e)}',
+                        )
+
+                    ranges.update_used_query_range(
+                        location_string=range_query_name,
+                        queried_ranges=[(start_ts, end_ts)] + ranges_to_query,
                     )
 
-                ranges.update_used_query_range(
-                    location_string=range_query_name,
-                    queried_ranges=[(start_ts, end_ts)] + ranges_to_query,
-                )
-
             if with_errors is True:
                 return True  # we had errors so stop any further queries and quit
 
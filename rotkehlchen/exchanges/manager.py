@@ -5,6 +5,7 @@ from types import ModuleType
 from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
 from rotkehlchen.db.constants import KRAKEN_ACCOUNT_TYPE_KEY
+from rotkehlchen.errors.misc import InputError
 from rotkehlchen.exchanges.binance import BINANCE_BASE_URL, BINANCEUS_BASE_URL
 from rotkehlchen.exchanges.exchange import ExchangeInterface
 from rotkehlchen.exchanges.ftx import FTX_BASE_URL, FTXUS_BASE_URL
@@ -108,39 +109,39 @@ class ExchangeManager():
         Returns True if an entry was found and edited and false otherwise
 
         May raise:
-        - InputError if there is an error updating the DB
+        - InputError if there is an error updating the DB or editing the exchange object
         """
         exchangeobj = self.get_exchange(name=name, location=location)
         if not exchangeobj:
             return False, f'Could not find {str(location)} exchange {name} for editing'
 
-        # First edit the database entries. This may raise InputError
-        self.database.edit_exchange(
-            name=name,
-            location=location,
-            new_name=new_name,
-            api_key=api_key,
-            api_secret=api_secret,
-            passphrase=passphrase,
-            kraken_account_type=kraken_account_type,
-            PAIRS=PAIRS,
-            ftx_subaccount=ftx_subaccount,
-            should_commit=False,
-        )
+        with self.database.savepoint():  # undoes the database edit if anything fails
+            # First edit the database entries. This may raise InputError
+            self.database.edit_exchange(
+                name=name,
+                location=location,
+                new_name=new_name,
+                api_key=api_key,
+                api_secret=api_secret,
+                passphrase=passphrase,
+                kraken_account_type=kraken_account_type,
+                PAIRS=PAIRS,
+                ftx_subaccount=ftx_subaccount,
+                should_commit=False,
+            )
 
-        # Edit the exchange object
-        success, msg = exchangeobj.edit_exchange(
-            name=new_name,
-            api_key=api_key,
-            api_secret=api_secret,
-            passphrase=passphrase,
-            kraken_account_type=kraken_account_type,
-            PAIRS=PAIRS,
-            ftx_subaccount=ftx_subaccount,
-        )
-        if success is False:
-            self.database.conn.rollback()  # the database changes that happened need rollback
-            return False, msg
+            # Edit the exchange object
+            success, msg = exchangeobj.edit_exchange(
+                name=new_name,
+                api_key=api_key,
+                api_secret=api_secret,
+                passphrase=passphrase,
+                kraken_account_type=kraken_account_type,
+                PAIRS=PAIRS,
+                ftx_subaccount=ftx_subaccount,
+            )
+            if success is False:
+                raise InputError(msg)
 
         # At this point all is great so we should also commit to the database
         self.database.conn.commit()
@@ -41,6 +41,7 @@ from rotkehlchen.types import (
     Timestamp,
 )
 from rotkehlchen.user_messages import MessagesAggregator
+from rotkehlchen.utils.concurrency import ETHERSCAN_QUERIES_LIMIT
 from rotkehlchen.utils.misc import hex_or_bytes_to_int
 from rotkehlchen.utils.serialization import jsonloads_dict
 
@@ -151,7 +152,8 @@ class Etherscan(ExternalServiceWithApiKey):
         while backoff < backoff_limit:
             log.debug(f'Querying etherscan: {query_str}')
             try:
-                response = self.session.get(query_str, timeout=timeout if timeout else DEFAULT_TIMEOUT_TUPLE)  # noqa: E501
+                with ETHERSCAN_QUERIES_LIMIT:
+                    response = self.session.get(query_str, timeout=timeout if timeout else DEFAULT_TIMEOUT_TUPLE)  # noqa: E501
             except requests.exceptions.RequestException as e:
                 if 'Max retries exceeded with url' in str(e):
                     log.debug(
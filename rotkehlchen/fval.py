@@ -3,6 +3,8 @@ from typing import Any, Union
 
 from rotkehlchen.errors.serialization import ConversionError
 
+_new_object = object.__new__
+
 # Here even though we got __future__ annotations using FVal does not seem to work
 AcceptableFValInitInput = Union[float, bytes, Decimal, int, str, 'FVal']
 AcceptableFValOtherInput = Union[int, 'FVal']
@@ -23,7 +25,12 @@ class FVal():
     def __init__(self, data: AcceptableFValInitInput = 0):
 
         try:
-            if isinstance(data, float):
+            # most FVals are created from strings while deserializing so check them first
+            if isinstance(data, str):
+                self.num = Decimal(data)
+            elif isinstance(data, FVal):
+                self.num = data.num
+            elif isinstance(data, float):
                 self.num = Decimal(str(data))
             elif isinstance(data, bytes):
                 # assume it's an ascii string and try to decode the bytes to one
@@ -32,10 +39,8 @@ class FVal():
                 # This elif has to come before the isinstance(int) check due to
                 # https://stackoverflow.com/questions/37888620/comparing-boolean-and-int-using-isinstance
                 raise ValueError('Invalid type bool for data given to FVal constructor')
-            elif isinstance(data, (Decimal, int, str)):
+            elif isinstance(data, (Decimal, int)):
                 self.num = Decimal(data)
-            elif isinstance(data, FVal):
-                self.num = data.num
             else:
                 raise ValueError(f'Invalid type {type(data)} of data given to FVal constructor')
 
@@ -45,6 +50,16 @@ class FVal():
                 'Found {}.'.format(type(data)),
             ) from e
 
+    @classmethod
+    def _from_decimal(cls, num: Decimal) -> 'FVal':
+        """Wraps an already computed Decimal skipping the input checks of the constructor
+
+        Only for the results of operations on the underlying Decimals of FVals
+        """
+        result = _new_object(cls)
+        result.num = num
+        return result
+
     def __str__(self) -> str:
         return str(self.num)
 
@@ -53,75 +68,78 @@ class FVal():
 
     def __gt__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('1')
+        return self.num > evaluated_other
 
     def __lt__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('-1')
+        return self.num < evaluated_other
 
     def __le__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('-1'), Decimal('0'))
+        return self.num <= evaluated_other
 
     def __ge__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('1'), Decimal('0'))
+        return self.num >= evaluated_other
 
     def __eq__(self, other: object) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('0')
+        return self.num == evaluated_other
+
+    def __hash__(self) -> int:
+        return hash(self.num)
 
     def __add__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__add__(evaluated_other))
+        return self._from_decimal(self.num.__add__(evaluated_other))
 
     def __sub__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__sub__(evaluated_other))
+        return self._from_decimal(self.num.__sub__(evaluated_other))
 
     def __mul__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__mul__(evaluated_other))
+        return self._from_decimal(self.num.__mul__(evaluated_other))
 
     def __truediv__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__truediv__(evaluated_other))
+        return self._from_decimal(self.num.__truediv__(evaluated_other))
 
     def __floordiv__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__floordiv__(evaluated_other))
+        return self._from_decimal(self.num.__floordiv__(evaluated_other))
 
     def __pow__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__pow__(evaluated_other))
+        return self._from_decimal(self.num.__pow__(evaluated_other))
 
     def __radd__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__radd__(evaluated_other))
+        return self._from_decimal(self.num.__radd__(evaluated_other))
 
     def __rsub__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rsub__(evaluated_other))
+        return self._from_decimal(self.num.__rsub__(evaluated_other))
 
     def __rmul__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rmul__(evaluated_other))
+        return self._from_decimal(self.num.__rmul__(evaluated_other))
 
     def __rtruediv__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rtruediv__(evaluated_other))
+        return self._from_decimal(self.num.__rtruediv__(evaluated_other))
 
     def __rfloordiv__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rfloordiv__(evaluated_other))
+        return self._from_decimal(self.num.__rfloordiv__(evaluated_other))
 
     def __mod__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__mod__(evaluated_other))
+        return self._from_decimal(self.num.__mod__(evaluated_other))
 
     def __rmod__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
-        return FVal(self.num.__rmod__(evaluated_other))
+        return self._from_decimal(self.num.__rmod__(evaluated_other))
 
     def __float__(self) -> float:
         return float(self.num)
@@ -129,10 +147,10 @@ class FVal():
     # --- Unary operands
 
     def __neg__(self) -> 'FVal':
-        return FVal(self.num.__neg__())
+        return self._from_decimal(-self.num)
 
     def __abs__(self) -> 'FVal':
-        return FVal(self.num.copy_abs())
+        return self._from_decimal(self.num.copy_abs())
 
     # --- Other operations
 
@@ -143,7 +161,7 @@ class FVal():
         """
         evaluated_other = evaluate_input(other)
         evaluated_third = evaluate_input(third)
-        return FVal(self.num.fma(evaluated_other, evaluated_third))
+        return self._from_decimal(self.num.fma(evaluated_other, evaluated_third))
 
     def to_percentage(self, precision: int = 4, with_perc_sign: bool = True) -> str:
         return f'{self.num*100:.{precision}f}{"%" if with_perc_sign else ""}'
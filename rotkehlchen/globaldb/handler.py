@@ -25,10 +25,12 @@ from rotkehlchen.constants.resolver import ethaddress_to_identifier
 from rotkehlchen.errors.asset import UnknownAsset
 from rotkehlchen.errors.misc import InputError
 from rotkehlchen.errors.serialization import DeserializationError
+from rotkehlchen.fval import FVal
 from rotkehlchen.globaldb.upgrades.v1_v2 import upgrade_ethereum_asset_ids
 from rotkehlchen.history.types import HistoricalPrice, HistoricalPriceOracle
 from rotkehlchen.logging import RotkehlchenLogsAdapter
-from rotkehlchen.types import ChecksumEthAddress, Timestamp
+from rotkehlchen.types import ChecksumEthAddress, Price, Timestamp
+from rotkehlchen.utils.misc import get_chunks
 
 from .schema import DB_SCRIPT_CREATE_TABLES
 
@@ -39,6 +41,7 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 GLOBAL_DB_VERSION = 2
+ASSETS_DATA_QUERY_CHUNK_LENGTH = 400
 
 
 def _get_setting_value(cursor: sqlite3.Cursor, name: str, default_value: int) -> int:
@@ -91,16 +94,22 @@ class GlobalDBHandler():
     __instance: Optional['GlobalDBHandler'] = None
     _data_directory: Optional[Path] = None
     conn: sqlite3.Connection
+    # Lazily built index of case-folded symbol to assets. None means it has to be (re)built
+    _assets_by_symbol: Optional[Dict[str, List[AssetData]]]
 
     def __new__(
             cls,
             data_dir: Path = None,
+            read_only: bool = False,
     ) -> 'GlobalDBHandler':
         """
         Initializes the GlobalDB.
 
         If the data dir is given it uses the already existing global DB in that directory,
         of if there is none copies the built-in one there.
+
+        If read_only is True the existing global DB is opened for reading without being
+        initialized, for processes that only read a DB owned by another process.
         """
         if GlobalDBHandler.__instance is not None:
             return GlobalDBHandler.__instance
@@ -108,7 +117,14 @@ class GlobalDBHandler():
         assert data_dir, 'First instantiation of GlobalDBHandler should have a data_dir'
         GlobalDBHandler.__instance = object.__new__(cls)
         GlobalDBHandler.__instance._data_directory = data_dir
-        GlobalDBHandler.__instance.conn = _initialize_global_db_directory(data_dir)
+        if read_only:
+            GlobalDBHandler.__instance.conn = sqlite3.connect(
+                f'file:{data_dir / "global_data" / "global.db"}?mode=ro',
+                uri=True,
+            )
+        else:
+            GlobalDBHandler.__instance.conn = _initialize_global_db_directory(data_dir)
+        GlobalDBHandler.__instance._assets_by_symbol = None
         _reload_constant_assets(GlobalDBHandler.__instance)
         return GlobalDBHandler.__instance
 
@@ -204,6 +220,7 @@ class GlobalDBHandler():
             GlobalDBHandler().add_common_asset_details(asset_data)
 
         connection.commit()  # success
+        GlobalDBHandler()._refresh_symbol_index_entries([asset_id])
 
     @overload
     @staticmethod
@@ -380,6 +397,29 @@ class GlobalDBHandler():
             protocol=protocol,
         )
 
+    @staticmethod
+    def get_assets_data(identifiers: List[str]) -> List[AssetData]:
+        """Get all details of many assets by identifier with as few queries as possible
+
+        Identifiers that can't be matched to an asset are skipped. Same as for
+        get_asset_data() ethereum tokens missing any of name, symbol and decimals
+        are also skipped.
+        """
+        result = []
+        # each identifier is bound twice in the query so keep under sqlite's variable limit
+        for chunk in get_chunks(identifiers, n=ASSETS_DATA_QUERY_CHUNK_LENGTH):
+            for entry in GlobalDBHandler().get_all_asset_data(mapping=False, specific_ids=chunk):
+                if entry.asset_type == AssetType.ETHEREUM_TOKEN and (
+                    entry.ethereum_address is None or
+                    entry.name is None or
+                    entry.symbol is None or
+                    entry.decimals is None
+                ):
+                    continue
+                result.append(entry)
+
+        return result
+
     @staticmethod
     def fetch_underlying_tokens(
             address: ChecksumEthAddress,
@@ -671,6 +711,7 @@ class GlobalDBHandler():
             )
 
         connection.commit()
+        GlobalDBHandler()._refresh_symbol_index_entries([rotki_id])
         return rotki_id
 
     @staticmethod
@@ -743,6 +784,7 @@ class GlobalDBHandler():
             )
 
         connection.commit()
+        GlobalDBHandler()._refresh_symbol_index_entries([rotki_id])
         return rotki_id
 
     @staticmethod
@@ -802,6 +844,7 @@ class GlobalDBHandler():
             ) from e
 
         connection.commit()
+        GlobalDBHandler()._refresh_symbol_index_entries([identifier])
 
     @staticmethod
     def add_common_asset_details(data: Dict[str, Any]) -> None:
@@ -869,6 +912,7 @@ class GlobalDBHandler():
             )
 
         connection.commit()
+        GlobalDBHandler()._refresh_symbol_index_entries([identifier])
 
     @staticmethod
     def add_user_owned_assets(assets: List['Asset']) -> None:
@@ -967,6 +1011,65 @@ class GlobalDBHandler():
 
         return assets
 
+    @staticmethod
+    def invalidate_symbol_index() -> None:
+        """Drop the in-memory symbol index so that it's rebuilt on next use
+
+        Should be called after any bulk change of the assets tables
+        """
+        GlobalDBHandler()._assets_by_symbol = None
+
+    def _get_symbol_index(self) -> Dict[str, List[AssetData]]:
+        """Returns the case-folded symbol to assets index, building it if needed"""
+        if self._assets_by_symbol is None:
+            index: Dict[str, List[AssetData]] = {}
+            for entry in self.get_all_asset_data(mapping=False):
+                if entry.symbol is None:
+                    continue
+                index.setdefault(entry.symbol.casefold(), []).append(entry)
+            self._assets_by_symbol = index
+            log.debug(f'Built assets symbol index with {len(index)} symbols')
+
+        return self._assets_by_symbol
+
+    def _refresh_symbol_index_entries(self, identifiers: List[str]) -> None:
+        """Re-reads the given assets from the DB and updates the symbol index with them
+
+        Assets that no longer exist in the DB are removed from the index. If the index
+        has not been built yet there is nothing to do.
+        """
+        if self._assets_by_symbol is None:
+            return
+
+        lowered_ids = {x.lower() for x in identifiers}
+        for symbol, entries in list(self._assets_by_symbol.items()):
+            remaining = [x for x in entries if x.identifier.lower() not in lowered_ids]
+            if len(remaining) == 0:
+                del self._assets_by_symbol[symbol]
+            elif len(remaining) != len(entries):
+                self._assets_by_symbol[symbol] = remaining
+
+        for entry in self.get_all_asset_data(mapping=False, specific_ids=identifiers):
+            if entry.symbol is None:
+                continue
+            self._assets_by_symbol.setdefault(entry.symbol.casefold(), []).append(entry)
+
+    @staticmethod
+    def get_assets_with_symbol_cached(
+            symbol: str,
+            asset_type: Optional[AssetType] = None,
+    ) -> List[AssetData]:
+        """Find all asset entries that have the given symbol using the in-memory index
+
+        Comparison is case insensitive. Same as get_assets_with_symbol() but does
+        not hit the DB after the index has been built.
+        """
+        entries = GlobalDBHandler()._get_symbol_index().get(symbol.casefold(), [])
+        if asset_type is None:
+            return list(entries)
+
+        return [x for x in entries if x.asset_type == asset_type]
+
     @staticmethod
     def get_historical_price(
             from_asset: 'Asset',
@@ -983,9 +1086,15 @@ class GlobalDBHandler():
         cursor = connection.cursor()
         querystr = (
             'SELECT from_asset, to_asset, source_type, timestamp, price FROM price_history '
-            'WHERE from_asset=? AND to_asset=? AND ABS(timestamp - ?) <= ? '
+            'WHERE from_asset=? AND to_asset=? AND timestamp BETWEEN ? AND ? '
         )
-        querylist = [from_asset.identifier, to_asset.identifier, timestamp, max_seconds_distance]
+        # a range on timestamp instead of ABS(timestamp - ?) so that the index can be used
+        querylist = [
+            from_asset.identifier,
+            to_asset.identifier,
+            timestamp - max_seconds_distance,
+            timestamp + max_seconds_distance,
+        ]
         if source is not None:
             querystr += ' AND source_type=?'
             querylist.append(source.serialize_for_db())
@@ -1063,6 +1172,38 @@ class GlobalDBHandler():
         connection.commit()
         return True
 
+    @staticmethod
+    def get_current_prices() -> List[Tuple[str, str, Price, Timestamp]]:
+        """Returns the saved current prices as from_asset, to_asset, price, timestamp"""
+        cursor = GlobalDBHandler().conn.cursor()
+        return [
+            (entry[0], entry[1], Price(FVal(entry[2])), Timestamp(entry[3]))
+            for entry in cursor.execute(
+                'SELECT from_asset, to_asset, price, timestamp FROM current_prices',
+            )
+        ]
+
+    @staticmethod
+    def set_current_prices(entries: List[Tuple[Asset, Asset, Price, Timestamp]]) -> None:
+        """Saves the given current prices, replacing any saved price of the same pair
+
+        If saving them causes a DB error it's rolled back and an error is logged
+        """
+        connection = GlobalDBHandler().conn
+        cursor = connection.cursor()
+        try:
+            cursor.executemany(
+                'INSERT OR REPLACE INTO current_prices(from_asset, to_asset, price, timestamp) '
+                'VALUES (?, ?, ?, ?)',
+                [(x[0].identifier, x[1].identifier, str(x[2]), x[3]) for x in entries],
+            )
+        except sqlite3.IntegrityError as e:
+            connection.rollback()
+            log.error(f'Failed to save {len(entries)} current prices due to {str(e)}')
+            return
+
+        connection.commit()
+
     @staticmethod
     def get_manual_prices(
         from_asset: Optional[Asset],
@@ -1291,6 +1432,7 @@ class GlobalDBHandler():
 
         connection.commit()
         cursor.execute(detach_database)
+        GlobalDBHandler().invalidate_symbol_index()
 
         return True, ''
 
@@ -1348,6 +1490,7 @@ class GlobalDBHandler():
 
         connection.commit()
         cursor.execute(detach_database)
+        GlobalDBHandler().invalidate_symbol_index()
         return True, ''
 
     def get_user_added_assets(
@@ -148,6 +148,20 @@ CREATE TABLE IF NOT EXISTS price_history (
     FOREIGN KEY(to_asset) REFERENCES assets(identifier) ON UPDATE CASCADE ON DELETE CASCADE,
     PRIMARY KEY(from_asset, to_asset, source_type, timestamp)
 );
+CREATE INDEX IF NOT EXISTS idx_price_history_pair_timestamp ON price_history(from_asset, to_asset, timestamp);
+"""  # noqa: E501
+
+# The last known current price of each pair, so that it can be used after a restart
+DB_CREATE_CURRENT_PRICES = """
+CREATE TABLE IF NOT EXISTS current_prices (
+    from_asset TEXT NOT NULL COLLATE NOCASE,
+    to_asset TEXT NOT NULL COLLATE NOCASE,
+    price TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    FOREIGN KEY(from_asset) REFERENCES assets(identifier) ON UPDATE CASCADE ON DELETE CASCADE,
+    FOREIGN KEY(to_asset) REFERENCES assets(identifier) ON UPDATE CASCADE ON DELETE CASCADE,
+    PRIMARY KEY(from_asset, to_asset)
+);
 """
 
 DB_CREATE_BINANCE_PARIS = """
@@ -174,6 +188,7 @@ BEGIN TRANSACTION;
 {DB_CREATE_USER_OWNED_ASSETS}
 {DB_CREATE_PRICE_HISTORY_SOURCE_TYPES}
 {DB_CREATE_PRICE_HISTORY}
+{DB_CREATE_CURRENT_PRICES}
 {DB_CREATE_BINANCE_PARIS}
 COMMIT;
 PRAGMA foreign_keys=on;
@@ -407,6 +407,7 @@ class AssetsUpdater():
             connection.close()
             connection = GlobalDBHandler().conn
             _replace_assets_from_db(connection, tempdbpath)
+            GlobalDBHandler().invalidate_symbol_index()
             return None
 
     def _perform_update(
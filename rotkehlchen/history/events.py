@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Any, List, Tuple
 
 from rotkehlchen.accounting.structures.base import HistoryBaseEntry
+from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.db.filtering import (
     AssetMovementsFilterQuery,
@@ -57,6 +58,7 @@ class EventsHistorian:
             chain_manager: 'ChainManager',
             eth_transactions: 'EthTransactions',
             evm_tx_decoder: 'EVMTransactionDecoder',
+            decoding_processes: int,
     ) -> None:
 
         self.msg_aggregator = msg_aggregator
@@ -66,6 +68,7 @@ class EventsHistorian:
         self.chain_manager = chain_manager
         self.evm_tx_decoder = evm_tx_decoder
         self.eth_transactions = eth_transactions
+        self.decoding_processes = decoding_processes
         db_settings = self.db.get_settings()
         self.dateformat = db_settings.date_display_format
         self.datelocaltime = db_settings.display_date_in_localtime
@@ -296,6 +299,9 @@ class EventsHistorian:
             start_ts=start_ts,
             end_ts=end_ts,
         )
+        # Resolve all assets the user's history refers to with a single global DB query
+        # instead of one per identifier while deserializing the events for the accountant
+        AssetResolver().preload(self.db.query_owned_asset_identifiers())
         # start creating the all trades history list
         history: List['AccountingEventMixin'] = []
         empty_or_error = ''
@@ -370,7 +376,10 @@ class EventsHistorian:
         step = self._increase_progress(step, total_steps)
 
         self.processing_state_name = 'Decoding raw transactions'
-        self.evm_tx_decoder.get_and_decode_undecoded_transactions(limit=None)
+        self.evm_tx_decoder.get_and_decode_undecoded_transactions(
+            limit=None,
+            processes=self.decoding_processes,
+        )
         step = self._increase_progress(step, total_steps)
 
         # Include all external trades and trades from external exchanges
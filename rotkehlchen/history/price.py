@@ -13,6 +13,7 @@ from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.types import Price, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
+from rotkehlchen.utils.singleflight import get_single_flight
 
 from .types import HistoricalPriceOracle, HistoricalPriceOracleInstance
 
@@ -24,6 +25,8 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+historical_price_flight = get_single_flight('historical_price')
+
 
 def query_usd_price_or_use_default(
         asset: Asset,
@@ -196,6 +199,25 @@ class PriceHistorian():
         if from_asset == to_asset:
             return Price(FVal('1'))
 
+        # Concurrent queries of the same price share a single query
+        return historical_price_flight.run(
+            ('query_historical_price', from_asset.identifier, to_asset.identifier, timestamp),
+            PriceHistorian._query_historical_price,
+            from_asset,
+            to_asset,
+            timestamp,
+        )
+
+    @staticmethod
+    def _query_historical_price(
+            from_asset: Asset,
+            to_asset: Asset,
+            timestamp: Timestamp,
+    ) -> Price:
+        """May raise:
+        - NoPriceForGivenTimestamp if we can't find a price for the asset in the given
+        timestamp from the external service.
+        """
         special_asset_price = PriceHistorian().get_price_for_special_asset(
             from_asset=from_asset,
             to_asset=to_asset,
@@ -2,11 +2,28 @@ from __future__ import unicode_literals  # isort:skip
 
 import logging
 import operator
+from contextlib import contextmanager
 from enum import auto
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import gevent
 
 from rotkehlchen.assets.asset import Asset, EthereumToken
+from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.chain.ethereum.contracts import EthereumContract
 from rotkehlchen.chain.ethereum.defi.curve_pools import get_curve_pools
 from rotkehlchen.chain.ethereum.defi.price import handle_defi_price_query
@@ -57,10 +74,10 @@ from rotkehlchen.constants.assets import (
     A_YV1_YFI,
 )
 from rotkehlchen.constants.ethereum import CURVE_POOL_ABI, YEARN_VAULT_V2_ABI
-from rotkehlchen.constants.timing import DAY_IN_SECONDS, MONTH_IN_SECONDS
+from rotkehlchen.constants.timing import DAY_IN_SECONDS, MONTH_IN_SECONDS, WEEK_IN_SECONDS
 from rotkehlchen.errors.asset import UnknownAsset
 from rotkehlchen.errors.defi import DefiPoolError
-from rotkehlchen.errors.misc import BlockchainQueryError, RemoteError, UnableToDecryptRemoteData
+from rotkehlchen.errors.misc import RemoteError, UnableToDecryptRemoteData
 from rotkehlchen.errors.price import PriceQueryUnsupportedAsset
 from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.externalapis.bisq_market import get_bisq_market_price
@@ -77,6 +94,7 @@ from rotkehlchen.types import (
     CURVE_POOL_PROTOCOL,
     UNISWAP_PROTOCOL,
     YEARN_VAULTS_V2_PROTOCOL,
+    ChecksumEthAddress,
     KnownProtocolsAssets,
     Price,
     Timestamp,
@@ -84,6 +102,7 @@ from rotkehlchen.types import (
 from rotkehlchen.utils.misc import timestamp_to_daystart_timestamp, ts_now
 from rotkehlchen.utils.mixins.serializableenum import SerializableEnumMixin
 from rotkehlchen.utils.network import request_get_dict
+from rotkehlchen.utils.singleflight import get_single_flight
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.ethereum.manager import EthereumManager
@@ -97,8 +116,12 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 CURRENT_PRICE_CACHE_SECS = 300  # 5 mins
+# How old a price can be and still be returned while it's refreshed in the background
+CURRENT_PRICE_MAX_STALE_SECS = WEEK_IN_SECONDS
 BTC_PER_BSQ = FVal('0.00000100')
 
+current_price_flight = get_single_flight('current_price')
+
 ASSETS_UNDERLYING_BTC = (
     A_YV1_RENWSBTC,
     A_FARM_CRVRENWBTC,
@@ -107,6 +130,25 @@ ASSETS_UNDERLYING_BTC = (
     A_CRV_RENWBTC,
     A_CRVP_RENWSBTC,
 )
+# Tokens whose price get_underlying_asset_price takes from another asset
+DERIVED_PRICE_OVERRIDEN_TOKENS = (
+    A_YV1_ALINK,
+    A_YV1_GUSD,
+    A_YV1_DAI,
+    A_FARM_DAI,
+    A_FARM_WETH,
+    A_YV1_WETH,
+    A_YV1_YFI,
+    A_FARM_USDT,
+    A_YV1_USDT,
+    A_FARM_USDC,
+    A_YV1_USDC,
+    A_FARM_TUSD,
+    A_YV1_TUSD,
+    *ASSETS_UNDERLYING_BTC,
+)
+# Maximum number of contract calls of the derived prices queried in one multicall
+DERIVED_PRICES_MULTICALL_CALLS = 150
 
 
 CurrentPriceOracleInstance = Union[
@@ -230,6 +272,14 @@ def _query_currency_converterapi(base: Asset, quote: Asset) -> Optional[Price]:
         return None
 
 
+class DerivedPriceQuery(NamedTuple):
+    """The contract calls needed for the price of a token that is derived from
+    on-chain state and how to compute the price from their multicall_2 output"""
+    token: EthereumToken
+    calls: List[Tuple[ChecksumEthAddress, str]]
+    compute: Callable[[List[Tuple[bool, bytes]]], Optional[Price]]
+
+
 class CachedPriceEntry(NamedTuple):
     price: Price
     time: Timestamp
@@ -239,6 +289,14 @@ class Inquirer():
     __instance: Optional['Inquirer'] = None
     _cached_forex_data: Dict
     _cached_current_price: Dict  # Can't use CacheableMixIn due to Singleton
+    # Pairs whose stale price was returned and have to be refreshed
+    _stale_prices: Set[Tuple[Asset, Asset]]
+    # Pairs whose price was queried since the prices were last saved in the global DB
+    _unsaved_prices: Set[Tuple[Asset, Asset]]
+    _stale_while_revalidate: bool = False
+    # Greenlets running queries that must not get stale prices, with how many such
+    # queries each of them runs. The greenlets they spawn don't get stale prices either.
+    _fresh_prices_greenlets: Dict[Any, int]
     _data_directory: Path
     _cryptocompare: 'Cryptocompare'
     _coingecko: 'Coingecko'
@@ -269,6 +327,10 @@ class Inquirer():
         Inquirer._cryptocompare = cryptocompare
         Inquirer._coingecko = coingecko
         Inquirer._cached_current_price = {}
+        Inquirer._stale_prices = set()
+        Inquirer._unsaved_prices = set()
+        Inquirer._stale_while_revalidate = False
+        Inquirer._fresh_prices_greenlets = {}
         Inquirer.special_tokens = [
             A_YV1_DAIUSDCTBUSD,
             A_CRVP_DAIUSDCTBUSD,
@@ -319,11 +381,151 @@ class Inquirer():
 
     @staticmethod
     def get_cached_current_price_entry(cache_key: Tuple[Asset, Asset]) -> Optional[CachedPriceEntry]:  # noqa: E501
-        cache = Inquirer()._cached_current_price.get(cache_key, None)
-        if cache is None or ts_now() - cache.time > CURRENT_PRICE_CACHE_SECS:
+        """Returns the cached price of the pair if it's recent enough
+
+        While stale-while-revalidate is on, a price older than CURRENT_PRICE_CACHE_SECS
+        is still returned and its pair is queued to be refreshed in the background,
+        unless the current greenlet queries within `fresh_prices()`
+        """
+        instance = Inquirer()
+        cache = instance._cached_current_price.get(cache_key, None)
+        if cache is None:
             return None
 
-        return cache
+        age = ts_now() - cache.time
+        if age <= CURRENT_PRICE_CACHE_SECS:
+            return cache
+        if (
+            instance._stale_while_revalidate is True and
+            instance._in_fresh_prices() is False and
+            age <= CURRENT_PRICE_MAX_STALE_SECS
+        ):
+            instance._stale_prices.add(cache_key)
+            return cache
+
+        return None
+
+    @staticmethod
+    @contextmanager
+    def fresh_prices() -> Iterator[None]:
+        """Within it no stale prices are returned and they are queried again instead
+
+        Used by the queries whose prices are saved, like the balances snapshots.
+        """
+        instance = Inquirer()
+        greenlet = gevent.getcurrent()
+        instance._fresh_prices_greenlets[greenlet] = instance._fresh_prices_greenlets.get(greenlet, 0) + 1  # noqa: E501
+        try:
+            yield
+        finally:
+            instance._fresh_prices_greenlets[greenlet] -= 1
+            if instance._fresh_prices_greenlets[greenlet] == 0:
+                del instance._fresh_prices_greenlets[greenlet]
+
+    def _in_fresh_prices(self) -> bool:
+        """Returns whether the current greenlet, or one that spawned it, is within
+        `fresh_prices()`"""
+        greenlet = gevent.getcurrent()
+        while greenlet is not None:
+            if greenlet in self._fresh_prices_greenlets:
+                return True
+            spawning_greenlet = getattr(greenlet, 'spawning_greenlet', None)
+            greenlet = spawning_greenlet() if spawning_greenlet is not None else None
+        return False
+
+    @staticmethod
+    def get_current_price_age(from_asset: Asset, to_asset: Asset) -> int:
+        """Returns how many seconds ago the cached price of the pair was queried.
+        0 if it is not cached, since then it was just queried."""
+        cache = Inquirer()._cached_current_price.get((from_asset, to_asset), None)
+        return 0 if cache is None else max(0, ts_now() - cache.time)
+
+    @staticmethod
+    def _set_cached_price(cache_key: Tuple[Asset, Asset], price: Price) -> None:
+        instance = Inquirer()
+        instance._cached_current_price[cache_key] = CachedPriceEntry(price=price, time=ts_now())
+        instance._stale_prices.discard(cache_key)
+        if price != ZERO:  # a zero price means that no price was found. Don't keep it.
+            instance._unsaved_prices.add(cache_key)
+
+    @staticmethod
+    def set_stale_while_revalidate(enabled: bool) -> None:
+        """Turns stale-while-revalidate on or off for the cached current prices
+
+        Turning it on also loads the current prices saved in the global DB, so that
+        the prices known before a restart are used until they are refreshed.
+        """
+        instance = Inquirer()
+        instance._stale_while_revalidate = enabled
+        instance._stale_prices.clear()
+        if enabled is False:
+            return
+
+        saved_prices = GlobalDBHandler().get_current_prices()
+        AssetResolver().preload(x[0] for x in saved_prices)
+        for from_identifier, to_identifier, price, timestamp in saved_prices:
+            try:
+                cache_key = (Asset(from_identifier), Asset(to_identifier))
+            except UnknownAsset:
+                continue
+            cache = instance._cached_current_price.get(cache_key, None)
+            if cache is None or cache.time < timestamp:
+                instance._cached_current_price[cache_key] = CachedPriceEntry(price=price, time=timestamp)  # noqa: E501
+
+        log.debug(f'Loaded {len(saved_prices)} saved current prices')
+
+    @staticmethod
+    def save_current_prices() -> None:
+        """Saves the current prices queried since the last save in the global DB"""
+        instance = Inquirer()
+        entries = []
+        for cache_key in instance._unsaved_prices:
+            cache = instance._cached_current_price.get(cache_key, None)
+            if cache is not None:
+                entries.append((cache_key[0], cache_key[1], cache.price, cache.time))
+        instance._unsaved_prices.clear()
+        if len(entries) != 0:
+            GlobalDBHandler().set_current_prices(entries)
+
+    @staticmethod
+    def has_stale_prices() -> bool:
+        return len(Inquirer()._stale_prices) != 0
+
+    @staticmethod
+    def has_unsaved_prices() -> bool:
+        return len(Inquirer()._unsaved_prices) != 0
+
+    @staticmethod
+    def refresh_stale_prices(weights: Dict[Asset, FVal]) -> None:
+        """Queries again the prices that were returned stale, the ones of the assets
+        with the highest weight first, and then saves all new prices in the global DB
+
+        The weight of an asset is usually its value in the portfolio
+        """
+        instance = Inquirer()
+        stale_prices = sorted(
+            instance._stale_prices,
+            key=lambda x: weights.get(x[0], ZERO),
+            reverse=True,
+        )
+        log.debug(f'Refreshing {len(stale_prices)} stale current prices')
+        refresh_start_ts = ts_now()
+        instance.prefetch_derived_prices(
+            tokens=[
+                EthereumToken.from_asset(x[0]) for x in stale_prices  # type: ignore  # is a token
+                if x[1] == A_USD and x[0].is_eth_token()
+            ],
+            ignore_cache=True,
+        )
+        for from_asset, to_asset in stale_prices:
+            instance._stale_prices.discard((from_asset, to_asset))
+            cache = instance._cached_current_price.get((from_asset, to_asset), None)
+            if cache is not None and cache.time >= refresh_start_ts:
+                continue  # already refreshed with the derived prices
+
+            instance.find_price(from_asset=from_asset, to_asset=to_asset, ignore_cache=True)
+
+        instance.save_current_prices()
 
     @staticmethod
     def set_oracles_order(oracles: List[CurrentPriceOracle]) -> None:
@@ -375,7 +577,7 @@ class Inquirer():
                 )
                 break
 
-        Inquirer._cached_current_price[cache_key] = CachedPriceEntry(price=price, time=ts_now())
+        Inquirer._set_cached_price(cache_key, price)
         return price
 
     @staticmethod
@@ -416,13 +618,26 @@ class Inquirer():
         if asset == A_USD:
             return Price(FVal(1))
 
-        instance = Inquirer()
-        cache_key = (asset, A_USD)
         if ignore_cache is False:
-            cache = instance.get_cached_current_price_entry(cache_key=cache_key)
+            cache = Inquirer().get_cached_current_price_entry(cache_key=(asset, A_USD))
             if cache is not None:
                 return cache.price
 
+        # Concurrent queries of the price of the same asset share a single query
+        return current_price_flight.run(
+            ('find_usd_price', asset.identifier),
+            Inquirer._query_usd_price,
+            asset,
+        )
+
+    @staticmethod
+    def _query_usd_price(asset: Asset) -> Price:
+        """Queries the current USD price of the asset ignoring the cache
+
+        Returns Price(ZERO) if all options have been exhausted and errors are logged in the logs
+        """
+        instance = Inquirer()
+        cache_key = (asset, A_USD)
         if asset.is_fiat():
             try:
                 return instance._query_fiat_pair(base=asset, quote=A_USD)
@@ -459,7 +674,7 @@ class Inquirer():
             else:
                 price = Price(usd_price)
 
-            Inquirer._cached_current_price[cache_key] = CachedPriceEntry(price=price, time=ts_now())  # noqa: E501
+            Inquirer._set_cached_price(cache_key, price)
             return price
 
         if is_known_protocol is True or underlying_tokens is not None:
@@ -473,10 +688,7 @@ class Inquirer():
                     )
             else:
                 usd_price = Price(result)
-            Inquirer._cached_current_price[cache_key] = CachedPriceEntry(
-                price=usd_price,
-                time=ts_now(),
-            )
+            Inquirer._set_cached_price(cache_key, usd_price)
             return usd_price
 
         # BSQ is a special asset that doesnt have oracle information but its custom API
@@ -485,10 +697,7 @@ class Inquirer():
                 price_in_btc = get_bisq_market_price(asset)
                 btc_price = Inquirer().find_usd_price(A_BTC)
                 usd_price = Price(price_in_btc * btc_price)
-                Inquirer._cached_current_price[cache_key] = CachedPriceEntry(
-                    price=usd_price,
-                    time=ts_now(),
-                )
+                Inquirer._set_cached_price(cache_key, usd_price)
                 return usd_price
             except (RemoteError, DeserializationError) as e:
                 msg = f'Could not find price for BSQ. {str(e)}'
@@ -502,6 +711,24 @@ class Inquirer():
 
         return instance._query_oracle_instances(from_asset=asset, to_asset=A_USD)
 
+    def _run_derived_price_query(self, query: Optional[DerivedPriceQuery]) -> Optional[Price]:
+        """Makes the contract calls of a single derived price query and computes the price"""
+        if query is None:
+            return None
+
+        assert self._ethereum is not None, 'Inquirer ethereum manager should have been initialized'  # noqa: E501
+        try:
+            output = multicall_2(
+                ethereum=self._ethereum,
+                require_success=False,
+                calls=query.calls,
+            )
+        except RemoteError as e:
+            log.error(f'Failed to query the contracts needed for the price of {query.token} due to {str(e)}')  # noqa: E501
+            return None
+
+        return query.compute(output)
+
     def find_uniswap_v2_lp_price(
             self,
             token: EthereumToken,
@@ -517,21 +744,36 @@ class Inquirer():
             block_identifier='latest',
         )
 
+    def _uniswap_v2_lp_price_query(self, token: EthereumToken) -> DerivedPriceQuery:
+        # local import since the uniswap utils import the inquirer via the price historian
+        from rotkehlchen.chain.ethereum.modules.uniswap.utils import uniswap_v2_lp_price_calls, uniswap_v2_lp_price_from_output  # isort:skip  # noqa: E501  # pylint: disable=import-outside-toplevel
+        return DerivedPriceQuery(
+            token=token,
+            calls=uniswap_v2_lp_price_calls(token),
+            compute=lambda output: uniswap_v2_lp_price_from_output(
+                token=token,
+                output=output,
+                token_price_func=self.find_usd_price,
+                token_price_func_args=[],
+            ),
+        )
+
     def find_curve_pool_price(
         self,
         lp_token: EthereumToken,
     ) -> Optional[Price]:
         """
         1. Obtain the pool for this token
-        2. Obtain prices for assets in pool
-        3. Obtain the virtual price for share and the balances of each
+        2. Obtain the virtual price for share and the balances of each
         token in the pool
+        3. Obtain prices for assets in pool
         4. Calc the price for a share
 
         Returns the price of 1 LP token from the pool
         """
-        assert self._ethereum is not None, 'Inquirer ethereum manager should have been initialized'  # noqa: E501
+        return self._run_derived_price_query(self._curve_pool_price_query(lp_token))
 
+    def _curve_pool_price_query(self, lp_token: EthereumToken) -> Optional[DerivedPriceQuery]:
         pools = get_curve_pools()
         if lp_token.ethereum_address not in pools:
             return None
@@ -547,18 +789,6 @@ class Inquirer():
         except UnknownAsset:
             return None
 
-        # Get price for each token in the pool
-        prices = []
-        for token in tokens:
-            price = self.find_usd_price(token)
-            if price == Price(ZERO):
-                log.error(
-                    f'Could not calculate price for {lp_token} due to inability to '
-                    f'fetch price for {token}.',
-                )
-                return None
-            prices.append(price)
-
         # Query virtual price of LP share and balances in the pool for each token
         contract = EthereumContract(
             address=pool.pool_address,
@@ -570,60 +800,70 @@ class Inquirer():
             (pool.pool_address, contract.encode(method_name='balances', arguments=[i]))
             for i in range(len(pool.assets))
         ]
-        output = multicall_2(
-            ethereum=self._ethereum,
-            require_success=False,
-            calls=calls,
-        )
 
-        # Check that the output has the correct structure
-        if not all([len(call_result) == 2 for call_result in output]):
-            log.debug(
-                f'Failed to query contract methods while finding curve pool price. '
-                f'Not every outcome has length 2. {output}',
-            )
-            return None
-        # Check that all the requests were successful
-        if not all([contract_output[0] for contract_output in output]):
-            log.debug(f'Failed to query contract methods while finding curve price. {output}')
-            return None
-        # Deserialize information obtained in the multicall execution
-        data = []
-        # https://github.com/PyCQA/pylint/issues/4739
-        virtual_price_decoded = contract.decode(output[0][1], 'get_virtual_price')  # pylint: disable=unsubscriptable-object  # noqa: E501
-        if not _check_curve_contract_call(virtual_price_decoded):
-            log.debug(f'Failed to decode get_virtual_price while finding curve price. {output}')
-            return None
-        data.append(FVal(virtual_price_decoded[0]))  # pylint: disable=unsubscriptable-object
-        for i in range(len(pool.assets)):
-            amount_decoded = contract.decode(output[i + 1][1], 'balances', arguments=[i])
-            if not _check_curve_contract_call(amount_decoded):
-                log.debug(f'Failed to decode balances {i} while finding curve price. {output}')
+        def compute(output: List[Tuple[bool, bytes]]) -> Optional[Price]:
+            # Check that the output has the correct structure
+            if not all([len(call_result) == 2 for call_result in output]):
+                log.debug(
+                    f'Failed to query contract methods while finding curve pool price. '
+                    f'Not every outcome has length 2. {output}',
+                )
+                return None
+            # Check that all the requests were successful
+            if not all([contract_output[0] for contract_output in output]):
+                log.debug(f'Failed to query contract methods while finding curve price. {output}')  # noqa: E501
                 return None
+            # Deserialize information obtained in the multicall execution
+            data = []
             # https://github.com/PyCQA/pylint/issues/4739
-            amount = amount_decoded[0]  # pylint: disable=unsubscriptable-object
-            normalized_amount = token_normalized_value_decimals(amount, tokens[i].decimals)
-            data.append(normalized_amount)
+            virtual_price_decoded = contract.decode(output[0][1], 'get_virtual_price')  # pylint: disable=unsubscriptable-object  # noqa: E501
+            if not _check_curve_contract_call(virtual_price_decoded):
+                log.debug(f'Failed to decode get_virtual_price while finding curve price. {output}')  # noqa: E501
+                return None
+            data.append(FVal(virtual_price_decoded[0]))  # pylint: disable=unsubscriptable-object
+            for i in range(len(pool.assets)):
+                amount_decoded = contract.decode(output[i + 1][1], 'balances', arguments=[i])
+                if not _check_curve_contract_call(amount_decoded):
+                    log.debug(f'Failed to decode balances {i} while finding curve price. {output}')  # noqa: E501
+                    return None
+                # https://github.com/PyCQA/pylint/issues/4739
+                amount = amount_decoded[0]  # pylint: disable=unsubscriptable-object
+                normalized_amount = token_normalized_value_decimals(amount, tokens[i].decimals)
+                data.append(normalized_amount)
+
+            # Get price for each token in the pool
+            prices = []
+            for token in tokens:
+                price = self.find_usd_price(token)
+                if price == Price(ZERO):
+                    log.error(
+                        f'Could not calculate price for {lp_token} due to inability to '
+                        f'fetch price for {token}.',
+                    )
+                    return None
+                prices.append(price)
 
-        # Prices and data should verify this relation for the following operations
-        if len(prices) != len(data) - 1:
-            log.debug(
-                f'Length of prices {len(prices)} does not match len of data {len(data)} '
-                f'while querying curve pool price.',
-            )
-            return None
-        # Total number of assets price in the pool
-        total_assets_price = sum(map(operator.mul, data[1:], prices))
-        if total_assets_price == 0:
-            log.error(
-                f'Curve pool price returned unexpected data {data} that lead to a zero price.',
-            )
-            return None
+            # Prices and data should verify this relation for the following operations
+            if len(prices) != len(data) - 1:
+                log.debug(
+                    f'Length of prices {len(prices)} does not match len of data {len(data)} '
+                    f'while querying curve pool price.',
+                )
+                return None
+            # Total number of assets price in the pool
+            total_assets_price = sum(map(operator.mul, data[1:], prices))
+            if total_assets_price == 0:
+                log.error(
+                    f'Curve pool price returned unexpected data {data} that lead to a zero price.',  # noqa: E501
+                )
+                return None
+
+            # Calculate weight of each asset as the proportion of tokens value
+            weights = (data[x + 1] * prices[x] / total_assets_price for x in range(len(tokens)))
+            assets_price = FVal(sum(map(operator.mul, weights, prices)))
+            return (assets_price * FVal(data[0])) / (10 ** lp_token.decimals)
 
-        # Calculate weight of each asset as the proportion of tokens value
-        weights = (data[x + 1] * prices[x] / total_assets_price for x in range(len(tokens)))
-        assets_price = FVal(sum(map(operator.mul, weights, prices)))
-        return (assets_price * FVal(data[0])) / (10 ** lp_token.decimals)
+        return DerivedPriceQuery(token=lp_token, calls=calls, compute=compute)
 
     def find_yearn_price(
         self,
@@ -633,29 +873,134 @@ class Inquirer():
         Query price for a yearn vault v2 token using the pricePerShare method
         and the price of the underlying token.
         """
-        assert self._ethereum is not None, 'Inquirer ethereum manager should have been initialized'  # noqa: E501
+        return self._run_derived_price_query(self._yearn_price_query(token))
 
+    @staticmethod
+    def _yearn_underlying_token(token: EthereumToken) -> Optional[EthereumToken]:
         maybe_underlying_token = GlobalDBHandler().fetch_underlying_tokens(token.ethereum_address)
         if maybe_underlying_token is None or len(maybe_underlying_token) != 1:
             log.error(f'Yearn vault token {token} without an underlying asset')
             return None
 
-        underlying_token = EthereumToken(maybe_underlying_token[0].address)
-        underlying_token_price = self.find_usd_price(underlying_token)
+        return EthereumToken(maybe_underlying_token[0].address)
+
+    def _yearn_price_query(self, token: EthereumToken) -> Optional[DerivedPriceQuery]:
+        maybe_underlying_token = self._yearn_underlying_token(token)
+        if maybe_underlying_token is None:
+            return None
+        underlying_token = maybe_underlying_token
+
         # Get the price per share from the yearn contract
         contract = EthereumContract(
             address=token.ethereum_address,
             abi=YEARN_VAULT_V2_ABI,
             deployed_block=0,
         )
-        try:
-            price_per_share = contract.call(self._ethereum, 'pricePerShare')
+
+        def compute(output: List[Tuple[bool, bytes]]) -> Optional[Price]:
+            success, result = output[0]
+            if not success or len(result) == 0:
+                log.error(f'Failed to query pricePerShare method in Yearn v2 Vault {token}')
+                return None
+
+            price_per_share = contract.decode(result, 'pricePerShare')[0]
+            underlying_token_price = self.find_usd_price(underlying_token)
             return Price(price_per_share * underlying_token_price / 10 ** token.decimals)
-        except (RemoteError, BlockchainQueryError) as e:
-            log.error(f'Failed to query pricePerShare method in Yearn v2 Vault. {str(e)}')
 
+        return DerivedPriceQuery(
+            token=token,
+            calls=[(token.ethereum_address, contract.encode(method_name='pricePerShare'))],
+            compute=compute,
+        )
+
+    def _derived_price_query(self, token: EthereumToken) -> Optional[DerivedPriceQuery]:
+        """The derived price query of the token, if its price comes from on-chain state
+        that can be batched, and would not be overriden by get_underlying_asset_price"""
+        if token in self.special_tokens or token in DERIVED_PRICE_OVERRIDEN_TOKENS:
+            return None
+        if token.protocol == UNISWAP_PROTOCOL:
+            return self._uniswap_v2_lp_price_query(token)
+        if token.protocol == CURVE_POOL_PROTOCOL:
+            return self._curve_pool_price_query(token)
+        if token.protocol == YEARN_VAULTS_V2_PROTOCOL:
+            return self._yearn_price_query(token)
         return None
 
+    @staticmethod
+    def prefetch_derived_prices(
+            tokens: Iterable[EthereumToken],
+            ignore_cache: bool = False,
+    ) -> None:
+        """Queries the on-chain state needed for the USD price of all given uniswap v2 LP,
+        curve pool and yearn v2 vault tokens in as few multicalls as possible and
+        caches their prices, so that finding their price later needs no contract call
+
+        Tokens of other kinds are skipped and so are tokens with a cached price, unless
+        ignore_cache is True. The prices that can't be computed are left to be queried
+        one by one as before.
+        """
+        instance = Inquirer()
+        if instance._ethereum is None:
+            return
+
+        queries: Dict[EthereumToken, DerivedPriceQuery] = {}
+        to_check = list(tokens)
+        while len(to_check) != 0:
+            token = to_check.pop()
+            if token in queries or (
+                ignore_cache is False and
+                instance.get_cached_current_price_entry((token, A_USD)) is not None
+            ):
+                continue
+            query = instance._derived_price_query(token)
+            if query is None:
+                continue
+            queries[token] = query
+            if token.protocol == YEARN_VAULTS_V2_PROTOCOL:
+                # the underlying token of a vault can be a curve or uniswap LP token
+                underlying_token = instance._yearn_underlying_token(token)
+                if underlying_token is not None:
+                    to_check.append(underlying_token)
+
+        if len(queries) == 0:
+            return
+
+        # compute the vaults last since their underlying tokens may be in the batches
+        ordered_queries = sorted(
+            queries.values(),
+            key=lambda x: x.token.protocol == YEARN_VAULTS_V2_PROTOCOL,
+        )
+        outputs: Dict[EthereumToken, List[Tuple[bool, bytes]]] = {}
+        batch: List[DerivedPriceQuery] = []
+        for idx, query in enumerate(ordered_queries):
+            batch.append(query)
+            batch_calls_num = sum(len(x.calls) for x in batch)
+            if idx != len(ordered_queries) - 1 and batch_calls_num + len(ordered_queries[idx + 1].calls) <= DERIVED_PRICES_MULTICALL_CALLS:  # noqa: E501
+                continue
+
+            try:
+                output = multicall_2(
+                    ethereum=instance._ethereum,
+                    require_success=False,
+                    calls=[call for x in batch for call in x.calls],
+                )
+            except RemoteError as e:
+                log.error(f'Failed to query the contracts needed for {len(batch)} derived prices due to {str(e)}')  # noqa: E501
+            else:
+                offset = 0
+                for entry in batch:
+                    outputs[entry.token] = output[offset:offset + len(entry.calls)]
+                    offset += len(entry.calls)
+            batch = []
+
+        log.debug(f'Queried the contracts of {len(outputs)} derived prices')
+        for query in ordered_queries:
+            if query.token not in outputs:
+                continue
+            price = query.compute(outputs[query.token])
+            if price is not None:
+                instance._set_cached_price((query.token, A_USD), Price(price))
+
     @staticmethod
     def get_fiat_usd_exchange_rates(currencies: Iterable[Asset]) -> Dict[Asset, Price]:
         """Gets the USD exchange rate of any of the given assets
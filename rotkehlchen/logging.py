@@ -1,15 +1,64 @@
 import argparse
+import atexit
+import copy
+import json
 import logging
 import re
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Any, Dict, MutableMapping, Tuple
+from typing import Any, Dict, MutableMapping, Optional, Tuple
 
 import gevent
+from gevent import monkey
 
 from rotkehlchen.utils.misc import timestamp_to_date, ts_now
 
 PYWSGI_RE = re.compile(r'\[(.*)\] ')
+_exception_formatter = logging.Formatter()
+
+# The logs are written by a native thread even when gevent has patched threading and queue
+_start_new_thread = monkey.get_original('_thread', 'start_new_thread')
+_allocate_lock = monkey.get_original('_thread', 'allocate_lock')
+_SimpleQueue = monkey.get_original('queue', 'SimpleQueue')
+
+
+def _greenlet_name(greenlet: Any) -> str:
+    if greenlet.parent is None:
+        return 'Main Greenlet'
+    try:
+        return greenlet.name
+    except AttributeError:  # means it's a raw greenlet
+        return f'Greenlet with id {id(greenlet)}'
+
+
+class LogMessage():
+    """The message of a record logged by RotkehlchenLogsAdapter
+
+    Keeps the name of the greenlet that logged it and the given fields, which are only
+    turned to text if a handler emits the record.
+    """
+    __slots__ = ('msg', 'greenlet', 'fields')
+
+    def __init__(self, msg: Any, greenlet: str, fields: MutableMapping[str, Any]) -> None:
+        self.msg = msg
+        self.greenlet = greenlet
+        self.fields = fields
+
+    def __str__(self) -> str:
+        fields = ','.join(f' {key}={value}' for key, value in self.fields.items())
+        return f'{self.greenlet}: {self.msg}{fields}'
+
+    def formatted(self, args: Any) -> 'LogMessage':
+        """Returns the message with the given args and the fields already turned to text"""
+        msg = str(self.msg)
+        if args:
+            msg = msg % args
+        fields = {
+            key: value if value is None or isinstance(value, (str, int, float)) else str(value)  # noqa: E501
+            for key, value in self.fields.items()
+        }
+        return LogMessage(msg=msg, greenlet=self.greenlet, fields=fields)
 
 
 class RotkehlchenLogsAdapter(logging.LoggerAdapter):
@@ -17,26 +66,95 @@ class RotkehlchenLogsAdapter(logging.LoggerAdapter):
     def __init__(self, logger: logging.Logger):
         super().__init__(logger, extra={})
 
-    def process(self, given_msg: Any, kwargs: MutableMapping[str, Any]) -> Tuple[str, Dict]:
+    def process(self, given_msg: Any, kwargs: MutableMapping[str, Any]) -> Tuple[LogMessage, Dict]:  # noqa: E501
         """
         This is the main post-processing function for rotki logs
 
-        This function:
-        - appends all kwargs to the final message
-        - appends the greenlet id in the log message
+        This function keeps all kwargs as fields of the message along with the name of
+        the current greenlet. When emitted they are appended to the message and the
+        greenlet name is prepended to it.
         """
-        msg = str(given_msg)
-        greenlet = gevent.getcurrent()
-        if greenlet.parent is None:
-            greenlet_name = 'Main Greenlet'
+        return LogMessage(msg=given_msg, greenlet=_greenlet_name(gevent.getcurrent()), fields=kwargs), {}  # noqa: E501
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """Formats each log record as a JSON object in a single line
+
+    The fields given to RotkehlchenLogsAdapter are kept under the "fields" key
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        if isinstance(record.msg, LogMessage):
+            message = str(record.msg.msg)
+            entry['greenlet'] = record.msg.greenlet
+            entry['message'] = message % record.args if record.args else message
+            entry['fields'] = record.msg.fields
         else:
-            try:
-                greenlet_name = greenlet.name
-            except AttributeError:  # means it's a raw greenlet
-                greenlet_name = f'Greenlet with id {id(greenlet)}'
+            entry['message'] = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
 
-        msg = greenlet_name + ': ' + msg + ','.join(' {}={}'.format(a[0], a[1]) for a in kwargs.items())  # noqa: E501
-        return msg, {}
+
+class FormattingQueueHandler(QueueHandler):
+    """Puts the log records in the queue with their message, args, fields and exception
+    already turned to text, so that the handlers of the listener don't touch objects
+    that the logging greenlet may still change. The rest of the formatting is left to
+    them. Records are only created for enabled levels, so this is skipped for the rest.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if isinstance(record.msg, LogMessage):
+            record.msg = record.msg.formatted(record.args)  # type: ignore  # msg may be any object
+        else:
+            record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class NativeThreadQueueListener(QueueListener):
+    """A QueueListener whose handlers run in a native thread. So formatting and writing
+    the logs happens outside of the gevent loop."""
+
+    def start(self) -> None:
+        self._stopped = _allocate_lock()
+        self._stopped.acquire()
+        _start_new_thread(self._run, ())
+
+    def _run(self) -> None:
+        try:
+            self._monitor()  # type: ignore  # not in the stubs of QueueListener
+        finally:
+            self._stopped.release()
+
+    def stop(self) -> None:
+        self.enqueue_sentinel()
+        with self._stopped:  # wait for all records before the sentinel to be handled
+            pass
+
+
+_listener: Optional[NativeThreadQueueListener] = None
+
+
+def _stop_listener() -> None:
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
 
 
 class PywsgiFilter(logging.Filter):
@@ -59,18 +177,26 @@ class PywsgiFilter(logging.Filter):
 
 
 def configure_logging(args: argparse.Namespace) -> None:
+    global _listener  # pylint: disable=global-statement
+    # dictConfig closes the handlers of a previous configuration so stop their listener first
+    _stop_listener()
     loglevel = args.loglevel.upper()
     formatters = {
         'default': {
             'format': '[%(asctime)s] %(levelname)s %(name)s %(message)s',
             'datefmt': '%d/%m/%Y %H:%M:%S %Z',
         },
+        'json': {
+            '()': JSONLinesFormatter,
+            'datefmt': '%Y-%m-%dT%H:%M:%S%z',
+        },
     }
+    formatter = 'json' if args.logformat == 'json' else 'default'
     handlers = {
         'console': {
             'class': 'logging.StreamHandler',
             'level': loglevel,
-            'formatter': 'default',
+            'formatter': formatter,
         },
     }
 
@@ -102,7 +228,7 @@ def configure_logging(args: argparse.Namespace) -> None:
             'maxBytes': single_log_max_bytes,
             'backupCount': backups_num,
             'level': loglevel,
-            'formatter': 'default',
+            'formatter': formatter,
         }
     else:
         selected_handlers = ['console']
@@ -133,6 +259,16 @@ def configure_logging(args: argparse.Namespace) -> None:
         'loggers': loggers,
     })
 
+    # The loggers only put the records in a queue. The configured handlers get them
+    # from it and format and write them in a native thread.
+    root_logger = logging.getLogger()
+    log_queue = _SimpleQueue()
+    _listener = NativeThreadQueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)  # noqa: E501
+    queue_handler = FormattingQueueHandler(log_queue)
+    for logger_name in loggers:
+        logging.getLogger(logger_name).handlers = [queue_handler]
+    _listener.start()
+
     if not args.logfromothermodules:
         logging.getLogger('urllib3').setLevel(logging.CRITICAL)
         logging.getLogger('urllib3.connectionpool').setLevel(logging.CRITICAL)
@@ -89,6 +89,7 @@ from rotkehlchen.types import (
 from rotkehlchen.usage_analytics import maybe_submit_usage_analytics
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import combine_dicts
+from rotkehlchen.utils.mixins.cacheable import CacheableMixIn
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.bitcoin.xpub import XpubData
@@ -232,6 +233,7 @@ class Rotkehlchen():
             # has unauthenticable/invalid premium credentials remaining in his DB
 
         settings = self.get_settings()
+        CacheableMixIn.set_default_cache_ttl(settings.query_cache_ttl)
         self.greenlet_manager.spawn_and_track(
             after_seconds=None,
             task_name='submit_usage_analytics',
@@ -303,6 +305,7 @@ class Rotkehlchen():
             saddle=saddle_oracle,
         )
         Inquirer().set_oracles_order(settings.current_price_oracles)
+        Inquirer().set_stale_while_revalidate(True)
 
         self.chain_manager = ChainManager(
             blockchain_accounts=self.data.db.get_blockchain_accounts(),
@@ -343,6 +346,7 @@ class Rotkehlchen():
             chain_manager=self.chain_manager,
             evm_tx_decoder=self.evm_tx_decoder,
             eth_transactions=self.eth_transactions,
+            decoding_processes=self.args.decoding_processes,
         )
         self.task_manager = TaskManager(
             max_tasks_num=DEFAULT_MAX_TASKS_NUM,
@@ -391,6 +395,8 @@ class Rotkehlchen():
         del self.events_historian
         del self.data_importer
 
+        Inquirer().save_current_prices()
+        Inquirer().set_stale_while_revalidate(False)
         self.data.logout()
         self.password = ''
         self.cryptocompare.unset_database()
@@ -670,6 +676,87 @@ class Rotkehlchen():
             save_despite_errors=save_despite_errors,
         )
 
+        allowed_to_save = requested_save_data or self.data.db.should_save_balances()
+        # A saved snapshot must not keep cached balances or the USD value of stale
+        # prices. Query them again.
+        with Inquirer().fresh_prices() if allowed_to_save else contextlib.nullcontext():
+            balances, liabilities, problem_free = self._query_all_balances(
+                ignore_cache=ignore_cache or allowed_to_save,
+                force_token_detection=ignore_cache,
+            )
+
+        # Calculate usd totals
+        assets_total_balance: DefaultDict[Asset, Balance] = defaultdict(Balance)
+        total_usd_per_location: Dict[str, FVal] = {}
+        for location, asset_balance in balances.items():
+            total_usd_per_location[location] = ZERO
+            for asset, balance in asset_balance.items():
+                assets_total_balance[asset] += balance
+                total_usd_per_location[location] += balance.usd_value
+
+        net_usd = sum((balance.usd_value for _, balance in assets_total_balance.items()), ZERO)
+        liabilities_total_usd = sum((liability.usd_value for _, liability in liabilities.items()), ZERO)  # noqa: E501
+        net_usd -= liabilities_total_usd
+
+        # Calculate location stats
+        location_stats: Dict[str, Any] = {}
+        for location, total_usd in total_usd_per_location.items():
+            if location == str(Location.BLOCKCHAIN):
+                total_usd -= liabilities_total_usd
+
+            percentage = (total_usd / net_usd).to_percentage() if net_usd != ZERO else '0%'
+            location_stats[location] = {
+                'usd_value': total_usd,
+                'percentage_of_net_value': percentage,
+            }
+
+        # Calculate 'percentage_of_net_value' per asset
+        assets_total_balance_as_dict: Dict[Asset, Dict[str, Any]] = {
+            asset: balance.to_dict() for asset, balance in assets_total_balance.items()
+        }
+        liabilities_as_dict: Dict[Asset, Dict[str, Any]] = {
+            asset: balance.to_dict() for asset, balance in liabilities.items()
+        }
+        for asset, balance_dict in assets_total_balance_as_dict.items():
+            percentage = (balance_dict['usd_value'] / net_usd).to_percentage() if net_usd != ZERO else '0%'  # noqa: E501
+            assets_total_balance_as_dict[asset]['percentage_of_net_value'] = percentage
+
+        for asset, balance_dict in liabilities_as_dict.items():
+            percentage = (balance_dict['usd_value'] / net_usd).to_percentage() if net_usd != ZERO else '0%'  # noqa: E501
+            liabilities_as_dict[asset]['percentage_of_net_value'] = percentage
+
+        # Compose balances response
+        result_dict = {
+            'assets': assets_total_balance_as_dict,
+            'liabilities': liabilities_as_dict,
+            'location': location_stats,
+            'net_usd': net_usd,
+        }
+        if (problem_free or save_despite_errors) and allowed_to_save:
+            if not timestamp:
+                timestamp = Timestamp(int(time.time()))
+            self.data.db.save_balances_data(data=result_dict, timestamp=timestamp)
+            log.debug('query_balances data saved')
+        else:
+            log.debug(
+                'query_balances data not saved',
+                allowed_to_save=allowed_to_save,
+                problem_free=problem_free,
+                save_despite_errors=save_despite_errors,
+            )
+
+        return result_dict
+
+    def _query_all_balances(
+            self,
+            ignore_cache: bool,
+            force_token_detection: bool,
+    ) -> Tuple[Dict[str, Dict[Asset, Balance]], Dict[Asset, Balance], bool]:
+        """Queries the balances of all locations and the liabilities
+
+        Returns the balances per location, the liabilities and whether all the queries
+        succeeded. Errors are sent to the user as balance snapshot errors.
+        """
         balances: Dict[str, Dict[Asset, Balance]] = {}
         problem_free = True
         for exchange in self.exchange_manager.iterate_exchanges():
@@ -695,12 +782,18 @@ class Rotkehlchen():
         try:
             blockchain_result = self.chain_manager.query_balances(
                 blockchain=None,
-                force_token_detection=ignore_cache,
+                force_token_detection=force_token_detection,
                 ignore_cache=ignore_cache,
             )
             if len(blockchain_result.totals.assets) != 0:
                 balances[str(Location.BLOCKCHAIN)] = blockchain_result.totals.assets
             liabilities = blockchain_result.totals.liabilities
+            for chain, error in blockchain_result.errors.items():
+                problem_free = False
+                self.msg_aggregator.add_message(
+                    message_type=WSMessageType.BALANCE_SNAPSHOT_ERROR,
+                    data={'location': f'{chain.value} balances query', 'error': error},
+                )
         except (RemoteError, EthSyncError) as e:
             problem_free = False
             liabilities = {}
@@ -722,7 +815,9 @@ class Rotkehlchen():
         # retrieve loopring balances if module is activated
         if self.chain_manager.get_module('loopring'):
             try:
-                loopring_balances = self.chain_manager.get_loopring_balances()
+                loopring_balances = self.chain_manager.get_loopring_balances(
+                    ignore_cache=ignore_cache,
+                )
             except RemoteError as e:
                 problem_free = False
                 self.msg_aggregator.add_message(
@@ -761,70 +856,7 @@ class Rotkehlchen():
                             )
 
         balances = account_for_manually_tracked_asset_balances(db=self.data.db, balances=balances)
-
-        # Calculate usd totals
-        assets_total_balance: DefaultDict[Asset, Balance] = defaultdict(Balance)
-        total_usd_per_location: Dict[str, FVal] = {}
-        for location, asset_balance in balances.items():
-            total_usd_per_location[location] = ZERO
-            for asset, balance in asset_balance.items():
-                assets_total_balance[asset] += balance
-                total_usd_per_location[location] += balance.usd_value
-
-        net_usd = sum((balance.usd_value for _, balance in assets_total_balance.items()), ZERO)
-        liabilities_total_usd = sum((liability.usd_value for _, liability in liabilities.items()), ZERO)  # noqa: E501
-        net_usd -= liabilities_total_usd
-
-        # Calculate location stats
-        location_stats: Dict[str, Any] = {}
-        for location, total_usd in total_usd_per_location.items():
-            if location == str(Location.BLOCKCHAIN):
-                total_usd -= liabilities_total_usd
-
-            percentage = (total_usd / net_usd).to_percentage() if net_usd != ZERO else '0%'
-            location_stats[location] = {
-                'usd_value': total_usd,
-                'percentage_of_net_value': percentage,
-            }
-
-        # Calculate 'percentage_of_net_value' per asset
-        assets_total_balance_as_dict: Dict[Asset, Dict[str, Any]] = {
-            asset: balance.to_dict() for asset, balance in assets_total_balance.items()
-        }
-        liabilities_as_dict: Dict[Asset, Dict[str, Any]] = {
-            asset: balance.to_dict() for asset, balance in liabilities.items()
-        }
-        for asset, balance_dict in assets_total_balance_as_dict.items():
-            percentage = (balance_dict['usd_value'] / net_usd).to_percentage() if net_usd != ZERO else '0%'  # noqa: E501
-            assets_total_balance_as_dict[asset]['percentage_of_net_value'] = percentage
-
-        for asset, balance_dict in liabilities_as_dict.items():
-            percentage = (balance_dict['usd_value'] / net_usd).to_percentage() if net_usd != ZERO else '0%'  # noqa: E501
-            liabilities_as_dict[asset]['percentage_of_net_value'] = percentage
-
-        # Compose balances response
-        result_dict = {
-            'assets': assets_total_balance_as_dict,
-            'liabilities': liabilities_as_dict,
-            'location': location_stats,
-            'net_usd': net_usd,
-        }
-        allowed_to_save = requested_save_data or self.data.db.should_save_balances()
-
-        if (problem_free or save_despite_errors) and allowed_to_save:
-            if not timestamp:
-                timestamp = Timestamp(int(time.time()))
-            self.data.db.save_balances_data(data=result_dict, timestamp=timestamp)
-            log.debug('query_balances data saved')
-        else:
-            log.debug(
-                'query_balances data not saved',
-                allowed_to_save=allowed_to_save,
-                problem_free=problem_free,
-                save_despite_errors=save_despite_errors,
-            )
-
-        return result_dict
+        return balances, liabilities, problem_free
 
     def set_settings(self, settings: ModifiableDBSettings) -> Tuple[bool, str]:
         """Tries to set new settings. Returns True in success or False with message if error"""
@@ -846,6 +878,9 @@ class Rotkehlchen():
         if settings.btc_derivation_gap_limit is not None:
             self.chain_manager.btc_derivation_gap_limit = settings.btc_derivation_gap_limit
 
+        if settings.query_cache_ttl is not None:
+            CacheableMixIn.set_default_cache_ttl(settings.query_cache_ttl)
+
         if settings.current_price_oracles is not None:
             Inquirer().set_oracles_order(settings.current_price_oracles)
 
@@ -25,6 +25,7 @@ from rotkehlchen.globaldb.handler import GlobalDBHandler
 from rotkehlchen.greenlets import GreenletManager
 from rotkehlchen.history.price import PriceHistorian
 from rotkehlchen.history.types import HistoricalPriceOracle
+from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.premium.premium import Premium, premium_create_and_verify
 from rotkehlchen.premium.sync import PremiumSyncManager
@@ -51,6 +52,7 @@ PREMIUM_STATUS_CHECK = 3600  # every hour
 TX_RECEIPTS_QUERY_LIMIT = 500
 TX_DECODING_LIMIT = 500
 PREMIUM_CHECK_RETRY_LIMIT = 3
+CURRENT_PRICES_SAVE_FREQUENCY = 300  # every 5 mins
 
 
 def noop_exchange_success_cb(trades, margin, asset_movements, exchange_specific_data) -> None:  # type: ignore # noqa: E501
@@ -110,6 +112,8 @@ class TaskManager():
         self.activate_premium = activate_premium
         self.query_balances = query_balances
         self.last_premium_status_check = ts_now()
+        self.last_current_prices_save_ts = ts_now()
+        self.current_prices_refresh_greenlet: Optional[gevent.Greenlet] = None
         self.msg_aggregator = MessagesAggregator()
         self.premium_check_retries = 0
 
@@ -126,6 +130,7 @@ class TaskManager():
             self._maybe_decode_evm_transactions,
             self._maybe_check_premium_status,
             self._maybe_update_snapshot_balances,
+            self._maybe_refresh_current_prices,
         ]
         if premium_sync_manager is not None:
             self.potential_tasks.append(premium_sync_manager.maybe_upload_data_to_server)
@@ -378,10 +383,7 @@ class TaskManager():
             usd_value = amount * price
             updates.append((str(usd_value), identifier))
 
-        query = 'UPDATE history_events SET usd_value=? WHERE rowid=?'
-        cursor = self.database.conn.cursor()
-        cursor.executemany(query, updates)
-        self.database.update_last_write()
+        DBHistoryEvents(self.database).update_usd_values(updates)
 
     def _maybe_decode_evm_transactions(self) -> None:
         """Schedules the evm transaction decoding task
@@ -467,6 +469,39 @@ class TaskManager():
                 ignore_cache=True,
             )
 
+    def _maybe_refresh_current_prices(self) -> None:
+        """Schedules the refresh of the stale current prices that were returned, or
+        the saving of the queried current prices if enough time has passed"""
+        if (
+            self.current_prices_refresh_greenlet is not None and
+            self.current_prices_refresh_greenlet.dead is False
+        ):
+            return
+
+        now = ts_now()
+        should_save = (
+            Inquirer().has_unsaved_prices() and
+            now - self.last_current_prices_save_ts > CURRENT_PRICES_SAVE_FREQUENCY
+        )
+        if Inquirer().has_stale_prices() is False and should_save is False:
+            return
+
+        # refresh the prices of the assets with the biggest value in the portfolio first
+        weights = {
+            entry.asset: FVal(entry.usd_value)
+            for entry in self.database.get_latest_asset_value_distribution()
+        }
+        task_name = 'Refresh stale current prices'
+        log.debug(f'Scheduling task to {task_name}')
+        self.current_prices_refresh_greenlet = self.greenlet_manager.spawn_and_track(
+            after_seconds=None,
+            task_name=task_name,
+            exception_is_error=True,
+            method=Inquirer().refresh_stale_prices,
+            weights=weights,
+        )
+        self.last_current_prices_save_ts = now
+
     def _schedule(self) -> None:
         """Schedules background tasks"""
         self.greenlet_manager.clear_finished()
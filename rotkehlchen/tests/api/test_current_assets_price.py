@@ -35,10 +35,12 @@ def test_get_current_assets_price_in_usd(rotkehlchen_api_server):
     else:
         result = assert_proper_response_with_result(response)
 
-    assert len(result) == 2
+    assert len(result) == 3
     assert result['assets']['BTC'] == '33183.98'
     assert result['assets']['GBP'] == '1.367'
     assert result['assets']['USD'] == '1'
+    assert set(result['price_ages']) == {'BTC', 'USD', 'GBP'}
+    assert result['price_ages']['USD'] == 0
     assert result['target_asset'] == 'USD'
 
 
@@ -66,8 +68,10 @@ def test_get_current_assets_price_in_btc(rotkehlchen_api_server):
     else:
         result = assert_proper_response_with_result(response)
 
-    assert len(result) == 2
+    assert len(result) == 3
     assert result['assets']['BTC'] == '1'
     assert result['assets']['GBP'] == '0.00004119457641910343485018976024'
     assert result['assets']['USD'] == '0.00003013502298398202988309419184'
+    assert set(result['price_ages']) == {'BTC', 'USD', 'GBP'}
+    assert result['price_ages']['BTC'] == 0
     assert result['target_asset'] == 'BTC'
@@ -0,0 +1,97 @@
+import time
+from http import HTTPStatus
+
+import requests
+
+from rotkehlchen.tests.utils.api import (
+    api_url_for,
+    assert_error_response,
+    assert_proper_response,
+    assert_proper_response_with_result,
+)
+
+
+def test_request_metrics(rotkehlchen_api_server):
+    """Test that request latencies are only measured while the metrics are enabled"""
+    response = requests.get(api_url_for(rotkehlchen_api_server, 'pingresource'))
+    assert_proper_response(response)
+    response = requests.get(api_url_for(rotkehlchen_api_server, 'metricsresource'))
+    assert_proper_response(response)
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert 'rotki_metrics_enabled 0' in response.text
+    assert 'endpoint="/api/1/ping"' not in response.text
+
+    response = requests.put(
+        api_url_for(rotkehlchen_api_server, 'metricsresource'),
+        json={'enabled': True},
+    )
+    assert assert_proper_response_with_result(response) is True
+    for _ in range(3):
+        assert_proper_response(requests.get(api_url_for(rotkehlchen_api_server, 'pingresource')))  # noqa: E501
+
+    response = requests.get(api_url_for(rotkehlchen_api_server, 'metricsresource'))
+    assert 'rotki_metrics_enabled 1' in response.text
+    assert 'rotki_api_request_duration_seconds_count{method="GET",endpoint="/api/1/ping",status="200"} 3' in response.text  # noqa: E501
+    assert 'rotki_greenlets{kind="api_task"}' in response.text
+    assert 'rotki_single_flight_collapsed_total{name="current_price"}' in response.text
+    assert '# TYPE rotki_module_query_seconds summary' in response.text
+    assert '# TYPE rotki_query_cache_hits_total counter' in response.text
+
+    response = requests.put(
+        api_url_for(rotkehlchen_api_server, 'metricsresource'),
+        json={'enabled': False},
+    )
+    assert_proper_response(response)
+    # the dispatching of requests is back to the one of the flask app
+    assert 'full_dispatch_request' not in rotkehlchen_api_server.flask_app.__dict__
+
+
+def test_profiler(rotkehlchen_api_server):
+    """Test that the profiler can be started, stopped and its samples downloaded"""
+    response = requests.get(api_url_for(rotkehlchen_api_server, 'profilerresource'))
+    assert_error_response(
+        response=response,
+        contained_in_msg='The profiler has not taken any samples',
+        status_code=HTTPStatus.CONFLICT,
+    )
+    response = requests.delete(api_url_for(rotkehlchen_api_server, 'profilerresource'))
+    assert_error_response(
+        response=response,
+        contained_in_msg='The profiler is not running',
+        status_code=HTTPStatus.CONFLICT,
+    )
+
+    response = requests.put(
+        api_url_for(rotkehlchen_api_server, 'profilerresource'),
+        json={'interval': 0.001},
+    )
+    assert assert_proper_response_with_result(response) is True
+    response = requests.put(api_url_for(rotkehlchen_api_server, 'profilerresource'))
+    assert_error_response(
+        response=response,
+        contained_in_msg='The profiler is already running',
+        status_code=HTTPStatus.CONFLICT,
+    )
+    time.sleep(0.1)
+    response = requests.delete(api_url_for(rotkehlchen_api_server, 'profilerresource'))
+    assert assert_proper_response_with_result(response) is True
+
+    response = requests.get(api_url_for(rotkehlchen_api_server, 'profilerresource'))
+    assert response.status_code == HTTPStatus.OK
+    assert 'attachment' in response.headers['Content-Disposition']
+    lines = response.text.splitlines()
+    assert len(lines) != 0
+    for line in lines:
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0
+        assert all(frame.endswith(')') for frame in stack.split(';'))
+
+    response = requests.put(
+        api_url_for(rotkehlchen_api_server, 'profilerresource'),
+        json={'interval': 5},
+    )
+    assert_error_response(
+        response=response,
+        contained_in_msg='interval must be between 0.001 and 1 seconds',
+        status_code=HTTPStatus.BAD_REQUEST,
+    )
@@ -4,7 +4,9 @@ import time
 from copy import deepcopy
 from unittest.mock import patch
 
+import gevent
 import pytest
+from pysqlcipher3 import dbapi2 as sqlcipher
 
 from rotkehlchen.accounting.ledger_actions import LedgerActionType
 from rotkehlchen.accounting.structures.balance import BalanceType
@@ -13,6 +15,8 @@ from rotkehlchen.assets.asset import Asset
 from rotkehlchen.balances.manual import ManuallyTrackedBalance
 from rotkehlchen.constants import YEAR_IN_SECONDS
 from rotkehlchen.constants.assets import A_1INCH, A_BTC, A_DAI, A_ETH, A_USD
+from rotkehlchen.constants.misc import ONE, ZERO
+from rotkehlchen.constants.timing import DAY_IN_SECONDS
 from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.db.dbhandler import DBHandler, detect_sqlcipher_version
 from rotkehlchen.db.filtering import AssetMovementsFilterQuery, TradesFilterQuery
@@ -33,6 +37,7 @@ from rotkehlchen.db.settings import (
     DEFAULT_MAIN_CURRENCY,
     DEFAULT_PNL_CSV_HAVE_SUMMARY,
     DEFAULT_PNL_CSV_WITH_FORMULAS,
+    DEFAULT_QUERY_CACHE_TTL,
     DEFAULT_SSF_0GRAPH_MULTIPLIER,
     DEFAULT_TAXABLE_LEDGER_ACTIONS,
     DEFAULT_UI_FLOATING_PRECISION,
@@ -40,6 +45,7 @@ from rotkehlchen.db.settings import (
     DBSettings,
     ModifiableDBSettings,
 )
+from rotkehlchen.db.snapshots import DBSnapshot
 from rotkehlchen.db.utils import BlockchainAccounts, DBAssetBalance, LocationData
 from rotkehlchen.errors.api import AuthenticationError
 from rotkehlchen.errors.misc import InputError
@@ -353,6 +359,7 @@ def test_writing_fetching_data(data_dir, username):
         'ssf_0graph_multiplier': DEFAULT_SSF_0GRAPH_MULTIPLIER,
         'last_data_migration': DEFAULT_LAST_DATA_MIGRATION,
         'non_syncing_exchanges': [],
+        'query_cache_ttl': DEFAULT_QUERY_CACHE_TTL,
     }
     assert len(expected_dict) == len(DBSettings()), 'One or more settings are missing'
 
@@ -760,6 +767,226 @@ def test_get_netvalue_without_nfts(data_dir, username):
     assert values[3] == '4500'
 
 
+def test_downsampled_balance_series(database):
+    """Test that the net value and the timed balances of long ranges are averaged in at
+    most the requested number of points and that the rollups follow the snapshots"""
+    start_ts = 1600041600  # a Monday at 00:00 UTC
+    snapshots = 60 * 24  # hourly for 60 days
+    database.add_multiple_balances([DBAssetBalance(
+        category=BalanceType.ASSET,
+        time=Timestamp(start_ts + idx * 3600),
+        asset=A_ETH,
+        amount=str(idx),
+        usd_value=str(idx * 10),
+    ) for idx in range(snapshots)])
+    database.add_multiple_location_data([LocationData(
+        time=Timestamp(start_ts + idx * 3600),
+        location=Location.TOTAL.serialize_for_db(),  # pylint: disable=no-member
+        usd_value=str(idx * 10 + 5),
+    ) for idx in range(snapshots)])
+
+    times, values = database.get_netvalue_data(Timestamp(start_ts), max_points=snapshots)
+    assert len(times) == snapshots
+    assert values[-1] == str((snapshots - 1) * 10 + 5)
+
+    # buckets of 3 days read from the daily rollups
+    times, values = database.get_netvalue_data(Timestamp(start_ts), max_points=20)
+    assert len(times) == len(values) == 20
+    for bucket, (point_time, value) in enumerate(zip(times, values)):
+        indices = range(bucket * 72, (bucket + 1) * 72)
+        assert point_time == start_ts + bucket * 3 * 86400 + 86400  # average of the days
+        assert FVal(value).is_close(FVal(sum(idx * 10 + 5 for idx in indices)) / 72)
+
+    # buckets shorter than a day read from the snapshots themselves
+    times, values = database.get_netvalue_data(Timestamp(start_ts), max_points=500)
+    assert len(times) == 500
+    assert FVal(values[0]).is_close(FVal(15))
+    # buckets longer than a week read from the weekly rollups
+    times, values = database.get_netvalue_data(Timestamp(start_ts), max_points=3)
+    assert len(times) == 3
+    assert times == sorted(times)
+
+    balances = database.query_timed_balances(
+        asset=A_ETH,
+        from_ts=Timestamp(start_ts),
+        to_ts=Timestamp(start_ts + snapshots * 3600),
+        balance_type=BalanceType.ASSET,
+        max_points=20,
+    )
+    assert len(balances) == 20
+    assert all(x.category == BalanceType.ASSET for x in balances)
+    assert FVal(balances[0].amount).is_close(FVal('35.5'))
+    assert FVal(balances[0].usd_value).is_close(FVal(355))
+
+    # deleting snapshots keeps the rollups equal to the sums of the remaining snapshots
+    DBSnapshot(database, database.msg_aggregator).delete(Timestamp(start_ts))
+    DBSnapshot(database, database.msg_aggregator).delete(Timestamp(start_ts + 3600))
+    cursor = database.conn.cursor()
+    expected = {}
+    for entry_time, usd_value in cursor.execute('SELECT time, usd_value FROM timed_location_data'):  # noqa: E501
+        day = entry_time - entry_time % DAY_IN_SECONDS
+        usd_value_sum, entries = expected.get(day, (ZERO, 0))
+        expected[day] = (usd_value_sum + FVal(usd_value), entries + 1)
+    rollups = cursor.execute(
+        'SELECT time, usd_value, entries FROM timed_location_data_rollups WHERE period="D"',
+    ).fetchall()
+    assert len(rollups) == len(expected)
+    for day, usd_value, entries in rollups:
+        assert FVal(usd_value).is_close(expected[day][0])
+        assert entries == expected[day][1]
+    assert cursor.execute(
+        'SELECT COUNT(*) FROM timed_balances_rollups WHERE period="W"',
+    ).fetchone()[0] == 9
+
+
+def test_balance_rollups_are_exact(database):
+    """Test that the rollups are the exact sums of the snapshots of their period and
+    return to the same value after a long sequence of snapshot additions and deletions,
+    where running float totals would drift"""
+    start_ts = 1600041600  # a Monday at 00:00 UTC
+
+    def add_snapshot(timestamp, usd_value):
+        database.add_multiple_balances([DBAssetBalance(
+            category=BalanceType.ASSET,
+            time=Timestamp(timestamp),
+            asset=A_ETH,
+            amount=usd_value,
+            usd_value=usd_value,
+        )])
+        database.add_multiple_location_data([LocationData(
+            time=Timestamp(timestamp),
+            location=Location.TOTAL.serialize_for_db(),  # pylint: disable=no-member
+            usd_value=usd_value,
+        )])
+
+    def query_rollups():
+        cursor = database.conn.cursor()
+        return (
+            cursor.execute('SELECT * FROM timed_balances_rollups ORDER BY period').fetchall(),
+            cursor.execute('SELECT * FROM timed_location_data_rollups ORDER BY period').fetchall(),  # noqa: E501
+        )
+
+    add_snapshot(start_ts, '0.1')
+    add_snapshot(start_ts + 3600, '0.2')
+    rollups = query_rollups()
+    assert rollups == (
+        [('D', start_ts, 'ETH', 'A', 0.3, 0.3, 2), ('W', start_ts, 'ETH', 'A', 0.3, 0.3, 2)],
+        [('D', start_ts, 'H', 0.3, 2), ('W', start_ts, 'H', 0.3, 2)],
+    )
+
+    timestamps = [start_ts + 7200 + idx * 60 for idx in range(300)]
+    for idx, timestamp in enumerate(timestamps):
+        add_snapshot(timestamp, f'{idx}.{idx % 7}1')
+    for timestamp in timestamps[::2] + timestamps[1::2]:
+        DBSnapshot(database, database.msg_aggregator).delete(Timestamp(timestamp))
+    assert query_rollups() == rollups
+
+
+def test_downsampled_balances_missing_asset(database):
+    """Test that an asset missing from some snapshots of a bucket counts as zero in them
+    when the bucket is averaged"""
+    start_ts = 1600041600  # a Monday at 00:00 UTC
+    snapshots = 8 * 24  # hourly for 8 days
+    balances = []
+    for idx in range(snapshots):
+        balances.append(DBAssetBalance(
+            category=BalanceType.ASSET,
+            time=Timestamp(start_ts + idx * 3600),
+            asset=A_ETH,
+            amount='1',
+            usd_value='10',
+        ))
+        if idx % 2 == 0:  # BTC is only in every other snapshot
+            balances.append(DBAssetBalance(
+                category=BalanceType.ASSET,
+                time=Timestamp(start_ts + idx * 3600),
+                asset=A_BTC,
+                amount='2',
+                usd_value='20',
+            ))
+    database.add_multiple_balances(balances)
+    database.add_multiple_location_data([LocationData(
+        time=Timestamp(start_ts + idx * 3600),
+        location=Location.TOTAL.serialize_for_db(),  # pylint: disable=no-member
+        usd_value='30' if idx % 2 == 0 else '10',
+    ) for idx in range(snapshots)])
+
+    # buckets of 2 days read from the daily rollups and of about 12 hours, holding 11 or
+    # 12 snapshots, read from the snapshots themselves
+    for max_points, max_diff in ((4, '1e-6'), (16, '0.1')):
+        for asset in (A_BTC, A_ETH):
+            balances = database.query_timed_balances(
+                asset=asset,
+                from_ts=Timestamp(start_ts),
+                to_ts=Timestamp(start_ts + snapshots * 3600),
+                max_points=max_points,
+            )
+            assert len(balances) == max_points
+            for balance in balances:
+                assert FVal(balance.amount).is_close(ONE, max_diff=max_diff)
+                assert FVal(balance.usd_value).is_close(FVal(10), max_diff=max_diff)
+
+
+def test_balances_snapshot_changes(database):
+    """Test that a snapshot stores only the balances whose amount changed since the
+    previous one, or whose USD value can't be derived from the USD price of the asset,
+    and the prices that changed, until enough snapshots were stored for a keyframe.
+    Also test that all readers see the whole snapshots."""
+    start_ts = Timestamp(1600041600)
+    snapshots = [
+        {A_ETH: ('3', '100'), A_BTC: ('2', '1000')},
+        {A_ETH: ('3', '100'), A_BTC: ('2', '1100')},
+        {A_ETH: ('3', '100'), A_BTC: ('2', '1100')},
+        {A_BTC: ('2', '1200'), A_DAI: ('5', '5')},
+        {A_BTC: ('3', '1800'), A_DAI: ('5', '5')},
+    ]
+    times = [start_ts + idx * 3600 for idx in range(len(snapshots))] + [start_ts + DAY_IN_SECONDS]  # noqa: E501
+    snapshots.append(snapshots[-1])
+    with patch('rotkehlchen.db.dbhandler.BALANCES_KEYFRAME_SNAPSHOTS', 4):
+        for timestamp, assets in zip(times, snapshots):
+            database.save_balances_data(
+                data={
+                    'assets': {k: {'amount': FVal(v[0]), 'usd_value': FVal(v[1])} for k, v in assets.items()},  # noqa: E501
+                    'liabilities': {},
+                    'location': {'blockchain': {'usd_value': FVal(0)}},
+                    'net_usd': FVal(0),
+                },
+                timestamp=timestamp,
+            )
+
+    cursor = database.conn.cursor()
+    stored = cursor.execute(
+        'SELECT time, COUNT(*) FROM timed_balances GROUP BY time ORDER BY time',
+    ).fetchall()
+    # 3 times the price of ETH is not 100 so its balance is always stored. The BTC price
+    # changes but its USD value is derived from it until its amount changes. The ETH
+    # balance of the fourth snapshot is removed.
+    assert stored == [(times[0], 2), (times[1], 1), (times[2], 1), (times[3], 2), (times[4], 1), (times[5], 2)]  # noqa: E501
+    prices = cursor.execute(
+        'SELECT time, COUNT(*) FROM timed_balances_prices GROUP BY time ORDER BY time',
+    ).fetchall()
+    assert prices == [(times[0], 2), (times[1], 1), (times[3], 2), (times[5], 2)]
+    assert cursor.execute(
+        'SELECT time FROM timed_balances_snapshots WHERE keyframe=1',
+    ).fetchall() == [(times[0],), (times[5],)]
+
+    for timestamp, assets in zip(times, snapshots):
+        balances = DBSnapshot(database, database.msg_aggregator).get_timed_balances(timestamp)
+        assert {x.asset: (x.amount, x.usd_value) for x in balances} == assets
+    eth_balances = database.query_timed_balances(asset=A_ETH)
+    assert [(x.time, x.amount, x.usd_value) for x in eth_balances] == [(x, '3', '100') for x in times[:3]]  # noqa: E501
+    btc_balances = database.query_timed_balances(asset=A_BTC, balance_type=BalanceType.ASSET)
+    assert [x.usd_value for x in btc_balances] == ['1000', '1100', '1100', '1200', '1800', '1800']
+    distribution = database.get_latest_asset_value_distribution()
+    assert [(x.time, x.asset) for x in distribution] == [(times[5], A_BTC), (times[5], A_DAI)]
+
+    # deleting a snapshot keeps the ones after it whole
+    assert DBSnapshot(database, database.msg_aggregator).delete(times[3]) == (True, '')
+    balances = DBSnapshot(database, database.msg_aggregator).get_timed_balances(times[4])
+    assert {x.asset: (x.amount, x.usd_value) for x in balances} == snapshots[4]
+    assert database.get_balances_snapshot(times[3]) == []
+
+
 def test_add_trades(data_dir, username, caplog):
     """Test that adding and retrieving trades from the DB works fine.
 
@@ -1342,3 +1569,146 @@ def test_fresh_db_adds_version(user_data_dir):
     query = query.fetchall()
     assert len(query) != 0
     assert int(query[0][0]) == ROTKEHLCHEN_DB_VERSION
+
+
+def test_write_batch(database):
+    """Test that writes in a write batch are committed together when the row limit
+    is reached and when the batch ends, along with a single update of the last write"""
+    trades = [Trade(
+        timestamp=Timestamp(1451606400 + idx),
+        location=Location.KRAKEN,
+        base_asset=A_ETH,
+        quote_asset=A_EUR,
+        trade_type=TradeType.BUY,
+        amount=FVal('1.1'),
+        rate=FVal('10'),
+        fee=Fee(FVal('0.01')),
+        fee_currency=A_EUR,
+        link='',
+        notes='',
+    ) for idx in range(5)]
+    assert not database.conn.in_transaction
+
+    with database.write_batch(caller='test', max_rows=3):
+        database.add_trades(trades[:2])
+        assert database.conn.in_transaction
+        with database.write_batch(caller='test'):  # joins the open batch
+            database.add_trades(trades[2:3])
+        # the row limit was reached so the batch got committed
+        assert not database.conn.in_transaction
+        database.add_trades(trades[3:])
+        assert database.conn.in_transaction
+
+    assert not database.conn.in_transaction
+    assert database.get_last_write_ts() == database.last_write_ts
+    returned_trades = database.get_trades(filter_query=TradesFilterQuery.make(), has_premium=True)  # noqa: E501
+    assert returned_trades == trades
+
+
+def test_savepoint_in_write_batch(database):
+    """Test that a failed operation in a savepoint only undoes its own writes, and not the
+    uncommitted writes of a write batch, whichever greenlet it runs in"""
+    trades = [Trade(
+        timestamp=Timestamp(1451606400 + idx),
+        location=Location.KRAKEN,
+        base_asset=A_ETH,
+        quote_asset=A_EUR,
+        trade_type=TradeType.BUY,
+        amount=FVal('1.1'),
+        rate=FVal('10'),
+        fee=Fee(FVal('0.01')),
+        fee_currency=A_EUR,
+        link='',
+        notes='',
+    ) for idx in range(4)]
+
+    def add_trade_and_fail(trade: Trade) -> None:
+        with pytest.raises(InputError), database.savepoint():
+            database.add_trades([trade])
+            raise InputError('failed')
+
+    with database.write_batch(caller='test'):
+        database.add_trades(trades[:1])
+        assert database.conn.in_transaction
+        gevent.spawn(add_trade_and_fail, trades[1]).get()
+        add_trade_and_fail(trades[2])
+        # the batch is not committed by the savepoints
+        assert database.conn.in_transaction
+        with database.savepoint():
+            database.add_trades(trades[3:])
+        assert database.conn.in_transaction
+
+    returned_trades = database.get_trades(filter_query=TradesFilterQuery.make(), has_premium=True)  # noqa: E501
+    assert returned_trades == [trades[0], trades[3]]
+
+
+def test_write_batches_wait_for_each_other(database):
+    """Test that the write batch of a greenlet waits for the open one of another greenlet
+    to end and that the wait is recorded"""
+    events = []
+
+    def other_batch():
+        with database.write_batch(caller='other'):
+            events.append('other')
+
+    with database.write_batch(caller='test'):
+        greenlet = gevent.spawn(other_batch)
+        gevent.sleep(0.2)
+        events.append('test')
+
+    greenlet.get()
+    assert events == ['test', 'other']
+    assert database.lock_waits['other'].count == 1
+    assert database.lock_waits['other'].max >= 0.2
+
+
+def test_read_only_connections(database):
+    """Test that reads in read_only() go through a separate read only connection that
+    only sees committed data and that the waits for it are recorded"""
+    assert database.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    writer_conn = database.conn
+    trade = Trade(
+        timestamp=Timestamp(1451606400),
+        location=Location.KRAKEN,
+        base_asset=A_ETH,
+        quote_asset=A_EUR,
+        trade_type=TradeType.BUY,
+        amount=FVal('1.1'),
+        rate=FVal('10'),
+        fee=Fee(FVal('0.01')),
+        fee_currency=A_EUR,
+        link='',
+        notes='',
+    )
+    with database.write_batch(caller='test'):
+        database.add_trades([trade])
+        # the trade is not committed yet so only the writer connection sees it
+        assert database.get_trades(filter_query=TradesFilterQuery.make(), has_premium=True) == [trade]  # noqa: E501
+        with database.read_only(caller='test'):
+            read_conn = database.conn
+            assert read_conn is not writer_conn
+            assert database.get_trades(filter_query=TradesFilterQuery.make(), has_premium=True) == []  # noqa: E501
+            with pytest.raises(sqlcipher.OperationalError):
+                database.add_tag(
+                    name='foo',
+                    description=None,
+                    background_color='ffffff',
+                    foreground_color='000000',
+                )
+
+    assert database.conn is writer_conn
+    with database.read_only(caller='test'):
+        assert database.conn is read_conn  # the connection was reused
+        assert database.get_trades(filter_query=TradesFilterQuery.make(), has_premium=True) == [trade]  # noqa: E501
+
+    with database.read_only(caller='test'):
+        read_conn = database.conn
+        database._close_read_connections()
+        # the connection in use is only closed when it is returned
+        assert read_conn.execute('SELECT COUNT(*) FROM trades').fetchone()[0] == 1
+    with pytest.raises(sqlcipher.ProgrammingError):
+        read_conn.execute('SELECT COUNT(*) FROM trades')
+
+    assert database.lock_waits['test'].count == 4
+    database.logout()
+    assert not (database.user_data_dir / 'rotkehlchen.db-wal').exists()
@@ -2,13 +2,17 @@ import pytest
 
 from rotkehlchen.db.filtering import (
     DBETHTransactionJoinsFilter,
+    DBFilterKeysetPagination,
     DBFilterOrder,
     DBFilterPagination,
     DBFilterQuery,
     DBLocationFilter,
     DBTimestampFilter,
     ETHTransactionsFilterQuery,
+    HistoryEventFilterQuery,
+    serialize_keyset_cursor,
 )
+from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.tests.utils.factories import make_ethereum_address
 from rotkehlchen.types import Location, Timestamp
 
@@ -24,7 +28,7 @@ def test_ethereum_transaction_filter():
         to_ts=Timestamp(999),
     )
     query, bindings = filter_query.prepare()
-    assert query == ' INNER JOIN ethtx_address_mappings WHERE ethereum_transactions.tx_hash=ethtx_address_mappings.tx_hash AND ethtx_address_mappings.address IN (?)  AND ((timestamp >= ? AND timestamp <= ?)) ORDER BY timestamp ASC LIMIT 10 OFFSET 10'  # noqa: E501
+    assert query == ' INNER JOIN ethtx_address_mappings WHERE ethereum_transactions.tx_hash=ethtx_address_mappings.tx_hash AND ethtx_address_mappings.address IN (?)  AND ((timestamp >= ? AND timestamp <= ?)) ORDER BY timestamp ASC,ethereum_transactions.tx_hash ASC LIMIT 10 OFFSET 10'  # noqa: E501
     assert bindings == [
         addresses[0],
         filter_query.from_ts,
@@ -76,3 +80,84 @@ def test_filter_arguments(and_op, order_by, pagination):
         time_filter.to_ts,
         location_filter.location.serialize_for_db(),
     ]
+
+
+def test_keyset_pagination():
+    """Test that the first page and the pages after a cursor are paginated with a cursor
+    seeking past the last row"""
+    filter_query = HistoryEventFilterQuery.make(limit=10, offset=0, from_ts=Timestamp(1))
+    query, bindings = filter_query.prepare()
+    assert query == 'WHERE (timestamp >= ?) ORDER BY timestamp ASC,sequence_index ASC,identifier ASC LIMIT 10'  # noqa: E501
+    assert bindings == [1000]
+
+    # the rows of a full page give the cursor of the next one
+    description = [('identifier',), ('event_identifier',), ('sequence_index',), ('timestamp',)]
+    rows = [(idx, 'foo', idx, 1000) for idx in range(1, 11)]
+    filter_query.update_next_cursor(description, rows)
+    assert filter_query.next_cursor is not None
+    filter_query.update_next_cursor(description, rows[:9])
+    assert filter_query.next_cursor is None, 'a partial page should be the last one'
+    cursor = serialize_keyset_cursor(filter_query.order_by.rules, [1000, 10, 10])
+
+    filter_query = HistoryEventFilterQuery.make(limit=10, cursor=cursor, from_ts=Timestamp(1))
+    query, bindings = filter_query.prepare()
+    assert query == 'WHERE ((timestamp >= ?)) AND (timestamp, sequence_index, identifier) > (?, ?, ?) ORDER BY timestamp ASC,sequence_index ASC,identifier ASC LIMIT 10'  # noqa: E501
+    assert bindings == [1000, 1000, 10, 10]
+    # counting the entries found for the filter ignores the cursor
+    query, bindings = filter_query.prepare(with_pagination=False)
+    assert query == 'WHERE (timestamp >= ?) ORDER BY timestamp ASC,sequence_index ASC,identifier ASC'  # noqa: E501
+    assert bindings == [1000]
+
+    with pytest.raises(DeserializationError):
+        HistoryEventFilterQuery.make(order_by_rules=[('timestamp', False)], limit=10, cursor=cursor)  # noqa: E501
+    with pytest.raises(DeserializationError):
+        HistoryEventFilterQuery.make(limit=10, cursor='invalid')
+    with pytest.raises(DeserializationError):
+        HistoryEventFilterQuery.make(limit=10, offset=10, cursor=cursor)
+    # other pages are paginated with an offset in the same order
+    query, _ = HistoryEventFilterQuery.make(limit=10, offset=20).prepare()
+    assert query == 'ORDER BY timestamp ASC,sequence_index ASC,identifier ASC LIMIT 10 OFFSET 20'  # noqa: E501
+    # and without an offset or a cursor the limit does not paginate
+    filter_query = HistoryEventFilterQuery.make(limit=100)
+    assert filter_query.pagination is None
+    assert filter_query.prepare()[0] == 'ORDER BY timestamp ASC,sequence_index ASC'
+
+
+def test_keyset_pagination_nullable_order():
+    """Test that seeking in a descending order of a nullable attribute includes NULLs last"""
+    order_by = DBFilterOrder(rules=[('fee', False), ('id', False)])
+    pagination = DBFilterKeysetPagination(limit=10, after=[2.5, 'foo'])
+    query, bindings = pagination.prepare_seek(order_by=order_by, not_null_attributes=('id',))
+    assert query == '(((CAST(fee AS REAL) < ? OR CAST(fee AS REAL) IS NULL)) OR (CAST(fee AS REAL) = ? AND (id < ? OR id IS NULL)))'  # noqa: E501
+    assert bindings == [2.5, 2.5, 'foo']
+
+    pagination = DBFilterKeysetPagination(limit=10, after=[None, 'foo'])
+    query, bindings = pagination.prepare_seek(order_by=order_by, not_null_attributes=('id',))
+    assert query == '((CAST(fee AS REAL) IS NULL AND (id < ? OR id IS NULL)))'
+    assert bindings == ['foo']
+
+
+def test_history_events_value_stats_split():
+    """Test that the value stats of whole days are read from the daily stats and only the
+    edge days from the history events"""
+    filter_query = HistoryEventFilterQuery.make(
+        from_ts=Timestamp(86400 * 3 + 5),
+        to_ts=Timestamp(86400 * 10),
+        location=Location.KRAKEN,
+    )
+    value_stats_filters = filter_query.prepare_value_stats()
+    assert value_stats_filters is not None
+    (stats_query, stats_bindings), edges = value_stats_filters
+    assert stats_query == 'WHERE (location=?) AND day >= ? AND day <= ?'
+    assert stats_bindings == ['B', 4, 9]
+    assert edges is not None
+    assert edges[0] == 'WHERE (location=?) AND (timestamp >= ? AND timestamp <= ?) AND (timestamp < ? OR timestamp >= ?)'  # noqa: E501
+    assert edges[1] == ['B', 259205000, 864000000, 345600000, 864000000]
+
+    value_stats_filters = HistoryEventFilterQuery.make().prepare_value_stats()
+    assert value_stats_filters == (('', []), None)
+
+    # less than a whole day or filters that are not in the daily stats
+    assert HistoryEventFilterQuery.make(from_ts=Timestamp(5), to_ts=Timestamp(86400)).prepare_value_stats() is None  # noqa: E501
+    assert HistoryEventFilterQuery.make(location_label='foo').prepare_value_stats() is None
+    assert HistoryEventFilterQuery.make(exclude_ignored_assets=True).prepare_value_stats() is None  # noqa: E501
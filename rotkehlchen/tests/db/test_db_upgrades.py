@@ -1,5 +1,6 @@
 import json
 import os
+from collections import defaultdict
 from contextlib import ExitStack, contextmanager
 from pathlib import Path
 from shutil import copyfile
@@ -28,7 +29,9 @@ from rotkehlchen.db.upgrades.v7_v8 import (
     v7_generate_asset_movement_id,
 )
 from rotkehlchen.db.upgrades.v13_v14 import REMOVED_ASSETS, REMOVED_ETH_TOKENS
+from rotkehlchen.db.upgrades.v32_v33 import ROLLUP_PERIODS
 from rotkehlchen.errors.misc import DBUpgradeError
+from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.database import (
     _init_prepared_db,
     _use_prepared_db,
@@ -2602,6 +2605,120 @@ def test_upgrade_db_31_to_32(user_data_dir):  # pylint: disable=unused-argument
     assert cursor.fetchone() == (1, expected_timestamp // 10)
 
 
+def _assert_rollups_match(rollups, entries, values_num):
+    """Checks that the daily and weekly rollups are the exact sums of the values of
+    the (time, *key, *values) entries with values_num values"""
+    expected = {}
+    for timestamp, *rest in entries:
+        key, values = tuple(rest[:-values_num]), rest[-values_num:]
+        for period, offset, length in ROLLUP_PERIODS:
+            rollup_key = (period, timestamp - (timestamp - offset) % length, *key)
+            sums, count = expected.get(rollup_key, ([FVal(0)] * values_num, 0))
+            expected[rollup_key] = ([x + FVal(y) for x, y in zip(sums, values)], count + 1)
+
+    rollups = rollups.fetchall()
+    assert len(rollups) == len(expected)
+    for *rollup_key, count in rollups:
+        expected_sums, expected_count = expected[tuple(rollup_key[:-values_num])]
+        assert count == expected_count
+        for value, expected_value in zip(rollup_key[-values_num:], expected_sums):
+            assert FVal(value).is_close(expected_value)
+
+
+def test_upgrade_db_32_to_33(user_data_dir):  # pylint: disable=unused-argument
+    """Test upgrading the DB from version 32 to version 33.
+
+    - Check that the indexes for the filtered columns are created and used
+    - Check that the daily stats of the history events are created and filled
+    - Check that the rollups of the balance snapshots are created and filled
+    - Check that only the changed timed balances and prices are kept and the snapshots
+    are the same
+    """
+    msg_aggregator = MessagesAggregator()
+    _use_prepared_db(user_data_dir, 'v31_rotkehlchen.db')
+    db_v32 = _init_db_with_target_version(
+        target_version=32,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    cursor = db_v32.conn.cursor()
+    result = cursor.execute(
+        'SELECT COUNT(*) FROM sqlite_master WHERE type="index" AND name LIKE "idx_%"',
+    )
+    assert result.fetchone()[0] == 0
+    history_events_before = cursor.execute('SELECT * FROM history_events').fetchall()
+    balances_before = defaultdict(set)
+    for category, timestamp, currency, amount, usd_value in cursor.execute(
+        'SELECT category, time, currency, amount, usd_value FROM timed_balances',
+    ):
+        balances_before[timestamp].add((category, currency, amount, usd_value))
+    balances_num_before = cursor.execute('SELECT COUNT(*) FROM timed_balances').fetchone()[0]
+    balances_for_rollups = cursor.execute(
+        'SELECT time, currency, category, amount, usd_value FROM timed_balances',
+    ).fetchall()
+
+    db_v32.logout()
+    # Execute upgrade
+    db = _init_db_with_target_version(
+        target_version=33,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    cursor = db.conn.cursor()
+    result = cursor.execute(
+        'SELECT name, tbl_name FROM sqlite_master WHERE type="index" AND name LIKE "idx_%"',
+    )
+    assert set(result) == {
+        ('idx_history_events_timestamp', 'history_events'),
+        ('idx_history_events_asset', 'history_events'),
+        ('idx_trades_time', 'trades'),
+        ('idx_trades_location_time', 'trades'),
+        ('idx_asset_movements_time', 'asset_movements'),
+        ('idx_asset_movements_location_time', 'asset_movements'),
+        ('idx_ledger_actions_timestamp', 'ledger_actions'),
+        ('idx_ethereum_transactions_timestamp', 'ethereum_transactions'),
+        ('idx_eth2_daily_staking_details_timestamp', 'eth2_daily_staking_details'),
+        ('idx_timed_balances_currency_time', 'timed_balances'),
+        ('idx_history_events_daily_stats', 'history_events_daily_stats'),
+    }
+    assert cursor.execute('SELECT * FROM history_events').fetchall() == history_events_before
+    plan = cursor.execute(
+        'EXPLAIN QUERY PLAN SELECT * FROM history_events WHERE timestamp >= ? '
+        'ORDER BY timestamp ASC, sequence_index ASC',
+        (0,),
+    ).fetchall()
+    assert 'idx_history_events_timestamp' in plan[0][-1]
+    expected_stats = cursor.execute(
+        'SELECT asset, location, type, subtype, timestamp / 86400000, '
+        'SUM(CAST(amount AS REAL)), SUM(CAST(usd_value AS REAL)), COUNT(*) '
+        'FROM history_events GROUP BY asset, location, type, subtype, timestamp / 86400000',
+    ).fetchall()
+    stats = cursor.execute('SELECT * FROM history_events_daily_stats').fetchall()
+    assert set(stats) == set(expected_stats)
+    result = cursor.execute(
+        'SELECT name FROM sqlite_master WHERE type="trigger" AND tbl_name="history_events"',
+    )
+    assert result.fetchall() == []
+    _assert_rollups_match(
+        rollups=cursor.execute('SELECT * FROM timed_location_data_rollups'),
+        entries=cursor.execute('SELECT time, location, usd_value FROM timed_location_data').fetchall(),  # noqa: E501
+        values_num=1,
+    )
+    _assert_rollups_match(
+        rollups=cursor.execute('SELECT * FROM timed_balances_rollups'),
+        entries=balances_for_rollups,
+        values_num=2,
+    )
+
+    assert cursor.execute('SELECT COUNT(*) FROM timed_balances').fetchone()[0] <= balances_num_before  # noqa: E501
+    assert cursor.execute('SELECT COUNT(*) FROM timed_balances_snapshots').fetchone()[0] == len(balances_before)  # noqa: E501
+    for timestamp, balances in balances_before.items():
+        assert {
+            (x.category.serialize_for_db(), x.asset.identifier, x.amount, x.usd_value)
+            for x in db.get_balances_snapshot(timestamp)
+        } == balances
+
+
 def test_latest_upgrade_adds_remove_tables(user_data_dir):
     """
     This is a test that we can only do for the last upgrade.
@@ -2614,7 +2731,7 @@ def test_latest_upgrade_adds_remove_tables(user_data_dir):
     msg_aggregator = MessagesAggregator()
     _use_prepared_db(user_data_dir, 'v31_rotkehlchen.db')
     last_db = _init_db_with_target_version(
-        target_version=31,
+        target_version=32,
         user_data_dir=user_data_dir,
         msg_aggregator=msg_aggregator,
     )
@@ -2625,24 +2742,39 @@ def test_latest_upgrade_adds_remove_tables(user_data_dir):
     last_db.logout()
     # Execute upgrade
     db = _init_db_with_target_version(
-        target_version=32,
+        target_version=33,
         user_data_dir=user_data_dir,
         msg_aggregator=msg_aggregator,
     )
     cursor = db.conn.cursor()
     result = cursor.execute('SELECT name FROM sqlite_master WHERE type="table"')
     tables_after_upgrade = {x[0] for x in result}
+    result = cursor.execute('SELECT name FROM sqlite_master WHERE type="index"')
+    indexes_after_upgrade = {x[0] for x in result}
+    result = cursor.execute('SELECT name FROM sqlite_master WHERE type="trigger"')
+    triggers_after_upgrade = {x[0] for x in result}
     # also add latest tables (this will indicate if DB upgrade missed something
     db.conn.executescript(DB_SCRIPT_CREATE_TABLES)
     result = cursor.execute('SELECT name FROM sqlite_master WHERE type="table"')
     tables_after_creation = {x[0] for x in result}
+    result = cursor.execute('SELECT name FROM sqlite_master WHERE type="index"')
+    indexes_after_creation = {x[0] for x in result}
+    result = cursor.execute('SELECT name FROM sqlite_master WHERE type="trigger"')
+    triggers_after_creation = {x[0] for x in result}
 
-    removed_tables = {'gitcoin_grant_metadata', 'ledger_actions_gitcoin_data', 'gitcoin_tx_type'}
     missing_tables = tables_before - tables_after_upgrade
-    assert missing_tables == removed_tables
+    assert missing_tables == set()
     assert tables_after_creation - tables_after_upgrade == set()
     new_tables = tables_after_upgrade - tables_before
-    assert new_tables == {'ens_mappings', 'ethereum_internal_transactions', 'ethtx_address_mappings', 'evm_tx_mappings', 'history_events_mappings'}  # noqa: E501
+    assert new_tables == {
+        'history_events_daily_stats',
+        'timed_balances_prices',
+        'timed_balances_rollups',
+        'timed_balances_snapshots',
+        'timed_location_data_rollups',
+    }
+    assert indexes_after_creation - indexes_after_upgrade == set()
+    assert triggers_after_creation - triggers_after_upgrade == set()
 
 
 def test_db_newer_than_software_raises_error(data_dir, username):
@@ -0,0 +1,173 @@
+from typing import List, Optional
+
+from rotkehlchen.accounting.structures.balance import Balance
+from rotkehlchen.accounting.structures.base import (
+    HistoryBaseEntry,
+    HistoryEventSubType,
+    HistoryEventType,
+)
+from rotkehlchen.constants.assets import A_BTC, A_ETH
+from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.db.filtering import HistoryEventFilterQuery
+from rotkehlchen.db.history_events import DBHistoryEvents
+from rotkehlchen.fval import FVal
+from rotkehlchen.types import Location, Timestamp, TimestampMS
+
+START_TS = 1600000000
+
+
+def _assert_value_stats(
+        db: DBHistoryEvents,
+        events: List[HistoryBaseEntry],
+        from_ts: Optional[Timestamp],
+        to_ts: Optional[Timestamp],
+) -> None:
+    filter_query = HistoryEventFilterQuery.make(
+        from_ts=from_ts,
+        to_ts=to_ts,
+        location=Location.KRAKEN,
+        event_types=[HistoryEventType.STAKING],
+        event_subtypes=[HistoryEventSubType.REWARD],
+    )
+    usd_value, assets_amounts = db.get_value_stats(filter_query)
+
+    expected_usd_value = ZERO
+    expected = {}
+    for event in events:
+        if from_ts is not None and event.timestamp < from_ts * 1000:
+            continue
+        if to_ts is not None and event.timestamp > to_ts * 1000:
+            continue
+        expected_usd_value += event.balance.usd_value
+        amount, asset_usd_value = expected.get(event.asset, (ZERO, ZERO))
+        expected[event.asset] = (amount + event.balance.amount, asset_usd_value + event.balance.usd_value)  # noqa: E501
+
+    assert usd_value == expected_usd_value
+    assert assets_amounts == sorted(
+        ((asset, amount, asset_usd_value) for asset, (amount, asset_usd_value) in expected.items()),  # noqa: E501
+        key=lambda x: x[0].identifier,
+    )
+
+
+def test_value_stats_follow_history_events(database):
+    """Test that the value stats read from the daily stats stay correct as history
+    events are added, edited and deleted"""
+    db = DBHistoryEvents(database)
+    db.add_history_events([HistoryBaseEntry(
+        event_identifier=f'reward{idx // 2}',
+        sequence_index=idx % 2,
+        timestamp=TimestampMS((START_TS + idx * 43200) * 1000),  # every 12 hours
+        location=Location.KRAKEN,
+        event_type=HistoryEventType.STAKING,
+        event_subtype=HistoryEventSubType.REWARD,
+        asset=A_ETH if idx % 3 else A_BTC,
+        balance=Balance(amount=FVal(idx + 1), usd_value=FVal(10 * (idx + 1))),
+    ) for idx in range(20)])
+    ranges = [
+        (None, None),
+        (Timestamp(START_TS + 3600), None),
+        (None, Timestamp(START_TS + 6 * 86400 + 7)),
+        (Timestamp(START_TS + 86400 - 1), Timestamp(START_TS + 5 * 86400)),
+        (Timestamp(START_TS + 100), Timestamp(START_TS + 200)),
+    ]
+    filter_query = HistoryEventFilterQuery.make()
+    events = db.get_history_events(filter_query, has_premium=True)
+    for from_ts, to_ts in ranges:
+        _assert_value_stats(db, events, from_ts, to_ts)
+
+    # move an event to another day and change its value
+    events[3].timestamp = TimestampMS(events[3].timestamp + 5 * 86400 * 1000)
+    events[3].balance = Balance(amount=FVal(100), usd_value=FVal(1000))
+    assert db.edit_history_event(events[3]) == (True, '')
+    # and delete two others
+    assert db.delete_history_events_by_identifier([events[6].identifier, events[11].identifier]) is None  # noqa: E501
+    events = db.get_history_events(filter_query, has_premium=True)
+    assert len(events) == 18
+    for from_ts, to_ts in ranges:
+        _assert_value_stats(db, events, from_ts, to_ts)
+
+    # deleting the only event of a day also removes its daily stats
+    assert events[0].timestamp // 86400000 != events[1].timestamp // 86400000
+    assert db.delete_history_events_by_identifier([events[0].identifier]) is None  # noqa: E501
+    cursor = database.conn.cursor()
+    first_day = cursor.execute('SELECT MIN(day) FROM history_events_daily_stats').fetchone()[0]
+    assert first_day == events[1].timestamp // 86400000
+
+
+def test_daily_stats_do_not_drift(database):
+    """Test that adding and deleting events many times leaves the daily stats equal to
+    the sums of the remaining events, with no floating point drift"""
+    db = DBHistoryEvents(database)
+    cursor = database.conn.cursor()
+    kept_event = HistoryBaseEntry(
+        event_identifier='kept',
+        sequence_index=0,
+        timestamp=TimestampMS(START_TS * 1000),
+        location=Location.KRAKEN,
+        event_type=HistoryEventType.STAKING,
+        event_subtype=HistoryEventSubType.REWARD,
+        asset=A_ETH,
+        balance=Balance(amount=FVal('0.3'), usd_value=FVal('0.7')),
+    )
+    db.add_history_events([kept_event])
+    for idx in range(50):
+        db.add_history_events([HistoryBaseEntry(
+            event_identifier='kept',
+            sequence_index=idx + 1,
+            timestamp=TimestampMS((START_TS + idx) * 1000),
+            location=Location.KRAKEN,
+            event_type=HistoryEventType.STAKING,
+            event_subtype=HistoryEventSubType.REWARD,
+            asset=A_ETH,
+            balance=Balance(amount=FVal('0.1'), usd_value=FVal('0.2')),
+        )])
+        identifier = cursor.execute(
+            'SELECT identifier FROM history_events WHERE sequence_index=?',
+            (idx + 1,),
+        ).fetchone()[0]
+        assert db.delete_history_events_by_identifier([identifier]) is None
+
+    assert cursor.execute(
+        'SELECT amount, usd_value, events FROM history_events_daily_stats',
+    ).fetchall() == [(0.3, 0.7, 1)]
+
+
+def test_daily_stats_bulk_insert_is_linear(database):
+    """Test that adding many events of the same day sums the day's events once instead
+    of once per added event, by counting the sqlite VM steps of the insertions"""
+    db = DBHistoryEvents(database)
+    steps = 0
+
+    def count_steps() -> int:
+        nonlocal steps
+        steps += 1
+        return 0
+
+    def add_events_work(day: int, number: int) -> int:
+        nonlocal steps
+        steps = 0
+        db.add_history_events([HistoryBaseEntry(
+            event_identifier=f'day{day}',
+            sequence_index=idx,
+            timestamp=TimestampMS((START_TS + day * 86400 + idx) * 1000),
+            location=Location.KRAKEN,
+            event_type=HistoryEventType.STAKING,
+            event_subtype=HistoryEventSubType.REWARD,
+            asset=A_ETH,
+            balance=Balance(amount=FVal('0.1'), usd_value=FVal('0.2')),
+        ) for idx in range(number)])
+        return steps
+
+    database.conn.set_progress_handler(count_steps, 100)
+    try:
+        work_2000 = add_events_work(day=0, number=2000)
+        work_4000 = add_events_work(day=1, number=4000)
+    finally:
+        database.conn.set_progress_handler(None, 100)
+
+    assert work_4000 < 3 * work_2000  # summing per added event would make it 4 times
+    cursor = database.conn.cursor()
+    assert cursor.execute(
+        'SELECT day - ?, amount, usd_value, events FROM history_events_daily_stats ORDER BY day',  # noqa: E501
+        (START_TS // 86400,),
+    ).fetchall() == [(0, 200.0, 400.0, 2000), (1, 400.0, 800.0, 4000)]
@@ -0,0 +1,67 @@
+from typing import Any, List
+
+from rotkehlchen.accounting.structures.base import HistoryEventType
+from rotkehlchen.constants.assets import A_BTC, A_ETH
+from rotkehlchen.db.filtering import (
+    AssetMovementsFilterQuery,
+    DBFilterQuery,
+    Eth2DailyStatsFilterQuery,
+    ETHTransactionsFilterQuery,
+    HistoryEventFilterQuery,
+    LedgerActionsFilterQuery,
+    ReportDataFilterQuery,
+    TradesFilterQuery,
+)
+from rotkehlchen.types import Location, Timestamp, make_evm_tx_hash
+
+FROM_TS = Timestamp(1500000000)
+TO_TS = Timestamp(1600000000)
+
+
+def _get_query_plan(cursor: Any, table: str, filter_query: DBFilterQuery) -> List[str]:
+    query, bindings = filter_query.prepare()
+    result = cursor.execute(f'EXPLAIN QUERY PLAN SELECT * FROM {table} {query}', bindings)
+    # older sqlite versions write "SCAN TABLE x" instead of "SCAN x"
+    return [x[-1].replace('SCAN TABLE ', 'SCAN ').replace('SEARCH TABLE ', 'SEARCH ') for x in result]  # noqa: E501
+
+
+def test_filter_queries_use_indexes(database):
+    """Test that the hot filters of db/filtering.py don't do a full scan of their table
+
+    For the timestamp ranges also check that the rows come ordered from the index
+    """
+    cursor = database.conn.cursor()
+    # (table, filter query, whether ordering should be done by the index)
+    cases = [
+        ('history_events', HistoryEventFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS), True),
+        ('history_events', HistoryEventFilterQuery.make(from_ts=FROM_TS, limit=10, offset=20), True),  # noqa: E501
+        ('history_events', HistoryEventFilterQuery.make(asset=A_ETH), False),
+        ('history_events', HistoryEventFilterQuery.make(event_identifier='0xfoo'), False),
+        ('history_events', HistoryEventFilterQuery.make(
+            from_ts=FROM_TS,
+            to_ts=TO_TS,
+            location=Location.KRAKEN,
+            event_types=[HistoryEventType.STAKING],
+        ), True),
+        ('trades', TradesFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS), True),
+        ('trades', TradesFilterQuery.make(to_ts=TO_TS, location=Location.BINANCE), True),
+        ('trades', TradesFilterQuery.make(from_ts=FROM_TS, base_asset=A_BTC), True),
+        ('asset_movements', AssetMovementsFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS), True),
+        ('asset_movements', AssetMovementsFilterQuery.make(from_ts=FROM_TS, location=Location.KRAKEN), True),  # noqa: E501
+        ('ledger_actions', LedgerActionsFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS), True),
+        ('ethereum_transactions', ETHTransactionsFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS), True),  # noqa: E501
+        ('ethereum_transactions', ETHTransactionsFilterQuery.make(tx_hash=make_evm_tx_hash(b'1' * 32)), False),  # noqa: E501
+        ('eth2_daily_staking_details', Eth2DailyStatsFilterQuery.make(from_ts=FROM_TS, to_ts=TO_TS), True),  # noqa: E501
+        ('eth2_daily_staking_details', Eth2DailyStatsFilterQuery.make(from_ts=FROM_TS, validators=[1, 2]), False),  # noqa: E501
+    ]
+    for table, filter_query, ordered_by_index in cases:
+        plan = _get_query_plan(cursor, table, filter_query)
+        assert f'SCAN {table}' not in plan, f'{filter_query} does a full scan: {plan}'
+        if ordered_by_index:
+            assert 'USE TEMP B-TREE FOR ORDER BY' not in plan, f'{filter_query} sorts: {plan}'
+
+    cursor = database.conn_transient.cursor()
+    filter_query = ReportDataFilterQuery.make(report_id=1, from_ts=FROM_TS, to_ts=TO_TS)
+    plan = _get_query_plan(cursor, 'pnl_events', filter_query)
+    assert 'SCAN pnl_events' not in plan
+    assert 'USE TEMP B-TREE FOR ORDER BY' not in plan
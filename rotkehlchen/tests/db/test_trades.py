@@ -1,14 +1,18 @@
+from typing import List
 from unittest.mock import patch
 
+import pytest
+
 from rotkehlchen.chain.ethereum.trades import AMMSwap
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import A_BTC, A_DAI, A_ETH, A_EUR, A_GNO, A_UNI, A_USDC
 from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.db.filtering import TradesFilterQuery
 # from rotkehlchen.db.filtering import TradesFilterQuery
+from rotkehlchen.errors.serialization import DeserializationError
 from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.fval import FVal
-from rotkehlchen.types import Location, Price, TradeType
+from rotkehlchen.types import Fee, Location, Price, TradeType
 from rotkehlchen.user_messages import MessagesAggregator
 
 
@@ -382,3 +386,55 @@ def test_query_trades_including_ammswaps(data_dir, username):
     assert total_found == 2, 'total found for filter should be 2'
     assert len(returned_trades) == 1
     assert_trades_equal(returned_trades[0], trades[1])
+
+
+def test_query_trades_with_cursor(data_dir, username):
+    """Test that paginating trades with the returned cursors gives all trades in order,
+    including trades with the same timestamp and NULL fees"""
+    msg_aggregator = MessagesAggregator()
+    data = DataHandler(data_dir, msg_aggregator)
+    data.unlock(username, '123', create_new=True)
+
+    trades = [Trade(
+        timestamp=idx // 3,
+        location=Location.EXTERNAL,
+        base_asset=A_ETH,
+        quote_asset=A_USDC,
+        trade_type=TradeType.BUY,
+        amount=FVal(idx + 1),
+        rate=Price(FVal(1.5)),
+        fee=None if idx % 2 == 0 else Fee(FVal(idx % 4)),
+        fee_currency=None if idx % 2 == 0 else A_USDC,
+        link=str(idx),
+        notes=None,
+    ) for idx in range(20)]
+    data.db.add_trades(trades)
+
+    for order_by_rules in ([('time', True)], [('time', False)], [('fee', False)]):
+        all_trades = data.db.get_trades(
+            filter_query=TradesFilterQuery.make(order_by_rules=order_by_rules),
+            has_premium=True,
+        )
+        paginated_trades: List[Trade] = []
+        cursor = None
+        while True:
+            filter_query = TradesFilterQuery.make(
+                order_by_rules=order_by_rules,
+                limit=3,
+                offset=0 if cursor is None else None,
+                cursor=cursor,
+            )
+            page = data.db.get_trades(filter_query=filter_query, has_premium=True)
+            assert len(page) <= 3
+            paginated_trades.extend(page)
+            if filter_query.next_cursor is None:
+                break
+            cursor = filter_query.next_cursor
+
+        assert len(paginated_trades) == 20
+        assert {x.identifier for x in paginated_trades} == {x.identifier for x in trades}
+        if order_by_rules[0][0] == 'time':  # identical timestamps are ordered by id
+            assert [x.timestamp for x in paginated_trades] == [x.timestamp for x in all_trades]
+
+    with pytest.raises(DeserializationError):  # cursor of a different ordering
+        TradesFilterQuery.make(order_by_rules=[('time', True)], limit=3, cursor=cursor)
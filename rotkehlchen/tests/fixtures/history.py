@@ -90,5 +90,6 @@ def events_historian(
         chain_manager=blockchain,
         evm_tx_decoder=evm_transaction_decoder,
         eth_transactions=eth_transactions,
+        decoding_processes=1,
     )
     return historian
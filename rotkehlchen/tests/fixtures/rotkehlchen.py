@@ -83,17 +83,21 @@ def fixture_cli_args(data_dir, ethrpc_endpoint):
         'logfile',
         'logtarget',
         'loglevel',
+        'logformat',
         'logfromothermodules',
         'max_size_in_mb_all_logs',
         'max_logfiles_num',
+        'decoding_processes',
     ])
     args.loglevel = 'debug'
+    args.logformat = 'text'
     args.logfromothermodules = False
     args.sleep_secs = 60
     args.data_dir = data_dir
     args.ethrpc_endpoint = ethrpc_endpoint
     args.max_size_in_mb_all_logs = DEFAULT_MAX_LOG_SIZE_IN_MB
     args.max_logfiles_num = DEFAULT_MAX_LOG_BACKUP_FILES
+    args.decoding_processes = 1
     return args
 
 
@@ -1,3 +1,38 @@
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+import pytest
+
+from rotkehlchen.chain.ethereum.decoding import parallel
+from rotkehlchen.chain.ethereum.decoding.constants import ERC20_APPROVE, ERC20_OR_ERC721_TRANSFER
+from rotkehlchen.chain.ethereum.decoding.parallel import (
+    DecoderSnapshot,
+    _decode_in_worker,
+    _initialize_worker,
+    decode_in_processes,
+)
+from rotkehlchen.chain.ethereum.modules.uniswap.v1.decoder import ETH_PURCHASE, TOKEN_PURCHASE
+from rotkehlchen.chain.ethereum.structures import EthereumTxReceipt, EthereumTxReceiptLog
+from rotkehlchen.chain.ethereum.types import string_to_ethereum_address
+from rotkehlchen.constants.assets import A_DAI
+from rotkehlchen.db.ethtx import DBEthTx
+from rotkehlchen.types import EthereumTransaction, make_evm_tx_hash
+
+TRACKED_ADDRESS = string_to_ethereum_address('0xc931De6d845846E332a52D045072E3feF540Bd5d')
+
+
+@pytest.fixture(name='worker_decoder')
+def fixture_worker_decoder(database, globaldb):
+    """Initializes the decoder of the worker processes in this process"""
+    _initialize_worker(DecoderSnapshot(
+        globaldb_directory=globaldb._data_directory,
+        tracked_accounts=database.get_blockchain_accounts(),
+        settings=database.get_settings(),
+    ))
+    yield parallel._worker_decoder
+    parallel._worker_decoder = None
+
+
 def test_decoders_initialization(evm_transaction_decoder):
     """Make sure that all decoders we have created are detected and initialized"""
     assert set(evm_transaction_decoder.decoders.keys()) == {
@@ -49,3 +84,137 @@ def test_decoders_initialization(evm_transaction_decoder):
         'dxdaomesa',
         '1inch-v1',
     }
+
+
+def test_decoding_rules_by_topic(evm_transaction_decoder):
+    """Make sure that rules are dispatched by the first log topic and that only logs
+    for which rules exist get their token looked up"""
+    assert evm_transaction_decoder.event_rules == []
+    swap_rules = evm_transaction_decoder.topic_rules[TOKEN_PURCHASE]
+    assert [x.__name__ for x in swap_rules] == ['_maybe_decode_swap']
+    assert evm_transaction_decoder.topic_rules[ETH_PURCHASE] == swap_rules
+
+    transaction = EthereumTransaction(
+        tx_hash=make_evm_tx_hash(b'\x01' * 32),
+        timestamp=1646375440,
+        block_number=14351442,
+        from_address=string_to_ethereum_address('0xc931De6d845846E332a52D045072E3feF540Bd5d'),
+        to_address=A_DAI.ethereum_address,
+        value=0,
+        gas=171249,
+        gas_price=22990000000,
+        gas_used=171249,
+        input_data=b'',
+        nonce=19,
+    )
+    unknown_topic_log = EthereumTxReceiptLog(
+        log_index=1,
+        data=b'',
+        address=A_DAI.ethereum_address,
+        removed=False,
+        topics=[b'\x02' * 32],
+    )
+    assert evm_transaction_decoder.try_all_rules(
+        tx_log=unknown_topic_log,
+        transaction=transaction,
+        decoded_events=[],
+        action_items=[],
+    ) is None
+    assert evm_transaction_decoder.tokens_cache == {}
+
+    approve_log = EthereumTxReceiptLog(
+        log_index=2,
+        data=b'\x00' * 32,
+        address=A_DAI.ethereum_address,
+        removed=False,
+        topics=[ERC20_APPROVE, b'\x00' * 32, b'\x00' * 32],
+    )
+    assert evm_transaction_decoder.try_all_rules(
+        tx_log=approve_log,
+        transaction=transaction,
+        decoded_events=[],
+        action_items=[],
+    ) is None  # no tracked address involved
+    assert evm_transaction_decoder.tokens_cache == {A_DAI.ethereum_address: A_DAI}
+    evm_transaction_decoder.reload_from_db()
+    assert evm_transaction_decoder.tokens_cache == {}
+
+
+@pytest.mark.parametrize('ethereum_accounts', [[TRACKED_ADDRESS]])
+@pytest.mark.usefixtures('worker_decoder')
+def test_worker_decoding_matches_serial(database, evm_transaction_decoder):
+    """Make sure that decoding with the read-only snapshot the worker processes use gives
+    the same events as normal decoding and that anything needing the user DB or the
+    ethereum nodes is deferred to the parent"""
+    transaction = EthereumTransaction(
+        tx_hash=make_evm_tx_hash(b'\x03' * 32),
+        timestamp=1646375440,
+        block_number=14351442,
+        from_address=TRACKED_ADDRESS,
+        to_address=A_DAI.ethereum_address,
+        value=0,
+        gas=171249,
+        gas_price=22990000000,
+        gas_used=171249,
+        input_data=b'',
+        nonce=19,
+    )
+    spender_topic = b'\x00' * 12 + b'\x04' * 20
+    receipt = EthereumTxReceipt(
+        tx_hash=transaction.tx_hash,
+        contract_address=None,
+        status=True,
+        type=0,
+        logs=[EthereumTxReceiptLog(
+            log_index=5,
+            data=(10 ** 18).to_bytes(32, byteorder='big'),
+            address=A_DAI.ethereum_address,
+            removed=False,
+            topics=[ERC20_APPROVE, b'\x00' * 12 + bytes.fromhex(TRACKED_ADDRESS[2:]), spender_topic],  # noqa: E501
+        )],
+    )
+    serialized_events = _decode_in_worker((transaction, receipt, []))
+    DBEthTx(database).add_ethereum_transactions([transaction], relevant_address=None)
+    events = evm_transaction_decoder.decode_transaction(transaction, receipt)
+    assert len(events) == 2  # gas and approval
+    assert serialized_events == [x.serialize_for_db() for x in events]
+
+    unknown_token_receipt = EthereumTxReceipt(
+        tx_hash=transaction.tx_hash,
+        contract_address=None,
+        status=True,
+        type=0,
+        logs=[EthereumTxReceiptLog(
+            log_index=5,
+            data=(10 ** 18).to_bytes(32, byteorder='big'),
+            address=string_to_ethereum_address('0x0404040404040404040404040404040404040404'),
+            removed=False,
+            topics=[ERC20_OR_ERC721_TRANSFER, spender_topic, b'\x00' * 12 + bytes.fromhex(TRACKED_ADDRESS[2:])],  # noqa: E501
+        )],
+    )
+    assert _decode_in_worker((transaction, unknown_token_receipt, [])) is None
+
+
+class BrokenPoolExecutor():
+    """A process pool whose workers get killed after decoding the first transaction"""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def map(self, function, work, chunksize):  # pylint: disable=unused-argument
+        yield []
+        raise BrokenProcessPool('A process in the process pool was terminated abruptly')
+
+
+def test_parallel_decoding_broken_pool():
+    """Make sure that if the process pool breaks the transactions left are returned as not
+    decoded so that they are decoded serially"""
+    with patch.object(parallel, 'ProcessPoolExecutor', new=BrokenPoolExecutor):
+        results = decode_in_processes(snapshot=None, work=[None, None, None], processes=2)
+    assert results == [[], None, None]
@@ -242,6 +242,23 @@ def test_case_does_not_matter_for_asset_constructor():
     assert a3.identifier == a4.identifier == ethaddress_to_identifier('0xdAC17F958D2ee523a2206206994597C13D831ec7')  # noqa: E501
 
 
+def test_asset_resolver_preload(globaldb):
+    """Test that preloading resolves many assets at once and populates the memory cache"""
+    resolver = AssetResolver()
+    resolver.clean_memory_cache()
+    identifiers = ['BTC', 'eth', A_DAI.identifier, 'NOTEXISTINGASSET']
+    assert resolver.preload(identifiers) == {'NOTEXISTINGASSET'}
+    assert 'btc' in resolver.assets_cache
+    assert 'eth' in resolver.assets_cache
+    assert A_DAI.identifier.lower() in resolver.assets_cache
+    assert 'notexistingasset' not in resolver.assets_cache
+
+    misses = resolver.cache_stats()['misses']
+    assert resolver.get_asset_data('BTC') == globaldb.get_asset_data('BTC', False)
+    assert resolver.get_asset_data(A_DAI.identifier) == globaldb.get_asset_data(A_DAI.identifier, False)  # noqa: E501
+    assert resolver.cache_stats()['misses'] == misses
+
+
 def test_coingecko_identifiers_are_reachable():
     """
     Test that all assets have a coingecko entry and that all the identifiers exist in coingecko
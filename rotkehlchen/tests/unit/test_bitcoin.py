@@ -1,5 +1,10 @@
 import pytest
 
+from rotkehlchen.chain.bitcoin import (
+    BitcoinAddressesCache,
+    get_bitcoin_addresses_balances,
+    have_bitcoin_transactions,
+)
 from rotkehlchen.chain.bitcoin.hdkey import HDKey, XpubType
 from rotkehlchen.chain.bitcoin.utils import (
     is_valid_btc_address,
@@ -11,13 +16,17 @@ from rotkehlchen.chain.bitcoin.utils import (
     scriptpubkey_to_p2sh_address,
 )
 from rotkehlchen.chain.bitcoin.xpub import XpubData
+from rotkehlchen.constants.misc import ONE, ZERO
 from rotkehlchen.errors.misc import XPUBError
+from rotkehlchen.fval import FVal
+from rotkehlchen.tests.utils.blockchain import mock_bitcoin_balances_query
 from rotkehlchen.tests.utils.ens import ENS_BRUNO_BTC_ADDR, ENS_BRUNO_BTC_BYTES
 from rotkehlchen.tests.utils.factories import (
     UNIT_BTC_ADDRESS1,
     UNIT_BTC_ADDRESS2,
     UNIT_BTC_ADDRESS3,
 )
+from rotkehlchen.types import BTCAddress
 
 
 def test_is_valid_btc_address():
@@ -342,3 +351,48 @@ def test_scriptpubkey_to_p2sh_address():
 def test_scriptpubkey_to_bech32_address(scriptpubkey, expected_address):
     address = scriptpubkey_to_bech32_address(bytes.fromhex(scriptpubkey))
     assert address == expected_address
+
+
+def test_bitcoin_balances_query_providers():
+    """Test that non bech32 addresses are queried in one batch from blockchain.info,
+    bech32 ones one by one from blockstream and that the addresses cache is used"""
+    bech32_addresses = [
+        BTCAddress('bc1qhkje0xfvhmgk6mvanxwy09n45df03tj3h3jtnf'),
+        BTCAddress('bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4'),
+    ]
+    other_addresses = [BTCAddress(UNIT_BTC_ADDRESS1), BTCAddress(UNIT_BTC_ADDRESS2)]
+    btc_map = {
+        UNIT_BTC_ADDRESS1: '100000000',
+        bech32_addresses[0]: '250000000',
+    }
+
+    def unexpected_get(url, *args, **kwargs):  # pylint: disable=unused-argument
+        raise AssertionError(f'Unexpected request during the test: {url}')
+
+    cache = BitcoinAddressesCache()
+    with mock_bitcoin_balances_query(btc_map, unexpected_get) as requests_get:
+        balances = get_bitcoin_addresses_balances(
+            accounts=[bech32_addresses[0], *other_addresses, bech32_addresses[1]],
+            cache=cache,
+        )
+        urls = [x[1]['url'] for x in requests_get.call_args_list]
+        assert len(urls) == 3
+        assert f'https://blockchain.info/multiaddr?active={"|".join(other_addresses)}' in urls
+        for address in bech32_addresses:
+            assert f'https://blockstream.info/api/address/{address}' in urls
+        assert balances == {
+            bech32_addresses[0]: FVal('2.5'),
+            bech32_addresses[1]: ZERO,
+            UNIT_BTC_ADDRESS1: ONE,
+            UNIT_BTC_ADDRESS2: ZERO,
+        }
+
+        # the addresses were just queried so they come from the cache
+        have_transactions = have_bitcoin_transactions(other_addresses, cache=cache)
+        assert have_transactions == {UNIT_BTC_ADDRESS1: (True, ONE), UNIT_BTC_ADDRESS2: (True, ZERO)}  # noqa: E501
+        assert requests_get.call_count == 3
+        assert get_bitcoin_addresses_balances(other_addresses, cache=cache, ignore_cache=True) == {  # noqa: E501
+            UNIT_BTC_ADDRESS1: ONE,
+            UNIT_BTC_ADDRESS2: ZERO,
+        }
+        assert requests_get.call_count == 4
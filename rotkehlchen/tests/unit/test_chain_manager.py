@@ -1,7 +1,13 @@
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import gevent
 import pytest
 
 from rotkehlchen.chain.manager import _module_name_to_class
-from rotkehlchen.types import AVAILABLE_MODULES_MAP
+from rotkehlchen.errors.misc import RemoteError
+from rotkehlchen.types import AVAILABLE_MODULES_MAP, SupportedBlockchain
 
 
 @pytest.mark.parametrize('ethereum_modules', [[]])
@@ -20,3 +26,29 @@ def test_module_deactivation(blockchain):
         assert isinstance(blockchain.eth_modules[module_name], expected_module_type)
         blockchain.deactivate_module(module_name)
         assert module_name not in blockchain.eth_modules
+
+
+def test_query_balances_concurrently(blockchain):
+    """Test that the chains are queried at the same time and that a chain that fails
+    does not fail the query of the others unless it was the one queried"""
+    queries = (
+        'query_ethereum_balances',
+        'query_ethereum_beaconchain_balances',
+        'query_kusama_balances',
+        'query_polkadot_balances',
+        'query_avalanche_balances',
+    )
+    with ExitStack() as stack:
+        for query in queries:
+            stack.enter_context(patch.object(blockchain, query, side_effect=lambda **kwargs: gevent.sleep(0.3)))  # noqa: E501
+        stack.enter_context(patch.object(blockchain, 'query_btc_balances', side_effect=RemoteError('blockchain.info is down')))  # noqa: E501
+        start = time.monotonic()
+        result = blockchain.query_balances()
+        assert time.monotonic() - start < 0.3 * len(queries) / 2
+        assert result.errors == {SupportedBlockchain.BITCOIN: 'blockchain.info is down'}
+        assert set(blockchain.balances_query_durations) == set(SupportedBlockchain)
+
+        with pytest.raises(RemoteError):
+            blockchain.query_balances(blockchain=SupportedBlockchain.BITCOIN)
+        result = blockchain.query_balances(blockchain=SupportedBlockchain.KUSAMA)
+        assert result.errors == {}
@@ -156,3 +156,37 @@ def test_initialize_with_bool_fails():
     with pytest.raises(ValueError):
         FVal(True)
         FVal(False)
+
+
+def test_operations_return_fval():
+    """Test that the results of all operations are proper FVals even though they
+    skip the input checks of the constructor"""
+    a = FVal('5.21')
+    b = FVal('2.12')
+    results = (
+        a + b, a - b, a * b, a / b, a // b, a ** 2, a % b,
+        2 + a, 2 - a, 2 * a, 2 / a, 2 // a, 2 % a,
+        -a, abs(a), a.fma(b, 1),
+    )
+    for result in results:
+        assert type(result) is FVal  # pylint: disable=unidiomatic-typecheck
+        assert result == FVal(str(result))
+        assert result + 1 - 1 == result
+
+
+def test_hashing():
+    assert hash(FVal('3.0')) == hash(FVal(3)) == hash(3)
+    assert hash(FVal('0.1')) == hash(FVal(0.1))
+    assert len({FVal('1'), FVal('1.00'), FVal(1), FVal('1.01')}) == 2
+    mapping = {FVal('2.5'): 'foo'}
+    assert mapping[FVal('2.50')] == 'foo'
+
+
+def test_comparison_with_other_types_fails():
+    a = FVal('1.5')
+    with pytest.raises(NotImplementedError):
+        _ = a == 1.5
+    with pytest.raises(NotImplementedError):
+        _ = a < 2.5
+    with pytest.raises(NotImplementedError):
+        _ = a >= '1.5'
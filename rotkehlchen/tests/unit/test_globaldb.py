@@ -262,6 +262,35 @@ def test_get_asset_with_symbol(globaldb):
         assert globaldb.get_assets_with_symbol(*x) == expected_renbtc
 
 
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_symbol_index_matches_db_and_follows_edits(globaldb):
+    """Test that the in-memory symbol index agrees with the DB query and is
+    kept up to date when assets are added, edited and deleted"""
+    for symbol in ('KEY', 'BIDR', 'AAVE', 'rEnBTc', 'DASDSADSDSDSAD'):
+        assert globaldb.get_assets_with_symbol_cached(symbol) == globaldb.get_assets_with_symbol(symbol)  # noqa: E501
+    assert globaldb.get_assets_with_symbol_cached('renbtc', AssetType.ETHEREUM_TOKEN) == globaldb.get_assets_with_symbol('renbtc', AssetType.ETHEREUM_TOKEN)  # noqa: E501
+
+    globaldb.add_asset(
+        asset_id='1',
+        asset_type=AssetType.OWN_CHAIN,
+        data={'name': 'Lolcoin', 'symbol': 'LOLZ', 'started': 0},
+    )
+    assert [x.identifier for x in globaldb.get_assets_with_symbol_cached('lolz')] == ['1']
+
+    globaldb.edit_custom_asset({
+        'identifier': '1',
+        'asset_type': AssetType.OWN_CHAIN,
+        'name': 'Lolcoin',
+        'symbol': 'LOLZ2',
+        'started': 0,
+    })
+    assert globaldb.get_assets_with_symbol_cached('LOLZ') == []
+    assert [x.identifier for x in globaldb.get_assets_with_symbol_cached('lolz2')] == ['1']
+
+    globaldb.delete_custom_asset('1')
+    assert globaldb.get_assets_with_symbol_cached('LOLZ2') == []
+
+
 @pytest.mark.parametrize('enum_class, table_name', [
     (AssetType, 'asset_types'),
     (HistoricalPriceOracle, 'price_history_source_types'),
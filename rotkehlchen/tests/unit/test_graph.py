@@ -4,8 +4,11 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from rotkehlchen.chain.ethereum.graph import Graph, format_query_indentation
+from rotkehlchen.chain.ethereum.interfaces.ammswap.graph import MINTS_QUERY
 from rotkehlchen.constants.timing import QUERY_RETRY_TIMES
 from rotkehlchen.errors.misc import RemoteError
+from rotkehlchen.tests.utils.factories import make_ethereum_address
+from rotkehlchen.tests.utils.graph import SubgraphStub
 
 TEST_URL_1 = 'https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v2'
 TEST_QUERY_1 = (
@@ -86,3 +89,58 @@ def test_success_result():
 
     assert client.execute.call_count == 1
     assert result == expected_result
+
+
+def test_query_addresses_cursor_pagination():
+    """Test that the entities of many addresses are queried together, paginating
+    by the id of the last entity instead of skipping entities
+    """
+    addresses = [make_ethereum_address() for _ in range(3)]
+    not_queried = make_ethereum_address()
+    entities = [
+        {'id': f'{i:05}', 'to': addresses[i % 3].lower()} for i in range(2500)
+    ] + [{'id': f'{i:05}', 'to': not_queried.lower()} for i in range(2500, 2600)]
+    param_types = {'$start_ts': 'BigInt!', '$end_ts': 'BigInt!'}
+    param_values = {'start_ts': '0', 'end_ts': '1640000000'}
+
+    with SubgraphStub(entity='mints', address_field='to', entities=entities) as stub:
+        result = list(Graph(stub.url).query_addresses(
+            querystr=format_query_indentation(MINTS_QUERY.format()),
+            entity='mints',
+            address_field='to',
+            addresses=addresses,
+            param_types=param_types,
+            param_values=param_values,
+        ))
+
+    assert len(result) == 2500
+    for address, entry in result:
+        assert entry['to'] == address.lower()
+        assert address in addresses
+    assert [x['id'] for x in stub.requests] == ['0', '00999', '01999']
+    for request in stub.requests:
+        assert set(request['addresses']) == {x.lower() for x in addresses}
+        assert 'offset' not in request
+
+
+def test_query_addresses_chunks():
+    """Test that the addresses are split in chunks of a query each"""
+    addresses = [make_ethereum_address() for _ in range(5)]
+    entities = [{'id': f'{i:05}', 'to': x.lower()} for i, x in enumerate(addresses)]
+
+    with ExitStack() as stack:
+        stack.enter_context(patch('rotkehlchen.chain.ethereum.graph.GRAPH_QUERY_ADDRESSES_LIMIT', new=2))  # noqa: E501
+        stub = stack.enter_context(
+            SubgraphStub(entity='mints', address_field='to', entities=entities),
+        )
+        result = list(Graph(stub.url).query_addresses(
+            querystr=format_query_indentation(MINTS_QUERY.format()),
+            entity='mints',
+            address_field='to',
+            addresses=addresses,
+            param_types={'$start_ts': 'BigInt!', '$end_ts': 'BigInt!'},
+            param_values={'start_ts': '0', 'end_ts': '1640000000'},
+        ))
+
+    assert [address for address, _ in result] == addresses
+    assert [len(x['addresses']) for x in stub.requests] == [2, 2, 1]
@@ -2,11 +2,14 @@ import os
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 
+import gevent
 import pytest
 import requests
+from gevent.event import Event
 
 from rotkehlchen.assets.asset import Asset, EthereumToken, UnderlyingToken
 from rotkehlchen.assets.types import AssetType
+from rotkehlchen.chain.ethereum.utils import multicall_2
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import (
     A_1INCH,
@@ -213,6 +216,74 @@ def test_find_usd_price_cache(inquirer, freezer):  # pylint: disable=unused-argu
         assert price == Price(FVal('2'))
 
 
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+def test_stale_while_revalidate(inquirer, globaldb, freezer):  # pylint: disable=unused-argument
+    """Test that saved prices are loaded, that stale prices are returned while
+    stale-while-revalidate is on, unless fresh prices are needed, and that
+    refreshing them queries and saves them"""
+    prices = iter([Price(FVal(x)) for x in range(1, 6)])
+    cc_patch = patch.object(
+        inquirer._cryptocompare,
+        'query_current_price',
+        side_effect=lambda from_asset, to_asset: next(prices),
+    )
+    inquirer.set_oracles_order(oracles=[CurrentPriceOracle.CRYPTOCOMPARE])
+    with cc_patch as cc:
+        inquirer.set_stale_while_revalidate(True)
+        assert inquirer.find_usd_price(A_ETH) == Price(FVal('1'))
+        inquirer.save_current_prices()
+        assert globaldb.get_current_prices() == [('ETH', 'USD', Price(FVal('1')), ts_now())]
+
+        # as after a restart the saved price is used
+        inquirer._cached_current_price.clear()
+        inquirer.set_stale_while_revalidate(True)
+        assert inquirer.find_usd_price(A_ETH) == Price(FVal('1'))
+        assert cc.call_count == 1
+
+        freezer.move_to(datetime.fromtimestamp(ts_now() + CURRENT_PRICE_CACHE_SECS + 1))
+        assert inquirer.find_usd_price(A_ETH) == Price(FVal('1'))
+        assert cc.call_count == 1
+        assert inquirer.has_stale_prices() is True
+        assert inquirer.get_current_price_age(A_ETH, A_USD) == CURRENT_PRICE_CACHE_SECS + 1
+
+        inquirer.refresh_stale_prices(weights={A_ETH: FVal(100)})
+        assert cc.call_count == 2
+        assert inquirer.has_stale_prices() is False
+        assert inquirer.find_usd_price(A_ETH) == Price(FVal('2'))
+        assert globaldb.get_current_prices() == [('ETH', 'USD', Price(FVal('2')), ts_now())]
+
+        # without stale-while-revalidate an old price is queried again
+        inquirer.set_stale_while_revalidate(False)
+        freezer.move_to(datetime.fromtimestamp(ts_now() + CURRENT_PRICE_CACHE_SECS + 1))
+        assert inquirer.find_usd_price(A_ETH) == Price(FVal('3'))
+        assert cc.call_count == 3
+
+        # and so is it for the queries that need fresh prices, like saved snapshots
+        inquirer.set_stale_while_revalidate(True)
+        freezer.move_to(datetime.fromtimestamp(ts_now() + CURRENT_PRICE_CACHE_SECS + 1))
+        with inquirer.fresh_prices():
+            assert inquirer.find_usd_price(A_ETH) == Price(FVal('4'))
+        assert cc.call_count == 4
+        assert inquirer.has_stale_prices() is False
+
+        # only the greenlets of those queries get fresh prices, including the ones they spawn
+        def query_fresh_price():
+            with inquirer.fresh_prices():
+                entered.set()
+                proceed.wait()
+                return gevent.spawn(inquirer.find_usd_price, A_ETH).get()
+
+        freezer.move_to(datetime.fromtimestamp(ts_now() + CURRENT_PRICE_CACHE_SECS + 1))
+        entered, proceed = Event(), Event()
+        fresh_greenlet = gevent.spawn(query_fresh_price)
+        entered.wait()
+        assert inquirer.find_usd_price(A_ETH) == Price(FVal('4'))
+        assert cc.call_count == 4
+        proceed.set()
+        assert fresh_greenlet.get() == Price(FVal('5'))
+        assert cc.call_count == 5
+
+
 def test_set_oracles_order(inquirer):
     inquirer.set_oracles_order([CurrentPriceOracle.COINGECKO])
 
@@ -328,6 +399,33 @@ def test_find_uniswap_v2_lp_token_price(inquirer, globaldb, ethereum_manager):
     assert price is not None
 
 
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+def test_prefetch_derived_prices(inquirer_defi, globaldb, ethereum_manager):
+    """Test that the prices of LP tokens are found with a single multicall"""
+    uniswap_address = '0xa2107FA5B38d9bbd2C461D6EDf11B11A50F6b974'
+    curve_address = '0xb19059ebb43466C323583928285a49f558E572Fd'
+    inquirer_defi.inject_ethereum(ethereum_manager)
+    globaldb.add_asset(
+        asset_id=ethaddress_to_identifier(uniswap_address),
+        asset_type=AssetType.ETHEREUM_TOKEN,
+        data=EthereumToken.initialize(
+            address=uniswap_address,
+            decimals=18,
+            name='Uniswap LINK/ETH',
+            symbol='UNI-V2',
+            protocol='UNI-V2',
+        ),
+    )
+    tokens = [EthereumToken(uniswap_address), EthereumToken(curve_address)]
+    with patch('rotkehlchen.inquirer.multicall_2', wraps=multicall_2) as multicall_patch:
+        inquirer_defi.prefetch_derived_prices(tokens)
+        assert multicall_patch.call_count == 1
+        for token in tokens:
+            assert inquirer_defi.find_usd_price(token) != ZERO
+        assert multicall_patch.call_count == 1
+
+
 @pytest.mark.parametrize('use_clean_caching_directory', [True])
 @pytest.mark.parametrize('should_mock_current_price_queries', [False])
 def test_find_curve_lp_token_price(inquirer_defi, ethereum_manager):
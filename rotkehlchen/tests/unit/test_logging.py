@@ -0,0 +1,107 @@
+import io
+import json
+import logging
+
+from rotkehlchen.fval import FVal
+from rotkehlchen.logging import (
+    FormattingQueueHandler,
+    JSONLinesFormatter,
+    NativeThreadQueueListener,
+    RotkehlchenLogsAdapter,
+    _SimpleQueue,
+)
+
+
+class StrCounter():
+    """Counts how many times it was turned to a string"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __str__(self) -> str:
+        self.calls += 1
+        return 'counted'
+
+
+def _make_logger(name: str, formatter: logging.Formatter) -> io.StringIO:
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter)
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return stream
+
+
+def test_log_fields_are_formatted_lazily():
+    """Test that the fields given to the logs adapter are appended to the message
+    only when the record is emitted"""
+    stream = _make_logger('test_logging.text', logging.Formatter('%(message)s'))
+    log = RotkehlchenLogsAdapter(logging.getLogger('test_logging.text'))
+    counter = StrCounter()
+    log.debug('skipped', value=counter)
+    assert counter.calls == 0
+    log.info('Spend uses up %s', 'all', amount=FVal('1.5'), value=counter)
+    assert counter.calls == 1
+    assert stream.getvalue() == 'Main Greenlet: Spend uses up all amount=1.5, value=counted\n'
+
+
+def test_json_lines_format():
+    stream = _make_logger('test_logging.json', JSONLinesFormatter())
+    log = RotkehlchenLogsAdapter(logging.getLogger('test_logging.json'))
+    log.info('Queried balances', amount=FVal('1.5'), count=2)
+    logging.getLogger('test_logging.json').warning('from %s', 'other module')
+    first, second = (json.loads(x) for x in stream.getvalue().splitlines())
+    assert first['level'] == 'INFO'
+    assert first['logger'] == 'test_logging.json'
+    assert first['greenlet'] == 'Main Greenlet'
+    assert first['message'] == 'Queried balances'
+    assert first['fields'] == {'amount': '1.5', 'count': 2}
+    assert second['message'] == 'from other module'
+    assert 'fields' not in second
+
+
+def test_queue_listener_writes_all_records():
+    """Test that records put in the queue are written by the listener thread in order
+    and that stopping the listener waits for all of them"""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    log_queue = _SimpleQueue()
+    listener = NativeThreadQueueListener(log_queue, handler, respect_handler_level=True)
+    logger = logging.getLogger('test_logging.queue')
+    logger.handlers = [FormattingQueueHandler(log_queue)]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    log = RotkehlchenLogsAdapter(logger)
+    listener.start()
+    for idx in range(100):
+        log.info('entry', idx=idx)
+    listener.stop()
+    assert stream.getvalue().splitlines() == [
+        f'Main Greenlet: entry idx={idx}' for idx in range(100)
+    ]
+
+
+def test_queued_records_are_formatted_when_logged():
+    """Test that the message, args and fields of a queued record are turned to text
+    when it is logged, so later changes to them don't reach the listener thread"""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JSONLinesFormatter())
+    log_queue = _SimpleQueue()
+    listener = NativeThreadQueueListener(log_queue, handler, respect_handler_level=True)
+    logger = logging.getLogger('test_logging.prepare')
+    logger.handlers = [FormattingQueueHandler(log_queue)]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    log = RotkehlchenLogsAdapter(logger)
+    assets = ['ETH']
+    log.info('Queried %s', assets, assets=assets, amount=FVal('1.5'), count=2)
+    assets.append('BTC')
+    listener.start()
+    listener.stop()
+    entry = json.loads(stream.getvalue())
+    assert entry['message'] == "Queried ['ETH']"
+    assert entry['fields'] == {'assets': "['ETH']", 'amount': '1.5', 'count': 2}
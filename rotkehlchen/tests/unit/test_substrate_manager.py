@@ -2,8 +2,10 @@ from typing import Any, Dict, NamedTuple
 from unittest.mock import MagicMock
 
 import pytest
+from substrateinterface import SubstrateInterface
+from substrateinterface.utils.ss58 import ss58_encode
 
-from rotkehlchen.chain.substrate.manager import SubstrateManager
+from rotkehlchen.chain.substrate.manager import SubstrateChainProperties, SubstrateManager
 from rotkehlchen.chain.substrate.types import (
     BlockNumber,
     KusamaNodeName,
@@ -15,10 +17,13 @@ from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.substrate import (
+    KUSAMA_SS58_FORMAT,
     SUBSTRATE_ACC1_KSM_ADDR,
     SUBSTRATE_ACC2_KSM_ADDR,
+    SubstrateNodeStub,
     attempt_connect_test_nodes,
 )
+from rotkehlchen.user_messages import MessagesAggregator
 
 
 class AccountInfo(NamedTuple):
@@ -151,3 +156,66 @@ def test_set_available_nodes_call_order(kusama_manager):
 ])
 def test_format_own_rpc_endpoint(endpoint, formatted_endpoint):
     assert formatted_endpoint == SubstrateManager._format_own_rpc_endpoint(endpoint)
+
+
+def test_get_accounts_balance_in_batches():
+    """Test that the accounts balances are requested in batches spread across the
+    available nodes one at a time per node, that a failing node's batches go to the
+    next node and that the own node gets all batches"""
+    kusama_manager = SubstrateManager(
+        chain=SubstrateChain.KUSAMA,
+        greenlet_manager=MagicMock(),
+        msg_aggregator=MessagesAggregator(),
+        connect_at_start=(),
+        connect_on_startup=False,
+        own_rpc_endpoint='',
+    )
+    kusama_manager.chain_properties = SubstrateChainProperties(
+        ss58_format=KUSAMA_SS58_FORMAT,
+        token=A_KSM,
+        token_decimals=FVal(12),
+    )
+    public_keys = [f'0x{idx:064x}' for idx in range(250)]
+    accounts = [ss58_encode(x, ss58_format=KUSAMA_SS58_FORMAT) for x in public_keys]
+    # the last account does not exist in the chain
+    balances = {public_key: idx * 10**12 for idx, public_key in enumerate(public_keys[:-1])}
+    expected_balances = {account: FVal(idx) + FVal('1e-12') for idx, account in enumerate(accounts[:-1])}  # noqa: E501
+    expected_balances[accounts[-1]] = ZERO
+
+    def node_interface(url: str) -> SubstrateInterface:
+        return SubstrateInterface(
+            url=url,
+            type_registry_preset=SubstrateChain.KUSAMA.substrate_interface_attributes().type_registry_preset,  # noqa: E501
+        )
+
+    nodes = [SubstrateNodeStub(balances) for _ in range(2)]
+    own_node = SubstrateNodeStub(balances)
+    with nodes[0], nodes[1], own_node:
+        kusama_manager.available_nodes_call_order = [
+            (KusamaNodeName.PARITY, NodeNameAttributes(node_interface=node_interface(nodes[0].url), weight_block=1000)),  # noqa: E501
+            (KusamaNodeName.ONFINALITY, NodeNameAttributes(node_interface=node_interface(nodes[1].url), weight_block=900)),  # noqa: E501
+        ]
+        assert kusama_manager.get_accounts_balance(accounts) == expected_balances
+        assert sorted(nodes[0].requests) == sorted([public_keys[:100], public_keys[200:]])
+        assert nodes[1].requests == [public_keys[100:200]]
+        assert nodes[0].max_concurrent_requests == 1
+
+        nodes[0].requests, nodes[1].requests = [], []
+        nodes[0].down = True
+        assert kusama_manager.get_accounts_balance(accounts) == expected_balances
+        assert len(nodes[0].requests) == 2
+        assert sorted(nodes[1].requests) == sorted([public_keys[:100], public_keys[100:200], public_keys[200:]])  # noqa: E501
+        assert nodes[1].max_concurrent_requests == 1
+
+        kusama_manager.available_nodes_call_order.insert(
+            0,
+            (KusamaNodeName.OWN, NodeNameAttributes(node_interface=node_interface(own_node.url), weight_block=0)),  # noqa: E501
+        )
+        assert kusama_manager.get_accounts_balance(accounts) == expected_balances
+        assert len(own_node.requests) == 3
+        assert own_node.max_concurrent_requests == 1
+
+        own_node.down = nodes[1].down = True
+        with pytest.raises(RemoteError) as e:
+            kusama_manager.get_accounts_balance(accounts)
+        assert 'Kusama request failed after trying the following nodes' in str(e.value)
@@ -3,11 +3,13 @@ from unittest.mock import MagicMock, patch
 
 import gevent
 import pytest
+from gevent.event import Event
 
 from rotkehlchen.chain.bitcoin.hdkey import HDKey
 from rotkehlchen.chain.bitcoin.xpub import XpubData
 from rotkehlchen.db.ethtx import DBEthTx
 from rotkehlchen.errors.misc import RemoteError
+from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.premium.premium import Premium, PremiumCredentials, SubscriptionStatus
 from rotkehlchen.tasks.manager import PREMIUM_STATUS_CHECK, TaskManager
 from rotkehlchen.tests.utils.ethereum import setup_ethereum_transactions_test
@@ -289,3 +291,27 @@ def test_update_snapshot_balances(task_manager):
                 )
     except gevent.Timeout as e:
         raise AssertionError(f'Update snapshot balances was not completed within {timeout} seconds') from e  # noqa: E501
+
+
+def test_maybe_refresh_current_prices(task_manager, inquirer):  # pylint: disable=unused-argument
+    """Test that the stale current prices refresh is not scheduled again while it runs"""
+    task_manager.potential_tasks = [task_manager._maybe_refresh_current_prices]
+    refreshed = Event()
+    has_stale_prices_patch = patch.object(Inquirer, 'has_stale_prices', return_value=True)
+    refresh_patch = patch.object(
+        Inquirer,
+        'refresh_stale_prices',
+        side_effect=lambda weights: refreshed.wait(),
+    )
+    with has_stale_prices_patch, refresh_patch as refresh_mock:
+        task_manager.schedule()
+        gevent.sleep(.1)
+        task_manager.schedule()
+        gevent.sleep(.1)
+        assert refresh_mock.call_count == 1, '2nd schedule should do nothing while refreshing'
+
+        refreshed.set()
+        gevent.sleep(.1)
+        task_manager.schedule()
+        gevent.sleep(.1)
+        assert refresh_mock.call_count == 2
@@ -3,17 +3,23 @@ import time
 from json.decoder import JSONDecodeError
 from unittest.mock import patch
 
+import gevent
 import pytest
 from eth_typing import HexAddress, HexStr
 from eth_utils import to_checksum_address
+from gevent.event import Event
 from hexbytes import HexBytes
 
+from rotkehlchen.chain.ethereum.modules.executor import ModuleQueryExecutor, ModuleQueryJob
 from rotkehlchen.chain.ethereum.utils import generate_address_via_create2
+from rotkehlchen.errors.misc import RemoteError
 from rotkehlchen.errors.serialization import ConversionError
 from rotkehlchen.fval import FVal
 from rotkehlchen.serialization.deserialize import deserialize_timestamp_from_date
 from rotkehlchen.serialization.serialize import process_result
 from rotkehlchen.tests.utils.mock import MockResponse
+from rotkehlchen.utils.concurrency import ConcurrencyLimit
+from rotkehlchen.utils.lru import LRUCache
 from rotkehlchen.utils.misc import (
     combine_dicts,
     combine_stat_dicts,
@@ -21,8 +27,13 @@ from rotkehlchen.utils.misc import (
     iso8601ts_to_timestamp,
     timestamp_to_date,
 )
-from rotkehlchen.utils.mixins.cacheable import CacheableMixIn, cache_response_timewise
+from rotkehlchen.utils.mixins.cacheable import (
+    CacheableMixIn,
+    cache_response_timewise,
+    results_caches_stats,
+)
 from rotkehlchen.utils.serialization import jsonloads_dict, jsonloads_list
+from rotkehlchen.utils.singleflight import SingleFlight, get_single_flight
 from rotkehlchen.utils.version_check import get_current_version
 
 
@@ -180,6 +191,8 @@ class Foo(CacheableMixIn):
         self.do_sum_call_count = 0
         self.do_something_call_count = 0
         self.do_something_arguments_dont_matter_count = 0
+        self.do_slow_sum_call_count = 0
+        self.do_bounded_sum_call_count = 0
 
     @cache_response_timewise()
     def do_sum(self, arg1, arg2, **kwargs):  # pylint: disable=no-self-use, unused-argument
@@ -196,6 +209,17 @@ class Foo(CacheableMixIn):
         self.do_something_arguments_dont_matter_count += 1
         return arg1 + arg2
 
+    @cache_response_timewise()
+    def do_slow_sum(self, arg1, arg2, **kwargs):  # pylint: disable=unused-argument
+        self.do_slow_sum_call_count += 1
+        gevent.sleep(0.01)
+        return arg1 + arg2
+
+    @cache_response_timewise(maxsize=2)
+    def do_bounded_sum(self, arg1, arg2, **kwargs):  # pylint: disable=no-self-use, unused-argument  # noqa: E501
+        self.do_bounded_sum_call_count += 1
+        return arg1 + arg2
+
 
 def test_cache_response_timewise():
     """Test that cached value is called and not the function again"""
@@ -245,6 +269,155 @@ def test_cache_response_timewise_with_arguments_matter_false():
     assert instance.do_something_arguments_dont_matter_count == 2
 
 
+def test_cache_response_timewise_concurrent_calls():
+    """Test that concurrent calls missing the cache for the same arguments share one call"""
+    instance = Foo()
+    collapsed = get_single_flight('cached_queries').collapsed
+    greenlets = [gevent.spawn(instance.do_slow_sum, 1, 1) for _ in range(5)]
+    greenlets.append(gevent.spawn(instance.do_slow_sum, 2, 2))
+    gevent.joinall(greenlets, raise_error=True)
+    assert [x.value for x in greenlets] == [2, 2, 2, 2, 2, 4]
+    assert instance.do_slow_sum_call_count == 2
+    assert get_single_flight('cached_queries').collapsed == collapsed + 4
+
+
+def test_cache_response_timewise_bounded():
+    """Test that each method keeps at most maxsize results, evicting the least
+    recently used ones, and that expired results are removed"""
+    instance = Foo()
+    assert instance.do_bounded_sum(1, 1) == 2
+    assert instance.do_bounded_sum(2, 2) == 4
+    assert instance.do_bounded_sum(1, 1) == 2
+    assert instance.do_bounded_sum(3, 3) == 6  # evicts (2, 2)
+    assert instance.do_bounded_sum(1, 1) == 2
+    assert instance.do_bounded_sum_call_count == 3
+    assert instance.do_bounded_sum(2, 2) == 4
+    assert instance.do_bounded_sum_call_count == 4
+    name = 'Foo.do_bounded_sum'
+    assert results_caches_stats()[name]['size'] == 2
+    assert results_caches_stats()[name]['hits'] == 2
+    assert results_caches_stats()[name]['evictions'] == 2
+
+    instance.cache_ttl_secs = 0
+    assert instance.do_bounded_sum(2, 2) == 4
+    assert instance.do_bounded_sum_call_count == 5
+    stats = results_caches_stats()[name]
+    assert stats['hits'] == 2
+    assert stats['misses'] == 5
+    assert stats['evictions'] == 3
+
+    instance.flush_cache('do_bounded_sum', 2, 2)
+    assert results_caches_stats()[name]['size'] == 1
+
+
+def test_single_flight():
+    """Test that waiters get the exception of the call and that they make the call
+    themselves if the greenlet making it is killed"""
+    single_flight = SingleFlight('test')
+    calls = []
+
+    def query(value):
+        calls.append(value)
+        gevent.sleep(0.01)
+        if value < 0:
+            raise RemoteError('negative value')
+        return value
+
+    greenlets = [gevent.spawn(single_flight.run, 'key', query, -1) for _ in range(3)]
+    gevent.joinall(greenlets)
+    assert all(isinstance(x.exception, RemoteError) for x in greenlets)
+    assert calls == [-1]
+
+    leader = gevent.spawn(single_flight.run, 'key', query, 1)
+    waiters = [gevent.spawn(single_flight.run, 'key', query, 1) for _ in range(2)]
+    gevent.sleep(0.001)
+    leader.kill()
+    gevent.joinall(waiters, raise_error=True)
+    assert [x.value for x in waiters] == [1, 1]
+    assert calls == [-1, 1, 1]
+    assert single_flight.calls == 3
+    assert single_flight.collapsed == 5
+    assert single_flight.in_flight == {}
+
+
+def test_single_flight_no_deadlock():
+    """Test that greenlets making nested calls of two keys in opposite orders don't
+    wait for each other and that a waiter makes the call after the wait timeout"""
+    single_flight = SingleFlight('test')
+    calls = []
+
+    def query(key, nested_key):
+        calls.append(key)
+        gevent.sleep(0.01)
+        if nested_key is None:
+            return key
+        return key + single_flight.run(nested_key, query, nested_key, None)
+
+    greenlets = [
+        gevent.spawn(single_flight.run, 'x', query, 'x', 'y'),
+        gevent.spawn(single_flight.run, 'y', query, 'y', 'x'),
+    ]
+    gevent.joinall(greenlets, timeout=5, raise_error=True)
+    assert [x.value for x in greenlets] == ['xyx', 'yx']
+    assert calls == ['x', 'y', 'x']
+
+    stuck = Event()
+    leader = gevent.spawn(single_flight.run, 'key', stuck.wait)
+    gevent.sleep(0.001)
+    with patch('rotkehlchen.utils.singleflight.SINGLE_FLIGHT_WAIT_TIMEOUT', 0.01):
+        assert single_flight.run('key', query, 'key', None) == 'key'
+    stuck.set()
+    leader.join()
+    assert single_flight.in_flight == {}
+
+
+def test_concurrency_limit():
+    """Test that the limit bounds the greenlets within it and can be reentered"""
+    limit = ConcurrencyLimit('test', 2)
+    inside = []
+    max_inside = 0
+
+    def query():
+        nonlocal max_inside
+        with limit:
+            with limit:  # nested queries of the same service don't wait
+                inside.append(1)
+                max_inside = max(max_inside, len(inside))
+                gevent.sleep(0.01)
+                inside.pop()
+
+    gevent.joinall([gevent.spawn(query) for _ in range(5)], raise_error=True)
+    assert max_inside == 2
+    assert limit.holders == {}
+
+
+def test_module_query_executor():
+    """Test that the jobs run concurrently, keep their order and are timed only
+    while measuring"""
+    executor = ModuleQueryExecutor(concurrency=4)
+    assert executor.map('aave', 'history', lambda x: x, [1, 2]) == [1, 2]
+    assert executor.stats == {}
+    executor.set_measuring(True)
+
+    def query(value):
+        gevent.sleep(0.01 * (5 - value))
+        if value == 10:
+            raise RemoteError('failed')
+        return value * 2
+
+    start = time.monotonic()
+    assert executor.map('aave', 'history', query, [1, 2, 3, 4]) == [2, 4, 6, 8]
+    assert time.monotonic() - start < 0.1
+    assert executor.stats[('aave', 'history')].count == 4
+    assert executor.run([
+        ModuleQueryJob('aave', 'balances', lambda: 1),
+        ModuleQueryJob('compound', 'balances', lambda: 2),
+    ]) == [1, 2]
+    assert executor.stats[('compound', 'balances')].count == 1
+    with pytest.raises(RemoteError):
+        executor.map('aave', 'history', query, [1, 10])
+
+
 def test_convert_to_int():
     assert convert_to_int('5') == 5
     assert convert_to_int('37451082560000003241000000000003221111111111') == 37451082560000003241000000000003221111111111  # noqa: E501
@@ -371,3 +544,21 @@ def test_retrieve_old_token_info(ethereum_manager):
     info = ethereum_manager.get_basic_contract_info('0x2C4Bd064b998838076fa341A83d007FC2FA50957')
     assert info['symbol'] == 'UNI-V1'
     assert info['name'] == 'Uniswap V1'
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # a is now the most recently used
+    cache.put('c', 3)  # evicts b
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.pop('a') == 1
+    assert len(cache) == 1
+    assert cache.stats() == {'size': 1, 'maxsize': 2, 'hits': 2, 'misses': 1, 'evictions': 1}
+    # a stale entry is expired by the get that finds it, which counts once as a miss
+    assert cache.get('c', is_valid=lambda x: x > 3) is None
+    assert 'c' not in cache
+    assert cache.stats() == {'size': 0, 'maxsize': 2, 'hits': 2, 'misses': 2, 'evictions': 2}
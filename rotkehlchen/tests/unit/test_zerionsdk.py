@@ -1,8 +1,13 @@
 import warnings as test_warnings
+from unittest.mock import patch
 
 import pytest
 
-from rotkehlchen.chain.ethereum.defi.zerionsdk import KNOWN_ZERION_PROTOCOL_NAMES, ZerionSDK
+from rotkehlchen.chain.ethereum.defi.zerionsdk import (
+    KNOWN_ZERION_PROTOCOL_NAMES,
+    PROTOCOLS_QUERY_NUM,
+    ZerionSDK,
+)
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.ethereum import (
     ETHEREUM_TEST_PARAMETERS,
@@ -76,3 +81,43 @@ def test_protocol_names_are_known(
             test_warnings.warn(
                 UserWarning(f'Unknown protocol "{name}" seen in Zerion protocol names'),
             )
+
+
+def test_empty_protocols_are_skipped(ethereum_manager, function_scope_messages_aggregator):
+    """Test that the protocols an account has no balances in are only queried
+    again once its ETH balance changes and that contracts are always fully queried"""
+    zerion = ZerionSDK(ethereum_manager, function_scope_messages_aggregator)
+    protocol_names = [f'protocol{x}' for x in range(PROTOCOLS_QUERY_NUM * 2 + 1)]
+    account1 = '0x9531C059098e3d194fF87FebB587aB07B30B1306'
+    account2 = '0x2B888954421b424C5D3D9Ce9bB67c9bD47537d12'
+    safe = '0x4F2083f5fBede34C2714aFfb3105539775f7FE64'
+    eth_balances = {account1: FVal(1), account2: FVal(2), safe: FVal(3)}
+    queried = []
+
+    def mock_protocol_balances(account, names):
+        queried.append((account, names))
+        if account == account1 and 'protocol5' in names:
+            return [(('protocol5', '', '', '', 1), [])]
+        return []
+
+    with patch.object(zerion, '_get_protocol_names', return_value=protocol_names), \
+            patch.object(zerion, '_get_eth_balances', side_effect=lambda x: eth_balances), \
+            patch.object(zerion, '_query_protocol_balances', side_effect=mock_protocol_balances), \
+            patch.object(zerion.ethereum, 'get_code', side_effect=lambda x: '0x6080' if x == safe else '0x') as get_code:  # noqa: E501
+        assert zerion.all_balances_for_accounts([account1, account2, safe]) == {}
+        assert len(queried) == 9
+        assert {x for _, names in queried for x in names} == set(protocol_names)
+        assert get_code.call_count == 3
+
+        queried.clear()
+        zerion.all_balances_for_accounts([account1, account2, safe])
+        assert queried[0] == (account1, ['protocol5'])
+        assert {x for _, names in queried[1:] for x in names} == set(protocol_names)
+        assert {account for account, _ in queried[1:]} == {safe}
+        assert get_code.call_count == 4
+
+        queried.clear()
+        eth_balances[account2] = FVal('1.5')
+        zerion.all_balances_for_accounts([account1, account2])
+        assert len(queried) == 4
+        assert {name for account, names in queried if account == account2 for name in names} == set(protocol_names)  # noqa: E501
@@ -474,7 +474,7 @@ def mock_bitcoin_balances_query(
             response = '{"addresses":['
             for idx, address in enumerate(addresses):
                 balance = btc_map.get(address, '0')
-                response += f'{{"address":"{address}", "final_balance":{balance}}}'
+                response += f'{{"address":"{address}", "final_balance":{balance}, "n_tx":1}}'
                 if idx < len(addresses) - 1:
                     response += ','
             response += ']}'
@@ -0,0 +1,61 @@
+import json
+from types import TracebackType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+from gevent.pywsgi import WSGIServer
+
+
+class SubgraphStub():
+    """A local GraphQL server standing in for a subgraph
+
+    It answers the queries of a single entity the way The Graph does for
+    `first: $limit`, `orderBy: id`, `id_gt: $id` and an `_in` filter of the
+    `$addresses` on the given field. The text of the query is not parsed. The
+    variables of all the requests are kept so that tests can check how the
+    subgraph was queried.
+    """
+
+    def __init__(
+            self,
+            entity: str,
+            address_field: str,
+            entities: List[Dict[str, Any]],
+    ) -> None:
+        self.entity = entity
+        self.address_field = address_field
+        self.entities = sorted(entities, key=lambda x: x['id'])
+        self.requests: List[Dict[str, Any]] = []
+        self.server = WSGIServer(('127.0.0.1', 0), self._application, log=None)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def _application(
+            self,
+            environ: Dict[str, Any],
+            start_response: Callable,
+    ) -> Iterable[bytes]:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        variables = json.loads(environ['wsgi.input'].read(length))['variables']
+        self.requests.append(variables)
+        addresses = set(variables['addresses'])
+        page = [
+            x for x in self.entities
+            if x['id'] > variables['id'] and x[self.address_field] in addresses
+        ][:variables['limit']]
+        body = json.dumps({'data': {self.entity: page}}).encode()
+        start_response('200 OK', [('Content-Type', 'application/json')])
+        return [body]
+
+    def __enter__(self) -> 'SubgraphStub':
+        self.server.start()
+        return self
+
+    def __exit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        self.server.stop()
@@ -1,8 +1,11 @@
+import json
 import logging
-from typing import Optional, Sequence, Set, Tuple
+from types import TracebackType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Type
 
 import gevent
 import requests
+from gevent.pywsgi import WSGIServer
 from substrateinterface import SubstrateInterface
 from substrateinterface.exceptions import SubstrateRequestException
 
@@ -130,3 +133,80 @@ def wait_until_all_substrate_nodes_connected(
             f'nodes: {",".join([str(node) for node in not_connected_nodes])} '
             f'due to timeout of {NODE_CONNECTION_TIMEOUT}',
         )
+
+
+class SubstrateNodeStub():
+    """A local JSON-RPC server standing in for a substrate node
+
+    It answers the `state_queryStorageAt` requests of `System.Account` storage
+    keys with an AccountInfo whose free amount is the given balance of the
+    account's public key and whose reserved amount is 1. Like a node, the
+    values are not returned in the order of the keys and the unknown accounts
+    get no value. The public keys of each request are kept, and the most
+    requests it ever answered at the same time, so that tests can check how
+    the node was queried. When `down` the requests get a JSON-RPC error.
+    """
+
+    def __init__(self, balances: Dict[str, int]) -> None:
+        self.balances = balances
+        self.down = False
+        self.requests: List[List[str]] = []
+        self.concurrent_requests = 0
+        self.max_concurrent_requests = 0
+        self.server = WSGIServer(('127.0.0.1', 0), self._application, log=None)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def _account_info(self, public_key: str) -> str:
+        nonce_and_ref_counts = bytes(16)
+        account_data = b''.join(
+            x.to_bytes(16, byteorder='little')
+            for x in (self.balances[public_key], 1, 0, 0)
+        )
+        return f'0x{(nonce_and_ref_counts + account_data).hex()}'
+
+    def _application(
+            self,
+            environ: Dict[str, Any],
+            start_response: Callable,
+    ) -> Iterable[bytes]:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        request = json.loads(environ['wsgi.input'].read(length))
+        assert request['method'] == 'state_queryStorageAt', request
+        storage_keys = request['params'][0]
+        # the public key is the end of the Blake2_128Concat hashed key
+        public_keys = [f'0x{x[-64:]}' for x in storage_keys]
+        self.requests.append(public_keys)
+        self.concurrent_requests += 1
+        self.max_concurrent_requests = max(self.max_concurrent_requests, self.concurrent_requests)  # noqa: E501
+        gevent.sleep(0.01)  # let the other requests reach the node meanwhile
+        self.concurrent_requests -= 1
+
+        response: Dict[str, Any] = {'jsonrpc': '2.0', 'id': request['id']}
+        if self.down:
+            response['error'] = {'code': -32000, 'message': 'the node is down'}
+        else:
+            response['result'] = [{
+                'block': '0x' + '00' * 32,
+                'changes': [
+                    [key, self._account_info(public_key) if public_key in self.balances else None]  # noqa: E501
+                    for key, public_key in reversed(list(zip(storage_keys, public_keys)))
+                ],
+            }]
+        body = json.dumps(response).encode()
+        start_response('200 OK', [('Content-Type', 'application/json')])
+        return [body]
+
+    def __enter__(self) -> 'SubstrateNodeStub':
+        self.server.start()
+        return self
+
+    def __exit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        self.server.stop()
@@ -0,0 +1,46 @@
+from types import TracebackType
+from typing import Any, Dict, Optional, Type
+
+from gevent import getcurrent
+from gevent.lock import BoundedSemaphore
+
+
+class ConcurrencyLimit():
+    """Bounds how many greenlets query a remote service at the same time
+
+    A greenlet that is already within the limit can enter it again, so that a
+    query calling another query of the same service does not wait for itself.
+    """
+
+    def __init__(self, name: str, limit: int) -> None:
+        self.name = name
+        self.limit = limit
+        self.semaphore = BoundedSemaphore(limit)
+        self.holders: Dict[Any, int] = {}
+
+    def __enter__(self) -> None:
+        current = getcurrent()
+        depth = self.holders.get(current, 0)
+        if depth == 0:
+            self.semaphore.acquire()
+        self.holders[current] = depth + 1
+
+    def __exit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        current = getcurrent()
+        depth = self.holders[current] - 1
+        if depth == 0:
+            del self.holders[current]
+            self.semaphore.release()
+        else:
+            self.holders[current] = depth
+
+
+# Shared by all the queries made to each service, whichever part of rotki makes them
+GRAPH_QUERIES_LIMIT = ConcurrencyLimit('graph', 4)
+ETHERSCAN_QUERIES_LIMIT = ConcurrencyLimit('etherscan', 4)
+OWN_NODE_QUERIES_LIMIT = ConcurrencyLimit('own_node', 8)
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class LRUCache(Generic[K, V]):
+    """A size bounded least recently used cache that keeps hit/miss statistics
+
+    Only get() affects the statistics and the recency order. Membership checks
+    via `in` do neither, so that callers can check for presence without skewing them.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        assert maxsize > 0, 'LRUCache maxsize should be positive'
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[K, V]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+            self,
+            key: K,
+            default: Optional[V] = None,
+            is_valid: Optional[Callable[[V], bool]] = None,
+    ) -> Optional[V]:
+        """Returns the value of key, or default if there is none
+
+        If is_valid is given and returns False for the value, the value is stale. It is
+        expired and the default is returned, which counts as a miss.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if is_valid is not None and is_valid(value) is False:
+            self.expire(key)
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """Add or replace an entry, evicting the least recently used one if full"""
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def expire(self, key: K) -> None:
+        """Remove a stale entry. The removal counts as an eviction"""
+        if key in self._data:
+            del self._data[key]
+            self.evictions += 1
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self.put(key, value)
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -1,7 +1,11 @@
+import weakref
+from collections import defaultdict
 from functools import wraps
 from typing import TYPE_CHECKING, Any, Callable, Dict, NamedTuple
 
+from rotkehlchen.utils.lru import LRUCache
 from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.singleflight import get_single_flight
 
 from .common import function_sig_key
 
@@ -15,10 +19,26 @@ class ResultCache(NamedTuple):
     timestamp: 'Timestamp'
 
 
-# Seconds for which cached api queries will be cached
-# By default 10 minutes.
-# TODO: Make configurable!
+# Seconds for which cached api queries will be cached by default. Set
+# from the query_cache_ttl DB setting once a user logs in.
 CACHE_RESPONSE_FOR_SECS = 600
+# Max number of different argument combinations whose results are cached per method
+CACHE_RESPONSE_MAXSIZE = 64
+
+cached_queries_flight = get_single_flight('cached_queries')
+# The results cache of every method of every cacheable object, with the name of the
+# class and method it caches. Weak so that caches go away with their objects.
+results_caches: 'weakref.WeakKeyDictionary[LRUCache[int, ResultCache], str]' = weakref.WeakKeyDictionary()  # noqa: E501
+
+
+def results_caches_stats() -> Dict[str, Dict[str, int]]:
+    """Returns the entries and hit/miss/eviction counters of the results caches
+    summed per class and method"""
+    stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for cache, name in list(results_caches.items()):
+        for key, value in cache.stats().items():
+            stats[name][key] += value
+    return stats
 
 
 class CacheableMixIn:
@@ -27,12 +47,25 @@ class CacheableMixIn:
     Any object that adheres to this MixIn's interface can have its functions
     use the @cache_response_timewise decorator
     """
+    # Can also be 0 which means cache is disabled. Setting it on an object
+    # overrides the default of all objects for that object only.
+    cache_ttl_secs = CACHE_RESPONSE_FOR_SECS
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
-        self.results_cache: Dict[int, ResultCache] = {}
-        # Can also be 0 which means cache is disabled.
-        self.cache_ttl_secs = CACHE_RESPONSE_FOR_SECS
+        self.results_cache: Dict[str, LRUCache[int, ResultCache]] = {}
+
+    @staticmethod
+    def set_default_cache_ttl(secs: int) -> None:
+        CacheableMixIn.cache_ttl_secs = secs
+
+    def get_results_cache(self, name: str, maxsize: int) -> LRUCache[int, ResultCache]:
+        """Returns the results cache of the method with the given name"""
+        cache = self.results_cache.get(name)
+        if cache is None:
+            cache = self.results_cache[name] = LRUCache(maxsize=maxsize)
+            results_caches[cache] = f'{self.__class__.__name__}.{name}'
+        return cache
 
     def flush_cache(self, name: str, *args: Any, **kwargs: Any) -> None:
         cache_key = function_sig_key(
@@ -42,12 +75,15 @@ class CacheableMixIn:
             *args,
             **kwargs,
         )
-        self.results_cache.pop(cache_key, None)
+        cache = self.results_cache.get(name)
+        if cache is not None:
+            cache.pop(cache_key)
 
 
 def cache_response_timewise(
         arguments_matter: bool = True,
         forward_ignore_cache: bool = False,
+        maxsize: int = CACHE_RESPONSE_MAXSIZE,
 ) -> Callable:
     """ This is a decorator for caching results of functions of objects.
     The objects must adhere to the CachableOject interface.
@@ -61,7 +97,13 @@ def cache_response_timewise(
     is completely skipped
 
     If arguments_matter is True then a different cache is kept for each different
-    combination of argumnents.
+    combination of argumnents. Up to maxsize of them are kept, evicting the least
+    recently used ones. Results older than the object's cache_ttl_secs are not used
+    and are removed when found.
+
+    Concurrent calls that miss the cache for the same key wait for the first one
+    and return its result instead of calling the function again. Methods also
+    decorated with @protect_with_lock skip this, as the lock already does it.
 
     if forward_ignore_cache is True then if the ignore_cache argument is given it's
     forward to the decorated function instead of being silently consumed.
@@ -81,25 +123,29 @@ def cache_response_timewise(
                 **kwargs,
             )
             now = ts_now()
+            cache = wrappingobj.get_results_cache(f.__name__, maxsize)
             if ignore_cache is False:
                 # Check the cache
-                if cache_key in wrappingobj.results_cache:
-                    cache_life_secs = now - wrappingobj.results_cache[cache_key].timestamp
-
-            cache_miss = (
-                ignore_cache is True or
-                cache_key not in wrappingobj.results_cache or
-                cache_life_secs >= wrappingobj.cache_ttl_secs
-            )
-
-            if cache_miss:
-                # Call the function, write the result in cache and return it
+                entry = cache.get(
+                    cache_key,
+                    is_valid=lambda x: now - x.timestamp < wrappingobj.cache_ttl_secs,
+                )
+                if entry is not None:
+                    return entry.result
+
+            # Call the function, write the result in cache and return it. Concurrent
+            # misses of the same object and arguments share a single call, unless
+            # a lock already makes them wait for each other.
+            def call_and_cache() -> Any:
                 result = f(wrappingobj, *args, **kwargs)
-                wrappingobj.results_cache[cache_key] = ResultCache(result, now)
+                cache.put(cache_key, ResultCache(result, now))
                 return result
 
-            # else hit the cache and return it
-            return wrappingobj.results_cache[cache_key].result
+            if wrapper.protected_with_lock:  # type: ignore
+                return call_and_cache()
+            return cached_queries_flight.run((id(wrappingobj), cache_key), call_and_cache)
 
+        # set by @protect_with_lock when it decorates the method
+        wrapper.protected_with_lock = False  # type: ignore
         return wrapper
     return _cache_response_timewise
@@ -31,6 +31,9 @@ def protect_with_lock(arguments_matter: bool = False) -> Callable:
         - the Blockchain object
     """
     def _cache_response_timewise(f: Callable) -> Callable:
+        # A cached method under the lock doesn't need to collapse concurrent misses
+        f.protected_with_lock = True  # type: ignore
+
         @wraps(f)
         def wrapper(wrappingobj: LockableQueryMixIn, *args: Any, **kwargs: Any) -> Any:
             lock_key = function_sig_key(
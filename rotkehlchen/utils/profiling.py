@@ -0,0 +1,100 @@
+import logging
+import sys
+from collections import defaultdict
+from types import FrameType
+from typing import DefaultDict, List, Optional
+
+from gevent import monkey
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# The sampler runs in a native thread so that it keeps sampling while a greenlet blocks
+_start_new_thread = monkey.get_original('_thread', 'start_new_thread')
+_allocate_lock = monkey.get_original('_thread', 'allocate_lock')
+_get_ident = monkey.get_original('_thread', 'get_ident')
+_sleep = monkey.get_original('time', 'sleep')
+
+DEFAULT_SAMPLE_INTERVAL = 0.01
+MAX_STACK_DEPTH = 128
+
+
+def _frame_format(frame: FrameType) -> str:
+    return f'{frame.f_code.co_name}({frame.f_globals.get("__name__")})'
+
+
+def _collapse_stack(frame: Optional[FrameType]) -> str:
+    callstack: List[str] = []
+    while frame is not None and len(callstack) < MAX_STACK_DEPTH:
+        callstack.append(_frame_format(frame))
+        frame = frame.f_back
+
+    callstack.reverse()
+    return ';'.join(callstack)
+
+
+class StackSampler():
+    """Samples the stack of the thread running the gevent loop at a fixed interval
+
+    Since all greenlets run in that thread, each sample is the stack of the greenlet
+    running at that moment, or the hub's loop if the process is idle. The samples are
+    aggregated in the collapsed stack format that flamegraph.pl and speedscope read.
+
+    No thread runs and nothing is hooked into the interpreter while the sampler is stopped.
+    """
+
+    def __init__(self) -> None:
+        self.stacks: DefaultDict[str, int] = defaultdict(int)
+        self.interval = DEFAULT_SAMPLE_INTERVAL
+        self._running = False
+        self._stopped = _allocate_lock()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        """Starts sampling the thread this is called from. Previous samples are discarded.
+
+        May raise RuntimeError if the sampler is already running"""
+        if self._running:
+            raise RuntimeError('The profiler is already running')
+
+        self.stacks = defaultdict(int)
+        self.interval = interval
+        self._running = True
+        self._stopped.acquire()  # pylint: disable=consider-using-with
+        _start_new_thread(self._run, (_get_ident(),))
+        log.info('Started the stack sampler', interval=interval)
+
+    def stop(self) -> None:
+        """Stops sampling and waits for the sampler thread to exit
+
+        May raise RuntimeError if the sampler is not running"""
+        if not self._running:
+            raise RuntimeError('The profiler is not running')
+
+        self._running = False
+        with self._stopped:
+            pass
+        log.info('Stopped the stack sampler', samples=sum(self.stacks.values()))
+
+    def _run(self, thread_id: int) -> None:
+        try:
+            while self._running:
+                frame = sys._current_frames().get(thread_id)  # pylint: disable=protected-access  # noqa: E501
+                if frame is None:  # the sampled thread exited
+                    self._running = False
+                    break
+                self.stacks[_collapse_stack(frame)] += 1
+                del frame
+                _sleep(self.interval)
+        finally:
+            self._stopped.release()
+
+    def collapsed_stacks(self) -> str:
+        """Returns the samples taken so far, one "frame;frame;frame count" line per stack"""
+        stacks = dict(self.stacks)  # copy since the sampler thread may be adding to it
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
@@ -0,0 +1,105 @@
+import logging
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from gevent import Greenlet, getcurrent
+from gevent.event import AsyncResult
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Seconds a greenlet waits for the call of another one before making it itself
+SINGLE_FLIGHT_WAIT_TIMEOUT = 60
+
+# The greenlet making the call each waiting greenlet waits for, across all groups
+_waiting_for: Dict[Greenlet, Greenlet] = {}
+
+
+class _LeaderAborted(Exception):
+    """The greenlet making the call was killed or timed out before it finished"""
+
+
+def _waits_for(leader: Greenlet, greenlet: Greenlet) -> bool:
+    """Returns whether the leader is, through the calls it waits for, waiting for
+    the given greenlet. Waiting for the leader would then be a deadlock."""
+    current = leader
+    while current is not None:
+        if current is greenlet:
+            return True
+        current = _waiting_for.get(current)
+    return False
+
+
+class SingleFlight():
+    """Collapses concurrent calls with the same key into a single call
+
+    The first caller of a key makes the call. Any other greenlet calling with the
+    same key while that call is in flight waits for it and gets the same result,
+    or the same exception. If the first caller is killed or times out then one of
+    the waiters makes the call instead.
+
+    A greenlet makes the call itself instead of waiting if the one making it is
+    waiting for a call of that greenlet, for example with nested calls of two
+    keys in opposite orders, or if the call is not done within
+    SINGLE_FLIGHT_WAIT_TIMEOUT seconds.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.in_flight: Dict[Hashable, Tuple[Greenlet, AsyncResult]] = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    def run(self, key: Hashable, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        current = getcurrent()
+        entry = self.in_flight.get(key)
+        if entry is not None:
+            leader, result = entry
+            if _waits_for(leader, current):
+                return function(*args, **kwargs)
+
+            self.collapsed += 1
+            _waiting_for[current] = leader
+            try:
+                result.wait(timeout=SINGLE_FLIGHT_WAIT_TIMEOUT)
+            finally:
+                del _waiting_for[current]
+            if not result.ready():
+                log.warning(
+                    f'Waited {SINGLE_FLIGHT_WAIT_TIMEOUT} seconds for the {self.name} '
+                    f'call of {key} in flight. Making the call instead',
+                )
+                return function(*args, **kwargs)
+            try:
+                return result.get()
+            except _LeaderAborted:
+                return self.run(key, function, *args, **kwargs)
+
+        result = AsyncResult()
+        self.in_flight[key] = (current, result)
+        self.calls += 1
+        try:
+            value = function(*args, **kwargs)
+        except Exception as e:
+            result.set_exception(e)
+            raise
+        except BaseException:  # killed or timed out. Let the waiters retry
+            result.set_exception(_LeaderAborted())
+            raise
+        finally:
+            del self.in_flight[key]
+
+        result.set(value)
+        return value
+
+
+# All the single flight groups by name, so that their counters can be reported
+single_flights: Dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    single_flight = single_flights.get(name)
+    if single_flight is None:
+        single_flight = single_flights[name] = SingleFlight(name)
+    return single_flight
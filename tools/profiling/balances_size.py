@@ -0,0 +1,129 @@
+"""Measures how much smaller the balance snapshots get when only their changes are stored
+
+A synthetic history of daily snapshots is written to the v32 timed_balances table of a
+plain sqlite DB, one row per balance per snapshot. It is then compacted by the v32->v33
+upgrade and the size of the DB is compared after a VACUUM. The balances are made of:
+- volatile assets whose price changes every snapshot
+- stablecoins whose price rarely changes
+- worthless tokens with a price of 0, as spam tokens airdropped to the accounts are
+The amount of each balance changes in a snapshot with the given probability.
+
+SQLCipher encrypts the same pages so the ratio is the same for the user DB.
+
+Usage: python -m tools.profiling.balances_size [--snapshots 730] [--volatile 40] [--stable 10] [--worthless 50] [--change-probability 0.05]
+"""  # noqa: E501
+import argparse
+import random
+import sqlite3
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Tuple
+
+from rotkehlchen.db.upgrades.v32_v33 import _compact_timed_balances
+from rotkehlchen.fval import FVal
+
+START_TS = 1500000000
+SNAPSHOT_INTERVAL = 86400  # the default balance save frequency
+TIMED_BALANCES_V32 = """
+CREATE TABLE timed_balances (
+    category CHAR(1) NOT NULL DEFAULT('A'),
+    time INTEGER,
+    currency TEXT,
+    amount TEXT,
+    usd_value TEXT,
+    PRIMARY KEY (time, currency, category)
+);
+CREATE INDEX idx_timed_balances_currency_time ON timed_balances(currency, time);
+"""
+
+
+def make_snapshots(
+        rng: random.Random,
+        snapshots: int,
+        volatile: int,
+        stable: int,
+        worthless: int,
+        change_probability: float,
+) -> List[List[Tuple[str, str, str, str]]]:
+    """Returns the (category, currency, amount, usd_value) rows of each snapshot"""
+    assets: Dict[str, Tuple[FVal, FVal]] = {}  # currency -> (amount, price)
+    for idx in range(volatile):
+        assets[f'_ceth_0x{idx:040x}'] = (FVal(rng.randrange(1, 10 ** 6)) / 1000, FVal(rng.randrange(1, 10 ** 5)) / 100)  # noqa: E501
+    for idx in range(stable):
+        assets[f'_ceth_0x{volatile + idx:040x}'] = (FVal(rng.randrange(1, 10 ** 6)) / 100, FVal(1))  # noqa: E501
+    for idx in range(worthless):
+        assets[f'_ceth_0x{volatile + stable + idx:040x}'] = (FVal(rng.randrange(1, 10 ** 9)), FVal(0))  # noqa: E501
+
+    result = []
+    for _ in range(snapshots):
+        rows = []
+        for number, (currency, (amount, price)) in enumerate(assets.items()):
+            if rng.random() < change_probability:
+                amount = amount * FVal(rng.randrange(50, 150)) / 100
+            if number < volatile:
+                price = price * FVal(rng.randrange(900, 1100)) / 1000
+            assets[currency] = (amount, price)
+            rows.append(('A', currency, str(amount), str(amount * price)))
+        result.append(rows)
+    return result
+
+
+def db_size(path: Path) -> int:
+    conn = sqlite3.connect(path)
+    conn.execute('VACUUM;')
+    conn.close()
+    return path.stat().st_size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the size of the balance snapshots')
+    parser.add_argument('--snapshots', type=int, default=730)
+    parser.add_argument('--volatile', type=int, default=40)
+    parser.add_argument('--stable', type=int, default=10)
+    parser.add_argument('--worthless', type=int, default=50)
+    parser.add_argument('--change-probability', type=float, default=0.05)
+    args = parser.parse_args()
+
+    snapshots = make_snapshots(
+        rng=random.Random(0),
+        snapshots=args.snapshots,
+        volatile=args.volatile,
+        stable=args.stable,
+        worthless=args.worthless,
+        change_probability=args.change_probability,
+    )
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'balances.db'
+        conn = sqlite3.connect(path)
+        conn.executescript(TIMED_BALANCES_V32)
+        conn.executemany(
+            'INSERT INTO timed_balances(category, time, currency, amount, usd_value) '
+            'VALUES(?, ?, ?, ?, ?)',
+            [
+                (category, START_TS + idx * SNAPSHOT_INTERVAL, currency, amount, usd_value)
+                for idx, rows in enumerate(snapshots)
+                for category, currency, amount, usd_value in rows
+            ],
+        )
+        conn.commit()
+        conn.close()
+        size_before = db_size(path)
+
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        _compact_timed_balances(cursor)
+        balance_rows = cursor.execute('SELECT COUNT(*) FROM timed_balances').fetchone()[0]
+        price_rows = cursor.execute('SELECT COUNT(*) FROM timed_balances_prices').fetchone()[0]  # noqa: E501
+        conn.commit()
+        conn.close()
+        size_after = db_size(path)
+
+    rows_before = sum(len(x) for x in snapshots)
+    print(f'rows before: {rows_before} timed balances')
+    print(f'rows after:  {balance_rows} timed balances, {price_rows} prices')
+    print(f'size before: {size_before / 1024:.0f} KiB')
+    print(f'size after:  {size_after / 1024:.0f} KiB ({size_after / size_before:.1%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Benchmarks EVM transaction decoding by replaying a fixture of synthetic receipts
+
+The receipts contain ERC20 transfers and approvals of known tokens involving tracked
+accounts along with logs no decoding rule handles, so no remote queries are needed.
+
+Usage: python -m tools.profiling.decoding [--receipts 10000] [--logs-per-receipt 4]
+"""
+import random
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Tuple
+
+from eth_utils import to_checksum_address
+
+from rotkehlchen.chain.ethereum.decoding.constants import ERC20_APPROVE, ERC20_OR_ERC721_TRANSFER
+from rotkehlchen.chain.ethereum.decoding.decoder import EVMTransactionDecoder
+from rotkehlchen.chain.ethereum.manager import EthereumManager
+from rotkehlchen.chain.ethereum.structures import EthereumTxReceipt, EthereumTxReceiptLog
+from rotkehlchen.chain.ethereum.transactions import EthTransactions
+from rotkehlchen.constants.assets import A_DAI, A_LINK, A_USDC, A_USDT, A_WETH
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.db.ethtx import DBEthTx
+from rotkehlchen.externalapis.etherscan import Etherscan
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.greenlets import GreenletManager
+from rotkehlchen.types import (
+    BlockchainAccountData,
+    ChecksumEthAddress,
+    EthereumTransaction,
+    SupportedBlockchain,
+    make_evm_tx_hash,
+)
+from rotkehlchen.user_messages import MessagesAggregator
+
+KNOWN_TOKENS = (A_DAI, A_LINK, A_USDC, A_USDT, A_WETH)
+
+
+def random_address(rng: random.Random) -> ChecksumEthAddress:
+    return to_checksum_address('0x' + rng.randbytes(20).hex())
+
+
+def address_topic(address: ChecksumEthAddress) -> bytes:
+    return b'\x00' * 12 + bytes.fromhex(address[2:])
+
+
+def make_fixture(
+        rng: random.Random,
+        tracked: List[ChecksumEthAddress],
+        receipts: int,
+        logs_per_receipt: int,
+) -> List[Tuple[EthereumTransaction, EthereumTxReceipt]]:
+    fixture = []
+    for idx in range(receipts):
+        tx_hash = make_evm_tx_hash(rng.randbytes(32))
+        from_address = rng.choice(tracked)
+        transaction = EthereumTransaction(
+            tx_hash=tx_hash,
+            timestamp=1600000000 + idx,
+            block_number=11000000 + idx,
+            from_address=from_address,
+            to_address=random_address(rng),
+            value=0,
+            gas=100000,
+            gas_price=10 ** 9,
+            gas_used=50000,
+            input_data=b'',
+            nonce=idx,
+        )
+        logs = []
+        for log_index in range(logs_per_receipt):
+            kind = rng.random()
+            if kind < 0.5:
+                topics = [
+                    ERC20_OR_ERC721_TRANSFER,
+                    address_topic(from_address),
+                    address_topic(random_address(rng)),
+                ]
+                address = rng.choice(KNOWN_TOKENS).ethereum_address
+            elif kind < 0.6:
+                topics = [
+                    ERC20_APPROVE,
+                    address_topic(from_address),
+                    address_topic(random_address(rng)),
+                ]
+                address = rng.choice(KNOWN_TOKENS).ethereum_address
+            else:  # a log for which no decoding rule exists
+                topics = [rng.randbytes(32), address_topic(random_address(rng))]
+                address = random_address(rng)
+            logs.append(EthereumTxReceiptLog(
+                log_index=log_index,
+                data=rng.randint(1, 10 ** 21).to_bytes(32, byteorder='big'),
+                address=address,
+                removed=False,
+                topics=topics,
+            ))
+        receipt = EthereumTxReceipt(tx_hash=tx_hash, contract_address=None, status=True, type=0, logs=logs)  # noqa: E501
+        fixture.append((transaction, receipt))
+
+    return fixture
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--receipts", default=10000, type=int)
+    parser.add_argument("--logs-per-receipt", default=4, type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    arguments = parser.parse_args()
+
+    rng = random.Random(arguments.seed)
+    tracked = [random_address(rng) for _ in range(5)]
+    with TemporaryDirectory() as tmpdir:
+        data_dir = Path(tmpdir)
+        user_data_dir = data_dir / 'benchmark'
+        user_data_dir.mkdir()
+        msg_aggregator = MessagesAggregator()
+        GlobalDBHandler(data_dir)
+        database = DBHandler(user_data_dir, '123', msg_aggregator, None)
+        database.add_blockchain_accounts(
+            SupportedBlockchain.ETHEREUM,
+            [BlockchainAccountData(address=x) for x in tracked],
+        )
+        ethereum = EthereumManager(
+            ethrpc_endpoint='',
+            etherscan=Etherscan(database=database, msg_aggregator=msg_aggregator),
+            msg_aggregator=msg_aggregator,
+            greenlet_manager=GreenletManager(msg_aggregator=msg_aggregator),
+            connect_at_start=[],
+        )
+        decoder = EVMTransactionDecoder(
+            database=database,
+            ethereum_manager=ethereum,
+            eth_transactions=EthTransactions(ethereum=ethereum, database=database),
+            msg_aggregator=msg_aggregator,
+        )
+
+        fixture = make_fixture(rng, tracked, arguments.receipts, arguments.logs_per_receipt)
+        DBEthTx(database).add_ethereum_transactions([x[0] for x in fixture], relevant_address=None)  # noqa: E501
+        decoder.reload_from_db()
+
+        events = 0
+        start = time.perf_counter()
+        for transaction, receipt in fixture:
+            events += len(decoder.decode_transaction(transaction, receipt))
+        elapsed = time.perf_counter() - start
+        database.logout()
+
+    logs = arguments.receipts * arguments.logs_per_receipt
+    print(
+        f'Decoded {arguments.receipts} receipts with {logs} logs into {events} events '
+        f'in {elapsed:.2f} s: {logs / elapsed:.0f} logs/sec, '
+        f'{arguments.receipts / elapsed:.0f} receipts/sec',
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmarks the import time of a module using python's -X importtime
+
+Usage: python -m tools.profiling.importtime [--module rotkehlchen.__main__] [--runs 5]
+"""
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+IMPORTTIME_PREFIX = 'import time:'
+
+
+class ImportEntry(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(output: str) -> List[ImportEntry]:
+    """Parses the stderr of `python -X importtime`. Each line looks like:
+
+    import time: self [us] | cumulative | imported package
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+
+        fields = line[len(IMPORTTIME_PREFIX):].split('|')
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:  # the header line
+            continue
+        entries.append(ImportEntry(
+            module=fields[2].strip(),
+            self_us=self_us,
+            cumulative_us=cumulative_us,
+        ))
+
+    return entries
+
+
+def measure_import(module: str) -> List[ImportEntry]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed: {result.stderr[-2000:]}')
+
+    return parse_importtime(result.stderr)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="rotkehlchen.__main__", type=str)
+    parser.add_argument("--runs", default=5, type=int)
+    parser.add_argument("--topn", default=20, type=int)
+    arguments = parser.parse_args()
+
+    totals = []
+    cumulative: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(arguments.runs):
+        entries = measure_import(arguments.module)
+        # the requested module is the last one to finish importing
+        totals.append(entries[-1].cumulative_us)
+        for entry in entries:
+            cumulative[entry.module].append(entry.cumulative_us)
+
+    print(
+        f'import {arguments.module}: median {statistics.median(totals) / 1000:.1f} ms, '
+        f'min {min(totals) / 1000:.1f} ms, max {max(totals) / 1000:.1f} ms '
+        f'over {arguments.runs} runs',
+    )
+    print(f'Top {arguments.topn} modules by median cumulative import time:')
+    medians = sorted(
+        ((statistics.median(values), name) for name, values in cumulative.items()),
+        reverse=True,
+    )
+    for median, name in medians[:arguments.topn]:
+        print(f'{median / 1000:10.1f} ms  {name}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Measures how much DEBUG logging costs during the cost basis calculation of a PnL report
+
+The same synthetic acquisitions and spends go through CostBasisCalculator with:
+- info: DEBUG entries are skipped
+- debug: DEBUG entries go through the queue and are written by the logging thread
+- debug-sync: DEBUG entries are formatted and written by the logging greenlet itself
+
+Usage: python -m tools.profiling.log_cost [--acquisitions 20000] [--spends 10000] [--runs 5]
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Tuple
+
+from rotkehlchen.accounting.cost_basis.base import AssetAcquisitionEvent, CostBasisCalculator
+from rotkehlchen.constants.assets import A_ETH
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.fval import FVal
+from rotkehlchen.globaldb.handler import GlobalDBHandler
+from rotkehlchen.logging import configure_logging
+from rotkehlchen.types import Price, Timestamp
+from rotkehlchen.user_messages import MessagesAggregator
+
+START_TS = 1500000000
+
+
+def make_workload(
+        rng: random.Random,
+        acquisitions: int,
+        spends: int,
+) -> Tuple[List[Tuple[FVal, Price]], List[FVal]]:
+    bought = [(FVal(rng.randrange(1, 10 ** 4)) / 1000, Price(FVal(rng.randrange(100, 5000)))) for _ in range(acquisitions)]  # noqa: E501
+    total = sum((x[0] for x in bought), FVal(0))
+    # spend about 90% of what was bought so that all spends find acquisitions
+    spent = [total * FVal('0.9') / spends for _ in range(spends)]
+    return bought, spent
+
+
+def run(calculator: CostBasisCalculator, workload: Tuple[List[Tuple[FVal, Price]], List[FVal]]) -> float:  # noqa: E501
+    bought, spent = workload
+    calculator.reset(calculator.settings)
+    calculator.get_events(A_ETH).acquisitions.extend(
+        AssetAcquisitionEvent(amount=amount, timestamp=Timestamp(START_TS + idx), rate=rate, index=idx)  # noqa: E501
+        for idx, (amount, rate) in enumerate(bought)
+    )
+    spend_ts = Timestamp(START_TS + len(bought))
+    start = time.perf_counter()
+    for amount in spent:
+        calculator.calculate_spend_cost_basis(
+            spending_amount=amount,
+            spending_asset=A_ETH,
+            timestamp=spend_ts,
+        )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--acquisitions", default=20000, type=int)
+    parser.add_argument("--spends", default=10000, type=int)
+    parser.add_argument("--runs", default=5, type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    arguments = parser.parse_args()
+
+    workload = make_workload(random.Random(arguments.seed), arguments.acquisitions, arguments.spends)  # noqa: E501
+    with TemporaryDirectory() as tmpdir:
+        data_dir = Path(tmpdir)
+        user_data_dir = data_dir / 'benchmark'
+        user_data_dir.mkdir()
+        msg_aggregator = MessagesAggregator()
+        GlobalDBHandler(data_dir)
+        database = DBHandler(user_data_dir, '123', msg_aggregator, None)
+        calculator = CostBasisCalculator(database=database, msg_aggregator=msg_aggregator)
+        logfile = data_dir / 'rotkehlchen.log'
+
+        for mode in ('info', 'debug', 'debug-sync'):
+            configure_logging(argparse.Namespace(
+                loglevel='info' if mode == 'info' else 'debug',
+                logformat='text',
+                logtarget='file',
+                logfile=str(logfile),
+                logfromothermodules=False,
+                max_size_in_mb_all_logs=10000,
+                max_logfiles_num=1,
+            ))
+            if mode == 'debug-sync':  # write from the logging greenlet, without the queue
+                handler = logging.FileHandler(logfile)
+                handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s %(name)s %(message)s'))  # noqa: E501
+                logging.getLogger().handlers = [handler]
+
+            timings = [run(calculator, workload) for _ in range(arguments.runs)]
+            median = statistics.median(timings)
+            print(
+                f'{mode:>10}: median {median * 1000:8.2f} ms, min {min(timings) * 1000:8.2f} ms '  # noqa: E501
+                f'over {arguments.runs} runs, {arguments.spends / median:8.0f} spends/sec',
+            )
+
+        database.logout()
+
+
+if __name__ == "__main__":
+    main()
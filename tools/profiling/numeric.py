@@ -0,0 +1,154 @@
+"""Micro-benchmarks of the numeric hot loops built on FVal
+
+Each benchmark replays a synthetic workload shaped like the corresponding code path:
+- accounting: the FIFO matching of spends to acquisitions of the cost basis calculation
+- balances: the aggregation of per-location balances into per-asset totals
+- deserialization: the conversion of amounts and rates returned as strings by remote APIs
+
+Usage: python -m tools.profiling.numeric [--size 10000] [--runs 5] [--only accounting]
+"""
+import random
+import statistics
+import timeit
+from collections import defaultdict
+from typing import Callable, DefaultDict, Dict, List, NamedTuple, Tuple
+
+from rotkehlchen.accounting.structures.balance import Balance
+from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.fval import FVal
+from rotkehlchen.serialization.deserialize import (
+    deserialize_asset_amount,
+    deserialize_fee,
+    deserialize_fval,
+)
+
+ASSETS = ('ETH', 'BTC', 'DAI', 'USDC', 'LINK', 'UNI', 'AAVE', 'MKR')
+LOCATIONS = ('blockchain', 'kraken', 'binance', 'coinbase', 'banks')
+
+
+class Acquisition(NamedTuple):
+    amount: FVal
+    rate: FVal
+
+
+def random_decimal_string(rng: random.Random, integer_digits: int = 4) -> str:
+    return f'{rng.randrange(10 ** integer_digits)}.{rng.randrange(10 ** 8):08d}'
+
+
+def make_accounting_workload(
+        rng: random.Random,
+        size: int,
+) -> Tuple[List[Acquisition], List[FVal]]:
+    acquisitions = [
+        Acquisition(amount=FVal(random_decimal_string(rng, 2)), rate=FVal(random_decimal_string(rng)))  # noqa: E501
+        for _ in range(size)
+    ]
+    spends = [FVal(random_decimal_string(rng, 2)) for _ in range(size // 2)]
+    return acquisitions, spends
+
+
+def run_accounting(workload: Tuple[List[Acquisition], List[FVal]]) -> None:
+    """Does the same operations as CostBasisCalculator.calculate_spend_cost_basis"""
+    acquisitions, spends = workload
+    remaining = [x.amount for x in acquisitions]
+    index = 0
+    taxable_amount = taxable_bought_cost = ZERO
+    for spend in spends:
+        remaining_sold_amount = spend
+        while index < len(acquisitions):
+            if remaining_sold_amount < remaining[index]:
+                taxable_amount += remaining_sold_amount
+                taxable_bought_cost += acquisitions[index].rate * remaining_sold_amount
+                remaining[index] = remaining[index] - remaining_sold_amount
+                break
+
+            remaining_sold_amount -= remaining[index]
+            taxable_amount += remaining[index]
+            taxable_bought_cost += acquisitions[index].rate * remaining[index]
+            remaining[index] = ZERO
+            index += 1
+
+        if taxable_amount != ZERO:
+            _ = taxable_bought_cost / taxable_amount
+
+
+def make_balances_workload(rng: random.Random, size: int) -> List[Dict[str, Dict[str, Balance]]]:
+    return [
+        {
+            location: {
+                asset: Balance(
+                    amount=FVal(random_decimal_string(rng)),
+                    usd_value=FVal(random_decimal_string(rng, 6)),
+                ) for asset in rng.sample(ASSETS, 4)
+            } for location in LOCATIONS
+        } for _ in range(size // (4 * len(LOCATIONS)))
+    ]
+
+
+def run_balances(workload: List[Dict[str, Dict[str, Balance]]]) -> None:
+    """Does the same operations as the aggregation of balances into the balance snapshot"""
+    for per_location in workload:
+        totals: DefaultDict[str, Balance] = defaultdict(Balance)
+        for balances in per_location.values():
+            for asset, balance in balances.items():
+                totals[asset] += balance
+
+        net_usd = sum((x.usd_value for x in totals.values()), ZERO)
+        for balance in totals.values():
+            if net_usd != ZERO:
+                _ = (balance.usd_value / net_usd * 100).to_percentage()
+
+
+def make_deserialization_workload(rng: random.Random, size: int) -> List[Dict[str, str]]:
+    return [
+        {
+            'amount': random_decimal_string(rng),
+            'price': random_decimal_string(rng, 5),
+            'fee': random_decimal_string(rng, 1),
+        } for _ in range(size)
+    ]
+
+
+def run_deserialization(workload: List[Dict[str, str]]) -> None:
+    """Does the same operations as the deserialization of exchange trades"""
+    for entry in workload:
+        amount = deserialize_asset_amount(entry['amount'])
+        rate = deserialize_fval(entry['price'], name='price', location='benchmark')
+        fee = deserialize_fee(entry['fee'])
+        _ = amount * rate
+        _ = fee > ZERO
+
+
+BENCHMARKS: Dict[str, Tuple[Callable, Callable]] = {
+    'accounting': (make_accounting_workload, run_accounting),
+    'balances': (make_balances_workload, run_balances),
+    'deserialization': (make_deserialization_workload, run_deserialization),
+}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default=10000, type=int)
+    parser.add_argument("--runs", default=5, type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument("--only", choices=list(BENCHMARKS), default=None)
+    arguments = parser.parse_args()
+
+    for name, (make_workload, run) in BENCHMARKS.items():
+        if arguments.only is not None and name != arguments.only:
+            continue
+
+        workload = make_workload(random.Random(arguments.seed), arguments.size)
+        # each run mutates nothing in the workload so it can be replayed as is
+        timings = timeit.repeat(lambda: run(workload), number=1, repeat=arguments.runs)  # noqa: B023,E501  # pylint: disable=cell-var-from-loop
+        median = statistics.median(timings)
+        print(
+            f'{name:>16}: median {median * 1000:8.2f} ms, min {min(timings) * 1000:8.2f} ms '
+            f'over {arguments.runs} runs, {arguments.size / median:10.0f} items/sec',
+        )
+
+
+if __name__ == "__main__":
+    main()